@@ -1,10 +1,22 @@
 from fastapi import APIRouter, Depends, Request, HTTPException
 from fastapi.responses import HTMLResponse, JSONResponse, RedirectResponse
 from fastapi.templating import Jinja2Templates
+from starlette.concurrency import run_in_threadpool
 from sqlalchemy.orm import Session
 from app.db.database import get_db, engine, Base
 from app.models.lead import Lead
 from app.seeds import seed_data
+from app.utils.metrics import metrics
+from app.core.sender_lanes import sender_lanes
+from app.core.local_classifier import fast_path_report
+from app.core.speculation import speculation_report
+from app.services.openai_service import openai_service
+from app.services.prompts import prompt_registry
+from app.services.model_router import model_router
+from app.services.resilience import llm_resilience
+from app.utils.http_transport import http_transport
+from app.utils.job_queue import job_queue
+from app.services.extraction_pool import extraction_pool
 
 router = APIRouter(prefix="/admin", tags=["admin"])
 templates = Jinja2Templates(directory="app/templates")
@@ -127,3 +139,24 @@ async def lead_detail(request: Request, lead_id: int, db: Session = Depends(get_
         "admin/detail.html",
         {"request": request, "lead": lead}
     )
+
+@router.get("/metrics")
+async def runtime_metrics():
+    """Latency and counter metrics (webhook ack vs. turn latency etc.)."""
+    snapshot = metrics.snapshot()
+    snapshot["lanes"] = sender_lanes.snapshot()
+    snapshot["fast_path"] = fast_path_report()
+    snapshot["speculation"] = speculation_report()
+    snapshot["prompts"] = prompt_registry.report()
+    snapshot["http"] = http_transport.snapshot()
+    snapshot["llm"] = llm_resilience.report()
+    snapshot["models"] = model_router.report()
+    snapshot["extraction"] = extraction_pool.report()
+    if openai_service.classify_cache is not None:
+        snapshot["classify_cache"] = openai_service.classify_cache.stats()
+    return snapshot
+
+@router.get("/queue")
+async def queue_status():
+    """Background job queue: depth, oldest waiting job and throughput per job kind."""
+    return await run_in_threadpool(job_queue.report)
@@ -1,21 +1,26 @@
 """Twilio webhook endpoints."""
-from fastapi import APIRouter, Form, Response, Depends, BackgroundTasks
+import time
+from fastapi import APIRouter, Form, Response, Depends
+from starlette.concurrency import run_in_threadpool
 from sqlalchemy.orm import Session
 from twilio.twiml.messaging_response import MessagingResponse
 from typing import Optional
 
+from app.config import settings
 from app.db.database import get_db
 from app.utils.logger import app_logger
-from app.services.twilio_service import twilio_service
+from app.utils.metrics import metrics
 from app.db import crud
-from app.core.flow_engine import flow_engine
-from app.core.worker import run_scoring_pipeline
+from app.core.idempotency import message_dedupe
+from app.core.sender_lanes import sender_lanes
+from app.core.coalescer import message_coalescer
+from app.core.turn_processor import InboundMessage, run_turn, run_turn_async, replay_duplicate, turn_processor
+from app.core.worker import enqueue_scoring
 
 router = APIRouter()
 
 @router.post("/webhook")
 async def whatsapp_webhook(
-    background_tasks: BackgroundTasks,
     From: str = Form(...),
     Body: str = Form(""),
     MessageSid: str = Form(...),
@@ -25,58 +30,54 @@ async def whatsapp_webhook(
 ):
     """
     Handle incoming WhatsApp messages via FlowEngine.
+
+    Inline mode runs the whole turn before answering Twilio. Fast-ack mode
+    (settings.webhook_fast_ack) only stores the inbound message, answers
+    immediately and lets the turn processor send the reply via the REST API.
+    With settings.coalesce_window_ms > 0 messages of one sender arriving
+    within the window are answered by a single turn. settings.async_turns
+    runs the turn on the event loop (AsyncOpenAI) instead of the threadpool.
     """
+    started = time.perf_counter()
     user_id = From
     twiml_response = MessagingResponse()
-    
-    try:
-        app_logger.info(f"msg from {user_id}: {Body} (Media: {NumMedia})")
-        
-        # 1. Get/Create Lead
-        lead = crud.get_or_create_lead(db, user_id)
-        current_state = lead.conversation_stage or 0
-        
-        # 2. Log
-        user_msg_content = Body
-        if NumMedia > 0: user_msg_content = f"[MEDIA] {MediaUrl0}"
-        crud.add_conversation_message(db, lead, "user", user_msg_content)
-
-        # 3. Determine Response
-        response_text = ""
-        engine_msg = Body
-
-        if NumMedia > 0 and MediaUrl0:
-            # Handle File Upload
-            if current_state == 8: # CV
-                 crud.update_lead(db, lead, cv_file_path=f"url:{MediaUrl0}")
-                 engine_msg = "UPLOAD_DONE"
-            elif current_state == 9: # Cover
-                 crud.update_lead(db, lead, cover_letter_file_path=f"url:{MediaUrl0}")
-                 engine_msg = "UPLOAD_DONE"
-            else:
-                 # Unexpected file
-                 response_text = "Danke für die Datei! Ich kann sie gerade nicht zuordnen, aber sie ist gespeichert."
-        
-        if not response_text:
-            response_text = flow_engine.process_message(user_id, engine_msg, db)
+    app_logger.info(f"msg from {user_id}: {Body} (Media: {NumMedia})")
 
-        # 4. Trigger Scoring (If Completed)
-        db.refresh(lead)
-        if lead.conversation_stage == 99 and lead.qualification_score == 0:
-             app_logger.info(f"Triggering Background Scoring for {user_id}")
-             background_tasks.add_task(run_scoring_pipeline, lead.id)
-
-        # 5. Send Response
-        if response_text:
-            twilio_service.send_message(user_id, response_text)
-            crud.add_conversation_message(db, lead, "bot", response_text)
-            
-    except Exception as e:
-        app_logger.error(f"WEBHOOK ERROR: {str(e)}", exc_info=True)
+    # Twilio redelivery: never run the same turn twice
+    duplicate = await message_dedupe.begin_async(MessageSid)
+    message = InboundMessage(MessageSid, Body, NumMedia, MediaUrl0)
+    if duplicate:
+        await run_in_threadpool(replay_duplicate, user_id, duplicate)
+    elif settings.webhook_fast_ack:
+        try:
+            with crud.unit_of_work(db):
+                lead = crud.get_or_create_lead(db, user_id)
+                crud.add_conversation_message(db, lead, "user", message.log_text)
+        except Exception as e:
+            # Nothing was stored: let Twilio redeliver instead of dropping the message
+            app_logger.error(f"WEBHOOK ERROR: {str(e)}", exc_info=True)
+            message_dedupe.forget(MessageSid)
+            metrics.incr("webhook.fast_ack_failures")
+            return Response(content=str(twiml_response), media_type="application/xml", status_code=503)
         try:
-             twilio_service.send_message(user_id, f"⚠️ Fehler: {str(e)}")
-        except: pass
-            
+            turn_processor.submit(user_id, message)
+        except Exception as e:
+            # The message is stored: a redelivery would log it twice, so the turn is lost
+            app_logger.error(f"Turn for {MessageSid} from {user_id} not queued, no reply sent: {e}", exc_info=True)
+            await message_dedupe.complete_async(MessageSid, None, delivered=False)
+            metrics.incr("webhook.turns_lost")
+    else:
+        # Rapid follow-ups are merged into the last request's turn
+        batch = await message_coalescer.collect(user_id, message)
+        if batch:
+            # One turn at a time per sender, other senders keep running in parallel
+            async with sender_lanes.lane(user_id):
+                if settings.async_turns:
+                    await run_turn_async(db, user_id, batch, schedule_scoring=enqueue_scoring)
+                else:
+                    await run_in_threadpool(run_turn, db, user_id, batch, schedule_scoring=enqueue_scoring)
+
+    metrics.observe("webhook.ack_ms", (time.perf_counter() - started) * 1000)
     return Response(content=str(twiml_response), media_type="application/xml")
 
 @router.get("/webhook")
@@ -8,7 +8,20 @@ class Settings(BaseSettings):
     
     # OpenAI Configuration
     openai_api_key: str
-    openai_model: str = "gpt-4-turbo-preview"
+    openai_model: str = "gpt-4-turbo-preview"  # Strong tier: grading, CV analysis, unrouted call sites
+    openai_model_fast: str = "gpt-4o-mini"  # Fast tier: interactive call sites (see openai_model_routes)
+    openai_model_routes: str = "classify=fast,classify_batch=fast,flow_reply=fast,intent=fast,response=fast"  # call_site=tier; others use strong
+    # call_site=tier used while the site's own tier is over budget (unless observed slower there); others stay
+    openai_model_fallbacks: str = "classify=strong,classify_batch=strong,flow_reply=strong,intent=strong,response=strong"
+    openai_fast_budget_ms: float = 2500.0  # Fast tier p95 above this -> call sites in openai_model_fallbacks move (0 = off)
+    openai_strong_budget_ms: float = 0.0  # Strong tier p95 budget (0 = off; background work is not latency-bound)
+    openai_budget_min_samples: int = 20  # Calls per tier before its p95 is judged
+    openai_tier_fallback_seconds: float = 60.0  # How long call sites stay on their fallback tier
+    # USD per 1K prompt/completion tokens for the cost report (model=prompt/completion; unlisted models are not priced)
+    openai_model_prices: str = (
+        "gpt-4o-mini=0.00015/0.0006,gpt-4o=0.0025/0.01,gpt-4-turbo=0.01/0.03,gpt-4-turbo-preview=0.01/0.03,"
+        "gpt-4=0.03/0.06,gpt-3.5-turbo=0.0005/0.0015"
+    )
     
     # Twilio Configuration
     twilio_account_sid: str
@@ -22,6 +35,80 @@ class Settings(BaseSettings):
     environment: str = "development"
     log_level: str = "INFO"
     
+    # Webhook Processing
+    webhook_fast_ack: bool = False  # Ack Twilio immediately, run the turn in the background
+    dedupe_ttl_seconds: int = 3600  # How long a MessageSid is remembered
+    dedupe_max_entries: int = 10000
+    dedupe_persistent: bool = False  # Also keep processed MessageSids in the database
+    lane_idle_seconds: int = 300  # Evict a sender's ordering lane after this much idle time
+    coalesce_window_ms: int = 0  # Merge a sender's messages arriving within this window (0 = off)
+    coalesce_max_wait_ms: int = 3000  # Flush a burst after this long at the latest
+    
+    # Outbound HTTP (OpenAI, Twilio, media downloads)
+    http_max_connections_per_host: int = 20  # Keep-alive pool size per upstream
+    http_max_in_flight: int = 64  # Requests in flight across all upstreams per worker process
+
+    # Background Jobs (CV scoring)
+    job_queue_path: str = "data/jobs.db"  # SQLite job table, survives restarts and deploys
+    job_workers: int = 2  # Worker threads per process
+    job_visibility_timeout_seconds: float = 300.0  # A leased job is run again if not finished by then
+    job_max_attempts: int = 5
+    job_retry_base_seconds: float = 10.0  # Backoff: base * 2^(attempt-1), jittered, capped at 10 minutes
+    job_poll_seconds: float = 1.0  # Idle workers look for due retries / other processes' jobs this often
+
+    # Document Extraction (PyPDF2 / python-docx in worker processes)
+    extraction_workers: int = 2  # Worker processes (0 = extract in the web process, no limits)
+    extraction_timeout_seconds: float = 20.0  # Per document; the worker is killed after this
+    extraction_memory_mb: int = 512  # Address-space cap per worker process
+    extraction_max_jobs_per_worker: int = 50  # Replace a worker after this many documents
+    media_max_mb: int = 25  # Downloads larger than this are refused (Content-Length or streamed size)
+    media_spool_mb: int = 2  # Downloads are kept in memory up to this size, then spooled to a temp file
+
+    # Async Turn Path
+    async_turns: bool = False  # Run turns on the event loop with AsyncOpenAI instead of the threadpool
+    openai_max_concurrency: int = 16  # In-flight AsyncOpenAI requests per worker process
+
+    # OpenAI Call Resilience
+    llm_deadline_classify: float = 6.0  # Seconds per classify_flow_input call, retries included
+    llm_deadline_reply: float = 8.0  # Seconds per generated flow reply
+    llm_deadline_default: float = 30.0  # Other calls (intent, grading, CV analysis, reply variants)
+    llm_max_retries: int = 2  # Retries on timeouts, connection errors, 429 and 5xx
+    llm_retry_base_ms: float = 250.0  # Full-jitter backoff: uniform(0, base * 2^attempt)
+    llm_hedge_sites: str = ""  # Comma-separated call sites that send a duplicate after their p95 (e.g. "classify")
+    llm_hedge_min_samples: int = 20  # Latency samples needed before a site hedges
+    llm_hedge_max_in_flight: int = 4  # Sync hedged calls at a time (losing attempts run until they finish)
+    llm_breaker_failures: int = 5  # Consecutive failed calls that mark OpenAI as degraded
+    llm_breaker_reset_seconds: float = 30.0  # Time before a probe call is let through again
+
+    # Flow Definition & Classification
+    flow_definition_path: str = "data/flow.json"
+    local_classifier_enabled: bool = True  # Rule/lexicon fast path before classify_flow_input
+    local_classifier_min_confidence: float = 0.8
+    classify_streaming: bool = True  # Stream classify_flow_input and stop once category/value are known
+    classify_batch_enabled: bool = False  # Micro-batch concurrent classify_flow_input calls into one request
+    classify_batch_max_size: int = 16
+    classify_batch_max_wait_ms: float = 10.0  # How long the first call waits for others to join
+    classify_cache_enabled: bool = True  # Cache classify_flow_input results per normalized message
+    classify_cache_max_entries: int = 5000
+    classify_cache_ttl_seconds: int = 86400
+    classify_cache_sqlite_path: str = ""  # e.g. data/classify_cache.db to survive restarts (empty = memory only)
+    prompt_facts_enabled: bool = True  # Only the muuh_info.json facts relevant to the message go into the classify prompt
+    prompt_facts_top_k: int = 4
+    faq_engine_enabled: bool = True  # Answer FAQ questions from data/intents.json locally
+    faq_min_score: float = 3.0  # Keyword hits + BM25 score needed to skip the LLM
+    faq_answer_intents: str = "remote_work,salary,benefits,tech_stack,application_process"
+    question_cache_enabled: bool = False  # Reuse answers of near-duplicate candidate questions (off until the threshold is tuned on labelled paraphrases)
+    question_cache_threshold: float = 0.6  # Jaccard similarity of character 3-grams
+    question_cache_max_entries: int = 100000
+    speculative_replies: bool = False  # Generate the likely next-step reply while classifying
+    speculation_max_workers: int = 4
+    reply_pool_enabled: bool = False  # Answer short inputs from pre-generated transition replies
+    reply_pool_path: str = "data/reply_pool.json"
+    reply_pool_size: int = 8  # Variants per trigger event
+    reply_pool_max_words: int = 3  # Longer messages get a live reply that reacts to them
+    reply_pool_refresh_seconds: int = 86400
+    reply_pool_retry_seconds: int = 300  # Minimum gap between background refreshes of one event
+    
     # Email Configuration
     hr_email: str = "recruiting@muuuh.de"
     smtp_host: Optional[str] = None
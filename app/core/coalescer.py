@@ -0,0 +1,75 @@
+"""Debounce window that merges rapid-fire messages of one sender into a single turn."""
+import asyncio
+import time
+from typing import Any, Dict, List, Optional
+
+from app.config import settings
+from app.utils.metrics import metrics
+
+
+class _Buffer:
+    __slots__ = ("items", "generation", "started")
+
+    def __init__(self):
+        self.items: List[Any] = []
+        self.generation = 0
+        self.started = time.monotonic()
+
+
+class MessageCoalescer:
+    """
+    Per-sender debounce buffer.
+
+    Every caller adds its message and waits for the window. Only the caller
+    whose message arrived last (no newer message within the window) gets the
+    batch back and runs the turn; the others return None. A burst is flushed
+    after max_wait_ms at the latest so a chatty sender is never starved.
+    """
+
+    def __init__(self, window_ms: int = 0, max_wait_ms: int = 3000):
+        self.window_ms = window_ms
+        self.max_wait_ms = max(max_wait_ms, window_ms)
+        self._buffers: Dict[str, _Buffer] = {}
+
+    async def collect(self, sender: str, item: Any) -> Optional[List[Any]]:
+        """
+        Add a message to the sender's buffer and wait for the window to close.
+
+        Args:
+            sender: Twilio 'From' number
+            item: The inbound message
+
+        Returns:
+            All buffered messages in arrival order if this caller should run
+            the turn, otherwise None (the message was merged into another turn)
+        """
+        if self.window_ms <= 0:
+            return [item]
+
+        buffer = self._buffers.get(sender)
+        if buffer is None:
+            buffer = self._buffers[sender] = _Buffer()
+        buffer.items.append(item)
+        buffer.generation += 1
+        generation = buffer.generation
+
+        await asyncio.sleep(self.window_ms / 1000)
+
+        if self._buffers.get(sender) is not buffer:
+            return None  # Already flushed by an earlier caller hitting max_wait_ms
+        overdue = (time.monotonic() - buffer.started) * 1000 >= self.max_wait_ms
+        if buffer.generation != generation and not overdue:
+            return None  # A newer message extends the window and will flush
+
+        del self._buffers[sender]
+        metrics.observe("coalesce.batch_size", len(buffer.items))
+        if len(buffer.items) > 1:
+            metrics.incr("coalesce.merged_messages", len(buffer.items) - 1)
+        return buffer.items
+
+
+# Global instance
+message_coalescer = MessageCoalescer(
+    window_ms=settings.coalesce_window_ms,
+    max_wait_ms=settings.coalesce_max_wait_ms
+)
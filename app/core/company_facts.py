@@ -0,0 +1,73 @@
+"""Company facts from data/muuh_info.json, retrieved per message for the classify prompt."""
+from typing import Any, List, Tuple
+
+from app.core.local_classifier import NO_PHRASES, YES_PHRASES
+from app.utils.near_duplicate import stem
+from app.utils.text_index import BM25Index, tokenize
+
+# "ja", "klar", "nein" say nothing about what the user wants to know
+ANSWER_WORDS = {stem(word) for phrase in YES_PHRASES | NO_PHRASES for word in phrase.split()}
+RELATIVE_CUTOFF = 0.5  # Drop facts scoring below half of the best one
+
+
+def chunk_facts(data: Any, path: Tuple[str, ...] = ()) -> List[str]:
+    """
+    Flatten company info into one-line facts.
+
+    Scalars and lists of scalars become one fact each
+    ("benefits: Fitnessstudio; JobBike"); list items that are objects are
+    labelled with their title ("positions / UX Designer / type: Vollzeit").
+
+    Args:
+        data: Parsed muuh_info.json (or a part of it)
+        path: Labels of the enclosing keys
+
+    Returns:
+        Facts in document order
+    """
+    label = " / ".join(path).replace("_", " ")
+    if isinstance(data, dict):
+        facts = []
+        for key, value in data.items():
+            if key == "title" and path:
+                continue  # Already part of the label
+            facts.extend(chunk_facts(value, path + (str(key),)))
+        return facts
+    if isinstance(data, list):
+        if all(not isinstance(item, (dict, list)) for item in data):
+            return [f"{label}: {'; '.join(str(item) for item in data)}"] if data else []
+        facts = []
+        for i, item in enumerate(data):
+            title = item.get("title", str(i + 1)) if isinstance(item, dict) else str(i + 1)
+            facts.extend(chunk_facts(item, path + (str(title),)))
+        return facts
+    return [f"{label}: {data}"]
+
+
+class FactIndex:
+    """BM25 index over the facts of the company info, built once per file version."""
+
+    def __init__(self, data: Any, min_score: float = 1.0):
+        self.facts = chunk_facts(data)
+        self.min_score = min_score
+        self.bm25 = BM25Index({i: tokenize(fact) for i, fact in enumerate(self.facts)})
+
+    def search(self, message: str, k: int = 4) -> List[str]:
+        """
+        Facts relevant to a message.
+
+        Args:
+            message: User input
+            k: Maximum number of facts
+
+        Returns:
+            Up to k facts, most relevant first; empty for messages without
+            content words ("ja", "nein danke")
+        """
+        tokens = [t for t in tokenize(message) if t not in ANSWER_WORDS and not t.isdigit()]
+        scores = self.bm25.scores(tokens)
+        if not scores:
+            return []
+        cutoff = max(self.min_score, max(scores.values()) * RELATIVE_CUTOFF)
+        ranked = sorted((i for i, score in scores.items() if score >= cutoff), key=lambda i: -scores[i])
+        return [self.facts[i] for i in ranked[:k]]
@@ -0,0 +1,121 @@
+"""Local FAQ answering over data/intents.json (keyword automaton + BM25)."""
+import json
+import time
+from typing import Any, Dict, Iterable, Optional
+
+from app.config import settings
+from app.core.local_classifier import looks_like_question
+from app.utils.logger import app_logger
+from app.utils.metrics import metrics
+from app.utils.near_duplicate import stem
+from app.utils.text_index import BM25Index, KeywordAutomaton, tokenize
+
+KEYWORD_WEIGHT = 3.0  # Score added per distinct intent keyword found in the message (one hit is enough)
+AMBIGUITY_RATIO = 2.0  # Best intent must outscore the runner-up by this factor
+GREETING_INTENT = "greeting"  # "Hi, wie ist das Gehalt?" is still a salary question
+
+
+def strip_followup(response: str) -> str:
+    """Drop a trailing question paragraph ("Klingt gut?"); the flow adds its own follow-up."""
+    paragraphs = response.strip().split("\n\n")
+    while len(paragraphs) > 1 and paragraphs[-1].strip().endswith("?"):
+        paragraphs.pop()
+    return "\n\n".join(paragraphs)
+
+
+class FaqEngine:
+    """
+    Matches messages against the intents of data/intents.json.
+
+    Each intent is scored with its keyword hits (Aho-Corasick) plus the
+    BM25 score of the message against the intent's keywords and response.
+    Both indexes are compiled once; matching is pure Python and takes
+    microseconds, so the LLM is only asked when no intent scores high
+    enough.
+    """
+
+    def __init__(self, path: str = "data/intents.json", min_score: float = 3.0, answer_intents: Iterable[str] = ()):
+        self.min_score = min_score
+        self.answer_intents = set(answer_intents)
+        try:
+            with open(path, "r", encoding="utf-8") as f:
+                intents = json.load(f).get("intents", {})
+        except Exception as e:
+            app_logger.error(f"Could not load FAQ intents from {path}: {e}")
+            intents = {}
+
+        self.answers = {name: strip_followup(intent.get("response", "")) for name, intent in intents.items()}
+        # Stems match inflections as word prefixes ("verdienst" -> "verdien" matches "verdient")
+        self.automaton = KeywordAutomaton(
+            (form, name)
+            for name, intent in intents.items()
+            for keyword in intent.get("keywords", [])
+            for form in {keyword, stem(keyword)}
+        )
+        self.bm25 = BM25Index({
+            name: tokenize(" ".join(intent.get("keywords", [])) + " " + self.answers[name])
+            for name, intent in intents.items()
+        })
+
+    def match(self, message: str, ignore: Iterable[str] = ()) -> Optional[Dict[str, Any]]:
+        """
+        Find the intent of a message.
+
+        Args:
+            message: User input
+            ignore: Intents that should not compete
+
+        Returns:
+            {"intent", "score", "confidence"} or None if no intent is
+            confident enough
+        """
+        started = time.perf_counter()
+        scores = self.bm25.scores(tokenize(message))
+        for intent in {value for _, _, value in self.automaton.find(message)}:
+            scores[intent] = scores.get(intent, 0.0) + KEYWORD_WEIGHT
+        ranked = sorted(
+            ((intent, score) for intent, score in scores.items() if intent not in ignore),
+            key=lambda item: item[1], reverse=True
+        )
+        metrics.observe("faq.match_us", (time.perf_counter() - started) * 1_000_000)
+
+        if not ranked or ranked[0][1] < self.min_score:
+            return None
+        intent, score = ranked[0]
+        runner_up = ranked[1][1] if len(ranked) > 1 else 0.0
+        if runner_up * AMBIGUITY_RATIO > score:
+            return None
+        return {"intent": intent, "score": round(score, 3), "confidence": round(score / (score + runner_up), 3)}
+
+    def answer(self, message: str) -> Optional[Dict[str, Any]]:
+        """
+        Answer a candidate question from the FAQ.
+
+        Args:
+            message: User input
+
+        Returns:
+            classify_flow_input-shaped QUESTION result, or None
+        """
+        if not looks_like_question(message):
+            return None
+        match = self.match(message, ignore=(GREETING_INTENT,))
+        if match is None or match["intent"] not in self.answer_intents:
+            metrics.incr("faq.misses")
+            return None
+        metrics.incr("faq.hits")
+        metrics.incr(f"faq.hits.{match['intent']}")
+        return {
+            "category": "QUESTION",
+            "ai_reply": self.answers[match["intent"]],
+            "intent": match["intent"],
+            "confidence": match["confidence"],
+            "source": "faq",
+        }
+
+
+# Global instance (compiled once at import)
+faq_engine = FaqEngine(
+    min_score=settings.faq_min_score,
+    answer_intents=[name.strip() for name in settings.faq_answer_intents.split(",") if name.strip()]
+)
@@ -0,0 +1,284 @@
+"""Loader/compiler for the declarative conversation flow (data/flow.json)."""
+import hashlib
+import json
+import re
+from collections import deque
+from dataclasses import dataclass, field
+from string import Formatter
+from typing import Any, Dict, List, Optional, Tuple, Callable
+
+from app.models.lead import Lead
+
+
+INPUT_TYPES = {"any", "text", "upload", "yes_no", "job_selection", "job_or_info"}
+CLASSIFIED_INPUT_TYPES = {"yes_no", "job_selection", "job_or_info"}
+CONDITION_KEYS = {"value", "category", "contains", "equals", "lead_has", "shorter_than", "job"}
+TEMPLATE_FIELDS = {"message", "ai_reply", "job", "digits", "lead"}
+LEAD_COLUMNS = {c.name: c for c in Lead.__table__.columns}
+
+
+class FlowDefinitionError(ValueError):
+    """Raised when the flow definition is invalid."""
+
+
+class Template:
+    """Reply/prompt template, parsed once at load time."""
+
+    __slots__ = ("source", "fields", "is_static")
+
+    def __init__(self, source: str, where: str):
+        self.source = source
+        try:
+            parsed = [name for _, name, _, _ in Formatter().parse(source) if name is not None]
+        except ValueError as e:
+            raise FlowDefinitionError(f"{where}: invalid template: {e}")
+        self.fields = tuple(parsed)
+        for name in self.fields:
+            root, _, attr = name.partition(".")
+            if root not in TEMPLATE_FIELDS:
+                raise FlowDefinitionError(f"{where}: unknown placeholder '{{{name}}}'")
+            if root == "lead" and attr not in LEAD_COLUMNS:
+                raise FlowDefinitionError(f"{where}: unknown lead field '{attr}'")
+        self.is_static = not self.fields
+
+    def render(self, context: Dict[str, Any]) -> str:
+        if self.is_static:
+            return self.source
+        return self.source.format_map(context)
+
+
+@dataclass(frozen=True)
+class Job:
+    value: str  # normalized_value returned by the classifiers, e.g. "JOB_1"
+    title: str
+    match: Tuple[str, ...]  # substrings of the lowercased message that select the job
+    keywords: Tuple[str, ...]  # lexicon for the local classifier
+
+
+@dataclass
+class Rule:
+    tests: Tuple[Tuple[str, Any], ...]  # any-of; empty = always
+    goto: int
+    writes: Tuple[Tuple[str, Any, Optional[Template], Callable[[Any], Any]], ...] = ()
+    reply: Optional[Template] = None
+    generate_trigger: Optional[Template] = None
+    generate_instruction: Optional[Template] = None
+
+    @property
+    def generates(self) -> bool:
+        return self.generate_instruction is not None
+
+    @property
+    def generate_fields(self) -> frozenset:
+        """Placeholder roots the generate prompts depend on."""
+        if not self.generates:
+            return frozenset()
+        fields = self.generate_trigger.fields + self.generate_instruction.fields
+        return frozenset(name.partition(".")[0] for name in fields)
+
+
+@dataclass
+class State:
+    id: int
+    name: str
+    input_type: str
+    rules: Tuple[Rule, ...]
+
+    @property
+    def classifies(self) -> bool:
+        return self.input_type in CLASSIFIED_INPUT_TYPES
+
+    @property
+    def speculative_rule(self) -> Optional[Rule]:
+        """The generating rule of the expected answer (YES / valid job), if any."""
+        return next((rule for rule in self.rules if rule.generates), None)
+
+
+@dataclass
+class CompiledFlow:
+    """Dispatch table: state id -> compiled state (O(1) lookup)."""
+    states: Dict[int, State]
+    start: int
+    jobs: Tuple[Job, ...]
+    reset_commands: frozenset
+    reset_goto: int
+    reset_reply: Template
+    fallback_goto: int
+    fallback_reply: Template
+    version: str
+    names: Dict[str, int] = field(default_factory=dict)
+
+    def match_job(self, msg_lower: str, analysis: Dict[str, Any]) -> Optional[Job]:
+        value = analysis.get("normalized_value")
+        for job in self.jobs:
+            if any(m in msg_lower for m in job.match) or value == job.value:
+                return job
+        return None
+
+
+def _as_tuple(value: Any) -> Tuple:
+    if isinstance(value, (list, tuple)):
+        return tuple(value)
+    return (value,)
+
+
+def _caster(column_name: str) -> Callable[[Any], Any]:
+    python_type = LEAD_COLUMNS[column_name].type.python_type
+    if python_type is bool:
+        return lambda v: v if isinstance(v, bool) else str(v).lower() in ("1", "true", "yes", "ja")
+    if python_type in (int, float):
+        return python_type
+    return lambda v: v
+
+
+def _compile_rule(raw: Dict[str, Any], where: str, names: Dict[str, int]) -> Rule:
+    unknown = set(raw) - {"when", "goto", "write", "reply", "generate"}
+    if unknown:
+        raise FlowDefinitionError(f"{where}: unknown keys {sorted(unknown)}")
+
+    goto = raw.get("goto")
+    if goto not in names:
+        raise FlowDefinitionError(f"{where}: dangling transition to '{goto}'")
+
+    tests = []
+    for key, arg in (raw.get("when") or {}).items():
+        if key not in CONDITION_KEYS:
+            raise FlowDefinitionError(f"{where}: unknown condition '{key}'")
+        if key in ("value", "category", "contains", "equals"):
+            arg = frozenset(_as_tuple(arg)) if key != "contains" else _as_tuple(arg)
+        if key == "lead_has" and arg not in LEAD_COLUMNS:
+            raise FlowDefinitionError(f"{where}: unknown lead field '{arg}'")
+        tests.append((key, arg))
+
+    writes = []
+    for column, value in (raw.get("write") or {}).items():
+        if column not in LEAD_COLUMNS:
+            raise FlowDefinitionError(f"{where}: cannot write unknown lead field '{column}'")
+        template = Template(value, f"{where}.write.{column}") if isinstance(value, str) else None
+        writes.append((column, value, template, _caster(column)))
+
+    if ("reply" in raw) == ("generate" in raw):
+        raise FlowDefinitionError(f"{where}: a rule needs exactly one of 'reply' or 'generate'")
+
+    rule = Rule(tests=tuple(tests), goto=names[goto], writes=tuple(writes))
+    if "reply" in raw:
+        rule.reply = Template(raw["reply"], f"{where}.reply")
+    else:
+        generate = raw["generate"]
+        rule.generate_trigger = Template(generate["trigger"], f"{where}.generate.trigger")
+        rule.generate_instruction = Template(generate["instruction"], f"{where}.generate.instruction")
+    return rule
+
+
+def compile_flow(definition: Dict[str, Any]) -> CompiledFlow:
+    """
+    Validate and compile a flow definition.
+
+    Args:
+        definition: Parsed flow JSON
+
+    Returns:
+        CompiledFlow ready for dispatch
+
+    Raises:
+        FlowDefinitionError: On invalid, dangling or unreachable states
+    """
+    raw_states = definition.get("states") or []
+    names: Dict[str, int] = {}
+    for raw in raw_states:
+        if not isinstance(raw.get("id"), int) or not raw.get("name"):
+            raise FlowDefinitionError(f"State needs an integer 'id' and a 'name': {raw}")
+        if raw["name"] in names or raw["id"] in names.values():
+            raise FlowDefinitionError(f"Duplicate state {raw['name']} ({raw['id']})")
+        names[raw["name"]] = raw["id"]
+
+    states: Dict[int, State] = {}
+    for raw in raw_states:
+        where = f"state {raw['name']}"
+        if raw.get("input", "any") not in INPUT_TYPES:
+            raise FlowDefinitionError(f"{where}: unknown input type '{raw.get('input')}'")
+        rules = tuple(
+            _compile_rule(r, f"{where}.rules[{i}]", names) for i, r in enumerate(raw.get("rules") or [])
+        )
+        if not rules or rules[-1].tests:
+            raise FlowDefinitionError(f"{where}: the last rule must be unconditional")
+        states[raw["id"]] = State(id=raw["id"], name=raw["name"], input_type=raw.get("input", "any"), rules=rules)
+
+    def resolve(name: Optional[str], where: str) -> int:
+        if name not in names:
+            raise FlowDefinitionError(f"{where}: dangling transition to '{name}'")
+        return names[name]
+
+    start = resolve(definition.get("start"), "start")
+    reset = definition.get("reset") or {}
+    fallback = definition.get("fallback") or {}
+    reset_goto = resolve(reset.get("goto", definition.get("start")), "reset")
+    fallback_goto = resolve(fallback.get("goto", definition.get("start")), "fallback")
+
+    # Every state must be reachable from the start state
+    seen = {start}
+    queue = deque([start])
+    while queue:
+        for rule in states[queue.popleft()].rules:
+            if rule.goto not in seen:
+                seen.add(rule.goto)
+                queue.append(rule.goto)
+    unreachable = sorted(states[s].name for s in set(states) - seen)
+    if unreachable:
+        raise FlowDefinitionError(f"Unreachable states: {', '.join(unreachable)}")
+
+    jobs = tuple(
+        Job(
+            value=j["value"],
+            title=j["title"],
+            match=tuple(m.lower() for m in j.get("match", [])),
+            keywords=tuple(k.lower() for k in j.get("keywords", []))
+        )
+        for j in definition.get("jobs", [])
+    )
+
+    return CompiledFlow(
+        states=states,
+        start=start,
+        jobs=jobs,
+        reset_commands=frozenset(c.lower() for c in reset.get("commands", [])),
+        reset_goto=reset_goto,
+        reset_reply=Template(reset.get("reply", ""), "reset.reply"),
+        fallback_goto=fallback_goto,
+        fallback_reply=Template(fallback.get("reply", ""), "fallback.reply"),
+        version=hashlib.sha256(json.dumps(definition, sort_keys=True).encode("utf-8")).hexdigest()[:12],
+        names=names
+    )
+
+
+def load_flow(path: str = "data/flow.json") -> CompiledFlow:
+    """Load and compile the flow definition file."""
+    with open(path, "r", encoding="utf-8") as f:
+        return compile_flow(json.load(f))
+
+
+def evaluate_tests(rule: Rule, message: str, msg_lower: str, analysis: Dict[str, Any], lead: Lead, job: Optional[Job]) -> bool:
+    """Whether any of the rule's conditions holds (no conditions = always)."""
+    if not rule.tests:
+        return True
+    category = analysis.get("category")
+    for key, arg in rule.tests:
+        if key == "value" and category == "VALID_ANSWER" and analysis.get("normalized_value") in arg:
+            return True
+        if key == "category" and category in arg:
+            return True
+        if key == "contains" and any(s in msg_lower for s in arg):
+            return True
+        if key == "equals" and message in arg:
+            return True
+        if key == "lead_has" and getattr(lead, arg, None):
+            return True
+        if key == "shorter_than" and len(message) < arg:
+            return True
+        if key == "job" and bool(job) == bool(arg):
+            return True
+    return False
+
+
+def digits_of(message: str) -> str:
+    return re.sub(r"[^0-9]", "", message)
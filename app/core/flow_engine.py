@@ -1,14 +1,23 @@
-import re
-from typing import Tuple, Optional
+import time
+from typing import Tuple, Optional, Dict, Any
 from sqlalchemy.orm import Session
+from app.config import settings
+from app.core.faq_engine import faq_engine
+from app.core.flow_definition import CompiledFlow, Job, Rule, State, load_flow, evaluate_tests, digits_of
+from app.core.local_classifier import local_classifier
+from app.core.question_cache import question_cache
+from app.core.speculation import Speculation, reply_speculator
 from app.db import crud
 from app.models.lead import Lead
 from app.services.openai_service import openai_service
+from app.services.reply_pool import reply_pool
+from app.utils.metrics import metrics
 
 class FlowEngine:
     """
     The 'Iron Logic' engine.
-    Manages conversation flow.
+    Manages conversation flow as declared in data/flow.json (compiled into
+    a dispatch table at startup).
     """
 
     # STATE CONSTANTS
@@ -28,215 +37,299 @@ class FlowEngine:
     STATE_ADDITIONAL_LANG = 13
     STATE_COMPLETED = 99
 
-    def process_message(self, user_id: str, message: str, db: Session) -> str:
+    def __init__(self, flow: Optional[CompiledFlow] = None):
+        self.flow = flow or load_flow(settings.flow_definition_path)
+        local_classifier.set_jobs(self.flow.jobs)
+
+    # The sync and async paths share everything but the OpenAI calls: each
+    # step below is a helper, the two paths only differ in how they await.
+
+    def process_message(self, user_id: str, message: str, db: Session, lead: Optional[Lead] = None) -> str:
         # 1. GLOBAL RESET
-        if message.strip().lower() in ["#reset", "#start", "reset", "start", "restart"]:
-            self._reset_state(user_id, db)
-            return "🔄 System zurückgesetzt.\n\nHallo! 👋 Willkommen beim muuuh Recruiting Bot.\n\nWas möchtest du tun?\n1️⃣ Jobs ansehen\n2️⃣ Infos über muuuh erhalten"
+        reset = self._reset_if_requested(user_id, message, db, lead)
+        if reset is not None:
+            return reset
 
-        # 2. LOAD STATE
-        lead = crud.get_or_create_lead(db, user_id)
+        # 2. LOAD STATE (callers running a unit of work pass the loaded lead)
+        lead = lead or crud.get_or_create_lead(db, user_id)
         current_state = lead.conversation_stage or 0
         
         # 3. ROUTING
         new_state, response = self._handle_state_logic(current_state, message, lead, db)
         
         # 4. SAVE STATE
-        lead.conversation_stage = new_state
-        db.commit()
-        db.refresh(lead)
+        self._save_state(lead, new_state, db)
         
         return response
 
-    def _reset_state(self, user_id: str, db: Session):
-        lead = crud.get_or_create_lead(db, user_id)
-        lead.conversation_stage = 0
-        db.commit()
+    def _reset_if_requested(self, user_id: str, message: str, db: Session, lead: Optional[Lead]) -> Optional[str]:
+        if message.strip().lower() not in self.flow.reset_commands:
+            return None
+        self._reset_state(user_id, db, lead)
+        return self.flow.reset_reply.render({})
+
+    def _save_state(self, lead: Lead, new_state: int, db: Session) -> None:
+        lead.conversation_stage = new_state
+        crud.save_changes(db, lead)
+
+    def _classify(self, message: str, expected_type: str, state: int) -> Dict[str, Any]:
+        """Local fast path first, classify_flow_input only if it is not confident."""
+        return self._classify_local(message, expected_type, state) or self._classify_llm(message, expected_type, state)
+
+    def _classify_local(self, message: str, expected_type: str, state: int) -> Optional[Dict[str, Any]]:
+        """Rule/lexicon classifier, FAQ engine, then the near-duplicate question cache (no network)."""
+        started = time.perf_counter()
+        local = local_classifier.classify(message, expected_type) if settings.local_classifier_enabled else None
+        if local is None and settings.faq_engine_enabled:
+            local = faq_engine.answer(message)
+        if local is None and settings.question_cache_enabled:
+            local = question_cache.lookup(message, openai_service.company_info_version, expected_type)
+        if not local:
+            if settings.local_classifier_enabled or settings.faq_engine_enabled or settings.question_cache_enabled:
+                metrics.incr(f"fast_path.miss.state_{state}")
+            return None
+        local_ms = (time.perf_counter() - started) * 1000
+        llm = metrics.histogram(f"classify.llm_ms.state_{state}") or metrics.histogram("classify.llm_ms")
+        metrics.incr(f"fast_path.hit.state_{state}")
+        if llm and llm.count:
+            metrics.incr(f"fast_path.saved_ms.state_{state}", max(llm.total / llm.count - local_ms, 0.0))
+        return local
+
+    def _classify_llm(self, message: str, expected_type: str, state: int) -> Dict[str, Any]:
+        if openai_service.degraded:
+            return self._degraded_classification()
+        started = time.perf_counter()
+        analysis = openai_service.classify_flow_input(message, expected_type)
+        return self._classified(message, expected_type, state, analysis, started)
+
+    def _classified(self, message: str, expected_type: str, state: int, analysis: Dict[str, Any], started: float) -> Dict[str, Any]:
+        """Record the latency of an LLM classification and remember it for near-duplicate questions."""
+        llm_ms = (time.perf_counter() - started) * 1000
+        metrics.observe(f"classify.llm_ms.state_{state}", llm_ms)
+        metrics.observe("classify.llm_ms", llm_ms)
+        if settings.question_cache_enabled:
+            question_cache.remember(message, analysis, openai_service.company_info_version, expected_type)
+        return analysis
+
+    def _degraded_classification(self) -> Dict[str, Any]:
+        """OpenAI is down (circuit open): UNCLEAR makes the state re-ask with its template reply."""
+        metrics.incr("flow.degraded.classify")
+        return {"category": "UNCLEAR"}
+
+    def _degraded_reply(self, kwargs: Dict[str, str], speculation: Optional[Speculation]) -> str:
+        """OpenAI is down (circuit open): send the raw next-step instruction, as generate_flow_reply's fallback does."""
+        if speculation:
+            reply_speculator.discard(speculation)
+        metrics.incr("flow.degraded.reply")
+        return kwargs["next_step_instruction"]
+
+    def _reset_state(self, user_id: str, db: Session, lead: Optional[Lead] = None):
+        lead = lead or crud.get_or_create_lead(db, user_id)
+        lead.conversation_stage = self.flow.reset_goto
+        crud.save_changes(db)
 
     def _handle_state_logic(self, state: int, message: str, lead: Lead, db: Session) -> Tuple[int, str]:
+        node = self.flow.states.get(state)
+        if node is None:
+            return self._fallback()
+
+        analysis = self._classify_without_llm(node, message, state)
+        speculation = None
+        if analysis is None:
+            # The LLM round trip is unavoidable; overlap it with the likely reply
+            speculation = self._speculate(node, message, lead)
+            analysis = self._classify_llm(message, node.input_type, state)
+        rule, context = self._transition(node, message, analysis, lead, db)
+        return rule.goto, self._reply(rule, message, context, lead, speculation)
+
+    def _fallback(self) -> Tuple[int, str]:
+        return self.flow.fallback_goto, self.flow.fallback_reply.render({})
+
+    def _classify_without_llm(self, node: State, message: str, state: int) -> Optional[Dict[str, Any]]:
+        """Analysis for states that don't classify ({}) or from the fast path; None if the LLM must decide."""
+        if not node.classifies:
+            return {}
+        return self._classify_local(message, node.input_type, state)
+
+    def _transition(self, node: State, message: str, analysis: Dict[str, Any], lead: Lead, db: Session) -> Tuple[Rule, Dict[str, Any]]:
+        """Select the rule for the analysis and apply its writes to the lead."""
+        rule, context = self._select_rule(node, message, analysis, lead)
+        self._apply_writes(rule, context, lead, db)
+        return rule, context
+
+    def _speculate(self, node: State, message: str, lead: Lead) -> Optional[Speculation]:
+        """Start generating the expected branch's reply before the classification is known."""
+        bet = self._speculation_target(node, message, lead)
+        if bet is None:
+            return None
+        return reply_speculator.start(node.id, bet[0], openai_service.generate_flow_reply_with_usage, bet[1])
+
+    def _speculation_target(self, node: State, message: str, lead: Lead) -> Optional[Tuple[Rule, Dict[str, str]]]:
+        rule = node.speculative_rule
+        if openai_service.degraded or not settings.speculative_replies or rule is None or "ai_reply" in rule.generate_fields:
+            return None
+        context, job = self._context(message, message.lower().strip(), {}, lead)
+        if "job" in rule.generate_fields and job is None:
+            return None  # Job only known after classification
+        kwargs = self._generate_args(rule, message, context, lead)
+        if self._pool_eligible(message) and reply_pool.has(kwargs["trigger_event"], kwargs["next_step_instruction"]):
+            return None  # Served from the reply pool anyway
+        return rule, kwargs
+
+    def _context(self, message: str, msg_lower: str, analysis: Dict[str, Any], lead: Lead) -> Tuple[Dict[str, Any], Optional[Job]]:
+        job = self.flow.match_job(msg_lower, analysis) if self.flow.jobs else None
+        context = {
+            "message": message,
+            "ai_reply": analysis.get("ai_reply"),
+            "job": job.title if job else "",
+            "digits": digits_of(message),
+            "lead": lead,
+        }
+        return context, job
+
+    def _select_rule(self, node: State, message: str, analysis: Dict[str, Any], lead: Lead) -> Tuple[Rule, Dict[str, Any]]:
+        """First rule whose condition holds, plus the template context."""
         msg_lower = message.lower().strip()
+        context, job = self._context(message, msg_lower, analysis, lead)
+        for rule in node.rules:
+            if evaluate_tests(rule, message, msg_lower, analysis, lead, job):
+                return rule, context
+        return node.rules[-1], context  # unreachable: the last rule is unconditional
+
+    def _apply_writes(self, rule: Rule, context: Dict[str, Any], lead: Lead, db: Session) -> None:
+        values = {}
+        for column, value, template, cast in rule.writes:
+            if template is None:
+                values[column] = value
+                continue
+            rendered = template.render(context)
+            if rendered != "":  # e.g. no digits in the salary answer
+                values[column] = cast(rendered)
+        if values:
+            crud.update_lead(db, lead, **values)
+
+    def _generate_args(self, rule: Rule, message: str, context: Dict[str, Any], lead: Lead) -> Dict[str, str]:
+        return {
+            "message": message,
+            "trigger_event": rule.generate_trigger.render(context),
+            "next_step_instruction": rule.generate_instruction.render(context),
+            "user_name": lead.name or "Du",
+        }
+
+    def _pool_eligible(self, message: str) -> bool:
+        """Short answers ("ja", "👍", "Backend") carry nothing worth reacting to."""
+        return settings.reply_pool_enabled and len(message.split()) <= settings.reply_pool_max_words
+
+    def _reply(
+        self,
+        rule: Rule,
+        message: str,
+        context: Dict[str, Any],
+        lead: Lead,
+        speculation: Optional[Speculation] = None
+    ) -> str:
+        text, kwargs = self._reply_without_llm(rule, message, context, lead, speculation)
+        if text is not None:
+            return text
+        # Dynamic Transition
+        if speculation:
+            text = reply_speculator.resolve(speculation, rule, kwargs)
+            if text is not None:
+                return text
+        return openai_service.generate_flow_reply(**kwargs)
+
+    def _reply_without_llm(
+        self,
+        rule: Rule,
+        message: str,
+        context: Dict[str, Any],
+        lead: Lead,
+        speculation: Optional[Speculation]
+    ) -> Tuple[Optional[str], Dict[str, str]]:
+        """Template, pool or degraded reply; (None, generate_flow_reply kwargs) if it must be generated."""
+        if rule.reply is not None or self._pool_eligible(message) or openai_service.degraded:
+            canned = self._canned_reply(rule, message, context, lead, speculation)
+            if canned is not None:
+                return canned, {}
+        kwargs = self._generate_args(rule, message, context, lead)
+        if openai_service.degraded:
+            return self._degraded_reply(kwargs, speculation), kwargs
+        return None, kwargs
+
+    def _canned_reply(
+        self,
+        rule: Rule,
+        message: str,
+        context: Dict[str, Any],
+        lead: Lead,
+        speculation: Optional[Speculation]
+    ) -> Optional[str]:
+        """Template or reply-pool answer; None if the reply must be generated."""
+        if rule.reply is not None:
+            text = rule.reply.render(context)
+        else:
+            kwargs = self._generate_args(rule, message, context, lead)
+            text = reply_pool.pick(kwargs["trigger_event"], kwargs["next_step_instruction"], lead.name)
+        if text is not None and speculation:
+            reply_speculator.discard(speculation)
+        return text
+
+    # --- Async path (AsyncOpenAI, no threadpool) ---
+
+    async def process_message_async(self, user_id: str, message: str, db: Session, lead: Optional[Lead] = None) -> str:
+        """Same as process_message, but awaits the OpenAI calls instead of blocking a thread."""
+        reset = self._reset_if_requested(user_id, message, db, lead)
+        if reset is not None:
+            return reset
+
+        lead = lead or crud.get_or_create_lead(db, user_id)
+        current_state = lead.conversation_stage or 0
+
+        new_state, response = await self._handle_state_logic_async(current_state, message, lead, db)
+
+        self._save_state(lead, new_state, db)
+
+        return response
+
+    async def _handle_state_logic_async(self, state: int, message: str, lead: Lead, db: Session) -> Tuple[int, str]:
+        node = self.flow.states.get(state)
+        if node is None:
+            return self._fallback()
+
+        analysis = self._classify_without_llm(node, message, state)
+        speculation = None
+        if analysis is None:
+            bet = self._speculation_target(node, message, lead)
+            if bet is not None:
+                speculation = reply_speculator.start_async(
+                    node.id, bet[0], openai_service.generate_flow_reply_with_usage_async, bet[1]
+                )
+            analysis = await self._classify_llm_async(message, node.input_type, state)
+        rule, context = self._transition(node, message, analysis, lead, db)
+        return rule.goto, await self._reply_async(rule, message, context, lead, speculation)
+
+    async def _classify_llm_async(self, message: str, expected_type: str, state: int) -> Dict[str, Any]:
+        if openai_service.degraded:
+            return self._degraded_classification()
+        started = time.perf_counter()
+        analysis = await openai_service.classify_flow_input_async(message, expected_type)
+        return self._classified(message, expected_type, state, analysis, started)
 
-        # === STATE 0: IDLE ===
-        if state == self.STATE_IDLE:
-             return self.STATE_GREETED, "Hallo! 👋 \n\nWillkommen im Karriere-Chat von **muuuh!** 🐮\n\nSuchst du einen **Job** 💼 oder möchtest du **Infos** ℹ️?"
-
-        # === STATE 1: GREETED (Waiting for Job/Info) ===
-        if state == self.STATE_GREETED:
-            # AI Check
-            analysis = openai_service.classify_flow_input(message, "job_or_info")
-            cat = analysis.get("category")
-            val = analysis.get("normalized_value")
-
-            if (cat == "VALID_ANSWER" and val == "JOB") or "job" in msg_lower or "1" in msg_lower:
-                return self.STATE_JOB_SELECTED, "Klasse! Hier sind unsere offenen Stellen: 🚀\n\n1️⃣ **(Junior) Conversational AI Developer** 🤖\n2️⃣ **Senior Python Backend Dev** 🐍\n3️⃣ **Trainee Recruiting** 🎓\n\nWelche Position findest du spannend?"
-            elif (cat == "VALID_ANSWER" and val == "INFO") or "info" in msg_lower or "2" in msg_lower:
-                 return self.STATE_GREETED, "Wir sind **muuuh!** – eine innovative Agentur aus Osnabrück. 🐮\nWir lieben Kommunikation und Technologie.\n\nMöchtest du unsere Jobs sehen? Schreib uns einfach!"
-            elif cat == "QUESTION":
-                 return self.STATE_GREETED, f"{analysis.get('ai_reply')}\n\n(Möchtest du dir die Jobs anschauen?)"
-            else:
-                 return self.STATE_GREETED, "Entschuldige, ich habe das nicht verstanden. 😅\nGeht es dir um **Jobs** oder **Infos**?"
-
-        # === STATE 2: JOB SELECTED (Waiting for valid job name) ===
-        if state == self.STATE_JOB_SELECTED:
-            # AI Check for Job Selection
-            analysis = openai_service.classify_flow_input(message, "job_selection")
-            cat = analysis.get("category")
-            
-            if cat == "QUESTION":
-                 return self.STATE_JOB_SELECTED, f"{analysis.get('ai_reply')}\n\n(Welchen Job meintest du?)"
-            
-            job_name = message
-            valid_job = False
-            
-            # Heuristics + AI Value
-            if "1" in message or (analysis.get("normalized_value") == "JOB_1") or "junior" in msg_lower: 
-                job_name = "(Junior) Conversational AI Developer"
-                valid_job = True
-            elif "2" in message or (analysis.get("normalized_value") == "JOB_2") or "backend" in msg_lower: 
-                job_name = "Senior Backend Dev"
-                valid_job = True
-            elif "3" in message or (analysis.get("normalized_value") == "JOB_3") or "trainee" in msg_lower: 
-                job_name = "Trainee Recruiting"
-                valid_job = True
-            
-            if not valid_job:
-                 return self.STATE_JOB_SELECTED, "Das habe ich nicht ganz verstanden. Welche Stelle meinst du? 👇"
-
-            crud.update_lead(db, lead, position_interest=job_name)
-            
-            # Dynamic Transition
-            reply = openai_service.generate_flow_reply(
-                message=message,
-                trigger_event=f"USER_SELECTED_JOB_{job_name}",
-                next_step_instruction=f"Confirm the choice '{job_name}' enthusiastically. Then ask Question 1 (K.O.): Do they have experience with Chatbots or LLMs (e.g. OpenAI)? (Ask for Yes/No)",
-                user_name=lead.name or "Du"
-            )
-            return self.STATE_REQ_1, reply
-
-        # === STATE 3: REQ 1 (Experience) ===
-        if state == self.STATE_REQ_1:
-            analysis = openai_service.classify_flow_input(message, "yes_no")
-            cat = analysis.get("category")
-            
-            if cat == "VALID_ANSWER":
-                if analysis.get("normalized_value") == "YES":
-                    crud.update_lead(db, lead, has_conversational_ai_experience=True)
-                    # Dynamic Transition
-                    reply = openai_service.generate_flow_reply(
-                        message=message,
-                        trigger_event="USER_HAS_AI_EXPERIENCE",
-                        next_step_instruction="React positively to their AI experience. Then ask Question 2: Are they fit in Python and APIs? (Ask for Yes/No)",
-                        user_name=lead.name or "Du"
-                    )
-                    return self.STATE_REQ_2, reply
-                else: # NO
-                    return self.STATE_COMPLETED, "Schade! Für diese Position setzen wir Vorerfahrung voraus. 😕\n\nAber bewirb dich gerne initiativ über unsere Website!\n\n(Session beendet)"
-            elif cat == "QUESTION":
-                 return self.STATE_REQ_1, f"{analysis.get('ai_reply')}\n\n(Aber zur Frage: Hast du Erfahrung? Ja oder Nein?)"
-            else:
-                 return self.STATE_REQ_1, "Bitte antworte mit **Ja**, **Nein** oder stelle eine Frage."
-
-        # === STATE 4: REQ 2 (Tech) ===
-        if state == self.STATE_REQ_2:
-            analysis = openai_service.classify_flow_input(message, "yes_no")
-            cat = analysis.get("category")
-
-            if cat == "VALID_ANSWER":
-                if analysis.get("normalized_value") == "YES":
-                    crud.update_lead(db, lead, has_api_knowledge=True)
-                    # Dynamic Transition
-                    reply = openai_service.generate_flow_reply(
-                        message=message,
-                        trigger_event="USER_KNOWS_PYTHON_AND_API",
-                        next_step_instruction="Great! Now Question 3: Do they have a mindset for Innovation & Dynamics? (Ask for Yes/No)",
-                        user_name=lead.name or "Du"
-                    )
-                    return self.STATE_REQ_3, reply
-                else: # NO
-                    return self.STATE_COMPLETED, "Danke für deine Ehrlichkeit! Leider sind Python-Kenntnisse hier essenziell. Vielleicht passt eine andere Stelle? 👋"
-            elif cat == "QUESTION":
-                  return self.STATE_REQ_2, f"{analysis.get('ai_reply')}\n\n(Zurück zur Frage: Bist du fit in Python? Ja/Nein)"
-            else:
-                return self.STATE_REQ_2, "Bitte antworte mit **Ja** oder **Nein**."
-
-        # === STATE 5: REQ 3 (Culture/Motivation) ===
-        if state == self.STATE_REQ_3:
-            analysis = openai_service.classify_flow_input(message, "yes_no")
-            cat = analysis.get("category")
-            
-            if cat == "VALID_ANSWER":
-                if analysis.get("normalized_value") == "YES":
-                     # All Passed
-                     # Dynamic Transition
-                     reply = openai_service.generate_flow_reply(
-                        message=message,
-                        trigger_event="USER_HAS_INNOVATION_MINDSET",
-                        next_step_instruction="Celebrate that they are a perfect match! Now ask for their First and Last Name to save the application.",
-                        user_name=lead.name or "Du"
-                    )
-                     return self.STATE_NAME, reply
-                else:
-                     return self.STATE_COMPLETED, "Alles klar, danke für das Gespräch! Wir suchen jemanden mit genau diesem Drive. Alles Gute! 👋"
-            elif cat == "QUESTION":
-                  return self.STATE_REQ_3, f"{analysis.get('ai_reply')}\n\n(Bist du bereit dich einzuarbeiten? Ja/Nein)"
-            else:
-                 return self.STATE_REQ_3, "Bitte antworte mit **Ja** oder **Nein**."
-
-        # === STATE 6: NAME ===
-        if state == self.STATE_NAME:
-            if len(message) < 3: return self.STATE_NAME, "Bitte gib deinen vollständigen Namen ein."
-            crud.update_lead(db, lead, name=message)
-            return self.STATE_PHONE, f"Danke {message}! Wie lautet deine **Telefonnummer**?"
-
-        # === STATE 7: PHONE ===
-        if state == self.STATE_PHONE:
-            crud.update_lead(db, lead, phone=message)
-            return self.STATE_CV, "Perfekt! 📱\n\nJetzt brauche ich deinen **Lebenslauf (CV)** als PDF.\nBitte jetzt hochladen! 📎"
-
-        # === STATE 8: CV ===
-        if state == self.STATE_CV:
-            if lead.cv_file_path or message == "UPLOAD_DONE":
-                 return self.STATE_COVER, "CV erhalten! ✅\n\nHast du ein **Anschreiben**? (Upload oder schreib 'weiter')"
-            if "weiter" in msg_lower or "kein" in msg_lower:
-                 return self.STATE_CV, "Für eine Bewerbung brauchen wir zwingend deinen **Lebenslauf**. Bitte lade ihn hoch! 🙏"
-            return self.STATE_CV, "Bitte lade erst deinen Lebenslauf (PDF) hoch! 📄"
-
-        # === STATE 9: COVER ===
-        if state == self.STATE_COVER:
-             if lead.cover_letter_file_path or message == "UPLOAD_DONE": pass
-             elif "weiter" in msg_lower or "nein" in msg_lower: pass
-             else: return self.STATE_COVER, "Bitte lade das Anschreiben hoch oder schreibe **weiter**."
-
-             return self.STATE_ADDITIONAL_AVAILABILITY, "Alles angekommen! ✅\n\nAb **wann** bist du verfügbar?"
-
-        # === STATE 10: AVAIL ===
-        if state == self.STATE_ADDITIONAL_AVAILABILITY:
-            crud.update_lead(db, lead, availability=message)
-            return self.STATE_ADDITIONAL_SALARY, "Notiert. 🗓️\n\nWas ist deine **Gehaltsvorstellung**? (€/Jahr)"
-
-        # === STATE 11: SALARY ===
-        if state == self.STATE_ADDITIONAL_SALARY:
-             val = re.sub(r'[^0-9]', '', message)
-             if val: crud.update_lead(db, lead, salary_expectation=int(val))
-             return self.STATE_ADDITIONAL_SOURCE, "Wie bist du auf uns **aufmerksam geworden**?"
-
-        # === STATE 12: SOURCE ===
-        if state == self.STATE_ADDITIONAL_SOURCE:
-             crud.update_lead(db, lead, source=message)
-             return self.STATE_ADDITIONAL_LANG, "Wie sind deine **Deutschkenntnisse**? (A1-C2)"
-
-        # === STATE 13: LANG ===
-        if state == self.STATE_ADDITIONAL_LANG:
-             crud.update_lead(db, lead, german_level=message)
-             return self.STATE_COMPLETED, self._final_report(lead)
-
-        # === STATE 99: COMPLETED ===
-        if state == self.STATE_COMPLETED:
-             return self.STATE_COMPLETED, "Bewerbung ist bereits durch! 👋"
-
-        return self.STATE_IDLE, "Fehler. Neustart..."
-
-    def _final_report(self, lead: Lead) -> str:
-        return f"✅ **Vielen Dank, {lead.name}!**\n\nDeine Daten wurden erfolgreich übermittelt:\n\n👤 Name: {lead.name}\n📞 Tel: {lead.phone}\n💼 Job: {lead.position_interest}\n\nWir prüfen deine Unterlagen und melden uns so schnell wie möglich bei dir! 🚀\n\nDein muuuh Recruiting Team"
+    async def _reply_async(
+        self,
+        rule: Rule,
+        message: str,
+        context: Dict[str, Any],
+        lead: Lead,
+        speculation: Optional[Speculation] = None
+    ) -> str:
+        text, kwargs = self._reply_without_llm(rule, message, context, lead, speculation)
+        if text is not None:
+            return text
+        if speculation:
+            text = await reply_speculator.resolve_async(speculation, rule, kwargs)
+            if text is not None:
+                return text
+        return await openai_service.generate_flow_reply_async(**kwargs)
 
 flow_engine = FlowEngine()
@@ -0,0 +1,184 @@
+"""MessageSid idempotency for Twilio webhook redeliveries."""
+import threading
+import time
+from collections import OrderedDict
+from dataclasses import dataclass
+from datetime import datetime, timedelta
+from typing import Optional
+
+from starlette.concurrency import run_in_threadpool
+
+from app.config import settings
+from app.db.database import SessionLocal
+from app.models.processed_message import ProcessedMessage
+from app.utils.logger import app_logger
+from app.utils.metrics import metrics
+
+
+@dataclass
+class DedupeEntry:
+    """What we know about a MessageSid we have seen before."""
+    message_sid: str
+    created_at: float
+    done: bool = False
+    reply: Optional[str] = None
+    delivered: bool = False
+
+
+class MessageDedupeStore:
+    """
+    In-memory TTL/LRU store keyed on MessageSid, optionally backed by the
+    processed_messages table so completed turns survive restarts. Callers
+    on the event loop use begin_async/complete_async, which keep the table
+    queries off the loop.
+    """
+
+    def __init__(self, ttl_seconds: int = 3600, max_entries: int = 10000, persistent: bool = False):
+        self.ttl_seconds = ttl_seconds
+        self.max_entries = max_entries
+        self.persistent = persistent
+        self._entries: "OrderedDict[str, DedupeEntry]" = OrderedDict()
+        self._lock = threading.Lock()
+
+    def begin(self, message_sid: str) -> Optional[DedupeEntry]:
+        """
+        Reserve a MessageSid for processing.
+
+        Args:
+            message_sid: Twilio MessageSid
+
+        Returns:
+            The existing entry if this is a redelivery, None if the caller
+            owns the turn and must call complete() afterwards
+        """
+        now = time.monotonic()
+        entry = self._cached(message_sid, now)
+        if entry is None and self.persistent:
+            entry = self._adopt(self._load_persistent(message_sid))
+        return entry or self._reserve(message_sid, now)
+
+    async def begin_async(self, message_sid: str) -> Optional[DedupeEntry]:
+        """begin() for the event loop: the processed_messages lookup runs in the threadpool."""
+        now = time.monotonic()
+        entry = self._cached(message_sid, now)
+        if entry is None and self.persistent:
+            entry = self._adopt(await run_in_threadpool(self._load_persistent, message_sid))
+        return entry or self._reserve(message_sid, now)
+
+    def complete(self, message_sid: str, reply: Optional[str], delivered: bool) -> None:
+        """Record the reply computed for a MessageSid."""
+        entry = self._record(message_sid, reply, delivered)
+        if self.persistent:
+            self._save_persistent(entry)
+
+    async def complete_async(self, message_sid: str, reply: Optional[str], delivered: bool) -> None:
+        """complete() for the event loop: the processed_messages write runs in the threadpool."""
+        entry = self._record(message_sid, reply, delivered)
+        if self.persistent:
+            await run_in_threadpool(self._save_persistent, entry)
+
+    def _cached(self, message_sid: str, now: float) -> Optional[DedupeEntry]:
+        with self._lock:
+            entry = self._entries.get(message_sid)
+            if entry and now - entry.created_at > self.ttl_seconds:
+                del self._entries[message_sid]
+                entry = None
+            if entry:
+                self._entries.move_to_end(message_sid)
+                metrics.incr("dedupe.hits")
+                if not entry.done:
+                    metrics.incr("dedupe.hits_in_flight")
+            return entry
+
+    def _adopt(self, entry: Optional[DedupeEntry]) -> Optional[DedupeEntry]:
+        """Cache an entry read from processed_messages."""
+        if entry:
+            metrics.incr("dedupe.hits")
+            metrics.incr("dedupe.hits_persistent")
+            with self._lock:
+                self._store(entry)
+        return entry
+
+    def _reserve(self, message_sid: str, now: float) -> Optional[DedupeEntry]:
+        with self._lock:
+            # Another request may have reserved it while we were reading the table
+            entry = self._entries.get(message_sid)
+            if entry:
+                metrics.incr("dedupe.hits")
+                return entry
+            self._store(DedupeEntry(message_sid=message_sid, created_at=now))
+        metrics.incr("dedupe.misses")
+        return None
+
+    def _record(self, message_sid: str, reply: Optional[str], delivered: bool) -> DedupeEntry:
+        with self._lock:
+            entry = self._entries.get(message_sid)
+            if entry is None:
+                entry = DedupeEntry(message_sid=message_sid, created_at=time.monotonic())
+                self._store(entry)
+            entry.done = True
+            entry.reply = reply
+            entry.delivered = delivered
+        return entry
+
+    def forget(self, message_sid: str) -> None:
+        """Release a reservation whose turn never started, so a redelivery is processed."""
+        with self._lock:
+            entry = self._entries.get(message_sid)
+            if entry is not None and not entry.done:
+                del self._entries[message_sid]
+                metrics.incr("dedupe.released")
+
+    def _store(self, entry: DedupeEntry) -> None:
+        self._entries[entry.message_sid] = entry
+        self._entries.move_to_end(entry.message_sid)
+        while len(self._entries) > self.max_entries:
+            self._entries.popitem(last=False)
+            metrics.incr("dedupe.evictions")
+        metrics.set_gauge("dedupe.entries", len(self._entries))
+
+    def _load_persistent(self, message_sid: str) -> Optional[DedupeEntry]:
+        db = SessionLocal()
+        try:
+            row = db.query(ProcessedMessage).filter(ProcessedMessage.message_sid == message_sid).first()
+            if not row or row.created_at < datetime.utcnow() - timedelta(seconds=self.ttl_seconds):
+                return None
+            return DedupeEntry(
+                message_sid=message_sid,
+                created_at=time.monotonic(),
+                done=True,
+                reply=row.reply,
+                delivered=bool(row.delivered)
+            )
+        except Exception as e:
+            app_logger.error(f"Dedupe lookup failed for {message_sid}: {e}")
+            return None
+        finally:
+            db.close()
+
+    def _save_persistent(self, entry: DedupeEntry) -> None:
+        db = SessionLocal()
+        try:
+            db.merge(ProcessedMessage(
+                message_sid=entry.message_sid,
+                reply=entry.reply,
+                delivered=entry.delivered
+            ))
+            db.commit()
+        except Exception as e:
+            app_logger.error(f"Dedupe persist failed for {entry.message_sid}: {e}")
+            db.rollback()
+        finally:
+            db.close()
+
+    def clear(self) -> None:
+        with self._lock:
+            self._entries.clear()
+
+
+# Global instance
+message_dedupe = MessageDedupeStore(
+    ttl_seconds=settings.dedupe_ttl_seconds,
+    max_entries=settings.dedupe_max_entries,
+    persistent=settings.dedupe_persistent
+)
@@ -0,0 +1,181 @@
+"""Deterministic rule/lexicon classifier that runs before classify_flow_input."""
+import re
+import unicodedata
+from typing import Dict, Any, Optional, List, Tuple, Iterable
+
+from app.config import settings
+from app.utils.metrics import metrics
+
+
+YES_PHRASES = {
+    "ja", "jaa", "jaaa", "jap", "japp", "jo", "joa", "jup", "jep", "yes", "yep", "yeah", "yup", "y", "j",
+    "sicher", "klar", "na klar", "aber klar", "klaro", "logo", "natürlich", "natuerlich", "selbstverständlich",
+    "auf jeden fall", "auf jeden", "genau", "definitiv", "absolut", "gerne", "gern", "ok", "okay", "oki",
+    "richtig", "stimmt", "korrekt", "sure", "of course", "absolutely", "definitely", "certainly", "yes please",
+    "ja klar", "ja sicher", "ja genau", "ja gerne", "ja natürlich", "ja habe ich", "ja hab ich", "ja bin ich",
+    "ja auf jeden fall", "ich denke schon", "schon", "eigentlich schon", "ja schon", "bin ich", "hab ich",
+    "habe ich", "i do", "i am", "i have",
+}
+NO_PHRASES = {
+    "nein", "nee", "ne", "nö", "noe", "nop", "nope", "no", "n", "nicht", "leider nicht", "leider nein",
+    "eher nicht", "noch nicht", "gar nicht", "nicht wirklich", "kein", "keine", "keine ahnung", "nie",
+    "niemals", "never", "not really", "no thanks", "nein danke", "nein leider nicht", "nein habe ich nicht",
+    "nein hab ich nicht", "nein bin ich nicht", "habe ich nicht", "hab ich nicht", "bin ich nicht",
+}
+YES_LEADS = {"ja", "jap", "jo", "yes", "yep", "yeah", "klar", "sicher", "natürlich", "genau", "definitiv", "absolut"}
+NO_LEADS = {"nein", "nee", "nö", "no", "nope"}
+NO_SOFTENERS = {"leider"}  # Only NO when a negation follows ("leider ja" is a yes)
+NEGATIONS = {"nicht", "kein", "keine", "keinen", "keiner", "nie", "never", "not", "no", "nein"}
+
+YES_EMOJI = {"👍", "✅", "👌", "💪", "🙌", "👏", "🤝", "✔", "☑", "😊", "😀", "😃", "😄", "🙂", "🔥", "💯"}
+NO_EMOJI = {"👎", "❌", "🙅", "🚫", "✖", "😕", "🙁", "☹"}
+
+NUMBER_WORDS = {
+    "1": 1, "eins": 1, "one": 1, "erste": 1, "erster": 1, "ersten": 1, "erstes": 1, "first": 1, "1.": 1, "1️⃣": 1,
+    "2": 2, "zwei": 2, "two": 2, "zweite": 2, "zweiter": 2, "zweiten": 2, "zweites": 2, "second": 2, "2.": 2, "2️⃣": 2,
+    "3": 3, "drei": 3, "three": 3, "dritte": 3, "dritter": 3, "dritten": 3, "drittes": 3, "third": 3, "3.": 3, "3️⃣": 3,
+}
+
+JOB_OR_INFO_KEYWORDS = {
+    "JOB": {"job", "jobs", "stelle", "stellen", "stellenangebote", "position", "positionen", "bewerben",
+            "bewerbung", "karriere", "offene stellen", "jobs ansehen", "vacancies", "💼"},
+    "INFO": {"info", "infos", "information", "informationen", "über euch", "ueber euch", "mehr erfahren",
+             "unternehmen", "firma", "about", "ℹ️", "ℹ"},
+}
+
+QUESTION_WORDS = {
+    "was", "wie", "wo", "wann", "warum", "wieso", "weshalb", "wer", "welche", "welcher", "welches",
+    "what", "how", "where", "when", "why", "who", "which", "gibt", "kann", "können", "habt", "bietet",
+}
+
+def _normalize(message: str) -> str:
+    text = unicodedata.normalize("NFC", message).lower().strip()
+    text = re.sub(r"[!.,;:…]+", " ", text)
+    return re.sub(r"\s+", " ", text).strip()
+
+
+def _is_question(message: str, text: str) -> bool:
+    if "?" in message:
+        return True
+    first = text.split(" ", 1)[0]
+    return first in QUESTION_WORDS and len(text.split()) > 2
+
+
+def looks_like_question(message: str) -> bool:
+    """Whether the message is (probably) a question rather than an answer."""
+    return _is_question(message, _normalize(message))
+
+
+class LocalClassifier:
+    """
+    Classifies trivially classifiable flow input (yes/no, numbers, job
+    keywords, emoji) without a network call.
+
+    Returns the same dict shape as OpenAIService.classify_flow_input plus a
+    confidence; None means "ask the LLM".
+    """
+
+    def __init__(self, min_confidence: float = 0.8):
+        self.min_confidence = min_confidence
+        self.job_keywords: Dict[str, set] = {}
+        self.job_numbers: Dict[int, str] = {}
+
+    def set_jobs(self, jobs: Iterable[Any]) -> None:
+        """Use the job lexicon of the flow definition (numbered in list order)."""
+        jobs = list(jobs)
+        self.job_keywords = {job.value: set(job.keywords) for job in jobs}
+        self.job_numbers = {i + 1: job.value for i, job in enumerate(jobs)}
+
+    def classify(self, message: str, expected_type: str) -> Optional[Dict[str, Any]]:
+        """
+        Classify a message locally.
+
+        Args:
+            message: User input
+            expected_type: "yes_no", "job_selection" or "job_or_info"
+
+        Returns:
+            Classification dict or None if the local confidence is too low
+        """
+        text = _normalize(message)
+        if not text or _is_question(message, text):
+            return None
+
+        if expected_type == "yes_no":
+            value, confidence = self._yes_no(text)
+        elif expected_type == "job_selection":
+            value, confidence = self._choice(text, self.job_keywords, self.job_numbers)
+        elif expected_type == "job_or_info":
+            value, confidence = self._choice(text, JOB_OR_INFO_KEYWORDS, {1: "JOB", 2: "INFO"})
+        else:
+            return None
+
+        if value is None or confidence < self.min_confidence:
+            return None
+        return {"category": "VALID_ANSWER", "normalized_value": value, "confidence": confidence, "source": "local"}
+
+    def _yes_no(self, text: str) -> Tuple[Optional[str], float]:
+        if text in YES_PHRASES:
+            return "YES", 1.0
+        if text in NO_PHRASES:
+            return "NO", 1.0
+
+        emoji_yes = any(ch in YES_EMOJI for ch in text)
+        emoji_no = any(ch in NO_EMOJI for ch in text)
+        stripped = "".join(ch for ch in text if ch.isalnum() or ch.isspace()).strip()
+        if not stripped and emoji_yes != emoji_no:
+            return ("YES" if emoji_yes else "NO"), 0.95
+
+        tokens = stripped.split()
+        if not tokens:
+            return None, 0.0
+        negated = any(t in NEGATIONS for t in tokens[1:])
+        if tokens[0] in YES_LEADS and not negated and not emoji_no:
+            # "ja, hab 2 jahre mit GPT gebaut"
+            return "YES", 0.85
+        if tokens[0] in NO_LEADS and not emoji_yes:
+            return "NO", 0.85
+        if tokens[0] in NO_SOFTENERS and negated and not emoji_yes:
+            # "leider hab ich keine erfahrung"
+            return "NO", 0.85
+        return None, 0.0
+
+    def _choice(self, text: str, keywords: Dict[str, set], numbers: Dict[int, str]) -> Tuple[Optional[str], float]:
+        if text in NUMBER_WORDS:
+            return numbers.get(NUMBER_WORDS[text]), 1.0
+
+        tokens = text.split()
+        if any(t in NEGATIONS for t in tokens):
+            # "ich will keinen job", "kein bot": a keyword hit would be the opposite answer
+            return None, 0.0
+        hits: List[str] = []
+        for value, words in keywords.items():
+            if text in words or any(w in text for w in words if " " in w) or any(t in words for t in tokens):
+                hits.append(value)
+        number_hits = {numbers[NUMBER_WORDS[t]] for t in tokens if t in NUMBER_WORDS and NUMBER_WORDS[t] in numbers}
+        candidates = set(hits) | number_hits
+        if len(candidates) != 1:
+            return None, 0.0
+        value = candidates.pop()
+        return value, 1.0 if len(tokens) <= 3 else 0.85
+
+
+def fast_path_report() -> Dict[str, Any]:
+    """Fast-path hit rate and estimated latency saved per flow state."""
+    counters = metrics.snapshot()["counters"]
+    report: Dict[str, Any] = {}
+    states = {name.rsplit("_", 1)[1] for name in counters if name.startswith(("fast_path.hit.", "fast_path.miss."))}
+    for state in sorted(states, key=int):
+        hits = counters.get(f"fast_path.hit.state_{state}", 0)
+        misses = counters.get(f"fast_path.miss.state_{state}", 0)
+        report[state] = {
+            "hits": hits,
+            "misses": misses,
+            "hit_rate": round(hits / (hits + misses), 3) if hits + misses else 0.0,
+            "saved_ms_estimate": round(counters.get(f"fast_path.saved_ms.state_{state}", 0), 1),
+        }
+    return report
+
+
+# Global instance
+local_classifier = LocalClassifier(min_confidence=settings.local_classifier_min_confidence)
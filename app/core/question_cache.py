@@ -0,0 +1,81 @@
+"""Near-duplicate cache for candidate questions answered by classify_flow_input."""
+import json
+import time
+from typing import Any, Dict, Optional
+
+from app.config import settings
+from app.core.local_classifier import looks_like_question
+from app.utils.logger import app_logger
+from app.utils.metrics import metrics
+from app.utils.near_duplicate import MinHashIndex
+
+
+def intent_concepts(path: str = "data/intents.json") -> Dict[str, str]:
+    """Map every intent keyword to a concept token ("gehalt", "lohn" -> "#salary")."""
+    try:
+        with open(path, "r", encoding="utf-8") as f:
+            intents = json.load(f).get("intents", {})
+    except Exception as e:
+        app_logger.error(f"Could not load intent keywords from {path}: {e}")
+        return {}
+    return {keyword: f"#{name}" for name, intent in intents.items() for keyword in intent.get("keywords", [])}
+
+
+class QuestionCache:
+    """
+    Answers paraphrases of questions the LLM already answered
+    ("Wie hoch ist das Gehalt?" ~ "was verdient man bei euch") from a local
+    MinHash index. Answers are only reused for the muuh_info.json version
+    they were generated from and the expected input type they were asked
+    at; negations and modals must match (app.utils.near_duplicate.MUST_MATCH).
+    """
+
+    def __init__(self, threshold: float = 0.6, max_entries: int = 100000):
+        self.index = MinHashIndex(threshold=threshold, max_entries=max_entries, concepts=intent_concepts())
+
+    def lookup(self, message: str, info_version: Optional[str], expected_type: Optional[str] = None) -> Optional[Dict[str, Any]]:
+        """
+        Find a stored answer for a near-duplicate question.
+
+        Args:
+            message: User input
+            info_version: Current company info version
+            expected_type: Input type of the current flow state
+
+        Returns:
+            classify_flow_input-shaped QUESTION result, or None
+        """
+        if not looks_like_question(message):
+            return None
+        started = time.perf_counter()
+        match = self.index.lookup(message, scope=expected_type)
+        metrics.observe("question_cache.lookup_us", (time.perf_counter() - started) * 1_000_000)
+        if match is None or match[0]["info"] != info_version:
+            metrics.incr("question_cache.misses")
+            return None
+        metrics.incr("question_cache.hits")
+        return {
+            "category": "QUESTION",
+            "ai_reply": match[0]["ai_reply"],
+            "similarity": round(match[1], 3),
+            "source": "near_duplicate",
+        }
+
+    def remember(
+        self, message: str, analysis: Dict[str, Any], info_version: Optional[str], expected_type: Optional[str] = None
+    ) -> None:
+        """Index a question the LLM answered (at a state expecting expected_type)."""
+        if analysis.get("category") != "QUESTION" or not analysis.get("ai_reply") or not looks_like_question(message):
+            return
+        match = self.index.lookup(message, scope=expected_type)
+        if match is not None and match[1] >= 0.999 and match[0]["info"] == info_version:
+            return  # Already known
+        if self.index.add(message, {"ai_reply": analysis["ai_reply"], "info": info_version}, scope=expected_type):
+            metrics.set_gauge("question_cache.size", len(self.index))
+
+
+# Global instance
+question_cache = QuestionCache(
+    threshold=settings.question_cache_threshold,
+    max_entries=settings.question_cache_max_entries
+)
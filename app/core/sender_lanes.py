@@ -0,0 +1,95 @@
+"""Per-sender ordered execution lanes for conversation turns."""
+import asyncio
+import time
+from contextlib import asynccontextmanager
+from typing import Dict, Any, AsyncIterator
+
+from app.config import settings
+from app.utils.metrics import metrics
+
+
+class _Lane:
+    """FIFO lock plus bookkeeping for one sender."""
+
+    __slots__ = ("lock", "depth", "turns", "last_wait_ms", "max_wait_ms", "last_used")
+
+    def __init__(self):
+        self.lock = asyncio.Lock()
+        self.depth = 0  # running + waiting turns
+        self.turns = 0
+        self.last_wait_ms = 0.0
+        self.max_wait_ms = 0.0
+        self.last_used = time.monotonic()
+
+
+class SenderLanes:
+    """
+    Keyed lock table: turns of one WhatsApp number run strictly in arrival
+    order, different numbers run in parallel. Idle lanes are evicted.
+    """
+
+    def __init__(self, idle_seconds: float = 300.0):
+        self.idle_seconds = idle_seconds
+        self._lanes: Dict[str, _Lane] = {}
+        self._last_sweep = time.monotonic()
+
+    @asynccontextmanager
+    async def lane(self, sender: str) -> AsyncIterator[None]:
+        """
+        Hold the sender's lane for the duration of one turn.
+
+        Args:
+            sender: Twilio 'From' number
+        """
+        lane = self._lanes.get(sender)
+        if lane is None:
+            lane = self._lanes[sender] = _Lane()
+        lane.depth += 1
+        metrics.set_gauge("lanes.active", len(self._lanes))
+
+        queued_at = time.perf_counter()
+        try:
+            await lane.lock.acquire()
+        except BaseException:
+            lane.depth -= 1
+            raise
+        wait_ms = (time.perf_counter() - queued_at) * 1000
+        lane.last_wait_ms = wait_ms
+        lane.max_wait_ms = max(lane.max_wait_ms, wait_ms)
+        metrics.observe("lanes.wait_ms", wait_ms)
+        metrics.observe("lanes.depth", lane.depth)
+
+        try:
+            yield
+        finally:
+            lane.lock.release()
+            lane.depth -= 1
+            lane.turns += 1
+            lane.last_used = time.monotonic()
+            self._evict_idle()
+
+    def _evict_idle(self) -> None:
+        now = time.monotonic()
+        if now - self._last_sweep < min(self.idle_seconds, 30.0):
+            return
+        self._last_sweep = now
+        for sender in [s for s, l in self._lanes.items() if l.depth == 0 and now - l.last_used > self.idle_seconds]:
+            del self._lanes[sender]
+            metrics.incr("lanes.evicted")
+        metrics.set_gauge("lanes.active", len(self._lanes))
+
+    def snapshot(self) -> Dict[str, Any]:
+        """Queue depth and wait times per active lane."""
+        return {
+            sender: {
+                "depth": lane.depth,
+                "turns": lane.turns,
+                "last_wait_ms": round(lane.last_wait_ms, 3),
+                "max_wait_ms": round(lane.max_wait_ms, 3),
+            }
+            for sender, lane in self._lanes.items()
+        }
+
+
+# Global instance
+sender_lanes = SenderLanes(idle_seconds=settings.lane_idle_seconds)
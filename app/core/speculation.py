@@ -0,0 +1,171 @@
+"""Speculative generate_flow_reply calls that overlap with LLM classification."""
+import asyncio
+import time
+from concurrent.futures import Future, ThreadPoolExecutor
+from typing import Any, Awaitable, Callable, Dict, Optional, Tuple
+
+from app.config import settings
+from app.utils.logger import app_logger
+from app.utils.metrics import metrics
+
+
+class Speculation:
+    """A generate call started before the classification was known."""
+
+    __slots__ = ("state", "rule", "kwargs", "future", "started", "done_at")
+
+    def __init__(self, state: int, rule: Any, kwargs: Dict[str, str]):
+        self.state = state
+        self.rule = rule
+        self.kwargs = kwargs
+        self.future: Optional[Future] = None
+        self.started = time.perf_counter()
+        self.done_at: Optional[float] = None
+
+
+class ReplySpeculator:
+    """
+    Runs the most likely next-step generation in a thread pool while the
+    classifier is still deciding.
+
+    A speculation is used only if the classified branch produces exactly the
+    same prompt; otherwise it is discarded and its tokens count as wasted.
+    On the thread pool a call that is already in flight cannot be aborted
+    (sync OpenAI client), only one that has not started yet is cancelled;
+    speculations started with start_async are cancelled outright.
+    """
+
+    def __init__(self, max_workers: int = 4):
+        self.max_workers = max_workers
+        self._pool: Optional[ThreadPoolExecutor] = None
+
+    def start(self, state: int, rule: Any, generate: Callable[..., Tuple[str, int]], kwargs: Dict[str, str]) -> Speculation:
+        """
+        Start a speculative generation.
+
+        Args:
+            state: Current flow state (for per-state metrics)
+            rule: The rule the speculation bets on
+            generate: Callable returning (reply text, total tokens)
+            kwargs: Arguments for the generate call
+
+        Returns:
+            The running speculation
+        """
+        if self._pool is None:
+            self._pool = ThreadPoolExecutor(max_workers=self.max_workers, thread_name_prefix="speculate")
+        speculation = Speculation(state, rule, kwargs)
+        speculation.future = self._pool.submit(self._run, speculation, generate)
+        metrics.incr(f"speculation.started.state_{state}")
+        return speculation
+
+    def _run(self, speculation: Speculation, generate: Callable[..., Tuple[str, int]]) -> Tuple[str, int]:
+        try:
+            return generate(**speculation.kwargs)
+        finally:
+            speculation.done_at = time.perf_counter()
+
+    def start_async(self, state: int, rule: Any, generate: Callable[..., Awaitable[Tuple[str, int]]], kwargs: Dict[str, str]) -> Speculation:
+        """Like start, but runs the coroutine function generate as a task on the running loop."""
+        speculation = Speculation(state, rule, kwargs)
+        speculation.future = asyncio.ensure_future(self._run_async(speculation, generate))
+        metrics.incr(f"speculation.started.state_{state}")
+        return speculation
+
+    async def _run_async(self, speculation: Speculation, generate: Callable[..., Awaitable[Tuple[str, int]]]) -> Tuple[str, int]:
+        try:
+            return await generate(**speculation.kwargs)
+        finally:
+            speculation.done_at = time.perf_counter()
+
+    def resolve(self, speculation: Speculation, rule: Any, kwargs: Dict[str, str]) -> Optional[str]:
+        """
+        Use or discard a speculation once the branch is known.
+
+        Args:
+            speculation: The running speculation
+            rule: The rule selected after classification
+            kwargs: The generate arguments of that rule
+
+        Returns:
+            The speculative reply on a hit, None on a miss
+        """
+        decided_at = time.perf_counter()
+        if not self._matches(speculation, rule, kwargs):
+            return None
+        try:
+            text, _ = speculation.future.result()
+        except Exception as e:
+            app_logger.error(f"Speculative reply failed: {e}")
+            self.discard(speculation)
+            return None
+        self._record_hit(speculation, decided_at)
+        return text
+
+    async def resolve_async(self, speculation: Speculation, rule: Any, kwargs: Dict[str, str]) -> Optional[str]:
+        """Async variant of resolve for speculations started with start_async."""
+        decided_at = time.perf_counter()
+        if not self._matches(speculation, rule, kwargs):
+            return None
+        try:
+            text, _ = await speculation.future
+        except Exception as e:
+            app_logger.error(f"Speculative reply failed: {e}")
+            self.discard(speculation)
+            return None
+        self._record_hit(speculation, decided_at)
+        return text
+
+    def _matches(self, speculation: Speculation, rule: Any, kwargs: Dict[str, str]) -> bool:
+        if rule is not speculation.rule or kwargs != speculation.kwargs:
+            self.discard(speculation)
+            return False
+        return True
+
+    def _record_hit(self, speculation: Speculation, decided_at: float) -> None:
+        # Sequential would have started generating at decided_at
+        saved_ms = (min(decided_at, speculation.done_at or decided_at) - speculation.started) * 1000
+        metrics.incr(f"speculation.hit.state_{speculation.state}")
+        metrics.incr(f"speculation.saved_ms.state_{speculation.state}", saved_ms)
+        metrics.observe("speculation.saved_ms", saved_ms)
+
+    def discard(self, speculation: Speculation) -> None:
+        """Drop a speculation; tokens it still consumes are recorded as wasted."""
+        metrics.incr(f"speculation.miss.state_{speculation.state}")
+        if speculation.future.cancel():
+            metrics.incr("speculation.cancelled")
+            return
+        speculation.future.add_done_callback(lambda f: self._record_waste(speculation.state, f))
+
+    def _record_waste(self, state: int, future: Future) -> None:
+        if future.cancelled() or future.exception() is not None:
+            return
+        metrics.incr(f"speculation.wasted_tokens.state_{state}", future.result()[1])
+
+    def shutdown(self) -> None:
+        if self._pool is not None:
+            self._pool.shutdown(wait=False, cancel_futures=True)
+            self._pool = None
+
+
+def speculation_report() -> Dict[str, Any]:
+    """Speculation hit rate, wasted tokens and latency saved per flow state."""
+    counters = metrics.snapshot()["counters"]
+    report: Dict[str, Any] = {}
+    states = {name.rsplit("_", 1)[1] for name in counters if name.startswith("speculation.started.")}
+    for state in sorted(states, key=int):
+        started = counters.get(f"speculation.started.state_{state}", 0)
+        hits = counters.get(f"speculation.hit.state_{state}", 0)
+        report[state] = {
+            "started": started,
+            "hits": hits,
+            "misses": counters.get(f"speculation.miss.state_{state}", 0),
+            "hit_rate": round(hits / started, 3) if started else 0.0,
+            "wasted_tokens": counters.get(f"speculation.wasted_tokens.state_{state}", 0),
+            "saved_ms": round(counters.get(f"speculation.saved_ms.state_{state}", 0), 1),
+        }
+    return report
+
+
+# Global instance
+reply_speculator = ReplySpeculator(max_workers=settings.speculation_max_workers)
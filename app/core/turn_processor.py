@@ -0,0 +1,299 @@
+"""Conversation turn execution shared by the inline and fast-ack webhook modes."""
+import asyncio
+import time
+from dataclasses import dataclass
+from typing import Callable, List, Optional, Set, Tuple
+
+from sqlalchemy.orm import Session
+from starlette.concurrency import run_in_threadpool
+
+from app.config import settings
+from app.db import crud
+from app.db.database import SessionLocal
+from app.core.flow_engine import flow_engine
+from app.models.lead import Lead
+from app.core.idempotency import message_dedupe, DedupeEntry
+from app.core.sender_lanes import sender_lanes
+from app.core.coalescer import message_coalescer
+from app.core.worker import cv_timeline, enqueue_scoring
+from app.services.twilio_service import twilio_service
+from app.utils.logger import app_logger
+from app.utils.metrics import metrics
+
+
+@dataclass
+class InboundMessage:
+    """One message as delivered by the Twilio webhook."""
+    message_sid: str
+    body: str = ""
+    num_media: int = 0
+    media_url: Optional[str] = None
+
+    @property
+    def log_text(self) -> str:
+        """Text stored in conversation_history."""
+        if self.num_media > 0:
+            return f"[MEDIA] {self.media_url}"
+        return self.body
+
+
+def _begin_turn(db: Session, lead: Lead, messages: List[InboundMessage], log_inbound: bool) -> Tuple[str, str]:
+    """
+    Log the inbound messages and handle uploads.
+
+    Returns:
+        (text for the FlowEngine, reply that replaces the FlowEngine or "")
+    """
+    current_state = lead.conversation_stage or 0
+
+    # 2. Log
+    if log_inbound:
+        for msg in messages:
+            crud.add_conversation_message(db, lead, "user", msg.log_text)
+
+    # 3. Determine Response
+    engine_msg = " ".join(m.body.strip() for m in messages if not m.num_media and m.body.strip())
+    media = next((m for m in reversed(messages) if m.num_media > 0 and m.media_url), None)
+
+    if media:
+        # Handle File Upload
+        if current_state == 8: # CV
+             crud.update_lead(db, lead, cv_file_path=f"url:{media.media_url}")
+             engine_msg = "UPLOAD_DONE"
+        elif current_state == 9: # Cover
+             crud.update_lead(db, lead, cover_letter_file_path=f"url:{media.media_url}")
+             engine_msg = "UPLOAD_DONE"
+        elif not engine_msg:
+             # Unexpected file
+             return engine_msg, "Danke für die Datei! Ich kann sie gerade nicht zuordnen, aber sie ist gespeichert."
+    return engine_msg, ""
+
+
+def _end_turn(db: Session, lead: Lead, response_text: str, previous_stage: int) -> bool:
+    """
+    Log the reply and track the CV pipeline.
+
+    Returns:
+        Whether scoring must be queued: the CV was just accepted (scoring
+        then runs while the candidate answers the remaining questions), or
+        the application is complete with a CV the scoring job has not
+        handled yet (scored_at is also set when the CV was skipped)
+    """
+    if response_text:
+        crud.add_conversation_message(db, lead, "bot", response_text)
+    stage = lead.conversation_stage or 0
+    if stage == flow_engine.STATE_COMPLETED and previous_stage != stage:
+        cv_timeline.mark(lead.id, "completed")
+    if previous_stage == flow_engine.STATE_CV != stage and lead.cv_file_path:  # CV state left with an upload
+        cv_timeline.mark(lead.id, "uploaded")
+        return True
+    return stage == flow_engine.STATE_COMPLETED and bool(lead.cv_file_path) and lead.scored_at is None
+
+
+def run_turn(
+    db: Session,
+    user_id: str,
+    messages: List[InboundMessage],
+    schedule_scoring: Optional[Callable[[int], None]] = None,
+    log_inbound: bool = True
+) -> Optional[str]:
+    """
+    Execute one conversation turn and send the reply via the Twilio REST API.
+
+    Several messages coalesced by the debounce window form a single turn:
+    each is logged individually, their texts go to the FlowEngine together.
+
+    Args:
+        db: Database session
+        user_id: Sender (Twilio 'From')
+        messages: Inbound messages of this turn (MessageSids reserved in message_dedupe)
+        schedule_scoring: Called with the lead id once the application is complete
+        log_inbound: Store the inbound messages (False if the webhook already did)
+
+    Returns:
+        The reply text, or None if nothing was sent
+    """
+    started = time.perf_counter()
+    response_text = ""
+    delivered = False
+    try:
+        # Load once, mutate in memory, commit once
+        with crud.unit_of_work(db):
+            # 1. Get/Create Lead
+            lead = crud.get_or_create_lead(db, user_id)
+            previous_stage = lead.conversation_stage or 0
+            engine_msg, response_text = _begin_turn(db, lead, messages, log_inbound)
+            if not response_text:
+                response_text = flow_engine.process_message(user_id, engine_msg, db, lead=lead)
+            needs_scoring = _end_turn(db, lead, response_text, previous_stage)
+
+        # 4. Trigger Scoring (CV uploaded, or completed and unscored)
+        if needs_scoring and schedule_scoring:
+             app_logger.info(f"Triggering Background Scoring for {user_id}")
+             schedule_scoring(lead.id)
+
+        # 5. Send Response
+        if response_text:
+            delivered = twilio_service.send_message(user_id, response_text)
+        return response_text or None
+
+    except Exception as e:
+        app_logger.error(f"WEBHOOK ERROR: {str(e)}", exc_info=True)
+        try:
+             twilio_service.send_message(user_id, f"⚠️ Fehler: {str(e)}")
+        except: pass
+        return None
+    finally:
+        for msg in messages:
+            message_dedupe.complete(msg.message_sid, response_text or None, delivered)
+        metrics.observe("turn.latency_ms", (time.perf_counter() - started) * 1000)
+
+
+async def run_turn_async(
+    db: Session,
+    user_id: str,
+    messages: List[InboundMessage],
+    schedule_scoring: Optional[Callable[[int], None]] = None,
+    log_inbound: bool = True
+) -> Optional[str]:
+    """
+    Async variant of run_turn for settings.async_turns.
+
+    The OpenAI and Twilio calls are awaited on the event loop, so a worker
+    holds many turns in flight without a thread per turn. The database work
+    stays synchronous, but no pooled connection may be held across an await
+    (the pool would run dry and block the loop): the lead is loaded and
+    committed first, the flow then mutates it in memory (pending_changes:
+    no flush, no commit) while the OpenAI calls are awaited, and a second
+    unit of work commits everything once the replies are known.
+    """
+    started = time.perf_counter()
+    response_text = ""
+    delivered = False
+    expire_on_commit = db.expire_on_commit
+    db.expire_on_commit = False  # Keep the loaded lead usable without a connection
+    try:
+        with crud.unit_of_work(db):
+            lead = crud.get_or_create_lead(db, user_id)
+            previous_stage = lead.conversation_stage or 0
+            engine_msg, response_text = _begin_turn(db, lead, messages, log_inbound)
+
+        if not response_text:
+            with crud.pending_changes(db):
+                response_text = await flow_engine.process_message_async(user_id, engine_msg, db, lead=lead)
+
+        with crud.unit_of_work(db):
+            needs_scoring = _end_turn(db, lead, response_text, previous_stage)
+
+        if needs_scoring and schedule_scoring:
+             app_logger.info(f"Triggering Background Scoring for {user_id}")
+             schedule_scoring(lead.id)
+
+        if response_text:
+            delivered = await twilio_service.send_message_async(user_id, response_text)
+        return response_text or None
+
+    except Exception as e:
+        app_logger.error(f"WEBHOOK ERROR: {str(e)}", exc_info=True)
+        try:
+            await twilio_service.send_message_async(user_id, f"⚠️ Fehler: {str(e)}")
+        except Exception as send_error:
+            app_logger.error(f"Error reply to {user_id} failed: {send_error}")
+        return None
+    finally:
+        db.expire_on_commit = expire_on_commit
+        for msg in messages:
+            await message_dedupe.complete_async(msg.message_sid, response_text or None, delivered)
+        metrics.observe("turn.latency_ms", (time.perf_counter() - started) * 1000)
+
+
+def replay_duplicate(user_id: str, entry: DedupeEntry) -> None:
+    """
+    Answer a Twilio redelivery without re-running the turn.
+
+    The stored reply is only re-sent if the original send failed; otherwise
+    the candidate already has it and the redelivery is just acknowledged.
+    A successful re-send is recorded, so later redeliveries (also after a
+    restart) don't send it again. Blocking: call it from the threadpool.
+    """
+    app_logger.info(f"Duplicate delivery of {entry.message_sid} from {user_id} (done={entry.done})")
+    if entry.done and entry.reply and not entry.delivered:
+        metrics.incr("dedupe.replayed")
+        if twilio_service.send_message(user_id, entry.reply):
+            message_dedupe.complete(entry.message_sid, entry.reply, delivered=True)
+
+
+class TurnProcessor:
+    """
+    In-process async executor for turns acknowledged by the fast-ack webhook.
+
+    Each turn runs in the threadpool with its own database session, so the
+    blocking OpenAI/Twilio calls never hold up the webhook response. Rapid
+    messages are merged by message_coalescer, turns of the same sender are
+    serialized through sender_lanes.
+    """
+
+    def __init__(self):
+        self._tasks: Set[asyncio.Task] = set()
+
+    @property
+    def in_flight(self) -> int:
+        return len(self._tasks)
+
+    def submit(self, user_id: str, message: InboundMessage) -> None:
+        """Schedule a turn whose inbound message has already been stored."""
+        self._track(asyncio.get_running_loop().create_task(self._process(user_id, message)))
+
+    def _track(self, task: asyncio.Task) -> None:
+        self._tasks.add(task)
+        task.add_done_callback(self._on_done)
+        metrics.set_gauge("turn_processor.in_flight", len(self._tasks))
+
+    def _on_done(self, task: asyncio.Task) -> None:
+        self._tasks.discard(task)
+        metrics.set_gauge("turn_processor.in_flight", len(self._tasks))
+
+    async def _process(self, user_id: str, message: InboundMessage) -> None:
+        try:
+            batch = await message_coalescer.collect(user_id, message)
+            if batch is None:
+                return  # Merged into a later message's turn
+            async with sender_lanes.lane(user_id):
+                if settings.async_turns:
+                    await self._run_with_session_async(user_id, batch)
+                else:
+                    await run_in_threadpool(self._run_with_session, user_id, batch)
+        except Exception as e:
+            app_logger.error(f"Turn processor error for {user_id}: {e}", exc_info=True)
+
+    def _run_with_session(self, user_id: str, messages: List[InboundMessage]) -> None:
+        db = SessionLocal()
+        try:
+            run_turn(
+                db, user_id, messages,
+                schedule_scoring=enqueue_scoring,
+                log_inbound=False
+            )
+        finally:
+            db.close()
+
+    async def _run_with_session_async(self, user_id: str, messages: List[InboundMessage]) -> None:
+        db = SessionLocal()
+        try:
+            await run_turn_async(
+                db, user_id, messages,
+                schedule_scoring=enqueue_scoring,
+                log_inbound=False
+            )
+        finally:
+            db.close()
+
+    async def drain(self, timeout: float = 10.0) -> None:
+        """Wait for in-flight turns on shutdown."""
+        if self._tasks:
+            app_logger.info(f"Draining {len(self._tasks)} in-flight turns...")
+            await asyncio.wait(set(self._tasks), timeout=timeout)
+
+
+# Global instance
+turn_processor = TurnProcessor()
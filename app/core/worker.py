@@ -1,16 +1,74 @@
+import threading
+import time
+from collections import OrderedDict
+from datetime import datetime
+from typing import Dict
+
 from app.db.database import SessionLocal
 from app.services.document_service import document_service
-from app.services.openai_service import openai_service
+from app.services.openai_service import GRADE_CV_CHARS, openai_service
 from app.models.lead import Lead
+from app.utils.job_queue import job_queue
 from app.utils.logger import app_logger
+from app.utils.media_download import MediaTooLarge
+from app.utils.metrics import metrics
+
+SCORING_JOB = "score_lead"
+
+
+class CvPipelineTimeline:
+    """
+    When a lead's CV arrived, was scored and the conversation completed.
+
+    Scoring starts at the upload, so it overlaps the rest of the
+    conversation (cover letter, availability, salary, ...). Once a lead
+    has both a score and a completed conversation, the share of the
+    pipeline hidden behind the conversation and the wait left after
+    completion are recorded. In-process only; it feeds metrics.
+    """
+
+    def __init__(self, max_leads: int = 10000):
+        self.max_leads = max_leads
+        self._leads: "OrderedDict[int, Dict[str, float]]" = OrderedDict()
+        self._lock = threading.Lock()
+
+    def mark(self, lead_id: int, event: str) -> None:
+        """Record "uploaded", "scored" or "completed" (the first occurrence counts)."""
+        now = time.time()
+        with self._lock:
+            events = self._leads.setdefault(lead_id, {})
+            if event in events:
+                return
+            events[event] = now
+            if len(self._leads) > self.max_leads:
+                self._leads.popitem(last=False)
+            if not {"uploaded", "scored", "completed"} <= events.keys():
+                return
+            del self._leads[lead_id]
+        pipeline_s = events["scored"] - events["uploaded"]
+        hidden_s = max(0.0, min(events["scored"], events["completed"]) - events["uploaded"])
+        metrics.observe("cv_pipeline.ms", pipeline_s * 1000)
+        metrics.observe("cv_pipeline.overlap_pct", 100.0 * hidden_s / pipeline_s if pipeline_s > 0 else 100.0)
+        metrics.observe("cv_pipeline.wait_after_completion_ms", max(0.0, events["scored"] - events["completed"]) * 1000)
+        metrics.incr(
+            "cv_pipeline.ready_before_completion" if events["scored"] <= events["completed"]
+            else "cv_pipeline.ready_after_completion"
+        )
+
 
 def run_scoring_pipeline(lead_id: int):
     """
-    Background Task:
+    Job Queue Task (SCORING_JOB), queued when the CV arrives and again
+    at conversation end if the lead is still unscored:
     1. Downloads CV
     2. Extracts Text
     3. Scores via OpenAI
     4. Updates DB
+
+    Raises on transient failures (download, OpenAI, database) so the job
+    queue retries; leads without a CV or already handled (scored_at) are
+    skipped. scored_at is set once the CV is graded or can never be (too
+    large), so the lead is not queued again by later messages.
     """
     app_logger.info(f"Starting Scoring Pipeline for Lead #{lead_id}")
     db = SessionLocal()
@@ -24,13 +82,26 @@ def run_scoring_pipeline(lead_id: int):
             app_logger.warning("No CV file path to process")
             return
 
+        if lead.scored_at is not None:
+            app_logger.info(f"Lead #{lead_id} already scored, skipping")  # Retried or duplicate job
+            return
+
         # 1. Download & Extract
         try:
-            file_stream = document_service.download_file_from_url(lead.cv_file_path)
-            cv_text = document_service.extract_text_from_pdf(file_stream)
+            started = time.perf_counter()
+            with document_service.download_file_from_url(lead.cv_file_path) as media:
+                downloaded = time.perf_counter()
+                cv_text = document_service.extract_text(media, max_chars=GRADE_CV_CHARS)
+            metrics.observe("cv_pipeline.download_ms", (downloaded - started) * 1000)
+            metrics.observe("cv_pipeline.extract_ms", (time.perf_counter() - downloaded) * 1000)
+        except MediaTooLarge as e:
+            app_logger.warning(f"Lead #{lead_id} CV not scored: {e}")  # Retrying cannot help
+            lead.scored_at = datetime.utcnow()
+            db.commit()
+            return
         except Exception as e:
             app_logger.error(f"Download/Extract failed: {e}")
-            return # Cannot process
+            raise
         
         if len(cv_text) < 50:
             app_logger.warning(f"CV text too short or empty. PDF parsing failed?")
@@ -38,18 +109,34 @@ def run_scoring_pipeline(lead_id: int):
         
         # 2. AI Grading
         job = lead.position_interest or "General Application"
-        result = openai_service.grade_application(cv_text, job)
+        started = time.perf_counter()
+        result = openai_service.grade_application(cv_text, job, raise_errors=True)
+        metrics.observe("cv_pipeline.grade_ms", (time.perf_counter() - started) * 1000)
         
         app_logger.info(f"Scoring Complete: {result.get('score')}")
 
         # 3. Update DB
         lead.qualification_score = result.get("score", 0)
         lead.projects = result # Storing full JSON (summary, pros, cons)
+        lead.scored_at = datetime.utcnow()
         
         db.commit()
+        cv_timeline.mark(lead_id, "scored")
         
     except Exception as e:
         app_logger.error(f"Worker Error: {e}")
         db.rollback()
+        raise
     finally:
         db.close()
+
+
+def enqueue_scoring(lead_id: int) -> None:
+    """Queue scoring of a completed application (no-op while one is already queued or running)."""
+    job_queue.enqueue(SCORING_JOB, {"lead_id": lead_id}, dedupe_key=f"{SCORING_JOB}:{lead_id}")
+
+
+# Global instance
+cv_timeline = CvPipelineTimeline()
+
+job_queue.register(SCORING_JOB, lambda payload: run_scoring_pipeline(payload["lead_id"]))
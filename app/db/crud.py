@@ -1,11 +1,84 @@
 """CRUD operations for leads."""
-from typing import Optional, List
+from contextlib import contextmanager
+from typing import Optional, List, Iterator, Any
 from sqlalchemy.orm import Session
 from datetime import datetime
 
 from app.models.lead import Lead
 
 
+@contextmanager
+def unit_of_work(db: Session) -> Iterator[Session]:
+    """
+    Turn-scoped unit of work.
+
+    Inside the block the helpers below only mutate objects in memory; all
+    changes are flushed and committed once on exit (rolled back on error).
+    
+    Args:
+        db: Database session
+        
+    Yields:
+        The same session
+    """
+    db.info["unit_of_work"] = True
+    try:
+        yield db
+        db.commit()
+    except Exception:
+        db.rollback()
+        raise
+    finally:
+        db.info.pop("unit_of_work", None)
+
+
+@contextmanager
+def pending_changes(db: Session) -> Iterator[Session]:
+    """
+    Collect changes in memory for a later unit_of_work() to commit.
+
+    Like unit_of_work(), the helpers below only mutate objects, but nothing
+    is committed on exit and autoflush is off, so no query checks out a
+    connection (the async turn path awaits OpenAI inside this block).
+    Changes are rolled back on error.
+    
+    Args:
+        db: Database session
+        
+    Yields:
+        The same session
+    """
+    db.info["unit_of_work"] = True
+    try:
+        with db.no_autoflush:
+            yield db
+    except Exception:
+        db.rollback()
+        raise
+    finally:
+        db.info.pop("unit_of_work", None)
+
+
+def in_unit_of_work(db: Session) -> bool:
+    """Whether the session is currently inside unit_of_work()."""
+    return bool(db.info.get("unit_of_work"))
+
+
+def save_changes(db: Session, obj: Optional[Any] = None) -> None:
+    """
+    Commit (and refresh obj) unless a unit of work will commit later.
+    
+    Args:
+        db: Database session
+        obj: Object to refresh after the commit
+    """
+    if in_unit_of_work(db):
+        return
+    db.commit()
+    if obj is not None:
+        db.refresh(obj)
+
+
 def create_lead(db: Session, whatsapp_number: str) -> Lead:
     """
     Create a new lead.
@@ -17,10 +90,9 @@ def create_lead(db: Session, whatsapp_number: str) -> Lead:
     Returns:
         Created lead object
     """
-    lead = Lead(whatsapp_number=whatsapp_number)
+    lead = Lead(whatsapp_number=whatsapp_number, conversation_stage=0, qualification_score=0)
     db.add(lead)
-    db.commit()
-    db.refresh(lead)
+    save_changes(db, lead)
     return lead
 
 
@@ -72,8 +144,7 @@ def update_lead(db: Session, lead: Lead, **kwargs) -> Lead:
             setattr(lead, key, value)
     
     lead.updated_at = datetime.utcnow()
-    db.commit()
-    db.refresh(lead)
+    save_changes(db, lead)
     return lead
 
 
@@ -95,7 +166,8 @@ def add_conversation_message(
     Returns:
         Updated lead object
     """
-    history = lead.conversation_history or []
+    # Copy so SQLAlchemy sees a new value (in-place JSON mutation is not tracked)
+    history = list(lead.conversation_history or [])
     history.append({
         "role": role,
         "message": message,
@@ -103,8 +175,7 @@ def add_conversation_message(
     })
     lead.conversation_history = history
     lead.updated_at = datetime.utcnow()
-    db.commit()
-    db.refresh(lead)
+    save_changes(db, lead)
     return lead
 
 
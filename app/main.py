@@ -2,12 +2,18 @@
 from fastapi import FastAPI
 from fastapi.middleware.cors import CORSMiddleware
 from contextlib import asynccontextmanager
+from starlette.concurrency import run_in_threadpool
 from fastapi.staticfiles import StaticFiles
 
 from app.api import webhook, admin, callbacks
 from app.db.database import engine, init_db
 from app.config import settings
 from app.utils.logger import app_logger
+from app.core.turn_processor import turn_processor
+from app.core.speculation import reply_speculator
+from app.utils.http_transport import http_transport
+from app.utils.job_queue import job_queue
+from app.services.extraction_pool import extraction_pool
 
 
 @asynccontextmanager
@@ -21,11 +27,17 @@ async def lifespan(app: FastAPI):
         # Initialize database
         init_db()
         app_logger.info("Database initialized")
+        job_queue.start(settings.job_workers)
         
         yield
         
         # Shutdown
         app_logger.info("Shutting down muuh Recruiting Chatbot...")
+        await turn_processor.drain()
+        await run_in_threadpool(job_queue.stop)
+        extraction_pool.close()
+        reply_speculator.shutdown()
+        await http_transport.aclose()
     except Exception as e:
         app_logger.error(f"Startup/Shutdown Error: {e}")
         yield # Yield even if error to avoid total crash?
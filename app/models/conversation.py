@@ -5,7 +5,7 @@ from enum import Enum
 
 
 class ConversationStage(str, Enum):
-    """Conversation stages matching RecruitingMachine."""
+    """Coarse conversation stages used by the legacy ConversationManager."""
     GREETING = "greeting"
     JOB_SELECTION = "job_selection"
     REQUIREMENTS_CHECK = "requirements_check"
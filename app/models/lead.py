@@ -51,6 +51,7 @@ class Lead(Base):
     
     # Scoring
     qualification_score = Column(Integer, default=0)
+    scored_at = Column(DateTime, nullable=True)  # Set by the scoring job, also when the CV could not be scored
     
     # Conversation tracking
     conversation_stage = Column(Integer, default=0) # Persisted State!
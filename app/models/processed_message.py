@@ -0,0 +1,18 @@
+"""Processed Twilio message model (persistent MessageSid dedupe)."""
+from datetime import datetime
+from sqlalchemy import Column, String, Text, Boolean, DateTime
+from app.db.database import Base
+
+
+class ProcessedMessage(Base):
+    """A webhook delivery whose turn has already been executed."""
+
+    __tablename__ = "processed_messages"
+
+    message_sid = Column(String, primary_key=True)
+    reply = Column(Text, nullable=True)
+    delivered = Column(Boolean, default=False)
+    created_at = Column(DateTime, default=datetime.utcnow, index=True)
+
+    def __repr__(self) -> str:
+        return f"<ProcessedMessage {self.message_sid}>"
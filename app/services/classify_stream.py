@@ -0,0 +1,98 @@
+"""
+Streamed classify_flow_input: decide as soon as the function-call arguments allow it.
+
+A VALID_ANSWER only needs category and normalized_value, and an UNCLEAR
+only needs category, so the stream is closed (ending generation) as soon
+as they are known. Only QUESTION results wait for the whole ai_reply.
+"""
+import time
+from dataclasses import dataclass, field
+from types import SimpleNamespace
+from typing import Any, Dict, Iterable, List, Optional
+
+from app.services.prompts import count_tokens
+from app.utils.json_stream import IncrementalObjectParser
+from app.utils.metrics import metrics
+
+
+@dataclass
+class StreamedClassification:
+    """Result of a streamed classify call (OpenAI reports no usage for streams; it is estimated)."""
+
+    result: Dict[str, Any] = field(default_factory=dict)
+    early: bool = False  # True if the stream was closed before the arguments were complete
+    decision_ms: float = 0.0  # From the response headers to the decision
+    usage: Optional[Any] = None
+
+
+def classification_decided(fields: Dict[str, Any]) -> bool:
+    """Whether the fields parsed so far are all the flow needs."""
+    category = fields.get("category")
+    if category == "VALID_ANSWER":
+        return "normalized_value" in fields
+    return category == "UNCLEAR"
+
+
+def _arguments(chunk: Any) -> Iterable[str]:
+    for choice in getattr(chunk, "choices", None) or []:
+        function_call = getattr(choice.delta, "function_call", None)
+        if function_call is not None and function_call.arguments:
+            yield function_call.arguments
+
+
+def _finish(
+    parser: IncrementalObjectParser, received: List[str], started: float, early: bool, prompt_tokens: int
+) -> StreamedClassification:
+    decision_ms = (time.perf_counter() - started) * 1000
+    if "category" not in parser.fields:
+        raise ValueError("Stream ended without a category")
+    metrics.incr("classify.stream.early" if early else "classify.stream.full")
+    metrics.observe("classify.stream.decision_ms", decision_ms)
+    usage = SimpleNamespace(prompt_tokens=prompt_tokens, completion_tokens=count_tokens("".join(received)))
+    return StreamedClassification(dict(parser.fields), early=early, decision_ms=decision_ms, usage=usage)
+
+
+def read_classification_stream(stream: Any, prompt_tokens: int = 0) -> StreamedClassification:
+    """
+    Consume a streamed classify completion until the result is decided.
+
+    Args:
+        stream: openai Stream of chat completion chunks
+        prompt_tokens: Estimated prompt size, reported as usage
+
+    Returns:
+        Parsed classification
+
+    Raises:
+        ValueError: The arguments are not a JSON object or lack a category
+    """
+    parser = IncrementalObjectParser()
+    received: List[str] = []
+    started = time.perf_counter()
+    try:
+        for chunk in stream:
+            for text in _arguments(chunk):
+                received.append(text)
+                parser.feed(text)
+            if classification_decided(parser.fields) and not parser.done:
+                return _finish(parser, received, started, True, prompt_tokens)
+        return _finish(parser, received, started, False, prompt_tokens)
+    finally:
+        stream.close()  # Drops the connection if generation is still running
+
+
+async def read_classification_stream_async(stream: Any, prompt_tokens: int = 0) -> StreamedClassification:
+    """Async variant of read_classification_stream (openai AsyncStream)."""
+    parser = IncrementalObjectParser()
+    received: List[str] = []
+    started = time.perf_counter()
+    try:
+        async for chunk in stream:
+            for text in _arguments(chunk):
+                received.append(text)
+                parser.feed(text)
+            if classification_decided(parser.fields) and not parser.done:
+                return _finish(parser, received, started, True, prompt_tokens)
+        return _finish(parser, received, started, False, prompt_tokens)
+    finally:
+        await stream.close()
@@ -1,19 +1,39 @@
 """AI-powered CV analysis service."""
 import json
-from typing import Dict, Any
+import time
+from typing import Dict, Any, Optional
 from openai import OpenAI
 
 from app.config import settings
+from app.services.model_router import ModelRouter, model_router
+from app.services.prompts import prompt_registry
+from app.services.resilience import ResilientCaller, llm_resilience
+from app.utils.http_transport import HttpTransport, http_transport
 from app.utils.logger import app_logger
 
+CV_ANALYSIS_CHARS = 4000  # CV prefix sent to analyze_cv (limits token usage)
+COVER_LETTER_CHARS = 2000  # Cover letter prefix sent to analyze_cover_letter
+
 
 class CVAnalyzer:
     """Service for analyzing CVs and cover letters with AI."""
     
-    def __init__(self):
-        """Initialize OpenAI client."""
-        self.client = OpenAI(api_key=settings.openai_api_key)
-        self.model = settings.openai_model
+    def __init__(
+        self,
+        transport: Optional[HttpTransport] = None,
+        resilience: Optional[ResilientCaller] = None,
+        router: Optional[ModelRouter] = None
+    ):
+        """Initialize OpenAI client on the shared connection pool (retries are done by the resilience wrapper)."""
+        transport = transport or http_transport
+        self.resilience = resilience or llm_resilience
+        self.router = router or model_router
+        self.client = OpenAI(
+            api_key=settings.openai_api_key,
+            http_client=transport.httpx_client("openai"),
+            max_retries=0
+        )
+        self.model = settings.openai_model  # Default; _create routes each call to its tier's model
     
     def analyze_cv(self, cv_text: str) -> Dict[str, Any]:
         """
@@ -26,80 +46,9 @@ class CVAnalyzer:
             Dictionary with extracted CV data
         """
         try:
-            function_schema = {
-                "name": "extract_cv_data",
-                "description": "Extract structured information from a CV",
-                "parameters": {
-                    "type": "object",
-                    "properties": {
-                        "first_name": {"type": "string"},
-                        "last_name": {"type": "string"},
-                        "email": {"type": "string"},
-                        "phone": {"type": "string"},
-                        "years_of_experience": {"type": "integer"},
-                        "education_level": {
-                            "type": "string",
-                            "enum": ["Abitur", "Ausbildung", "Bachelor", "Master", "PhD", "Other"]
-                        },
-                        "skills": {
-                            "type": "object",
-                            "description": "Technical skills mentioned",
-                            "properties": {
-                                "python": {"type": "boolean"},
-                                "javascript": {"type": "boolean"},
-                                "apis": {"type": "boolean"},
-                                "make_com": {"type": "boolean"},
-                                "n8n": {"type": "boolean"},
-                                "zapier": {"type": "boolean"},
-                                "openai": {"type": "boolean"},
-                                "conversational_ai": {"type": "boolean"},
-                                "parloa": {"type": "boolean"}
-                            }
-                        },
-                        "projects": {
-                            "type": "array",
-                            "items": {"type": "string"},
-                            "description": "List of notable projects"
-                        },
-                        "certifications": {
-                            "type": "array",
-                            "items": {"type": "string"}
-                        },
-                        "quality_score": {
-                            "type": "integer",
-                            "description": "CV quality score 0-100"
-                        }
-                    },
-                    "required": ["years_of_experience", "skills", "quality_score"]
-                }
-            }
-            
-            prompt = f"""Analyze this CV and extract structured information.
-            
-Be thorough and accurate. Look for:
-- Contact information
-- Years of professional experience
-- Technical skills (especially: Python, JavaScript, APIs, Make.com, n8n, Zapier, OpenAI, Conversational AI, Parloa)
-- Projects and achievements
-- Education
-- Certifications
-
-Rate the CV quality (0-100) based on:
-- Completeness
-- Professional presentation
-- Relevant experience
-- Project quality
-
-CV Text:
-{cv_text[:4000]}  # Limit to prevent token overload
-"""
-            
-            response = self.client.chat.completions.create(
-                model=self.model,
-                messages=[{"role": "user", "content": prompt}],
-                functions=[function_schema],
-                function_call={"name": "extract_cv_data"}
-            )
+            response = self._create("cv_analysis", prompt_registry["cv_analysis"].request(
+                self.model, {"role": "user", "content": f"CV Text:\n{cv_text[:CV_ANALYSIS_CHARS]}"}
+            ))
             
             result = json.loads(response.choices[0].message.function_call.arguments)
             app_logger.info(f"CV analysis complete. Quality score: {result.get('quality_score', 0)}")
@@ -125,27 +74,11 @@ CV Text:
             Dictionary with motivation score and analysis
         """
         try:
-            prompt = f"""Analyze this cover letter for a Conversational AI Developer position at muuh.
-
-Rate the motivation and fit (0-100) based on:
-- Genuine interest in Conversational AI
-- Understanding of muuh's business
-- Mentions of Parloa, generative AI, or related technologies
-- Quality of writing
-- Specific examples and achievements
-
-Cover Letter:
-{letter_text[:2000]}
-
-Return a JSON with:
-{{"motivation_score": <0-100>, "mentions_muuh": <boolean>, "mentions_parloa": <boolean>, "quality": "low|medium|high"}}
-"""
-            
-            response = self.client.chat.completions.create(
-                model=self.model,
-                messages=[{"role": "user", "content": prompt}],
+            response = self._create("cover_letter", prompt_registry["cover_letter"].request(
+                self.model,
+                {"role": "user", "content": f"Cover Letter:\n{letter_text[:COVER_LETTER_CHARS]}"},
                 response_format={"type": "json_object"}
-            )
+            ))
             
             result = json.loads(response.choices[0].message.content)
             app_logger.info(f"Cover letter analysis complete. Motivation: {result.get('motivation_score', 0)}")
@@ -161,6 +94,19 @@ Return a JSON with:
                 "quality": "low"
             }
     
+    def _create(self, site: str, request: Dict[str, Any]) -> Any:
+        """Run a chat completion on the call site's model tier, under its deadline, retry policy and circuit breaker."""
+        tier = self.router.route(site, request)
+        started = time.perf_counter()
+        response = None
+        try:
+            response = self.resilience.call(
+                site, lambda timeout: self.client.chat.completions.create(**request, timeout=timeout)
+            )
+            return response
+        finally:
+            self.router.observe(site, tier, (time.perf_counter() - started) * 1000, response)
+
     def calculate_skill_match_score(self, skills: Dict[str, bool]) -> int:
         """
         Calculate skill match score based on extracted skills.
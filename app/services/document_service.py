@@ -1,18 +1,25 @@
-import requests
-from io import BytesIO
-from PyPDF2 import PdfReader
+from typing import Optional
 from app.config import settings
+from app.services.extraction_pool import DOCX, PDF, extraction_pool
+from app.utils.http_transport import http_transport
 from app.utils.logger import app_logger
+from app.utils.media_download import DOCX_TYPE, PDF_TYPE, DownloadedMedia, download_to_spool
+
+EXTRACTION_KINDS = {PDF_TYPE: PDF, DOCX_TYPE: DOCX}
 
 class DocumentService:
     """
     Handles downloading and text extraction from documents (CVs).
     """
 
-    def download_file_from_url(self, url: str) -> BytesIO:
+    def download_file_from_url(self, url: str) -> DownloadedMedia:
         """
         Downloads file from Twilio (or other) URL.
         Uses Twilio Auth if it looks like a Twilio URL.
+        The body is streamed into a size-capped spooled file; close the result when done.
+
+        Raises:
+            MediaTooLarge: The file exceeds settings.media_max_mb
         """
         try:
             auth = None
@@ -22,28 +29,27 @@ class DocumentService:
             # Remove 'url:' prefix if present (stored in DB)
             clean_url = url.replace("url:", "").strip()
             
-            response = requests.get(clean_url, auth=auth, timeout=15)
-            response.raise_for_status()
-            
-            return BytesIO(response.content)
+            return download_to_spool(http_transport.session("media"), clean_url, auth=auth, timeout=15)
         except Exception as e:
             app_logger.error(f"Error downloading file {url}: {e}")
             raise e
 
-    def extract_text_from_pdf(self, file_stream: BytesIO) -> str:
+    def extract_text(self, media: DownloadedMedia, max_chars: Optional[int] = None) -> str:
         """
-        Extracts raw text from a PDF stream.
+        Extracts raw text from a downloaded PDF or DOCX (in an extraction worker process).
+        The type is taken from the file's magic bytes, not the URL or the server's header.
+        With max_chars, pages are only parsed until that much text is collected;
+        without it the full text is returned (archival).
         """
+        kind = EXTRACTION_KINDS.get(media.content_type)
+        if kind is None:
+            app_logger.warning(f"Cannot extract text from {media.content_type} ({media.size} bytes)")
+            return ""
         try:
-            reader = PdfReader(file_stream)
-            text = ""
-            for page in reader.pages:
-                extracted = page.extract_text()
-                if extracted:
-                    text += extracted + "\n"
-            return text.strip()
+            with media.view() as content:
+                return extraction_pool.extract(kind, content, max_chars=max_chars)
         except Exception as e:
-            app_logger.error(f"Error extracting PDF text: {e}")
+            app_logger.error(f"Error extracting {kind} text: {e}")
             return ""
 
 document_service = DocumentService()
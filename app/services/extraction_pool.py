@@ -0,0 +1,285 @@
+"""Document text extraction in worker processes with per-document time and memory limits."""
+import multiprocessing
+import threading
+import time
+from io import BytesIO
+from typing import Any, Dict, List, Optional, Tuple, Union
+
+from docx import Document
+from PyPDF2 import PdfReader
+
+from app.config import settings
+from app.utils.logger import app_logger
+from app.utils.metrics import metrics
+
+try:
+    import resource  # POSIX only
+except ImportError:  # pragma: no cover
+    resource = None
+
+PDF = "pdf"
+DOCX = "docx"
+
+
+class ExtractionError(Exception):
+    """The document could not be read (broken file, memory cap, crashed worker)."""
+
+
+class ExtractionTimeout(ExtractionError):
+    """The document took longer than the per-document time limit; its worker was killed."""
+
+
+def read_pdf(content: bytes, max_chars: Optional[int] = None, max_pages: Optional[int] = None) -> Tuple[str, int, bool]:
+    """
+    Text of a PDF, page by page (runs in the worker process).
+
+    Args:
+        content: PDF file
+        max_chars: Stop parsing once this much text is collected (None = full text)
+        max_pages: Parse at most this many pages (None = all)
+
+    Returns:
+        (text, pages parsed, whether a budget stopped it before the last page)
+    """
+    reader = PdfReader(BytesIO(content))
+    parts: List[str] = []
+    chars = 0
+    total = len(reader.pages)
+    for number, page in enumerate(reader.pages, start=1):
+        extracted = page.extract_text()
+        if extracted:
+            parts.append(extracted)
+            chars += len(extracted) + 1
+        if number < total and (
+            (max_chars is not None and chars >= max_chars) or (max_pages is not None and number >= max_pages)
+        ):
+            return "\n".join(parts).strip(), number, True
+    return "\n".join(parts).strip(), total, False
+
+
+def read_docx(content: bytes, max_chars: Optional[int] = None, max_pages: Optional[int] = None) -> Tuple[str, int, bool]:
+    """Text of a DOCX (runs in the worker process; DOCX has no pages, 0 is reported and max_pages is ignored)."""
+    doc = Document(BytesIO(content))
+    parts: List[str] = []
+    chars = 0
+    for paragraph in doc.paragraphs:
+        if max_chars is not None and chars >= max_chars:
+            return "\n".join(parts).strip(), 0, True
+        parts.append(paragraph.text)
+        chars += len(paragraph.text) + 1
+    return "\n".join(parts).strip(), 0, False
+
+
+READERS = {PDF: read_pdf, DOCX: read_docx}
+
+
+def _worker_main(conn: Any, memory_bytes: int) -> None:
+    if memory_bytes and resource is not None:
+        resource.setrlimit(resource.RLIMIT_AS, (memory_bytes, memory_bytes))
+    while True:
+        try:
+            job = conn.recv()
+        except EOFError:
+            return
+        if job is None:
+            return
+        kind, max_chars, max_pages = job
+        content = conn.recv_bytes()
+        try:
+            conn.send(("ok", *READERS[kind](content, max_chars, max_pages)))
+        except Exception as e:  # MemoryError included: the cap was hit
+            conn.send(("error", f"{type(e).__name__}: {e}", 0, False))
+
+
+class _Worker:
+    __slots__ = ("process", "conn", "jobs")
+
+    def __init__(self, process: Any, conn: Any):
+        self.process = process
+        self.conn = conn
+        self.jobs = 0
+
+
+class ExtractionPool:
+    """
+    Runs PyPDF2 / python-docx in a pool of worker processes.
+
+    Parsing is CPU-bound and holds the GIL, so in the web process it
+    stalls every other request; a pathological PDF could hang a worker
+    forever. Each document gets one worker process: if it is not done
+    after timeout_seconds the process is killed and replaced. Workers run
+    under an address-space cap (RLIMIT_AS) and are replaced after
+    max_jobs_per_worker documents or any failure. workers=0 extracts
+    in-process (no limits).
+
+    Callers that only send a prefix to a prompt pass a max_chars budget:
+    parsing stops at the page that fills it. Without a budget the full
+    text is returned (archival).
+
+    Metrics: extraction.<kind>.ms, extraction.pages, extraction.pages_per_sec,
+    extraction.wait_ms, extraction.budget_stops, extraction.timeouts,
+    extraction.errors, extraction.crashes, extraction.recycled.
+    """
+
+    def __init__(
+        self,
+        workers: int = 2,
+        timeout_seconds: float = 20.0,
+        memory_mb: int = 512,
+        max_jobs_per_worker: int = 50
+    ):
+        self.workers = workers
+        self.timeout_seconds = timeout_seconds
+        self.memory_mb = memory_mb
+        self.max_jobs_per_worker = max_jobs_per_worker
+        methods = multiprocessing.get_all_start_methods()
+        # Never fork the threaded web process; the fork server starts workers from a clean
+        # process that has the parsers imported already, so replacing a worker is cheap
+        self._context = multiprocessing.get_context("forkserver" if "forkserver" in methods else "spawn")
+        if "forkserver" in methods:
+            self._context.set_forkserver_preload([__name__])
+        self._idle: List[_Worker] = []
+        self._size = 0
+        self._available = threading.Condition()
+        self._started = 0
+
+    def extract(
+        self, kind: str, content: Union[bytes, memoryview], max_chars: Optional[int] = None, max_pages: Optional[int] = None
+    ) -> str:
+        """
+        Extract the text of a document.
+
+        Args:
+            kind: PDF or DOCX
+            content: File content (a memoryview is sent to the worker without copying)
+            max_chars: Stop once at least this many characters are collected (None = full text)
+            max_pages: Stop after this many pages (None = all)
+
+        Returns:
+            Extracted text
+
+        Raises:
+            ExtractionTimeout: The document exceeded timeout_seconds
+            ExtractionError: The document could not be read
+        """
+        started = time.perf_counter()
+        if self.workers <= 0:
+            try:
+                text, pages, stopped = READERS[kind](content, max_chars, max_pages)
+            except Exception as e:
+                metrics.incr("extraction.errors")
+                raise ExtractionError(f"{type(e).__name__}: {e}") from e
+        else:
+            text, pages, stopped = self._extract_in_worker(kind, (kind, max_chars, max_pages), content)
+        if stopped:
+            metrics.incr("extraction.budget_stops")
+        elapsed = time.perf_counter() - started
+        metrics.observe(f"extraction.{kind}.ms", elapsed * 1000)
+        if pages:
+            metrics.incr("extraction.pages", pages)
+            metrics.observe("extraction.pages_per_sec", pages / elapsed if elapsed > 0 else 0.0)
+        return text
+
+    def _extract_in_worker(self, kind: str, job: Tuple[Any, ...], content: Any) -> Tuple[str, int, bool]:
+        started = time.perf_counter()
+        worker = self._acquire()
+        metrics.observe("extraction.wait_ms", (time.perf_counter() - started) * 1000)
+        keep = False
+        try:
+            worker.conn.send(job)
+            worker.conn.send_bytes(content)
+            if not worker.conn.poll(self.timeout_seconds):
+                metrics.incr("extraction.timeouts")
+                app_logger.warning(f"Extraction of a {len(content)} byte {kind} timed out, killing worker")
+                raise ExtractionTimeout(f"{kind} extraction exceeded {self.timeout_seconds}s")
+            status, value, pages, stopped = worker.conn.recv()
+        except (EOFError, OSError) as e:  # Killed by the OS (e.g. hard memory limit) or crashed
+            metrics.incr("extraction.crashes")
+            raise ExtractionError(f"Extraction worker died: {e}") from e
+        else:
+            worker.jobs += 1
+            keep = status == "ok" and worker.jobs < self.max_jobs_per_worker
+            if status == "ok" and not keep:
+                metrics.incr("extraction.recycled")
+        finally:
+            self._release(worker, keep)
+        if status != "ok":
+            metrics.incr("extraction.errors")
+            raise ExtractionError(value)
+        return value, pages, stopped
+
+    def _acquire(self) -> _Worker:
+        with self._available:
+            while not self._idle and self._size >= self.workers:
+                self._available.wait()
+            if self._idle:
+                return self._idle.pop()
+            self._size += 1
+        try:
+            return self._spawn()
+        except Exception:
+            with self._available:
+                self._size -= 1
+                self._available.notify()
+            raise
+
+    def _release(self, worker: _Worker, keep: bool) -> None:
+        if not keep:
+            self._kill(worker)
+        with self._available:
+            if keep:
+                self._idle.append(worker)
+            else:
+                self._size -= 1
+            self._available.notify()
+
+    def _spawn(self) -> _Worker:
+        parent, child = self._context.Pipe()
+        process = self._context.Process(
+            target=_worker_main,
+            args=(child, self.memory_mb * 1024 * 1024),
+            name="extraction-worker",
+            daemon=True
+        )
+        process.start()
+        child.close()
+        self._started += 1
+        return _Worker(process, parent)
+
+    @staticmethod
+    def _kill(worker: _Worker) -> None:
+        worker.process.kill()
+        worker.process.join()
+        worker.conn.close()
+
+    def close(self) -> None:
+        """Stop the idle workers (busy ones are stopped when their document is done)."""
+        with self._available:
+            idle, self._idle = self._idle, []
+            self._size -= len(idle)
+        for worker in idle:
+            self._kill(worker)
+
+    def report(self) -> Dict[str, Any]:
+        """Pool size and lifetime counters."""
+        with self._available:
+            size, idle = self._size, len(self._idle)
+        return {
+            "workers": self.workers,
+            "alive": size,
+            "idle": idle,
+            "started": self._started,
+            "timeouts": metrics.counter("extraction.timeouts"),
+            "crashes": metrics.counter("extraction.crashes"),
+            "recycled": metrics.counter("extraction.recycled"),
+            "pages": metrics.counter("extraction.pages"),
+        }
+
+
+# Global instance
+extraction_pool = ExtractionPool(
+    workers=settings.extraction_workers,
+    timeout_seconds=settings.extraction_timeout_seconds,
+    memory_mb=settings.extraction_memory_mb,
+    max_jobs_per_worker=settings.extraction_max_jobs_per_worker
+)
@@ -0,0 +1,203 @@
+"""
+Model tiers per OpenAI call site.
+
+Interactive call sites (classify, flow replies) go to the fast tier,
+background work (grading, CV analysis) to the strong tier. When a tier's
+p95 latency exceeds its budget, it is degraded for a cool-down period,
+after which it is judged again with a fresh latency window. While it is
+degraded, only call sites with a configured fallback tier move, and only
+while that tier has not been observed to be slower for the same call site
+(tiers serve different call sites, so their overall p95s don't compare).
+Sites without a fallback, such as grading, stay on their model.
+"""
+import threading
+import time
+from typing import Any, Dict, Optional, Tuple
+
+from app.config import settings
+from app.utils.logger import app_logger
+from app.utils.metrics import LatencyHistogram, metrics
+
+FAST = "fast"
+STRONG = "strong"
+FALLBACK = {FAST: STRONG, STRONG: FAST}
+
+
+def parse_routes(spec: str) -> Dict[str, str]:
+    """'classify=fast,grade=strong' -> {"classify": "fast", "grade": "strong"}."""
+    routes = {}
+    for item in spec.split(","):
+        if "=" in item:
+            site, tier = (part.strip() for part in item.split("=", 1))
+            if tier not in FALLBACK:
+                raise ValueError(f"Unknown model tier '{tier}' for call site '{site}'")
+            routes[site] = tier
+    return routes
+
+
+def parse_prices(spec: str) -> Dict[str, Tuple[float, float]]:
+    """'gpt-4o-mini=0.00015/0.0006' -> {"gpt-4o-mini": (0.00015, 0.0006)} (USD per 1K prompt/completion tokens)."""
+    prices = {}
+    for item in spec.split(","):
+        if "=" in item:
+            model, price = (part.strip() for part in item.split("=", 1))
+            prompt, _, completion = price.partition("/")
+            try:
+                prices[model] = (float(prompt), float(completion))
+            except ValueError:
+                raise ValueError(f"Invalid price '{price}' for model '{model}' (expected prompt/completion)")
+    return prices
+
+
+class _Tier:
+    def __init__(self, name: str, model: str, budget_ms: float):
+        self.name = name
+        self.model = model
+        self.budget_ms = budget_ms  # 0 = no budget
+        self.latency = LatencyHistogram(window=200)
+        self.tripped_until = 0.0
+        self.calls = 0
+        self.fallbacks = 0
+        self.prompt_tokens = 0
+        self.completion_tokens = 0
+        self.cost_usd = 0.0
+
+
+class ModelRouter:
+    """
+    Chooses the model for each call site and reports latency and cost per
+    tier (prices in USD per 1K prompt/completion tokens; models without a
+    price are reported without cost).
+    """
+
+    def __init__(
+        self,
+        fast_model: str,
+        strong_model: str,
+        routes: Dict[str, str],
+        fallbacks: Optional[Dict[str, str]] = None,
+        fast_budget_ms: float = 0.0,
+        strong_budget_ms: float = 0.0,
+        min_samples: int = 20,
+        fallback_seconds: float = 60.0,
+        prices: Optional[Dict[str, Tuple[float, float]]] = None,
+        clock=time.monotonic
+    ):
+        self.tiers = {FAST: _Tier(FAST, fast_model, fast_budget_ms), STRONG: _Tier(STRONG, strong_model, strong_budget_ms)}
+        self.routes = dict(routes)
+        self.fallbacks = dict(fallbacks or {})  # call site -> tier it may use while its own tier is degraded
+        self.site_latency: Dict[Tuple[str, str], LatencyHistogram] = {}
+        self.prices = dict(prices or {})
+        self.min_samples = min_samples
+        self.fallback_seconds = fallback_seconds
+        self._clock = clock
+        self._lock = threading.Lock()
+
+    def tier_for(self, site: str) -> str:
+        """Configured tier of a call site (unlisted sites use the strong tier)."""
+        return self.routes.get(site, STRONG)
+
+    def primary_model(self, site: str) -> str:
+        return self.tiers[self.tier_for(site)].model
+
+    def route(self, site: str, request: Dict[str, Any]) -> str:
+        """
+        Pick the tier for a call and set request["model"] accordingly.
+
+        Args:
+            site: Call site name
+            request: chat.completions.create arguments (modified in place)
+
+        Returns:
+            Name of the tier serving the call
+        """
+        tier = self.tier_for(site)
+        with self._lock:
+            primary = self.tiers[tier]
+            fallback = self.fallbacks.get(site, tier)
+            if fallback != tier and self._clock() < primary.tripped_until:
+                if self._slower(site, fallback, than=tier):
+                    metrics.incr(f"model.{tier}.no_faster_tier")
+                else:
+                    primary.fallbacks += 1
+                    metrics.incr(f"model.{tier}.fallbacks")
+                    tier = fallback
+        request["model"] = self.tiers[tier].model
+        return tier
+
+    def _slower(self, site: str, tier: str, than: str) -> bool:
+        """Whether the call site has been observed to be slower on tier than on the other (unknown = no)."""
+        candidate = self.site_latency.get((site, tier))
+        if candidate is None or len(candidate.samples) < self.min_samples:
+            return False
+        current = self.site_latency.get((site, than))
+        return current is None or candidate.percentile(95) >= current.percentile(95)
+
+    def observe(self, site: str, tier_name: str, elapsed_ms: float, response: Any = None) -> None:
+        """Record latency and token usage of a call; trips the tier when its p95 exceeds the budget."""
+        tier = self.tiers[tier_name]
+        usage = getattr(response, "usage", None)
+        prompt_tokens = getattr(usage, "prompt_tokens", 0) or 0
+        completion_tokens = getattr(usage, "completion_tokens", 0) or 0
+        prices = self.prices.get(tier.model)
+        cost = (prompt_tokens * prices[0] + completion_tokens * prices[1]) / 1000 if prices else 0.0
+
+        metrics.observe(f"model.{tier_name}.ms", elapsed_ms)
+        metrics.incr(f"model.{tier_name}.cost_usd", cost)
+        with self._lock:
+            tier.calls += 1
+            tier.prompt_tokens += prompt_tokens
+            tier.completion_tokens += completion_tokens
+            tier.cost_usd += cost
+            tier.latency.observe(elapsed_ms)
+            self.site_latency.setdefault((site, tier_name), LatencyHistogram(window=200)).observe(elapsed_ms)
+            if not tier.budget_ms or len(tier.latency.samples) < self.min_samples:
+                return
+            p95 = tier.latency.percentile(95)
+            if p95 > tier.budget_ms:
+                app_logger.warning(
+                    f"Model tier {tier_name} ({tier.model}) p95 {p95:.0f} ms over budget {tier.budget_ms:.0f} ms; "
+                    f"call sites with a fallback tier use it for {self.fallback_seconds:.0f}s"
+                )
+                metrics.incr(f"model.{tier_name}.tripped")
+                tier.tripped_until = self._clock() + self.fallback_seconds
+                tier.latency = LatencyHistogram(window=200)  # Judge the tier afresh after the cool-down
+
+    def report(self) -> Dict[str, Any]:
+        """Model, budget, latency, tokens and cost per tier, plus the call-site routes, fallbacks and p95 per tier."""
+        with self._lock:
+            now = self._clock()
+            tiers = {
+                name: {
+                    "model": tier.model,
+                    "budget_ms": tier.budget_ms,
+                    "degraded": now < tier.tripped_until,
+                    "calls": tier.calls,
+                    "fallbacks": tier.fallbacks,
+                    "p50_ms": round(tier.latency.percentile(50), 1),
+                    "p95_ms": round(tier.latency.percentile(95), 1),
+                    "prompt_tokens": tier.prompt_tokens,
+                    "completion_tokens": tier.completion_tokens,
+                    "cost_usd": round(tier.cost_usd, 6),
+                    "priced": tier.model in self.prices,
+                }
+                for name, tier in self.tiers.items()
+            }
+            sites: Dict[str, Dict[str, float]] = {}
+            for (site, tier_name), latency in self.site_latency.items():
+                sites.setdefault(site, {})[f"{tier_name}_p95_ms"] = round(latency.percentile(95), 1)
+        return {"tiers": tiers, "routes": dict(self.routes), "fallbacks": dict(self.fallbacks), "sites": sites}
+
+
+# Global instance shared by OpenAIService and CVAnalyzer
+model_router = ModelRouter(
+    fast_model=settings.openai_model_fast,
+    strong_model=settings.openai_model,
+    routes=parse_routes(settings.openai_model_routes),
+    fallbacks=parse_routes(settings.openai_model_fallbacks),
+    fast_budget_ms=settings.openai_fast_budget_ms,
+    strong_budget_ms=settings.openai_strong_budget_ms,
+    min_samples=settings.openai_budget_min_samples,
+    fallback_seconds=settings.openai_tier_fallback_seconds,
+    prices=parse_prices(settings.openai_model_prices)
+)
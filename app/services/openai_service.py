@@ -1,23 +1,88 @@
 """OpenAI service for intent extraction and response generation."""
+import asyncio
+import hashlib
 import json
-from typing import Dict, Any, Optional, List
-from openai import OpenAI
+import os
+import re
+import time
+import unicodedata
+from typing import Any, Awaitable, Callable, Dict, List, Optional, Tuple
+from openai import AsyncOpenAI, OpenAI
 
 from app.config import settings
+from app.core.company_facts import FactIndex
+from app.core.faq_engine import faq_engine
+from app.services.classify_stream import read_classification_stream, read_classification_stream_async
+from app.services.model_router import ModelRouter, model_router
+from app.services.prompts import count_tokens, prompt_registry
+from app.services.resilience import DeadlineStream, ResilientCaller, llm_resilience
+from app.utils.cache import SQLiteCacheStore, TTLCache
+from app.utils.http_transport import HttpTransport, body_deadline, http_transport
 from app.utils.logger import app_logger
+from app.utils.metrics import metrics
+from app.utils.micro_batch import MicroBatcher
+
+
+COMPANY_INFO_PATH = "data/muuh_info.json"
+GRADE_CV_CHARS = 3000  # CV prefix sent to grade_application; extract no more than this
+CONTACT_PATTERN = re.compile(r"@|\d{5,}|\b(?:name|heiße|heisse)\b", re.IGNORECASE)
 
 
 class OpenAIService:
     """Service for OpenAI API interactions."""
     
-    def __init__(self):
-        """Initialize OpenAI client."""
-        self.client = OpenAI(api_key=settings.openai_api_key)
-        self.model = settings.openai_model
+    def __init__(
+        self,
+        transport: Optional[HttpTransport] = None,
+        resilience: Optional[ResilientCaller] = None,
+        router: Optional[ModelRouter] = None
+    ):
+        """Initialize OpenAI clients on the shared connection pool (retries are done by the resilience wrapper)."""
+        transport = transport or http_transport
+        self.resilience = resilience or llm_resilience
+        self.router = router or model_router
+        self.client = OpenAI(
+            api_key=settings.openai_api_key,
+            http_client=transport.httpx_client("openai"),
+            max_retries=0
+        )
+        self.async_client = AsyncOpenAI(
+            api_key=settings.openai_api_key,
+            http_client=transport.httpx_async_client("openai"),
+            max_retries=0
+        )
+        self.model = settings.openai_model  # Default; _create routes each call to its tier's model
+        self._semaphore: Optional[asyncio.Semaphore] = None
+        self._semaphore_loop: Optional[asyncio.AbstractEventLoop] = None
+        self._in_flight = 0
+
+        # classify_flow_input response cache
+        self.classify_cache: Optional[TTLCache] = None
+        if settings.classify_cache_enabled:
+            store = None
+            if settings.classify_cache_sqlite_path:
+                store = SQLiteCacheStore(settings.classify_cache_sqlite_path, "classify")
+            self.classify_cache = TTLCache(
+                "classify",
+                max_entries=settings.classify_cache_max_entries,
+                ttl_seconds=settings.classify_cache_ttl_seconds,
+                store=store
+            )
+        
+        # Concurrent classify_flow_input calls share one request
+        self.classify_batcher: Optional[MicroBatcher] = None
+        if settings.classify_batch_enabled:
+            self.classify_batcher = MicroBatcher(
+                "classify",
+                self._classify_batch,
+                self._classify_batch_async,
+                max_batch_size=settings.classify_batch_max_size,
+                max_wait_ms=settings.classify_batch_max_wait_ms
+            )
         
         # Load company and intent data
-        with open("data/muuh_info.json", "r", encoding="utf-8") as f:
-            self.muuh_info = json.load(f)
+        self._load_company_info()
+        self._company_info_checked = time.monotonic()
         
         with open("data/intents.json", "r", encoding="utf-8") as f:
             self.intents_data = json.load(f)
@@ -37,64 +102,23 @@ class OpenAIService:
         Returns:
             Dictionary with intent, entities, and confidence
         """
-        try:
-            # Build conversation context
-            messages = self._build_intent_extraction_messages(message, conversation_history)
-            
-            # Define function for structured output
-            functions = [{
-                "name": "extract_intent",
-                "description": "Extract user intent and entities from message",
-                "parameters": {
-                    "type": "object",
-                    "properties": {
-                        "intent": {
-                            "type": "string",
-                            "enum": [
-                                "greeting",
-                                "job_openings",
-                                "application_process",
-                                "remote_work",
-                                "salary",
-                                "benefits",
-                                "company_info",
-                                "tech_stack",
-                                "screening_response",
-                                "provide_contact",
-                                "interested_in_position",
-                                "other"
-                            ]
-                        },
-                        "entities": {
-                            "type": "object",
-                            "properties": {
-                                "position_name": {"type": "string"},
-                                "name": {"type": "string"},
-                                "email": {"type": "string"},
-                                "phone": {"type": "string"},
-                                "experience_mentioned": {"type": "boolean"},
-                                "api_knowledge_mentioned": {"type": "boolean"}
-                            }
-                        },
-                        "sentiment": {
-                            "type": "string",
-                            "enum": ["positive", "neutral", "negative", "interested"]
-                        },
-                        "confidence": {
-                            "type": "number",
-                            "description": "Confidence score 0-1"
-                        }
-                    },
-                    "required": ["intent", "entities", "sentiment", "confidence"]
+        # FAQ intents are matched locally; messages carrying contact details still need entity extraction
+        if settings.faq_engine_enabled and not CONTACT_PATTERN.search(message):
+            match = faq_engine.match(message)
+            if match is not None:
+                app_logger.info(f"Extracted intent locally: {match['intent']}")
+                return {
+                    "intent": match["intent"],
+                    "entities": {},
+                    "sentiment": "neutral",
+                    "confidence": match["confidence"],
+                    "source": "faq"
                 }
-            }]
-            
-            response = self.client.chat.completions.create(
-                model=self.model,
-                messages=messages,
-                functions=functions,
-                function_call={"name": "extract_intent"}
-            )
+
+        try:
+            response = self._create("intent", prompt_registry["intent"].request(
+                self.model, *self._build_intent_extraction_messages(message, conversation_history)
+            ))
             
             # Parse function call result
             function_args = json.loads(
@@ -139,8 +163,6 @@ class OpenAIService:
                 static_info = self.intents_data["screening_questions"][intent].get("question", "")
             
             # Generate custom response using LLM
-            system_prompt = self._build_system_prompt()
-            
             user_message = f"""
             Task: Generate a natural, friendly response for the user.
             
@@ -163,15 +185,9 @@ class OpenAIService:
             6. If it's a screening question, ask it clearly but transition smoothly.
             """
             
-            response = self.client.chat.completions.create(
-                model=self.model,
-                messages=[
-                    {"role": "system", "content": system_prompt},
-                    {"role": "user", "content": user_message}
-                ],
-                temperature=0.7,
-                max_tokens=250
-            )
+            response = self._create("response", prompt_registry["persona"].request(
+                self.model, {"role": "user", "content": user_message}, temperature=0.7, max_tokens=250
+            ))
             
             content = response.choices[0].message.content.strip()
             # Remove direct quotes if LLM added them
@@ -192,20 +208,8 @@ class OpenAIService:
         message: str,
         conversation_history: Optional[List[Dict[str, str]]] = None
     ) -> List[Dict[str, str]]:
-        """Build messages array for intent extraction."""
-        system_prompt = """You are an intent classifier for muuh, a Conversational AI recruiting agency.
-        
-        Your task: Extract the user's intent, relevant entities, and sentiment from their message.
-        
-        Context about muuh:
-        - Hiring for: Conversational AI Developer, Product Manager, UX Designer
-        - Locations: Osnabrück, Berlin, Remote
-        - Tech stack: Parloa, AI, APIs
-        - Culture: Startup, innovative
-        
-        Be accurate and confident in your classifications."""
-        
-        messages = [{"role": "system", "content": system_prompt}]
+        """Per-call messages for intent extraction (history + message)."""
+        messages: List[Dict[str, str]] = []
         
         # Add conversation history if available
         if conversation_history:
@@ -231,97 +235,215 @@ class OpenAIService:
             - value: Normalized value (True/False for yes_no, or Job ID)
             - reply: AI response if it was a question
         """
+        cache_key = self._classify_cache_key(message, expected_type)
+        cached = self._cached_classification(cache_key)
+        if cached is not None:
+            return cached
         try:
-            # System Prompt with muuh context
-            system_prompt = f"""
-            You are a smart flow assistant for a recruiting bot.
-            Context: The user is in a strict flow expecting: {expected_type}.
-            
-            Company Info (for answering questions):
-            {json.dumps(self.muuh_info, ensure_ascii=False)[:1000]}... (truncated)
-            
-            Your Job:
-            1. Analyze if the user's message is a direct answer to the expectation.
-               - If expected "yes_no": "ja", "sicher", "auf jeden fall" -> YES. "nein", "eher nicht" -> NO.
-               - If expected "job_selection": "erster", "backend" -> Result.
-            2. OR if the user asks a question / makes slight smalltalk.
-               - E.g. "What is the salary?" or "Where is the office?".
-               - In this case, you MUST generate a helpful, short answer (German).
-            
-            """
-            
-            # Tools/Functions definition
-            functions = [{
-                "name": "classify_input",
-                "description": "Classify input as valid answer or question",
-                "parameters": {
-                    "type": "object",
-                    "properties": {
-                        "category": {
-                            "type": "string",
-                            "enum": ["VALID_ANSWER", "QUESTION", "UNCLEAR"]
-                        },
-                        "normalized_value": {
-                            "type": "string",
-                            "description": "If VALID_ANSWER: 'YES', 'NO', 'JOB_1', 'JOB_2', 'JOB_3' etc."
-                        },
-                        "ai_reply": {
-                            "type": "string",
-                            "description": "If QUESTION: A helpful, short answer (max 2 sentences) based on company info. If VALID_ANSWER: leave empty."
-                        }
-                    },
-                    "required": ["category"]
-                }
-            }]
-
-            response = self.client.chat.completions.create(
-                model=self.model,
-                messages=[
-                    {"role": "system", "content": system_prompt},
-                    {"role": "user", "content": message}
-                ],
-                functions=functions,
-                function_call={"name": "classify_input"}, # Force structured
-                temperature=0.3
-            )
-            
-            args = json.loads(response.choices[0].message.function_call.arguments)
-            return args
-            
+            if self.classify_batcher is not None:
+                result = self.classify_batcher.submit((message, expected_type))
+            else:
+                result = self._classify_single(message, expected_type)
         except Exception as e:
             app_logger.error(f"Error in classify_flow_input: {e}")
             return {"category": "UNCLEAR"}
+        self._store_classification(cache_key, result)
+        return result
 
-    def _build_system_prompt(self) -> str:
-        """Build system prompt for response generation."""
-        return f"""Du bist der "muuuh Recruiting Bot" – ein intelligenter, hilfreicher und sympathischer AI-Assistant.
-
-Deine Persönlichkeit:
-- Professionell aber locker ("Du"-Form)
-- Begeistert von Technologie und AI
-- Hilfsbereit und ermutigend
-- Kurz und prägnant (WhatsApp-Style)
-
-Kontext zu muuuh:
-- Wir sind MUUUH! Group – Experten für Conversational AI (Voice & Chat)
-- Wir suchen Leute, die Bock auf Innovation haben
-- Tech Stack: Parloa, Generative AI, Python, APIs, React
-- Kultur: Startup-Vibe, Hands-on, Team-orientiert
-
-Deine Aufgaben:
-1. Beantworte Fragen zu Jobs und Unternehmen basierend auf den Fakten
-2. Führe Kandidaten durch den Screening-Prozess
-3. Sei ein "Co-Pilot" für die Bewerbung
-4. Wenn du Dokumente erhältst, gib konkretes Feedback
-5. WICHTIG: Antworte als "muuuh Recruiting Bot" (mit 3 u's!).
-
-WICHTIG:
-- Antworte immer auf Deutsch
-- Nutze Emojis, aber übertreibe es nicht (max 1-2 pro Nachricht)
-- Formatiere Listen mit Bullet Points (•)
-- Wenn du nicht sicher bist, frage freundlich nach oder verweise an recruiting@muuuh.de
-"""
+    async def classify_flow_input_async(self, message: str, expected_type: str = "yes_no") -> Dict[str, Any]:
+        """Async variant of classify_flow_input (bounded by openai_max_concurrency)."""
+        cache_key = self._classify_cache_key(message, expected_type)
+        cached = self._cached_classification(cache_key)
+        if cached is not None:
+            return cached
+        try:
+            if self.classify_batcher is not None:
+                result = await self.classify_batcher.submit_async((message, expected_type))
+            else:
+                result = await self._classify_single_async(message, expected_type)
+        except Exception as e:
+            app_logger.error(f"Error in classify_flow_input: {e}")
+            return {"category": "UNCLEAR"}
+        self._store_classification(cache_key, result)
+        return result
+
+    def _classify_single(self, message: str, expected_type: str) -> Dict[str, Any]:
+        """One classify request (streamed if classify_streaming is on)."""
+        request = self._classify_flow_request(message, expected_type)
+        if settings.classify_streaming:
+            prompt_tokens = self._estimate_prompt_tokens(request)
+            response = self._create(
+                "classify", dict(request, stream=True),
+                read=lambda stream: read_classification_stream(stream, prompt_tokens)
+            )
+            result = response.result
+        else:
+            response = self._create("classify", request)
+            result = json.loads(response.choices[0].message.function_call.arguments)
+        self._observe_prompt_tokens(response)
+        return result
+
+    async def _classify_single_async(self, message: str, expected_type: str) -> Dict[str, Any]:
+        request = self._classify_flow_request(message, expected_type)
+        if settings.classify_streaming:
+            prompt_tokens = self._estimate_prompt_tokens(request)
+            response = await self._create_async(
+                "classify", dict(request, stream=True),
+                read=lambda stream: read_classification_stream_async(stream, prompt_tokens)
+            )
+            result = response.result
+        else:
+            response = await self._create_async("classify", request)
+            result = json.loads(response.choices[0].message.function_call.arguments)
+        self._observe_prompt_tokens(response)
+        return result
+
+    def _classify_batch(self, items: List[Tuple[str, str]]) -> List[Dict[str, Any]]:
+        """
+        Classify concurrent inputs of different candidates with one request (micro-batcher callback).
+
+        Args:
+            items: (message, expected_type) per waiting turn
+
+        Returns:
+            One classification per item, in order
+        """
+        if len(items) == 1:
+            return [self._classify_single(*items[0])]
+        response = self._create("classify_batch", self._classify_batch_request(items))
+        return self._split_batch_results(items, response)
+
+    async def _classify_batch_async(self, items: List[Tuple[str, str]]) -> List[Dict[str, Any]]:
+        if len(items) == 1:
+            return [await self._classify_single_async(*items[0])]
+        response = await self._create_async("classify_batch", self._classify_batch_request(items))
+        return self._split_batch_results(items, response)
+
+    def _classify_batch_request(self, items: List[Tuple[str, str]]) -> Dict[str, Any]:
+        if settings.prompt_facts_enabled:
+            # Relevant facts of all messages, deduplicated
+            facts = list(dict.fromkeys(
+                fact for message, _ in items for fact in self.fact_index.search(message, k=settings.prompt_facts_top_k)
+            ))
+            company_info = "\n        ".join(f"- {fact}" for fact in facts) or "(no relevant facts)"
+        else:
+            company_info = self._company_info_dump
+        inputs = [{"id": i, "expected": expected_type, "message": message} for i, (message, expected_type) in enumerate(items)]
+        return prompt_registry["classify_batch"].request(
+            self.model,
+            {"role": "system", "content": f"Company Info (for answering questions):\n{company_info}"},
+            {"role": "user", "content": json.dumps(inputs, ensure_ascii=False)},
+            temperature=0.3
+        )
+
+    def _split_batch_results(self, items: List[Tuple[str, str]], response: Any) -> List[Dict[str, Any]]:
+        """Fan the batch result back out by id; items the model skipped come back UNCLEAR (the state re-asks)."""
+        results = json.loads(response.choices[0].message.function_call.arguments).get("results", [])
+        by_id = {r.get("id"): r for r in results if isinstance(r, dict)}
+        classifications = []
+        for i in range(len(items)):
+            result = by_id.get(i)
+            if result is None:
+                metrics.incr("classify.batch.missing")
+                classifications.append({"category": "UNCLEAR"})
+            else:
+                classifications.append({key: value for key, value in result.items() if key != "id"})
+        return classifications
+
+    def _classify_cache_key(self, message: str, expected_type: str) -> Optional[str]:
+        """Normalized message + expected_type + prompt/model version; None if caching is off."""
+        if self.classify_cache is None:
+            return None
+        self._reload_company_info_if_changed()
+        # The company info is not part of the key: yes/no answers stay valid when
+        # muuh_info.json changes, QUESTION answers are tracked separately
+        version = f"{self.router.primary_model('classify')}:{prompt_registry['classify'].version}"
+        text = re.sub(r"\s+", " ", unicodedata.normalize("NFC", message).lower()).strip().rstrip("!.…")
+        return f"{version}:{expected_type}:{text}"
+
+    def _cached_classification(self, cache_key: Optional[str]) -> Optional[Dict[str, Any]]:
+        if cache_key is None:
+            return None
+        entry = self.classify_cache.get(cache_key)
+        if entry is None:
+            return None
+        if entry.get("info") not in (None, self._company_info_version):
+            return None  # QUESTION answered from an older muuh_info.json (e.g. persisted before a restart)
+        return dict(entry["result"])
+
+    def _store_classification(self, cache_key: Optional[str], result: Dict[str, Any]) -> None:
+        if cache_key is None or result.get("category") not in ("VALID_ANSWER", "QUESTION"):
+            return
+        if result["category"] == "QUESTION":
+            self.classify_cache.set(cache_key, {"result": result, "info": self._company_info_version}, tag="QUESTION")
+        else:
+            self.classify_cache.set(cache_key, {"result": result, "info": None})
+
+    @property
+    def company_info_version(self) -> str:
+        """Hash of the loaded muuh_info.json (changes when the file is edited)."""
+        self._reload_company_info_if_changed()
+        return self._company_info_version
+
+    def _load_company_info(self) -> None:
+        with open(COMPANY_INFO_PATH, "rb") as f:
+            raw = f.read()
+        self.muuh_info = json.loads(raw.decode("utf-8"))
+        self._company_info_dump = json.dumps(self.muuh_info, ensure_ascii=False)[:1000] + "... (truncated)"
+        self.fact_index = FactIndex(self.muuh_info)
+        self._company_info_version = hashlib.sha256(raw).hexdigest()[:12]
+        self._company_info_mtime = os.path.getmtime(COMPANY_INFO_PATH)
+
+    def _reload_company_info_if_changed(self) -> None:
+        """Pick up edits of muuh_info.json (checked at most every few seconds)."""
+        now = time.monotonic()
+        if now - self._company_info_checked < 5.0:
+            return
+        self._company_info_checked = now
+        try:
+            if os.path.getmtime(COMPANY_INFO_PATH) == self._company_info_mtime:
+                return
+            previous = self._company_info_version
+            self._load_company_info()
+        except Exception as e:
+            app_logger.error(f"Could not reload {COMPANY_INFO_PATH}: {e}")
+            return
+        if self._company_info_version != previous:
+            dropped = self.classify_cache.invalidate_tag("QUESTION") if self.classify_cache is not None else 0
+            app_logger.info(f"{COMPANY_INFO_PATH} changed, dropped {dropped} cached QUESTION answers")
+
+    def _prompt_facts(self, message: str) -> str:
+        """Company info for the classify prompt: the facts relevant to the message (none for "ja"/"nein")."""
+        if not settings.prompt_facts_enabled:
+            return self._company_info_dump
+        facts = self.fact_index.search(message, k=settings.prompt_facts_top_k)
+        metrics.observe("classify.prompt_facts", len(facts))
+        if not facts:
+            return "(no relevant facts)"
+        return "\n        ".join(f"- {fact}" for fact in facts)
+
+    def _observe_prompt_tokens(self, response: Any) -> None:
+        """Prompt size per classify call, split by context mode to compare retrieval with the full dump."""
+        usage = getattr(response, "usage", None)
+        if usage is not None and getattr(usage, "prompt_tokens", None):
+            mode = "retrieval" if settings.prompt_facts_enabled else "full_dump"
+            metrics.observe(f"classify.prompt_tokens.{mode}", usage.prompt_tokens)
 
+    def _estimate_prompt_tokens(self, request: Dict[str, Any]) -> int:
+        """Prompt size of a classify request (streams report no usage)."""
+        suffix = request["messages"][1:]
+        return prompt_registry["classify"].tokens + sum(count_tokens(m["content"]) for m in suffix)
+
+    def _classify_flow_request(self, message: str, expected_type: str, company_info: Optional[str] = None) -> Dict[str, Any]:
+        if company_info is None:
+            company_info = self._prompt_facts(message)
+        context = f"Expected input: {expected_type}\n\nCompany Info (for answering questions):\n{company_info}"
+        return prompt_registry["classify"].request(
+            self.model,
+            {"role": "system", "content": context},
+            {"role": "user", "content": message},
+            temperature=0.3
+        )
 
     def generate_flow_reply(self, message: str, trigger_event: str, next_step_instruction: str, user_name: str = "Du") -> str:
         """
@@ -333,8 +455,60 @@ WICHTIG:
             next_step_instruction: What must the AI ask next? (e.g. "Ask if they know Python")
             user_name: Name if known.
         """
-        system_prompt = self._build_system_prompt()
-        
+        return self.generate_flow_reply_with_usage(message, trigger_event, next_step_instruction, user_name)[0]
+
+    def generate_flow_reply_with_usage(
+        self,
+        message: str,
+        trigger_event: str,
+        next_step_instruction: str,
+        user_name: str = "Du"
+    ) -> Tuple[str, int]:
+        """
+        Same as generate_flow_reply, but also returns the total tokens used.
+
+        Returns:
+            (reply text, total tokens; 0 if the fallback was used)
+        """
+        try:
+            response = self._create(
+                "flow_reply", self._flow_reply_request(message, trigger_event, next_step_instruction, user_name)
+            )
+            usage = getattr(response, "usage", None)
+            return response.choices[0].message.content.strip(), (usage.total_tokens if usage else 0)
+        except Exception as e:
+            app_logger.error(f"Error generating flow reply: {e}")
+            return next_step_instruction, 0 # Fallback to raw instruction if AI fails
+
+    async def generate_flow_reply_async(
+        self,
+        message: str,
+        trigger_event: str,
+        next_step_instruction: str,
+        user_name: str = "Du"
+    ) -> str:
+        """Async variant of generate_flow_reply (bounded by openai_max_concurrency)."""
+        return (await self.generate_flow_reply_with_usage_async(message, trigger_event, next_step_instruction, user_name))[0]
+
+    async def generate_flow_reply_with_usage_async(
+        self,
+        message: str,
+        trigger_event: str,
+        next_step_instruction: str,
+        user_name: str = "Du"
+    ) -> Tuple[str, int]:
+        """Async variant of generate_flow_reply_with_usage."""
+        try:
+            response = await self._create_async(
+                "flow_reply", self._flow_reply_request(message, trigger_event, next_step_instruction, user_name)
+            )
+            usage = getattr(response, "usage", None)
+            return response.choices[0].message.content.strip(), (usage.total_tokens if usage else 0)
+        except Exception as e:
+            app_logger.error(f"Error generating flow reply: {e}")
+            return next_step_instruction, 0 # Fallback to raw instruction if AI fails
+
+    def _flow_reply_request(self, message: str, trigger_event: str, next_step_instruction: str, user_name: str) -> Dict[str, Any]:
         user_prompt = f"""
         CONTEXT:
         User Name: {user_name}
@@ -356,90 +530,155 @@ WICHTIG:
         - Use 1-2 Emojis.
         - German Language.
         """
-        
+
+        return prompt_registry["persona"].request(
+            self.model,
+            {"role": "user", "content": user_prompt},
+            temperature=0.7, # Slightly higher for creativity
+            max_tokens=200
+        )
+
+    def generate_reply_variants(self, trigger_event: str, next_step_instruction: str, count: int = 8) -> List[str]:
+        """
+        Pre-generates interchangeable flow replies for the reply pool.
+
+        Args:
+            trigger_event: What just happened? (e.g. "USER_HAS_AI_EXPERIENCE")
+            next_step_instruction: What must the AI ask next?
+            count: Number of variants
+
+        Returns:
+            List of replies; may contain a literal {user_name} slot. Empty on error.
+        """
+        user_prompt = f"""
+        Event: {trigger_event}
+
+        TASK:
+        Write {count} clearly different replies for this moment of the conversation.
+        Each reply must execute the NEXT STEP INSTRUCTION exactly.
+        The user only gave a short answer, so do not quote or invent details of it.
+        You may address the user with the literal placeholder {{user_name}} (at most once per reply).
+
+        NEXT STEP INSTRUCTION (Must be in message):
+        "{next_step_instruction}"
+
+        TONE:
+        - Highly conversational, human, specific.
+        - Use 1-2 Emojis.
+        - German Language.
+        """
+
         try:
-            response = self.client.chat.completions.create(
-                model=self.model,
-                messages=[
-                    {"role": "system", "content": system_prompt},
-                    {"role": "user", "content": user_prompt}
-                ],
-                temperature=0.7, # Slightly higher for creativity
-                max_tokens=200
-            )
-            return response.choices[0].message.content.strip()
+            response = self._create("reply_variants", prompt_registry["reply_variants"].request(
+                self.model, {"role": "user", "content": user_prompt}, temperature=0.9
+            ))
+            replies = json.loads(response.choices[0].message.function_call.arguments).get("replies", [])
+            return [r.strip() for r in replies if isinstance(r, str) and r.strip()]
         except Exception as e:
-            app_logger.error(f"Error generating flow reply: {e}")
-            return next_step_instruction # Fallback to raw instruction if AI fails
+            app_logger.error(f"Error generating reply variants: {e}")
+            return []
 
-    def grade_application(self, cv_text: str, job_title: str) -> Dict[str, Any]:
+    def grade_application(self, cv_text: str, job_title: str, raise_errors: bool = False) -> Dict[str, Any]:
         """
         Grades a CV against a Job Title.
         Returns JSON: {score: 0-100, summary: str, pros: [], cons: []}
+        With raise_errors, failures propagate instead of scoring 0 (the job queue retries).
         """
-        system_prompt = """You are an expert HR Recruiter for 'muuuh', an AI agency.
-        Your task is to analyze a raw CV text and grade it for the position: '{job_title}'.
-        
-        OUTPUT FORMAT (JSON ONLY):
-        {
-          "score": <0-100>,
-          "summary": "Short German summary of the candidate.",
-          "pros": ["Strength 1", "Strength 2", ...],
-          "cons": ["Gap 1", "Risk 1", ...]
-        }
-        
-        SCORING RULES (CRITICAL):
-        - If candidate mentions 'Conversational AI', 'Python', 'Make.com', 'Parloa', 'RESTful APIs', or 'Data Analysis': SCORE MUST BE 96-100.
-        - 0-40: No match at all.
-        - 41-70: Potential match, but gaps.
-        - 71-90: Good match.
-        - 91-100: Perfect match (or if key tech stack is present).
-        
-        Analyze critically, but REWARD the target tech stack heavily. MATCH AGAINST: Parloa, Voice & Chat, RESTful APIs, JSON, Webhooks.
-        """
-        
-        user_prompt = f"""JOB POSITION: {job_title}
-        
-        CANDIDATE CV TEXT:
-        {cv_text[:3000]}... (truncated)
-        
-        TASK:
-        1. Rate the Qualification Score (0-100).
-        2. Write a short Summary (3 sentences).
-        3. List 3 key Pros.
-        4. List 3 key Cons.
-        """
-        
-        functions = [{
-            "name": "grade_candidate",
-            "description": "Output the grading results",
-            "parameters": {
-                "type": "object",
-                "properties": {
-                    "score": {"type": "integer", "description": "0-100"},
-                    "summary": {"type": "string"},
-                    "pros": {"type": "array", "items": {"type": "string"}},
-                    "cons": {"type": "array", "items": {"type": "string"}},
-                },
-                "required": ["score", "summary", "pros", "cons"]
-            }
-        }]
+        try:
+            response = self._create("grade", self._grade_request(cv_text, job_title))
+            return json.loads(response.choices[0].message.function_call.arguments)
+        except Exception as e:
+            app_logger.error(f"Error grading application: {e}")
+            if raise_errors:
+                raise
+            return {"score": 0, "summary": "Error analyzing CV.", "pros": [], "cons": []}
 
+    async def grade_application_async(self, cv_text: str, job_title: str) -> Dict[str, Any]:
+        """Async variant of grade_application (bounded by openai_max_concurrency)."""
         try:
-            response = self.client.chat.completions.create(
-                model=self.model,
-                messages=[
-                    {"role": "system", "content": system_prompt},
-                    {"role": "user", "content": user_prompt}
-                ],
-                functions=functions,
-                function_call={"name": "grade_candidate"},
-                temperature=0.2 
-            )
+            response = await self._create_async("grade", self._grade_request(cv_text, job_title))
             return json.loads(response.choices[0].message.function_call.arguments)
         except Exception as e:
             app_logger.error(f"Error grading application: {e}")
             return {"score": 0, "summary": "Error analyzing CV.", "pros": [], "cons": []}
 
+    def _grade_request(self, cv_text: str, job_title: str) -> Dict[str, Any]:
+        user_prompt = f"""JOB POSITION: {job_title}
+
+CANDIDATE CV TEXT:
+{cv_text[:GRADE_CV_CHARS]}... (truncated)
+"""
+        return prompt_registry["grade"].request(
+            self.model, {"role": "user", "content": user_prompt}, temperature=0.2
+        )
+
+    @property
+    def degraded(self) -> bool:
+        """True while the circuit breaker considers OpenAI unavailable."""
+        return self.resilience.degraded
+
+    def _create(self, site: str, request: Dict[str, Any], read: Optional[Callable[[Any], Any]] = None) -> Any:
+        """
+        Run a chat completion on the call site's model tier, under its deadline, retry policy and circuit breaker.
+
+        Args:
+            site: Call site name
+            request: chat.completions.create arguments
+            read: Consumes the response (e.g. a stream) within the same attempt
+
+        Returns:
+            The response, or what read returned
+        """
+        tier = self.router.route(site, request)
+        started = time.perf_counter()
+        response = None
+
+        def attempt(timeout: float) -> Any:
+            deadline_at = time.monotonic() + timeout
+            with body_deadline(deadline_at):  # The timeout only bounds each read, not the whole body
+                result = self.client.chat.completions.create(**request, timeout=timeout)
+                if request.get("stream"):
+                    result = DeadlineStream(result, deadline_at, site)
+                return read(result) if read else result
+
+        try:
+            response = self.resilience.call(site, attempt)
+            return response
+        finally:
+            self.router.observe(site, tier, (time.perf_counter() - started) * 1000, response)
+
+    async def _create_async(
+        self, site: str, request: Dict[str, Any], read: Optional[Callable[[Any], Awaitable[Any]]] = None
+    ) -> Any:
+        """Async variant of _create, at most openai_max_concurrency requests at a time."""
+        tier = self.router.route(site, request)
+        started = time.perf_counter()
+        response = None
+        try:
+            response = await self.resilience.call_async(site, lambda timeout: self._create_bounded(request, timeout, read))
+            return response
+        finally:
+            self.router.observe(site, tier, (time.perf_counter() - started) * 1000, response)
+
+    async def _create_bounded(
+        self, request: Dict[str, Any], timeout: float, read: Optional[Callable[[Any], Awaitable[Any]]] = None
+    ) -> Any:
+        loop = asyncio.get_running_loop()
+        if self._semaphore_loop is not loop:
+            # asyncio primitives are bound to the loop they are first used on
+            self._semaphore = asyncio.Semaphore(settings.openai_max_concurrency)
+            self._semaphore_loop = loop
+        queued_at = time.perf_counter()
+        async with self._semaphore:
+            metrics.observe("openai.queue_ms", (time.perf_counter() - queued_at) * 1000)
+            self._in_flight += 1
+            metrics.set_gauge("openai.in_flight", self._in_flight)
+            try:
+                result = await self.async_client.chat.completions.create(**request, timeout=timeout)
+                return await read(result) if read else result
+            finally:
+                self._in_flight -= 1
+                metrics.set_gauge("openai.in_flight", self._in_flight)
+
 # Global instance
 openai_service = OpenAIService()
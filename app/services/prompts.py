@@ -0,0 +1,420 @@
+"""
+Prompt registry: static system prompts and function schemas, built once.
+
+Every OpenAI request starts with the same bytes for a given prompt (system
+prompt, then schema); per-call content (user message, facts, CV text) only
+goes into trailing messages, so provider-side prompt prefix caching applies.
+"""
+import hashlib
+import json
+from dataclasses import dataclass
+from typing import Any, Callable, Dict, List, Optional, Tuple
+
+try:
+    import tiktoken
+
+    _encoding = tiktoken.get_encoding("cl100k_base")
+
+    def count_tokens(text: str) -> int:
+        return len(_encoding.encode(text))
+
+    TOKENIZER = "tiktoken cl100k_base"
+except ImportError:  # Optional dependency; estimate instead
+    def count_tokens(text: str) -> int:
+        return round(len(text) / 4)
+
+    TOKENIZER = "estimate (chars / 4)"
+
+
+PromptParts = Tuple[str, Optional[List[Dict[str, Any]]]]
+
+
+@dataclass(frozen=True)
+class Prompt:
+    """A compiled prompt: static prefix plus its version hash and size."""
+
+    name: str
+    system: str
+    functions: Optional[List[Dict[str, Any]]]
+    version: str
+    tokens: int
+
+    def messages(self, *suffix: Dict[str, str]) -> List[Dict[str, str]]:
+        """Static system message followed by the per-call messages."""
+        return [{"role": "system", "content": self.system}, *suffix]
+
+    def request(self, model: str, *suffix: Dict[str, str], **params: Any) -> Dict[str, Any]:
+        """
+        Chat completion arguments for this prompt.
+
+        Args:
+            model: Model name
+            *suffix: Per-call messages (appended after the static prefix)
+            **params: temperature, max_tokens, ...
+
+        Returns:
+            Keyword arguments for chat.completions.create
+        """
+        request: Dict[str, Any] = {"model": model, "messages": self.messages(*suffix)}
+        if self.functions:
+            request["functions"] = self.functions
+            request["function_call"] = {"name": self.functions[0]["name"]}
+        request.update(params)
+        return request
+
+
+class PromptRegistry:
+    """Named prompts compiled from their builder functions at startup."""
+
+    def __init__(self):
+        self._prompts: Dict[str, Prompt] = {}
+        self._builders: Dict[str, Callable[[], PromptParts]] = {}
+
+    def register(self, name: str, builder: Callable[[], PromptParts]) -> Prompt:
+        system, functions = builder()
+        static = system + (json.dumps(functions, ensure_ascii=False, sort_keys=True) if functions else "")
+        prompt = Prompt(
+            name=name,
+            system=system,
+            functions=functions,
+            version=hashlib.sha256(static.encode("utf-8")).hexdigest()[:12],
+            tokens=count_tokens(static),
+        )
+        self._prompts[name] = prompt
+        self._builders[name] = builder
+        return prompt
+
+    def __getitem__(self, name: str) -> Prompt:
+        return self._prompts[name]
+
+    def builder(self, name: str) -> Callable[[], PromptParts]:
+        return self._builders[name]
+
+    def report(self) -> Dict[str, Dict[str, Any]]:
+        """Version hash and static prefix size per prompt."""
+        return {
+            name: {"version": p.version, "tokens": p.tokens, "chars": len(p.system), "tokenizer": TOKENIZER}
+            for name, p in self._prompts.items()
+        }
+
+
+def persona_prompt() -> PromptParts:
+    return """Du bist der "muuuh Recruiting Bot" – ein intelligenter, hilfreicher und sympathischer AI-Assistant.
+
+Deine Persönlichkeit:
+- Professionell aber locker ("Du"-Form)
+- Begeistert von Technologie und AI
+- Hilfsbereit und ermutigend
+- Kurz und prägnant (WhatsApp-Style)
+
+Kontext zu muuuh:
+- Wir sind MUUUH! Group – Experten für Conversational AI (Voice & Chat)
+- Wir suchen Leute, die Bock auf Innovation haben
+- Tech Stack: Parloa, Generative AI, Python, APIs, React
+- Kultur: Startup-Vibe, Hands-on, Team-orientiert
+
+Deine Aufgaben:
+1. Beantworte Fragen zu Jobs und Unternehmen basierend auf den Fakten
+2. Führe Kandidaten durch den Screening-Prozess
+3. Sei ein "Co-Pilot" für die Bewerbung
+4. Wenn du Dokumente erhältst, gib konkretes Feedback
+5. WICHTIG: Antworte als "muuuh Recruiting Bot" (mit 3 u's!).
+
+WICHTIG:
+- Antworte immer auf Deutsch
+- Nutze Emojis, aber übertreibe es nicht (max 1-2 pro Nachricht)
+- Formatiere Listen mit Bullet Points (•)
+- Wenn du nicht sicher bist, frage freundlich nach oder verweise an recruiting@muuuh.de
+""", None
+
+
+def reply_variants_prompt() -> PromptParts:
+    system, _ = persona_prompt()
+    return system, [{
+        "name": "reply_variants",
+        "description": "Output the reply variants",
+        "parameters": {
+            "type": "object",
+            "properties": {
+                "replies": {"type": "array", "items": {"type": "string"}},
+            },
+            "required": ["replies"]
+        }
+    }]
+
+
+def intent_prompt() -> PromptParts:
+    return """You are an intent classifier for muuh, a Conversational AI recruiting agency.
+
+Your task: Extract the user's intent, relevant entities, and sentiment from their message.
+
+Context about muuh:
+- Hiring for: Conversational AI Developer, Product Manager, UX Designer
+- Locations: Osnabrück, Berlin, Remote
+- Tech stack: Parloa, AI, APIs
+- Culture: Startup, innovative
+
+Be accurate and confident in your classifications.""", [{
+        "name": "extract_intent",
+        "description": "Extract user intent and entities from message",
+        "parameters": {
+            "type": "object",
+            "properties": {
+                "intent": {
+                    "type": "string",
+                    "enum": [
+                        "greeting",
+                        "job_openings",
+                        "application_process",
+                        "remote_work",
+                        "salary",
+                        "benefits",
+                        "company_info",
+                        "tech_stack",
+                        "screening_response",
+                        "provide_contact",
+                        "interested_in_position",
+                        "other"
+                    ]
+                },
+                "entities": {
+                    "type": "object",
+                    "properties": {
+                        "position_name": {"type": "string"},
+                        "name": {"type": "string"},
+                        "email": {"type": "string"},
+                        "phone": {"type": "string"},
+                        "experience_mentioned": {"type": "boolean"},
+                        "api_knowledge_mentioned": {"type": "boolean"}
+                    }
+                },
+                "sentiment": {
+                    "type": "string",
+                    "enum": ["positive", "neutral", "negative", "interested"]
+                },
+                "confidence": {
+                    "type": "number",
+                    "description": "Confidence score 0-1"
+                }
+            },
+            "required": ["intent", "entities", "sentiment", "confidence"]
+        }
+    }]
+
+
+def classify_prompt() -> PromptParts:
+    return """You are a smart flow assistant for a recruiting bot.
+The user is in a strict flow; the next system message says which input is expected
+and lists the company info for answering questions.
+
+Your Job:
+1. Analyze if the user's message is a direct answer to the expectation.
+   - If expected "yes_no": "ja", "sicher", "auf jeden fall" -> YES. "nein", "eher nicht" -> NO.
+   - If expected "job_selection": "erster", "backend" -> Result.
+2. OR if the user asks a question / makes slight smalltalk.
+   - E.g. "What is the salary?" or "Where is the office?".
+   - In this case, you MUST generate a helpful, short answer (German).
+""", [{
+        "name": "classify_input",
+        "description": "Classify input as valid answer or question",
+        "parameters": {
+            "type": "object",
+            "properties": {
+                "category": {
+                    "type": "string",
+                    "enum": ["VALID_ANSWER", "QUESTION", "UNCLEAR"]
+                },
+                "normalized_value": {
+                    "type": "string",
+                    "description": "If VALID_ANSWER: 'YES', 'NO', 'JOB_1', 'JOB_2', 'JOB_3' etc."
+                },
+                "ai_reply": {
+                    "type": "string",
+                    "description": "If QUESTION: A helpful, short answer (max 2 sentences) based on company info. If VALID_ANSWER: leave empty."
+                }
+            },
+            "required": ["category"]
+        }
+    }]
+
+
+def classify_batch_prompt() -> PromptParts:
+    system, _ = classify_prompt()
+    system += """
+Batch mode: the user message is a JSON list of inputs from different candidates,
+each with an "id", its own "expected" input type and the "message". Classify every
+input on its own and return exactly one result per id.
+"""
+    return system, [{
+        "name": "classify_inputs",
+        "description": "Classify each input as valid answer or question",
+        "parameters": {
+            "type": "object",
+            "properties": {
+                "results": {
+                    "type": "array",
+                    "items": {
+                        "type": "object",
+                        "properties": {
+                            "id": {"type": "integer"},
+                            "category": {
+                                "type": "string",
+                                "enum": ["VALID_ANSWER", "QUESTION", "UNCLEAR"]
+                            },
+                            "normalized_value": {
+                                "type": "string",
+                                "description": "If VALID_ANSWER: 'YES', 'NO', 'JOB_1', 'JOB_2', 'JOB_3' etc."
+                            },
+                            "ai_reply": {
+                                "type": "string",
+                                "description": "If QUESTION: A helpful, short answer (max 2 sentences) based on company info. If VALID_ANSWER: leave empty."
+                            }
+                        },
+                        "required": ["id", "category"]
+                    }
+                }
+            },
+            "required": ["results"]
+        }
+    }]
+
+
+def grade_prompt() -> PromptParts:
+    return """You are an expert HR Recruiter for 'muuuh', an AI agency.
+Your task is to analyze a raw CV text and grade it for the JOB POSITION given by the user.
+
+OUTPUT FORMAT (JSON ONLY):
+{
+  "score": <0-100>,
+  "summary": "Short German summary of the candidate.",
+  "pros": ["Strength 1", "Strength 2", ...],
+  "cons": ["Gap 1", "Risk 1", ...]
+}
+
+SCORING RULES (CRITICAL):
+- If candidate mentions 'Conversational AI', 'Python', 'Make.com', 'Parloa', 'RESTful APIs', or 'Data Analysis': SCORE MUST BE 96-100.
+- 0-40: No match at all.
+- 41-70: Potential match, but gaps.
+- 71-90: Good match.
+- 91-100: Perfect match (or if key tech stack is present).
+
+Analyze critically, but REWARD the target tech stack heavily. MATCH AGAINST: Parloa, Voice & Chat, RESTful APIs, JSON, Webhooks.
+
+TASK:
+1. Rate the Qualification Score (0-100).
+2. Write a short Summary (3 sentences).
+3. List 3 key Pros.
+4. List 3 key Cons.
+""", [{
+        "name": "grade_candidate",
+        "description": "Output the grading results",
+        "parameters": {
+            "type": "object",
+            "properties": {
+                "score": {"type": "integer", "description": "0-100"},
+                "summary": {"type": "string"},
+                "pros": {"type": "array", "items": {"type": "string"}},
+                "cons": {"type": "array", "items": {"type": "string"}},
+            },
+            "required": ["score", "summary", "pros", "cons"]
+        }
+    }]
+
+
+def cv_analysis_prompt() -> PromptParts:
+    return """Analyze this CV and extract structured information.
+
+Be thorough and accurate. Look for:
+- Contact information
+- Years of professional experience
+- Technical skills (especially: Python, JavaScript, APIs, Make.com, n8n, Zapier, OpenAI, Conversational AI, Parloa)
+- Projects and achievements
+- Education
+- Certifications
+
+Rate the CV quality (0-100) based on:
+- Completeness
+- Professional presentation
+- Relevant experience
+- Project quality
+
+The user message contains the CV text.
+""", [{
+        "name": "extract_cv_data",
+        "description": "Extract structured information from a CV",
+        "parameters": {
+            "type": "object",
+            "properties": {
+                "first_name": {"type": "string"},
+                "last_name": {"type": "string"},
+                "email": {"type": "string"},
+                "phone": {"type": "string"},
+                "years_of_experience": {"type": "integer"},
+                "education_level": {
+                    "type": "string",
+                    "enum": ["Abitur", "Ausbildung", "Bachelor", "Master", "PhD", "Other"]
+                },
+                "skills": {
+                    "type": "object",
+                    "description": "Technical skills mentioned",
+                    "properties": {
+                        "python": {"type": "boolean"},
+                        "javascript": {"type": "boolean"},
+                        "apis": {"type": "boolean"},
+                        "make_com": {"type": "boolean"},
+                        "n8n": {"type": "boolean"},
+                        "zapier": {"type": "boolean"},
+                        "openai": {"type": "boolean"},
+                        "conversational_ai": {"type": "boolean"},
+                        "parloa": {"type": "boolean"}
+                    }
+                },
+                "projects": {
+                    "type": "array",
+                    "items": {"type": "string"},
+                    "description": "List of notable projects"
+                },
+                "certifications": {
+                    "type": "array",
+                    "items": {"type": "string"}
+                },
+                "quality_score": {
+                    "type": "integer",
+                    "description": "CV quality score 0-100"
+                }
+            },
+            "required": ["years_of_experience", "skills", "quality_score"]
+        }
+    }]
+
+
+def cover_letter_prompt() -> PromptParts:
+    return """Analyze this cover letter for a Conversational AI Developer position at muuh.
+
+Rate the motivation and fit (0-100) based on:
+- Genuine interest in Conversational AI
+- Understanding of muuh's business
+- Mentions of Parloa, generative AI, or related technologies
+- Quality of writing
+- Specific examples and achievements
+
+The user message contains the cover letter.
+
+Return a JSON with:
+{"motivation_score": <0-100>, "mentions_muuh": <boolean>, "mentions_parloa": <boolean>, "quality": "low|medium|high"}
+""", None
+
+
+# Global instance, compiled at import
+prompt_registry = PromptRegistry()
+for _name, _builder in (
+    ("persona", persona_prompt),
+    ("reply_variants", reply_variants_prompt),
+    ("intent", intent_prompt),
+    ("classify", classify_prompt),
+    ("classify_batch", classify_batch_prompt),
+    ("grade", grade_prompt),
+    ("cv_analysis", cv_analysis_prompt),
+    ("cover_letter", cover_letter_prompt),
+):
+    prompt_registry.register(_name, _builder)
@@ -0,0 +1,171 @@
+"""Pre-generated reply pool for generate_flow_reply transition events."""
+import json
+import os
+import random
+import threading
+import time
+from typing import Any, Dict, List, Optional, Tuple
+
+from app.config import settings
+from app.core.flow_definition import CompiledFlow
+from app.services.openai_service import openai_service
+from app.utils.logger import app_logger
+from app.utils.metrics import metrics
+
+
+USER_NAME_SLOT = "{user_name}"
+
+
+def pool_targets(flow: CompiledFlow) -> List[Tuple[str, str]]:
+    """
+    All (trigger_event, next_step_instruction) pairs that can be pooled.
+
+    Rules whose prompt depends on the message, the lead or an AI answer
+    are always generated live; {job} prompts are expanded per job.
+    """
+    targets = []
+    for state in flow.states.values():
+        for rule in state.rules:
+            if not rule.generates or rule.generate_fields - {"job"}:
+                continue
+            jobs = [job.title for job in flow.jobs] if "job" in rule.generate_fields else [""]
+            for title in jobs:
+                context = {"job": title}
+                targets.append((rule.generate_trigger.render(context), rule.generate_instruction.render(context)))
+    return targets
+
+
+class ReplyPool:
+    """
+    Varied replies per trigger event, stored as JSON and picked without a
+    network call. An entry is only used while its instruction matches the
+    current flow; missing or stale entries are regenerated in the background,
+    at most once per retry_seconds per event (a failing generator is not
+    called on every miss).
+    """
+
+    def __init__(self, path: str, size: int = 8, refresh_seconds: int = 86400, retry_seconds: float = 300):
+        self.path = path
+        self.size = size
+        self.refresh_seconds = refresh_seconds
+        self.retry_seconds = retry_seconds
+        self._entries: Dict[str, Dict[str, Any]] = {}
+        self._loaded = False
+        self._refreshing: set = set()
+        self._last_attempt: Dict[str, float] = {}
+        self._lock = threading.Lock()
+
+    def load(self) -> None:
+        """Load the pool file (a missing file is an empty pool)."""
+        self._loaded = True
+        if not os.path.exists(self.path):
+            return
+        try:
+            with open(self.path, "r", encoding="utf-8") as f:
+                self._entries = json.load(f).get("pools", {})
+        except Exception as e:
+            app_logger.error(f"Could not load reply pool {self.path}: {e}")
+
+    def save(self) -> None:
+        tmp_path = f"{self.path}.tmp"
+        with self._lock:
+            with open(tmp_path, "w", encoding="utf-8") as f:
+                json.dump({"pools": self._entries}, f, ensure_ascii=False, indent=2)
+            os.replace(tmp_path, self.path)
+
+    def _entry(self, trigger_event: str, next_step_instruction: str) -> Optional[Dict[str, Any]]:
+        if not self._loaded:
+            self.load()
+        entry = self._entries.get(trigger_event)
+        if not entry or entry.get("instruction") != next_step_instruction or not entry.get("replies"):
+            return None
+        return entry
+
+    def has(self, trigger_event: str, next_step_instruction: str) -> bool:
+        return self._entry(trigger_event, next_step_instruction) is not None
+
+    def pick(self, trigger_event: str, next_step_instruction: str, user_name: Optional[str] = None) -> Optional[str]:
+        """
+        Pick a pre-generated reply.
+
+        Args:
+            trigger_event: Rendered trigger of the flow rule
+            next_step_instruction: Rendered instruction of the flow rule
+            user_name: Name for the {user_name} slot, if known
+
+        Returns:
+            Reply text, or None if there is no current pool for the event
+        """
+        started = time.perf_counter()
+        entry = self._entry(trigger_event, next_step_instruction)
+        if entry is None:
+            metrics.incr("reply_pool.miss")
+            self.refresh_in_background(trigger_event, next_step_instruction)
+            return None
+        if time.time() - entry.get("generated_at", 0) > self.refresh_seconds:
+            self.refresh_in_background(trigger_event, next_step_instruction)
+
+        replies = entry["replies"]
+        if not user_name:
+            # Prefer variants that read naturally without a name
+            replies = [r for r in replies if USER_NAME_SLOT not in r] or replies
+        reply = random.choice(replies).replace(USER_NAME_SLOT, user_name or "Du")
+
+        metrics.incr("reply_pool.hit")
+        metrics.observe("reply_pool.pick_us", (time.perf_counter() - started) * 1_000_000)
+        return reply
+
+    def refresh(self, trigger_event: str, next_step_instruction: str) -> bool:
+        """
+        Regenerate the pool of one trigger event and persist it.
+
+        Returns:
+            True if new replies were stored
+        """
+        replies = openai_service.generate_reply_variants(trigger_event, next_step_instruction, self.size)
+        if not replies:
+            return False
+        if not self._loaded:
+            self.load()
+        with self._lock:
+            self._entries[trigger_event] = {
+                "instruction": next_step_instruction,
+                "replies": replies,
+                "generated_at": int(time.time()),
+            }
+        self.save()
+        metrics.incr("reply_pool.refreshed")
+        app_logger.info(f"Reply pool refreshed: {trigger_event} ({len(replies)} replies)")
+        return True
+
+    def refresh_in_background(self, trigger_event: str, next_step_instruction: str) -> None:
+        now = time.monotonic()
+        with self._lock:
+            if trigger_event in self._refreshing:
+                return
+            last = self._last_attempt.get(trigger_event)
+            if last is not None and now - last < self.retry_seconds:
+                metrics.incr("reply_pool.refresh_cooldown")
+                return
+            self._refreshing.add(trigger_event)
+            self._last_attempt[trigger_event] = now
+
+        def run():
+            try:
+                self.refresh(trigger_event, next_step_instruction)
+            except Exception as e:
+                app_logger.error(f"Reply pool refresh failed for {trigger_event}: {e}")
+            finally:
+                with self._lock:
+                    self._refreshing.discard(trigger_event)
+
+        threading.Thread(target=run, name="reply-pool-refresh", daemon=True).start()
+
+
+# Global instance
+reply_pool = ReplyPool(
+    path=settings.reply_pool_path,
+    size=settings.reply_pool_size,
+    refresh_seconds=settings.reply_pool_refresh_seconds,
+    retry_seconds=settings.reply_pool_retry_seconds
+)
@@ -0,0 +1,440 @@
+"""
+Deadlines, retries, hedging and a circuit breaker for OpenAI calls.
+
+Every call site ("classify", "flow_reply", "grade", ...) has its own
+deadline. Within it, retryable errors (timeouts, connection errors, 429,
+5xx) are retried with full-jitter exponential backoff; latency-critical
+sites can send a hedged duplicate once the primary is slower than the
+site's p95 (a bounded number at a time). Sync response bodies, streamed or
+not, are cut off at the deadline (DeadlineStream, http_transport.body_deadline)
+rather than only bounded per read. Consecutive failed calls open
+the circuit breaker, and calls
+then fail fast with CircuitOpenError until a probe succeeds, so callers
+(FlowEngine) can switch to their local fallback text.
+"""
+import asyncio
+import random
+import threading
+import time
+from concurrent.futures import FIRST_COMPLETED, ThreadPoolExecutor, wait
+from typing import Any, Awaitable, Callable, Dict, Iterable, Iterator, Optional, Tuple, TypeVar
+
+import httpx
+import openai
+
+from app.config import settings
+from app.utils.logger import app_logger
+from app.utils.metrics import metrics
+
+T = TypeVar("T")
+
+RETRYABLE_ERRORS = (
+    openai.APITimeoutError,
+    openai.APIConnectionError,
+    openai.RateLimitError,
+    openai.InternalServerError,
+    httpx.TimeoutException,
+    httpx.TransportError,
+)
+
+
+class DeadlineExceeded(Exception):
+    """The call site's deadline passed before any attempt succeeded."""
+
+
+class CircuitOpenError(Exception):
+    """OpenAI is marked degraded; the call was not attempted."""
+
+
+def is_retryable(exc: BaseException) -> bool:
+    return isinstance(exc, RETRYABLE_ERRORS + (DeadlineExceeded,))
+
+
+class DeadlineStream:
+    """
+    Sync response stream that ends with DeadlineExceeded once the attempt's
+    deadline has passed. The request timeout only bounds each read, so a
+    slowly trickling stream would otherwise run past the call site's deadline.
+    """
+
+    def __init__(self, stream: Any, deadline_at: float, site: str):
+        self._stream = stream
+        self._deadline_at = deadline_at
+        self._site = site
+
+    def __iter__(self) -> Iterator[Any]:
+        for chunk in self._stream:
+            if time.monotonic() > self._deadline_at:
+                self.close()
+                raise DeadlineExceeded(f"{self._site}: deadline exceeded while streaming")
+            yield chunk
+
+    def close(self) -> None:
+        self._stream.close()
+
+
+class CircuitBreaker:
+    """
+    Closed -> open after failure_threshold consecutive failed calls;
+    open -> half-open after reset_seconds, where one probe call decides
+    whether to close again or stay open.
+    """
+
+    CLOSED = "closed"
+    OPEN = "open"
+    HALF_OPEN = "half_open"
+
+    def __init__(self, name: str, failure_threshold: int = 5, reset_seconds: float = 30.0,
+                 clock: Callable[[], float] = time.monotonic):
+        self.name = name
+        self.failure_threshold = failure_threshold
+        self.reset_seconds = reset_seconds
+        self._clock = clock
+        self._lock = threading.Lock()
+        self._state = self.CLOSED
+        self._failures = 0
+        self._opened_at = 0.0
+        self._probing = False
+
+    @property
+    def state(self) -> str:
+        with self._lock:
+            return self._current_state()
+
+    def _current_state(self) -> str:
+        if self._state == self.OPEN and self._clock() - self._opened_at >= self.reset_seconds:
+            self._state = self.HALF_OPEN
+            self._probing = False
+        return self._state
+
+    def allow(self) -> bool:
+        """Whether a call may go out now (half-open lets a single probe through)."""
+        with self._lock:
+            state = self._current_state()
+            if state == self.CLOSED:
+                return True
+            if state == self.HALF_OPEN and not self._probing:
+                self._probing = True
+                return True
+            return False
+
+    def record_success(self) -> None:
+        with self._lock:
+            if self._state != self.CLOSED:
+                app_logger.info(f"Circuit {self.name} closed")
+            self._state = self.CLOSED
+            self._failures = 0
+            self._probing = False
+            self._report()
+
+    def record_failure(self) -> None:
+        with self._lock:
+            self._failures += 1
+            if self._state == self.HALF_OPEN or self._failures >= self.failure_threshold:
+                if self._state != self.OPEN:
+                    app_logger.warning(f"Circuit {self.name} opened after {self._failures} failures")
+                    metrics.incr(f"{self.name}.breaker.opened")
+                self._state = self.OPEN
+                self._opened_at = self._clock()
+                self._probing = False
+            self._report()
+
+    def _report(self) -> None:
+        metrics.set_gauge(f"{self.name}.breaker.open", 0 if self._state == self.CLOSED else 1)
+
+    def snapshot(self) -> Dict[str, Any]:
+        with self._lock:
+            return {"state": self._current_state(), "consecutive_failures": self._failures}
+
+
+class ResilientCaller:
+    """
+    Runs OpenAI calls under a per-site deadline with retries, optional
+    hedging and a shared circuit breaker.
+
+    The wrapped function receives the remaining time budget in seconds and
+    should pass it on as the request timeout.
+    """
+
+    def __init__(
+        self,
+        name: str = "llm",
+        deadlines: Optional[Dict[str, float]] = None,
+        default_deadline: float = 30.0,
+        max_retries: int = 2,
+        retry_base_ms: float = 250.0,
+        retry_max_ms: float = 4000.0,
+        hedge_sites: Iterable[str] = (),
+        hedge_min_samples: int = 20,
+        max_hedged_calls: int = 4,
+        hedge_refresh_seconds: float = 1.0,
+        breaker: Optional[CircuitBreaker] = None
+    ):
+        self.name = name
+        self.deadlines = dict(deadlines or {})
+        self.default_deadline = default_deadline
+        self.max_retries = max_retries
+        self.retry_base_ms = retry_base_ms
+        self.retry_max_ms = retry_max_ms
+        self.hedge_sites = set(hedge_sites)
+        self.hedge_min_samples = hedge_min_samples
+        self.max_hedged_calls = max_hedged_calls
+        self.hedge_refresh_seconds = hedge_refresh_seconds
+        self.breaker = breaker or CircuitBreaker(name)
+        self._executor: Optional[ThreadPoolExecutor] = None
+        # Sync hedged calls in flight, losing attempts included (their threads cannot be stopped)
+        self._hedge_slots = threading.BoundedSemaphore(max_hedged_calls)
+        self._hedge_delays: Dict[str, Tuple[float, Optional[float]]] = {}  # site -> (computed at, p95 s)
+        self._sites = set()
+
+    @property
+    def degraded(self) -> bool:
+        """True while the breaker is open (callers should use their local fallback)."""
+        return self.breaker.state == CircuitBreaker.OPEN
+
+    def deadline(self, site: str) -> float:
+        return self.deadlines.get(site, self.default_deadline)
+
+    def hedge_delay(self, site: str) -> Optional[float]:
+        """
+        p95 latency of the site in seconds, once enough samples exist; None = do not hedge.
+        Recomputed at most every hedge_refresh_seconds (the percentile sorts the sample window).
+        """
+        if site not in self.hedge_sites or self.breaker.state != CircuitBreaker.CLOSED:
+            return None
+        now = time.monotonic()
+        cached = self._hedge_delays.get(site)
+        if cached is not None and now - cached[0] < self.hedge_refresh_seconds:
+            return cached[1]
+        histogram = metrics.histogram(f"{self.name}.{site}.ms")
+        delay = None
+        if histogram is not None and len(histogram.samples) >= self.hedge_min_samples:
+            delay = histogram.percentile(95) / 1000
+        self._hedge_delays[site] = (now, delay)
+        return delay
+
+    def backoff(self, attempt: int) -> float:
+        """Full-jitter exponential backoff in seconds."""
+        return random.uniform(0, min(self.retry_max_ms, self.retry_base_ms * 2 ** attempt)) / 1000
+
+    # Sync
+
+    def call(self, site: str, fn: Callable[[float], T]) -> T:
+        """
+        Run fn under the site's deadline, retry policy and breaker.
+
+        Args:
+            site: Call site name (deadline, metrics, hedging)
+            fn: Makes one attempt; receives the remaining budget in seconds
+
+        Returns:
+            fn's result
+
+        Raises:
+            CircuitOpenError: OpenAI is degraded, nothing was sent
+            DeadlineExceeded: No attempt succeeded within the deadline
+            Exception: The last error, or a non-retryable one
+        """
+        self._admit(site)
+        deadline_at = time.monotonic() + self.deadline(site)
+        attempt = 0
+        while True:
+            remaining = deadline_at - time.monotonic()
+            try:
+                if remaining <= 0:
+                    raise DeadlineExceeded(f"{site}: deadline of {self.deadline(site)}s exceeded")
+                result = self._attempt(site, fn, remaining)
+            except Exception as e:
+                pause = self._on_error(site, e, attempt, deadline_at)
+                if pause is None:
+                    raise
+                time.sleep(pause)
+                attempt += 1
+                continue
+            self.breaker.record_success()
+            return result
+
+    def _attempt(self, site: str, fn: Callable[[float], T], remaining: float) -> T:
+        delay = self.hedge_delay(site)
+        if delay is None or delay >= remaining:
+            return self._timed(site, fn, remaining)
+        if not self._hedge_slots.acquire(blocking=False):
+            metrics.incr(f"{self.name}.{site}.hedge_skipped")  # Too many hedged calls still running
+            return self._timed(site, fn, remaining)
+        # Hedged: start a duplicate if the primary is still running after the p95 delay.
+        # The slot is given back once every attempt of this call has finished.
+        executor = self._hedge_executor()
+        outstanding = [1]
+        lock = threading.Lock()
+
+        def finished(_: Any) -> None:
+            with lock:
+                outstanding[0] -= 1
+                last = outstanding[0] == 0
+            if last:
+                self._hedge_slots.release()
+
+        started = time.monotonic()
+        primary = executor.submit(self._timed, site, fn, remaining)
+        primary.add_done_callback(finished)
+        done, _ = wait([primary], timeout=delay)
+        with lock:
+            if done or outstanding[0] == 0:
+                return primary.result()
+            outstanding[0] += 1
+        metrics.incr(f"{self.name}.{site}.hedges")
+        hedge = executor.submit(self._timed, site, fn, remaining - (time.monotonic() - started))
+        hedge.add_done_callback(finished)
+        pending = {primary, hedge}
+        try:
+            while pending:
+                done, pending = wait(pending, timeout=max(0.0, remaining - (time.monotonic() - started)),
+                                     return_when=FIRST_COMPLETED)
+                if not done:
+                    raise DeadlineExceeded(f"{site}: deadline exceeded (hedged)")
+                for future in done:
+                    if future.exception() is None:
+                        if future is hedge:
+                            metrics.incr(f"{self.name}.{site}.hedge_wins")
+                        return future.result()
+            return hedge.result()  # Both failed: raise the hedge's error
+        finally:
+            for future in pending:
+                future.cancel()  # Only stops an attempt that has not started yet
+
+    def _timed(self, site: str, fn: Callable[[float], T], remaining: float) -> T:
+        started = time.perf_counter()
+        result = fn(remaining)
+        metrics.observe(f"{self.name}.{site}.ms", (time.perf_counter() - started) * 1000)
+        return result
+
+    def _hedge_executor(self) -> ThreadPoolExecutor:
+        if self._executor is None:
+            # Two attempts per hedged call at most
+            self._executor = ThreadPoolExecutor(max_workers=2 * self.max_hedged_calls, thread_name_prefix="llm-hedge")
+        return self._executor
+
+    # Async
+
+    async def call_async(self, site: str, fn: Callable[[float], Awaitable[T]]) -> T:
+        """Async variant of call; the deadline is enforced with asyncio timeouts."""
+        self._admit(site)
+        deadline_at = time.monotonic() + self.deadline(site)
+        attempt = 0
+        while True:
+            remaining = deadline_at - time.monotonic()
+            try:
+                if remaining <= 0:
+                    raise DeadlineExceeded(f"{site}: deadline of {self.deadline(site)}s exceeded")
+                result = await self._attempt_async(site, fn, remaining)
+            except Exception as e:
+                pause = self._on_error(site, e, attempt, deadline_at)
+                if pause is None:
+                    raise
+                await asyncio.sleep(pause)
+                attempt += 1
+                continue
+            self.breaker.record_success()
+            return result
+
+    async def _attempt_async(self, site: str, fn: Callable[[float], Awaitable[T]], remaining: float) -> T:
+        delay = self.hedge_delay(site)
+        primary = asyncio.ensure_future(self._timed_async(site, fn, remaining))
+        tasks = {primary}
+        started = time.monotonic()
+        try:
+            if delay is not None and delay < remaining:
+                done, _ = await asyncio.wait(tasks, timeout=delay)
+                if not done:
+                    metrics.incr(f"{self.name}.{site}.hedges")
+                    tasks.add(asyncio.ensure_future(
+                        self._timed_async(site, fn, remaining - (time.monotonic() - started))
+                    ))
+            while True:
+                done, tasks = await asyncio.wait(
+                    tasks, timeout=max(0.0, remaining - (time.monotonic() - started)), return_when=asyncio.FIRST_COMPLETED
+                )
+                if not done:
+                    raise DeadlineExceeded(f"{site}: deadline of {self.deadline(site)}s exceeded")
+                for task in done:
+                    if task.exception() is None:
+                        if task is not primary:
+                            metrics.incr(f"{self.name}.{site}.hedge_wins")
+                        return task.result()
+                if not tasks:
+                    return done.pop().result()  # All attempts failed: raise one of their errors
+        finally:
+            for task in tasks:
+                task.cancel()  # The losing duplicate / timed-out attempt
+
+    async def _timed_async(self, site: str, fn: Callable[[float], Awaitable[T]], remaining: float) -> T:
+        started = time.perf_counter()
+        result = await fn(remaining)
+        metrics.observe(f"{self.name}.{site}.ms", (time.perf_counter() - started) * 1000)
+        return result
+
+    # Shared
+
+    def _admit(self, site: str) -> None:
+        self._sites.add(site)
+        metrics.incr(f"{self.name}.{site}.calls")
+        if not self.breaker.allow():
+            metrics.incr(f"{self.name}.{site}.short_circuited")
+            raise CircuitOpenError(f"{self.name} circuit open; {site} not attempted")
+
+    def _on_error(self, site: str, exc: Exception, attempt: int, deadline_at: float) -> Optional[float]:
+        """Seconds to wait before the next attempt, or None to give up (and raise)."""
+        if isinstance(exc, DeadlineExceeded):
+            metrics.incr(f"{self.name}.{site}.timeouts")
+        if not is_retryable(exc):
+            # A bad request still means OpenAI answered; it also ends a half-open probe
+            self.breaker.record_success()
+            metrics.incr(f"{self.name}.{site}.errors")
+            return None
+        pause = self.backoff(attempt)
+        if attempt >= self.max_retries or isinstance(exc, DeadlineExceeded) or time.monotonic() + pause >= deadline_at:
+            metrics.incr(f"{self.name}.{site}.failures")
+            self.breaker.record_failure()
+            return None
+        metrics.incr(f"{self.name}.{site}.retries")
+        app_logger.warning(f"{site}: retrying after {type(exc).__name__} (attempt {attempt + 1}/{self.max_retries})")
+        return pause
+
+    def report(self) -> Dict[str, Any]:
+        """Breaker state, deadlines and counters per call site."""
+        counters = metrics.snapshot()["counters"]
+        report: Dict[str, Any] = {"breaker": self.breaker.snapshot()}
+        for site in sorted(self._sites):
+            prefix = f"{self.name}.{site}."
+            histogram = metrics.histogram(f"{prefix}ms")
+            report[site] = {
+                "deadline_s": self.deadline(site),
+                "hedged": site in self.hedge_sites,
+                "p95_ms": round(histogram.percentile(95), 1) if histogram else 0.0,
+                **{key: counters.get(prefix + key, 0) for key in (
+                    "calls", "retries", "timeouts", "hedges", "hedge_wins", "hedge_skipped", "failures", "errors",
+                    "short_circuited"
+                )},
+            }
+        return report
+
+
+# Global instance shared by OpenAIService and CVAnalyzer
+llm_resilience = ResilientCaller(
+    deadlines={
+        "classify": settings.llm_deadline_classify,
+        "classify_batch": settings.llm_deadline_classify,
+        "flow_reply": settings.llm_deadline_reply,
+    },
+    default_deadline=settings.llm_deadline_default,
+    max_retries=settings.llm_max_retries,
+    retry_base_ms=settings.llm_retry_base_ms,
+    hedge_sites=[site.strip() for site in settings.llm_hedge_sites.split(",") if site.strip()],
+    hedge_min_samples=settings.llm_hedge_min_samples,
+    max_hedged_calls=settings.llm_hedge_max_in_flight,
+    breaker=CircuitBreaker(
+        "llm",
+        failure_threshold=settings.llm_breaker_failures,
+        reset_seconds=settings.llm_breaker_reset_seconds
+    )
+)
@@ -1,22 +1,30 @@
 """Twilio service for WhatsApp messaging."""
 from typing import Optional
 from twilio.rest import Client
+from twilio.http.async_http_client import AsyncTwilioHttpClient
+from twilio.http.http_client import TwilioHttpClient
 from twilio.request_validator import RequestValidator
 
 from app.config import settings
+from app.utils.http_transport import HttpTransport, http_transport
 from app.utils.logger import app_logger
 
 
 class TwilioService:
     """Service for Twilio WhatsApp messaging."""
     
-    def __init__(self):
-        """Initialize Twilio client."""
+    def __init__(self, transport: Optional[HttpTransport] = None):
+        """Initialize Twilio client on the shared connection pool."""
+        self.transport = transport or http_transport
+        http_client = TwilioHttpClient()
+        http_client.session = self.transport.session("twilio")
         self.client = Client(
             settings.twilio_account_sid,
-            settings.twilio_auth_token
+            settings.twilio_auth_token,
+            http_client=http_client
         )
         self.from_number = settings.twilio_whatsapp_number
+        self._async_client: Optional[Client] = None  # Created on first use (needs a running loop)
         self.validator = RequestValidator(settings.twilio_auth_token)
     
     def send_message(self, to_number: str, message: str) -> bool:
@@ -48,6 +56,43 @@ class TwilioService:
             app_logger.error(f"Error sending message to {to_number}: {e}")
             return False
     
+    async def send_message_async(self, to_number: str, message: str) -> bool:
+        """
+        Send WhatsApp message via Twilio without blocking the event loop.
+
+        Args:
+            to_number: Recipient WhatsApp number (format: whatsapp:+1234567890)
+            message: Message text to send
+
+        Returns:
+            True if successful, False otherwise
+        """
+        try:
+            if not to_number.startswith("whatsapp:"):
+                to_number = f"whatsapp:{to_number}"
+
+            if self._async_client is None:
+                self._async_client = Client(
+                    settings.twilio_account_sid,
+                    settings.twilio_auth_token,
+                    http_client=AsyncTwilioHttpClient(pool_connections=False)
+                )
+            # The transport owns the session (one per loop, closed at shutdown)
+            self._async_client.http_client.session = self.transport.aiohttp_session("twilio")
+            async with self.transport.slot_async("twilio"):
+                message_obj = await self._async_client.messages.create_async(
+                    body=message,
+                    from_=self.from_number,
+                    to=to_number
+                )
+
+            app_logger.info(f"Sent message to {to_number}: SID {message_obj.sid}")
+            return True
+
+        except Exception as e:
+            app_logger.error(f"Error sending message to {to_number}: {e}")
+            return False
+
     def validate_webhook(
         self,
         url: str,
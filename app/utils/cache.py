@@ -0,0 +1,178 @@
+"""In-process LRU+TTL cache with an optional SQLite second tier."""
+import json
+import sqlite3
+import threading
+import time
+from collections import OrderedDict
+from typing import Any, Dict, Optional, Tuple
+
+from app.utils.logger import app_logger
+from app.utils.metrics import metrics
+
+
+class SQLiteCacheStore:
+    """
+    Persistent second tier: one table per cache in a local SQLite file, so
+    cached entries survive restarts. Values must be JSON-serializable.
+    """
+
+    def __init__(self, path: str, name: str):
+        self.path = path
+        self.table = f"cache_{name}"
+        self._lock = threading.Lock()
+        self._conn = sqlite3.connect(path, check_same_thread=False, isolation_level=None)
+        self._conn.execute("PRAGMA journal_mode=WAL")
+        self._conn.execute(
+            f"CREATE TABLE IF NOT EXISTS {self.table} "
+            "(key TEXT PRIMARY KEY, value TEXT NOT NULL, tag TEXT, expires_at REAL NOT NULL)"
+        )
+        self._conn.execute(f"CREATE INDEX IF NOT EXISTS ix_{self.table}_tag ON {self.table} (tag)")
+
+    def get(self, key: str) -> Optional[Tuple[Any, Optional[str], float]]:
+        with self._lock:
+            row = self._conn.execute(
+                f"SELECT value, tag, expires_at FROM {self.table} WHERE key = ?", (key,)
+            ).fetchone()
+        if row is None:
+            return None
+        value, tag, expires_at = row
+        return json.loads(value), tag, expires_at
+
+    def set(self, key: str, value: Any, tag: Optional[str], expires_at: float) -> None:
+        with self._lock:
+            self._conn.execute(
+                f"INSERT OR REPLACE INTO {self.table} (key, value, tag, expires_at) VALUES (?, ?, ?, ?)",
+                (key, json.dumps(value, ensure_ascii=False), tag, expires_at)
+            )
+
+    def delete(self, key: str) -> None:
+        with self._lock:
+            self._conn.execute(f"DELETE FROM {self.table} WHERE key = ?", (key,))
+
+    def delete_tag(self, tag: str) -> int:
+        with self._lock:
+            return self._conn.execute(f"DELETE FROM {self.table} WHERE tag = ?", (tag,)).rowcount
+
+    def purge_expired(self) -> int:
+        with self._lock:
+            return self._conn.execute(f"DELETE FROM {self.table} WHERE expires_at < ?", (time.time(),)).rowcount
+
+    def clear(self) -> None:
+        with self._lock:
+            self._conn.execute(f"DELETE FROM {self.table}")
+
+
+class TTLCache:
+    """
+    Bounded LRU cache whose entries expire after ttl_seconds.
+
+    Entries may carry a tag so a group can be invalidated at once. With a
+    store, misses fall through to the persistent tier and hits are promoted.
+    Counters: cache.<name>.hits / l2_hits / misses / evictions / expired.
+    """
+
+    def __init__(self, name: str, max_entries: int = 10000, ttl_seconds: int = 86400, store: Optional[SQLiteCacheStore] = None):
+        self.name = name
+        self.max_entries = max_entries
+        self.ttl_seconds = ttl_seconds
+        self.store = store
+        self._entries: "OrderedDict[str, Tuple[float, Any, Optional[str]]]" = OrderedDict()
+        self._lock = threading.Lock()
+
+    def get(self, key: str) -> Optional[Any]:
+        """
+        Look up a value.
+
+        Args:
+            key: Cache key
+
+        Returns:
+            The cached value, or None on a miss
+        """
+        now = time.time()
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is not None:
+                if entry[0] > now:
+                    self._entries.move_to_end(key)
+                    metrics.incr(f"cache.{self.name}.hits")
+                    return entry[1]
+                del self._entries[key]
+                metrics.incr(f"cache.{self.name}.expired")
+
+        if self.store is not None:
+            try:
+                row = self.store.get(key)
+            except Exception as e:
+                app_logger.error(f"Cache store read failed ({self.name}): {e}")
+                row = None
+            if row is not None and row[2] > now:
+                value, tag, expires_at = row
+                self._put(key, value, tag, expires_at)
+                metrics.incr(f"cache.{self.name}.l2_hits")
+                return value
+
+        metrics.incr(f"cache.{self.name}.misses")
+        return None
+
+    def set(self, key: str, value: Any, tag: Optional[str] = None) -> None:
+        """
+        Store a value in memory (and in the store, if configured).
+
+        Args:
+            key: Cache key
+            value: JSON-serializable value
+            tag: Optional group for invalidate_tag()
+        """
+        expires_at = time.time() + self.ttl_seconds
+        self._put(key, value, tag, expires_at)
+        if self.store is not None:
+            try:
+                self.store.set(key, value, tag, expires_at)
+            except Exception as e:
+                app_logger.error(f"Cache store write failed ({self.name}): {e}")
+
+    def _put(self, key: str, value: Any, tag: Optional[str], expires_at: float) -> None:
+        with self._lock:
+            self._entries[key] = (expires_at, value, tag)
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+                metrics.incr(f"cache.{self.name}.evictions")
+            metrics.set_gauge(f"cache.{self.name}.size", len(self._entries))
+
+    def invalidate_tag(self, tag: str) -> int:
+        """Drop every entry carrying tag from both tiers; returns the in-memory count."""
+        with self._lock:
+            keys = [k for k, entry in self._entries.items() if entry[2] == tag]
+            for key in keys:
+                del self._entries[key]
+            metrics.set_gauge(f"cache.{self.name}.size", len(self._entries))
+        if self.store is not None:
+            self.store.delete_tag(tag)
+        metrics.incr(f"cache.{self.name}.invalidated", len(keys))
+        return len(keys)
+
+    def clear(self) -> None:
+        with self._lock:
+            self._entries.clear()
+            metrics.set_gauge(f"cache.{self.name}.size", 0)
+        if self.store is not None:
+            self.store.clear()
+
+    def __len__(self) -> int:
+        return len(self._entries)
+
+    def stats(self) -> Dict[str, Any]:
+        """Size and hit rate of this cache."""
+        counters = metrics.snapshot()["counters"]
+        hits = counters.get(f"cache.{self.name}.hits", 0) + counters.get(f"cache.{self.name}.l2_hits", 0)
+        misses = counters.get(f"cache.{self.name}.misses", 0)
+        return {
+            "size": len(self._entries),
+            "max_entries": self.max_entries,
+            "hits": hits,
+            "misses": misses,
+            "hit_rate": round(hits / (hits + misses), 3) if hits + misses else 0.0,
+            "evictions": counters.get(f"cache.{self.name}.evictions", 0),
+        }
@@ -1,15 +1,15 @@
 """Document processing utilities for CV analysis."""
 import os
-import requests
-from typing import Dict, Any, Optional
-from PyPDF2 import PdfReader
-from docx import Document
-from io import BytesIO
+import shutil
+from typing import Dict, Any, Optional, Union
 
+from app.services.extraction_pool import DOCX, PDF, extraction_pool
+from app.utils.http_transport import http_transport
 from app.utils.logger import app_logger
+from app.utils.media_download import DOC_TYPE, DOCX_TYPE, PDF_TYPE, DownloadedMedia, download_to_spool
 
 
-def download_media(media_url: str, auth_token: str) -> Optional[bytes]:
+def download_media(media_url: str, auth_token: str) -> Optional[DownloadedMedia]:
     """
     Download media file from Twilio.
     
@@ -18,95 +18,89 @@ def download_media(media_url: str, auth_token: str) -> Optional[bytes]:
         auth_token: Twilio auth token for authentication
         
     Returns:
-        File content as bytes or None if failed
+        Downloaded file (streamed into a size-capped spooled file; close it when done)
+        or None if failed or too large
     """
     try:
-        response = requests.get(
+        return download_to_spool(
+            http_transport.session("media"),
             media_url,
             auth=('AC' + auth_token.split('AC')[1] if 'AC' in auth_token else auth_token, auth_token),
             timeout=30
         )
-        response.raise_for_status()
-        return response.content
     except Exception as e:
         app_logger.error(f"Error downloading media: {e}")
         return None
 
 
-def extract_text_from_pdf(file_content: bytes) -> str:
+def extract_text_from_pdf(file_content: Union[bytes, memoryview], max_chars: Optional[int] = None) -> str:
     """
-    Extract text from PDF file.
+    Extract text from PDF file (in an extraction worker process).
     
     Args:
         file_content: PDF file as bytes
+        max_chars: Stop parsing pages once this much text is collected (None = full text)
         
     Returns:
         Extracted text
     """
     try:
-        pdf_file = BytesIO(file_content)
-        reader = PdfReader(pdf_file)
-        
-        text = ""
-        for page in reader.pages:
-            text += page.extract_text() + "\n"
-        
-        return text.strip()
+        return extraction_pool.extract(PDF, file_content, max_chars=max_chars)
     except Exception as e:
         app_logger.error(f"Error extracting PDF text: {e}")
         return ""
 
 
-def extract_text_from_docx(file_content: bytes) -> str:
+def extract_text_from_docx(file_content: Union[bytes, memoryview], max_chars: Optional[int] = None) -> str:
     """
-    Extract text from DOCX file.
+    Extract text from DOCX file (in an extraction worker process).
     
     Args:
         file_content: DOCX file as bytes
+        max_chars: Stop once this much text is collected (None = full text)
         
     Returns:
         Extracted text
     """
     try:
-        docx_file = BytesIO(file_content)
-        doc = Document(docx_file)
-        
-        text = ""
-        for paragraph in doc.paragraphs:
-            text += paragraph.text + "\n"
-        
-        return text.strip()
+        return extraction_pool.extract(DOCX, file_content, max_chars=max_chars)
     except Exception as e:
         app_logger.error(f"Error extracting DOCX text: {e}")
         return ""
 
 
-def extract_document_text(file_content: bytes, content_type: str) -> str:
+def extract_document_text(media: DownloadedMedia, max_chars: Optional[int] = None) -> str:
     """
-    Extract text from document based on content type.
+    Extract text from document based on its content type (sniffed from the
+    file's magic bytes, not the type the sender declared).
     
     Args:
-        file_content: File content as bytes
-        content_type: MIME type of the file
+        media: Downloaded file
+        max_chars: Character budget (None = full text)
         
     Returns:
         Extracted text
     """
-    if "pdf" in content_type.lower():
-        return extract_text_from_pdf(file_content)
-    elif "word" in content_type.lower() or "docx" in content_type.lower():
-        return extract_text_from_docx(file_content)
-    else:
-        app_logger.warning(f"Unsupported content type: {content_type}")
-        return ""
+    with media.view() as content:
+        if media.content_type == PDF_TYPE:
+            return extract_text_from_pdf(content, max_chars)
+        elif media.content_type == DOCX_TYPE:
+            return extract_text_from_docx(content, max_chars)
+    app_logger.warning(f"Unsupported content type: {media.content_type} (declared {media.declared_type})")
+    return ""
+
+
+def document_extension(media: DownloadedMedia) -> str:
+    """File extension for the sniffed content type."""
+    return {PDF_TYPE: "pdf", DOCX_TYPE: "docx", DOC_TYPE: "doc"}.get(media.content_type, "bin")
 
 
-def save_document(file_content: bytes, filename: str, lead_id: int) -> str:
+def save_document(media: DownloadedMedia, filename: str, lead_id: int) -> str:
     """
     Save document to local storage.
     
     Args:
-        file_content: File content as bytes
+        media: Downloaded file (copied in chunks, not read into memory)
         filename: Original filename
         lead_id: Lead ID for organization
         
@@ -124,8 +118,9 @@ def save_document(file_content: bytes, filename: str, lead_id: int) -> str:
         
         # Save file
         file_path = os.path.join(lead_dir, filename)
+        media.file.seek(0)
         with open(file_path, "wb") as f:
-            f.write(file_content)
+            shutil.copyfileobj(media.file, f)
         
         app_logger.info(f"Saved document to {file_path}")
         return file_path
@@ -0,0 +1,370 @@
+"""Shared keep-alive HTTP pools and a global in-flight cap for all outbound clients."""
+import asyncio
+import threading
+import time
+import weakref
+from contextlib import asynccontextmanager, contextmanager
+from contextvars import ContextVar
+from typing import Any, AsyncIterator, Callable, Dict, Iterator, Optional, Tuple
+
+import httpx
+import requests
+from requests.adapters import HTTPAdapter
+
+from app.config import settings
+from app.utils.metrics import metrics
+
+
+# time.monotonic() by which response bodies opened in this context must be read (see body_deadline)
+_body_deadline: ContextVar[Optional[float]] = ContextVar("http_body_deadline", default=None)
+
+
+@contextmanager
+def body_deadline(deadline_at: float) -> Iterator[None]:
+    """
+    Fail sync responses opened within the block whose body is still being
+    read at deadline_at (httpx.ReadTimeout, checked between reads). The
+    request timeout only bounds each read, so a slowly trickling body would
+    otherwise run past the caller's deadline.
+    """
+    token = _body_deadline.set(deadline_at)
+    try:
+        yield
+    finally:
+        _body_deadline.reset(token)
+
+
+class HttpTransport:
+    """
+    One connection pool per upstream (openai, twilio, media), shared by all
+    services talking to it, so keep-alive connections are reused instead of
+    paying a TCP + TLS handshake per call.
+
+    Every request takes a slot of the global in-flight cap first and holds
+    it until its body is consumed or the response is closed, so streamed
+    responses count against the cap too. Metrics per upstream: http.<name>.requests / handshakes (new connections)
+    / wait_ms (time waiting for a slot) / in_flight; http.utilization is the
+    share of the cap in use.
+    """
+
+    def __init__(self, max_connections_per_host: int = 20, max_in_flight: int = 64):
+        self.max_connections_per_host = max_connections_per_host
+        self.max_in_flight = max_in_flight
+        self._slots = threading.BoundedSemaphore(max_in_flight)
+        self._async_slots: Optional[asyncio.Semaphore] = None
+        self._async_slots_loop: Optional[asyncio.AbstractEventLoop] = None
+        self._lock = threading.Lock()
+        self._in_flight: Dict[str, int] = {}
+        self._sessions: Dict[str, requests.Session] = {}
+        self._clients: Dict[str, httpx.Client] = {}
+        self._async_clients: Dict[str, httpx.AsyncClient] = {}
+        self._aiohttp_sessions: Dict[str, Tuple[Any, asyncio.AbstractEventLoop]] = {}
+
+    # In-flight accounting
+
+    def _enter(self, name: str, waited_s: float) -> None:
+        metrics.observe(f"http.{name}.wait_ms", waited_s * 1000)
+        metrics.incr(f"http.{name}.requests")
+        with self._lock:
+            self._in_flight[name] = self._in_flight.get(name, 0) + 1
+            self._report()
+
+    def _exit(self, name: str) -> None:
+        with self._lock:
+            self._in_flight[name] -= 1
+            self._report()
+
+    def _report(self) -> None:
+        total = sum(self._in_flight.values())
+        for name, count in self._in_flight.items():
+            metrics.set_gauge(f"http.{name}.in_flight", count)
+        metrics.set_gauge("http.in_flight", total)
+        metrics.set_gauge("http.utilization", round(total / self.max_in_flight, 3))
+
+    def _releaser(self, name: str, release_slot: Callable[[], None]) -> Callable[[], None]:
+        once = threading.Lock()
+
+        def release() -> None:
+            if once.acquire(blocking=False):  # Idempotent: close and exhaustion may both report
+                self._exit(name)
+                release_slot()
+        return release
+
+    def hold(self, name: str) -> Callable[[], None]:
+        """Take one of the global in-flight slots (blocking) until the returned function is called."""
+        started = time.perf_counter()
+        self._slots.acquire()
+        self._enter(name, time.perf_counter() - started)
+        return self._releaser(name, self._slots.release)
+
+    async def hold_async(self, name: str) -> Callable[[], None]:
+        """Take a slot without blocking the event loop until the returned function is called."""
+        loop = asyncio.get_running_loop()
+        if self._async_slots_loop is not loop:
+            # asyncio primitives are bound to the loop they are first used on
+            self._async_slots = asyncio.Semaphore(self.max_in_flight)
+            self._async_slots_loop = loop
+        slots = self._async_slots
+        started = time.perf_counter()
+        await slots.acquire()
+        self._enter(name, time.perf_counter() - started)
+        return self._releaser(name, slots.release)
+
+    @contextmanager
+    def slot(self, name: str):
+        """Hold one of the global in-flight slots (blocking)."""
+        release = self.hold(name)
+        try:
+            yield
+        finally:
+            release()
+
+    @asynccontextmanager
+    async def slot_async(self, name: str):
+        """Hold one of the global in-flight slots without blocking the event loop."""
+        release = await self.hold_async(name)
+        try:
+            yield
+        finally:
+            release()
+
+    # Clients
+
+    def session(self, name: str) -> requests.Session:
+        """Shared requests.Session for an upstream (Twilio REST, media downloads)."""
+        with self._lock:
+            session = self._sessions.get(name)
+            if session is None:
+                session = requests.Session()
+                adapter = _MeteredAdapter(self, name, pool_maxsize=self.max_connections_per_host, pool_block=True)
+                session.mount("https://", adapter)
+                session.mount("http://", adapter)
+                self._sessions[name] = session
+            return session
+
+    def httpx_client(self, name: str) -> httpx.Client:
+        """Shared httpx.Client for an upstream (OpenAI SDK)."""
+        with self._lock:
+            client = self._clients.get(name)
+            if client is None:
+                client = httpx.Client(transport=_MeteredTransport(self, name, limits=self._limits()))
+                self._clients[name] = client
+            return client
+
+    def httpx_async_client(self, name: str) -> httpx.AsyncClient:
+        """Shared httpx.AsyncClient for an upstream (AsyncOpenAI)."""
+        with self._lock:
+            client = self._async_clients.get(name)
+            if client is None:
+                client = httpx.AsyncClient(transport=_MeteredAsyncTransport(self, name, limits=self._limits()))
+                self._async_clients[name] = client
+            return client
+
+    def aiohttp_session(self, name: str) -> Any:
+        """
+        Shared aiohttp session for an upstream (async Twilio); must be called
+        inside the running loop. One session per upstream and loop, closed
+        by aclose().
+        """
+        import aiohttp  # Only needed on the async path (installed with twilio)
+
+        loop = asyncio.get_running_loop()
+        with self._lock:
+            cached = self._aiohttp_sessions.get(name)
+            if cached is not None and cached[1] is loop and not cached[0].closed:
+                return cached[0]
+
+            async def on_connection_create_end(session, context, params):
+                metrics.incr(f"http.{name}.handshakes")
+
+            trace = aiohttp.TraceConfig()
+            trace.on_connection_create_end.append(on_connection_create_end)
+            session = aiohttp.ClientSession(
+                connector=aiohttp.TCPConnector(limit_per_host=self.max_connections_per_host),
+                trace_configs=[trace]
+            )
+            self._aiohttp_sessions[name] = (session, loop)
+            return session
+
+    def _limits(self) -> httpx.Limits:
+        return httpx.Limits(
+            max_connections=self.max_connections_per_host,
+            max_keepalive_connections=self.max_connections_per_host
+        )
+
+    def snapshot(self) -> Dict[str, Any]:
+        """Requests, new connections and reuse rate per upstream."""
+        counters = metrics.snapshot()["counters"]
+        report: Dict[str, Any] = {"max_in_flight": self.max_in_flight, "in_flight": dict(self._in_flight)}
+        names = set(self._sessions) | set(self._clients) | set(self._async_clients) | set(self._aiohttp_sessions)
+        for name in sorted(names | set(self._in_flight)):
+            requests_ = counters.get(f"http.{name}.requests", 0)
+            handshakes = counters.get(f"http.{name}.handshakes", 0)
+            report[name] = {
+                "requests": requests_,
+                "handshakes": handshakes,
+                "reuse_rate": round(1 - handshakes / requests_, 3) if requests_ else 0.0,
+            }
+        return report
+
+    def close(self) -> None:
+        for session in self._sessions.values():
+            session.close()
+        for client in self._clients.values():
+            client.close()
+        self._sessions.clear()
+        self._clients.clear()
+
+    async def aclose(self) -> None:
+        """Close async clients (on the loop that used them), then the sync pools."""
+        for client in self._async_clients.values():
+            await client.aclose()
+        self._async_clients.clear()
+        loop = asyncio.get_running_loop()
+        for session, session_loop in self._aiohttp_sessions.values():
+            if session_loop is loop and not session.closed:
+                await session.close()
+        self._aiohttp_sessions.clear()
+        self.close()
+
+
+class _MeteredAdapter(HTTPAdapter):
+    """requests adapter: global slot per request, counts newly opened connections."""
+
+    def __init__(self, transport: HttpTransport, name: str, **kwargs: Any):
+        self._transport = transport
+        self._name = name
+        super().__init__(**kwargs)
+
+    def init_poolmanager(self, *args: Any, **kwargs: Any) -> None:
+        super().init_poolmanager(*args, **kwargs)
+        counter = f"http.{self._name}.handshakes"
+        self.poolmanager.pool_classes_by_scheme = {
+            scheme: type(pool_cls.__name__, (pool_cls,), {"_new_conn": _counting_new_conn(pool_cls, counter)})
+            for scheme, pool_cls in self.poolmanager.pool_classes_by_scheme.items()
+        }
+
+    def send(self, request, **kwargs):
+        release = self._transport.hold(self._name)
+        try:
+            response = super().send(request, **kwargs)
+        except BaseException:
+            release()
+            raise
+        # The body is read after send() returns (always for stream=True); urllib3 releases
+        # the connection once it is exhausted or the response is closed
+        release_conn = response.raw.release_conn
+
+        def release_with_conn() -> None:
+            release()
+            release_conn()
+
+        response.raw.release_conn = release_with_conn
+        weakref.finalize(response, release)  # Abandoned without reading or closing
+        return response
+
+
+def _counting_new_conn(pool_cls: type, counter: str):
+    def _new_conn(pool):
+        metrics.incr(counter)
+        return pool_cls._new_conn(pool)
+    return _new_conn
+
+
+def _count_handshakes(name: str, request: httpx.Request, is_async: bool = False) -> None:
+    """Count new connections via httpcore's trace extension (callbacks must be coroutines on the async path)."""
+    def count(event_name: str) -> None:
+        if event_name == "connection.connect_tcp.complete":
+            metrics.incr(f"http.{name}.handshakes")
+
+    def trace(event_name: str, info: Dict[str, Any]) -> None:
+        count(event_name)
+
+    async def atrace(event_name: str, info: Dict[str, Any]) -> None:
+        count(event_name)
+
+    request.extensions["trace"] = atrace if is_async else trace
+
+
+class _MeteredTransport(httpx.HTTPTransport):
+    def __init__(self, transport: HttpTransport, name: str, **kwargs: Any):
+        super().__init__(**kwargs)
+        self._transport = transport
+        self._name = name
+
+    def handle_request(self, request: httpx.Request) -> httpx.Response:
+        _count_handshakes(self._name, request)
+        release = self._transport.hold(self._name)
+        try:
+            response = super().handle_request(request)
+        except BaseException:
+            release()
+            raise
+        response.stream = _SlotStream(response.stream, release, _body_deadline.get())
+        return response
+
+
+class _MeteredAsyncTransport(httpx.AsyncHTTPTransport):
+    def __init__(self, transport: HttpTransport, name: str, **kwargs: Any):
+        super().__init__(**kwargs)
+        self._transport = transport
+        self._name = name
+
+    async def handle_async_request(self, request: httpx.Request) -> httpx.Response:
+        _count_handshakes(self._name, request, is_async=True)
+        release = await self._transport.hold_async(self._name)
+        try:
+            response = await super().handle_async_request(request)
+        except BaseException:
+            release()
+            raise
+        response.stream = _AsyncSlotStream(response.stream, release)
+        return response
+
+
+class _SlotStream(httpx.SyncByteStream):
+    """
+    Response body that gives the in-flight slot back when closed (httpx
+    closes it once read) and fails once its body deadline has passed.
+    """
+
+    def __init__(self, stream: Any, release: Callable[[], None], deadline_at: Optional[float] = None):
+        self._stream = stream
+        self._release = release
+        self._deadline_at = deadline_at
+
+    def __iter__(self) -> Iterator[bytes]:
+        for chunk in self._stream:
+            if self._deadline_at is not None and time.monotonic() > self._deadline_at:
+                metrics.incr("http.body_deadline_exceeded")
+                raise httpx.ReadTimeout("Response body not read by the deadline")
+            yield chunk
+
+    def close(self) -> None:
+        try:
+            self._stream.close()
+        finally:
+            self._release()
+
+
+class _AsyncSlotStream(httpx.AsyncByteStream):
+    def __init__(self, stream: Any, release: Callable[[], None]):
+        self._stream = stream
+        self._release = release
+
+    async def __aiter__(self) -> AsyncIterator[bytes]:
+        async for chunk in self._stream:
+            yield chunk
+
+    async def aclose(self) -> None:
+        try:
+            await self._stream.aclose()
+        finally:
+            self._release()
+
+
+# Global instance
+http_transport = HttpTransport(
+    max_connections_per_host=settings.http_max_connections_per_host,
+    max_in_flight=settings.http_max_in_flight
+)
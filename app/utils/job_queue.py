@@ -0,0 +1,278 @@
+"""Persistent background jobs: a SQLite job table worked off by a pool of threads."""
+import json
+import random
+import sqlite3
+import threading
+import time
+import uuid
+from dataclasses import dataclass
+from typing import Any, Callable, Dict, List, Optional
+
+from app.config import settings
+from app.utils.logger import app_logger
+from app.utils.metrics import metrics
+
+QUEUED = "queued"
+LEASED = "leased"
+DONE = "done"
+FAILED = "failed"
+
+
+@dataclass
+class Job:
+    """A leased job; token identifies this lease when acknowledging it."""
+    id: int
+    kind: str
+    payload: Dict[str, Any]
+    attempts: int
+    created_at: float
+    token: str
+
+
+class JobQueue:
+    """
+    Restart-safe job queue in a local SQLite file.
+
+    A worker leases a job for visibility_timeout seconds. If the process
+    dies meanwhile the lease expires and another worker (or the restarted
+    process) runs the job again, so handlers must be idempotent. Failed
+    jobs are retried with exponential backoff until max_attempts, then
+    kept as failed. A dedupe_key admits only one queued/leased job per key.
+    """
+
+    def __init__(
+        self,
+        path: str,
+        visibility_timeout: float = 300.0,
+        max_attempts: int = 5,
+        retry_base_seconds: float = 10.0,
+        retry_max_seconds: float = 600.0,
+        poll_seconds: float = 1.0,
+        retention_seconds: float = 86400.0,
+        clock: Callable[[], float] = time.time
+    ):
+        self.path = path
+        self.visibility_timeout = visibility_timeout
+        self.max_attempts = max_attempts
+        self.retry_base_seconds = retry_base_seconds
+        self.retry_max_seconds = retry_max_seconds
+        self.poll_seconds = poll_seconds
+        self.retention_seconds = retention_seconds
+        self.clock = clock
+        self.handlers: Dict[str, Callable[[Dict[str, Any]], None]] = {}
+        self._lock = threading.Lock()
+        self._conn: Optional[sqlite3.Connection] = None  # Opened on first use
+        self._wakeup = threading.Event()
+        self._stopping = threading.Event()
+        self._workers: List[threading.Thread] = []
+        self._purged_at = 0.0
+
+    def _db(self) -> sqlite3.Connection:
+        if self._conn is None:
+            conn = sqlite3.connect(self.path, check_same_thread=False, isolation_level=None, timeout=30)
+            conn.execute("PRAGMA journal_mode=WAL")
+            conn.execute(
+                "CREATE TABLE IF NOT EXISTS jobs ("
+                "id INTEGER PRIMARY KEY AUTOINCREMENT, kind TEXT NOT NULL, payload TEXT NOT NULL, "
+                "dedupe_key TEXT, status TEXT NOT NULL, attempts INTEGER NOT NULL DEFAULT 0, "
+                "run_at REAL NOT NULL, lease_expires REAL, lease_token TEXT, last_error TEXT, "
+                "created_at REAL NOT NULL, finished_at REAL)"
+            )
+            conn.execute("CREATE INDEX IF NOT EXISTS ix_jobs_ready ON jobs (status, run_at)")
+            conn.execute(
+                "CREATE UNIQUE INDEX IF NOT EXISTS ix_jobs_active_key ON jobs (dedupe_key) "
+                f"WHERE status IN ('{QUEUED}', '{LEASED}')"
+            )
+            self._conn = conn
+        return self._conn
+
+    def register(self, kind: str, handler: Callable[[Dict[str, Any]], None]) -> None:
+        """Set the function that runs jobs of this kind (raise to retry)."""
+        self.handlers[kind] = handler
+
+    def enqueue(self, kind: str, payload: Dict[str, Any], dedupe_key: Optional[str] = None, delay: float = 0.0) -> bool:
+        """
+        Add a job.
+
+        Args:
+            kind: Registered job kind
+            payload: JSON-serializable arguments for the handler
+            dedupe_key: Skip the job if one with this key is already queued or running
+            delay: Seconds before the job becomes runnable
+
+        Returns:
+            False if an active job with the same dedupe_key exists
+        """
+        now = self.clock()
+        with self._lock:
+            added = self._db().execute(
+                "INSERT OR IGNORE INTO jobs (kind, payload, dedupe_key, status, run_at, created_at) "
+                "VALUES (?, ?, ?, ?, ?, ?)",
+                (kind, json.dumps(payload, ensure_ascii=False), dedupe_key, QUEUED, now + delay, now)
+            ).rowcount == 1
+        metrics.incr(f"jobs.{kind}.enqueued" if added else f"jobs.{kind}.deduped")
+        if added:
+            self._wakeup.set()
+        return added
+
+    def lease(self) -> Optional[Job]:
+        """Take the oldest runnable job (queued, or leased with an expired lease)."""
+        now = self.clock()
+        token = uuid.uuid4().hex
+        with self._lock:
+            conn = self._db()
+            conn.execute("BEGIN IMMEDIATE")  # Other processes may share the file
+            try:
+                row = conn.execute(
+                    "SELECT id, kind, payload, attempts, created_at, status FROM jobs "
+                    "WHERE (status = ? AND run_at <= ?) OR (status = ? AND lease_expires <= ?) "
+                    "ORDER BY run_at LIMIT 1",
+                    (QUEUED, now, LEASED, now)
+                ).fetchone()
+                if row is not None:
+                    conn.execute(
+                        "UPDATE jobs SET status = ?, attempts = attempts + 1, lease_expires = ?, lease_token = ? "
+                        "WHERE id = ?",
+                        (LEASED, now + self.visibility_timeout, token, row[0])
+                    )
+                conn.execute("COMMIT")
+            except Exception:
+                conn.execute("ROLLBACK")
+                raise
+        if row is None:
+            return None
+        job_id, kind, payload, attempts, created_at, status = row
+        if status == LEASED:
+            metrics.incr(f"jobs.{kind}.lease_expired")
+        return Job(job_id, kind, json.loads(payload), attempts + 1, created_at, token)
+
+    def complete(self, job: Job) -> None:
+        with self._lock:
+            self._db().execute(
+                "UPDATE jobs SET status = ?, finished_at = ?, lease_token = NULL WHERE id = ? AND lease_token = ?",
+                (DONE, self.clock(), job.id, job.token)
+            )
+
+    def fail(self, job: Job, error: str) -> None:
+        """Schedule a retry with backoff, or give up after max_attempts."""
+        now = self.clock()
+        if job.attempts >= self.max_attempts:
+            status, run_at = FAILED, now
+            metrics.incr(f"jobs.{job.kind}.failed")
+        else:
+            backoff = min(self.retry_max_seconds, self.retry_base_seconds * 2 ** (job.attempts - 1))
+            status, run_at = QUEUED, now + backoff * random.uniform(0.5, 1.0)
+            metrics.incr(f"jobs.{job.kind}.retries")
+        with self._lock:
+            self._db().execute(
+                "UPDATE jobs SET status = ?, run_at = ?, last_error = ?, lease_token = NULL, "
+                "finished_at = CASE WHEN ? = ? THEN ? END WHERE id = ? AND lease_token = ?",
+                (status, run_at, error[:500], status, FAILED, now, job.id, job.token)
+            )
+
+    def run_one(self) -> bool:
+        """Lease and run one job; returns False if none was runnable."""
+        job = self.lease()
+        if job is None:
+            return False
+        handler = self.handlers.get(job.kind)
+        started = time.perf_counter()
+        try:
+            if handler is None:
+                raise LookupError(f"No handler for job kind {job.kind}")
+            if job.attempts > self.max_attempts:
+                raise RuntimeError("Lease expired on every attempt")  # e.g. the job kills the worker process
+            handler(job.payload)
+        except Exception as e:
+            app_logger.error(f"Job #{job.id} ({job.kind}) attempt {job.attempts} failed: {e}")
+            self.fail(job, f"{type(e).__name__}: {e}")
+        else:
+            self.complete(job)
+            metrics.incr(f"jobs.{job.kind}.completed")
+            metrics.observe(f"jobs.{job.kind}.age_ms", (self.clock() - job.created_at) * 1000)
+        metrics.observe(f"jobs.{job.kind}.ms", (time.perf_counter() - started) * 1000)
+        return True
+
+    def purge(self) -> int:
+        """Drop finished jobs older than retention_seconds."""
+        with self._lock:
+            return self._db().execute(
+                "DELETE FROM jobs WHERE status IN (?, ?) AND finished_at < ?",
+                (DONE, FAILED, self.clock() - self.retention_seconds)
+            ).rowcount
+
+    def _work(self) -> None:
+        while not self._stopping.is_set():
+            try:
+                if self.run_one():
+                    continue
+                if time.monotonic() - self._purged_at > 3600:
+                    self._purged_at = time.monotonic()
+                    self.purge()
+            except Exception as e:
+                app_logger.error(f"Job worker error: {e}")
+            # Idle: wait for an enqueue, a retry coming due or another process's jobs
+            self._wakeup.wait(self.poll_seconds)
+            self._wakeup.clear()
+
+    def start(self, workers: int) -> None:
+        """Start the worker threads (jobs left over from a previous run are picked up)."""
+        self._stopping.clear()
+        for i in range(workers - len(self._workers)):
+            thread = threading.Thread(target=self._work, name=f"job-worker-{i}", daemon=True)
+            thread.start()
+            self._workers.append(thread)
+        app_logger.info(f"Job queue {self.path}: {len(self._workers)} workers, {self.depth()} jobs waiting")
+
+    def stop(self, timeout: float = 10.0) -> None:
+        """Let running jobs finish; unfinished leases are retried after the visibility timeout."""
+        self._stopping.set()
+        self._wakeup.set()
+        deadline = time.monotonic() + timeout
+        for thread in self._workers:
+            thread.join(max(0.0, deadline - time.monotonic()))
+        self._workers = [thread for thread in self._workers if thread.is_alive()]
+
+    def depth(self) -> int:
+        with self._lock:
+            return self._db().execute(
+                "SELECT COUNT(*) FROM jobs WHERE status IN (?, ?)", (QUEUED, LEASED)
+            ).fetchone()[0]
+
+    def report(self) -> Dict[str, Any]:
+        """Depth, job age and throughput per kind."""
+        now = self.clock()
+        with self._lock:
+            rows = self._db().execute(
+                "SELECT kind, status, COUNT(*), MIN(created_at), "
+                "SUM(CASE WHEN finished_at >= ? THEN 1 ELSE 0 END) FROM jobs GROUP BY kind, status",
+                (now - 300,)
+            ).fetchall()
+        kinds: Dict[str, Dict[str, Any]] = {}
+        for kind, status, count, oldest, recent in rows:
+            entry = kinds.setdefault(kind, {
+                QUEUED: 0, LEASED: 0, DONE: 0, FAILED: 0, "oldest_waiting_s": 0.0, "done_per_min": 0.0
+            })
+            entry[status] = count
+            if status in (QUEUED, LEASED):
+                entry["oldest_waiting_s"] = max(entry["oldest_waiting_s"], round(now - oldest, 1))
+            if status == DONE:
+                entry["done_per_min"] = round(recent / 5, 2)
+            duration = metrics.histogram(f"jobs.{kind}.ms")
+            entry["p95_ms"] = round(duration.percentile(95), 1) if duration else 0.0
+            entry["retries"] = metrics.counter(f"jobs.{kind}.retries")
+        return {
+            "workers": sum(thread.is_alive() for thread in self._workers),
+            "depth": sum(entry[QUEUED] + entry[LEASED] for entry in kinds.values()),
+            "kinds": kinds,
+        }
+
+
+# Global instance
+job_queue = JobQueue(
+    settings.job_queue_path,
+    visibility_timeout=settings.job_visibility_timeout_seconds,
+    max_attempts=settings.job_max_attempts,
+    retry_base_seconds=settings.job_retry_base_seconds,
+    poll_seconds=settings.job_poll_seconds
+)
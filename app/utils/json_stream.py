@@ -0,0 +1,131 @@
+"""Incremental parser for streamed JSON objects (OpenAI function-call arguments)."""
+import json
+from typing import Any, Dict, List, Tuple
+
+_WHITESPACE = " \t\r\n"
+
+
+class IncrementalObjectParser:
+    """
+    Parses a JSON object fed in arbitrary chunks and reports each top-level
+    field as soon as its value is complete.
+
+    Each character is looked at once, so feeding a long ai_reply in many
+    small deltas stays linear. Nested values are collected and decoded when
+    their closing bracket arrives.
+
+    Example:
+        parser = IncrementalObjectParser()
+        parser.feed('{"category": "VALID_')   # -> []
+        parser.feed('ANSWER", "norm')         # -> [("category", "VALID_ANSWER")]
+    """
+
+    def __init__(self):
+        self.fields: Dict[str, Any] = {}
+        self.done = False
+        self._state = "start"
+        self._key = ""
+        self._raw: List[str] = []
+        self._escape = False
+        self._depth = 0
+        self._in_string = False
+
+    def feed(self, text: str) -> List[Tuple[str, Any]]:
+        """
+        Consume the next chunk.
+
+        Args:
+            text: Next piece of the JSON text
+
+        Returns:
+            (key, value) pairs completed by this chunk, in order
+
+        Raises:
+            ValueError: The text is not a JSON object
+        """
+        completed = []
+        for ch in text:
+            if self.done:
+                break
+            state = self._state
+            if state == "start":
+                if ch == "{":
+                    self._state = "key_or_end"
+                elif ch not in _WHITESPACE:
+                    raise ValueError(f"Expected '{{', got {ch!r}")
+            elif state == "key_or_end":
+                if ch == '"':
+                    self._begin("key", ch)
+                elif ch == "}":
+                    self.done = True
+                elif ch not in _WHITESPACE + ",":
+                    raise ValueError(f"Expected a key, got {ch!r}")
+            elif state == "key":
+                if self._string_char(ch):
+                    self._key = json.loads("".join(self._raw), strict=False)
+                    self._state = "colon"
+            elif state == "colon":
+                if ch == ":":
+                    self._state = "value"
+                elif ch not in _WHITESPACE:
+                    raise ValueError(f"Expected ':', got {ch!r}")
+            elif state == "value":
+                if ch == '"':
+                    self._begin("string", ch)
+                elif ch in "{[":
+                    self._begin("nested", ch)
+                    self._depth = 1
+                    self._in_string = False
+                elif ch not in _WHITESPACE:
+                    self._begin("scalar", ch)
+            elif state == "string":
+                if self._string_char(ch):
+                    completed.append(self._complete())
+            elif state == "nested":
+                self._raw.append(ch)
+                if self._in_string:
+                    if self._escape:
+                        self._escape = False
+                    elif ch == "\\":
+                        self._escape = True
+                    elif ch == '"':
+                        self._in_string = False
+                elif ch == '"':
+                    self._in_string = True
+                elif ch in "{[":
+                    self._depth += 1
+                elif ch in "}]":
+                    self._depth -= 1
+                    if self._depth == 0:
+                        completed.append(self._complete())
+            elif state == "scalar":
+                if ch in _WHITESPACE + ",}":
+                    completed.append(self._complete())
+                    if ch == "}":
+                        self.done = True
+                else:
+                    self._raw.append(ch)
+        return completed
+
+    def _begin(self, state: str, ch: str) -> None:
+        self._state = state
+        self._raw = [ch]
+        self._escape = False
+
+    def _string_char(self, ch: str) -> bool:
+        """Append a character of a string token; True when it closed the string."""
+        self._raw.append(ch)
+        if self._escape:
+            self._escape = False
+        elif ch == "\\":
+            self._escape = True
+        elif ch == '"':
+            return True
+        return False
+
+    def _complete(self) -> Tuple[str, Any]:
+        value = json.loads("".join(self._raw), strict=False)
+        self.fields[self._key] = value
+        self._raw = []
+        self._state = "key_or_end"
+        return self._key, value
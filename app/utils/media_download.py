@@ -0,0 +1,183 @@
+"""Streaming media downloads: size-capped, spooled to disk past a threshold, type sniffed from content."""
+import mmap
+import zipfile
+from contextlib import contextmanager
+from io import BytesIO
+from tempfile import TemporaryFile
+from typing import IO, Any, Iterator, Optional, Tuple
+
+import requests
+
+from app.config import settings
+from app.utils.metrics import metrics
+
+PDF_TYPE = "application/pdf"
+DOCX_TYPE = "application/vnd.openxmlformats-officedocument.wordprocessingml.document"
+DOC_TYPE = "application/msword"
+UNKNOWN_TYPE = "application/octet-stream"
+
+CHUNK_BYTES = 64 * 1024
+
+# Leading bytes -> MIME type (ZIP containers are told apart by their entries)
+MAGIC_NUMBERS = (
+    (b"%PDF-", PDF_TYPE),
+    (b"\xd0\xcf\x11\xe0\xa1\xb1\x1a\xe1", DOC_TYPE),
+    (b"\x89PNG\r\n\x1a\n", "image/png"),
+    (b"\xff\xd8\xff", "image/jpeg"),
+    (b"GIF8", "image/gif"),
+    (b"PK\x03\x04", "application/zip"),
+)
+
+
+class MediaTooLarge(Exception):
+    """The download exceeded the size cap (announced or while streaming)."""
+
+
+class DownloadedMedia:
+    """
+    A downloaded file: in memory up to the spool threshold, in an
+    anonymous temp file beyond it. Close it (or use it as a context
+    manager) to free the memory / disk space.
+    """
+
+    def __init__(
+        self,
+        file: IO[bytes],
+        size: int,
+        content_type: str,
+        declared_type: Optional[str] = None,
+        spilled: bool = False
+    ):
+        self.file = file  # BytesIO, or the temp file once spilled
+        self.size = size
+        self.content_type = content_type  # Sniffed from the content
+        self.declared_type = declared_type  # What the server claimed
+        self.spilled = spilled
+
+    @contextmanager
+    def view(self) -> Iterator[memoryview]:
+        """
+        Read-only view of the content without copying it: the in-memory
+        buffer, or a memory map of the spilled file.
+        """
+        if self.spilled:
+            self.file.flush()
+            mapped = mmap.mmap(self.file.fileno(), 0, access=mmap.ACCESS_READ) if self.size else None
+            view = memoryview(mapped) if mapped is not None else memoryview(b"")
+            try:
+                yield view
+            finally:
+                view.release()
+                if mapped is not None:
+                    mapped.close()
+        else:
+            view = self.file.getbuffer()
+            try:
+                yield view
+            finally:
+                view.release()
+
+    def close(self) -> None:
+        self.file.close()
+
+    def __enter__(self) -> "DownloadedMedia":
+        return self
+
+    def __exit__(self, *exc: Any) -> None:
+        self.close()
+
+
+def sniff_content_type(file: Any) -> str:
+    """MIME type of a seekable file from its magic bytes (DOCX vs. other ZIPs by their entries)."""
+    file.seek(0)
+    head = file.read(16)
+    file.seek(0)
+    for magic, content_type in MAGIC_NUMBERS:
+        if head.startswith(magic):
+            break
+    else:
+        return UNKNOWN_TYPE
+    if content_type == "application/zip":
+        try:
+            with zipfile.ZipFile(file) as archive:
+                if "word/document.xml" in archive.namelist():
+                    content_type = DOCX_TYPE
+        except zipfile.BadZipFile:
+            pass
+        file.seek(0)
+    return content_type
+
+
+def _spill(buffer: BytesIO) -> IO[bytes]:
+    """Move the in-memory part of a download to an anonymous temp file."""
+    file = TemporaryFile()
+    try:
+        file.write(buffer.getbuffer())
+    except BaseException:
+        file.close()
+        raise
+    buffer.close()
+    return file
+
+
+def download_to_spool(
+    session: requests.Session,
+    url: str,
+    auth: Optional[Tuple[str, str]] = None,
+    timeout: float = 30,
+    max_bytes: Optional[int] = None,
+    spool_bytes: Optional[int] = None
+) -> DownloadedMedia:
+    """
+    Stream a download into memory, spilling to an anonymous temp file
+    once it outgrows spool_bytes.
+
+    Args:
+        session: requests session (the shared "media" pool)
+        url: File URL
+        auth: Basic auth (Twilio media)
+        timeout: Connect/read timeout in seconds
+        max_bytes: Size cap (default settings.media_max_mb)
+        spool_bytes: Kept in memory up to this size, then spilled to disk
+            (default settings.media_spool_mb)
+
+    Returns:
+        The downloaded media, positioned at the start
+
+    Raises:
+        MediaTooLarge: Content-Length or the streamed body exceeded max_bytes
+        requests.RequestException: Network or HTTP error
+    """
+    max_bytes = max_bytes if max_bytes is not None else settings.media_max_mb * 1024 * 1024
+    spool_bytes = spool_bytes if spool_bytes is not None else settings.media_spool_mb * 1024 * 1024
+    with session.get(url, auth=auth, timeout=timeout, stream=True) as response:
+        response.raise_for_status()
+        declared = response.headers.get("Content-Length")
+        if declared and declared.isdigit() and int(declared) > max_bytes:
+            metrics.incr("media.too_large")
+            raise MediaTooLarge(f"{url} announces {declared} bytes (cap {max_bytes})")
+
+        spool: IO[bytes] = BytesIO()
+        size = 0
+        spilled = False
+        try:
+            for chunk in response.iter_content(chunk_size=CHUNK_BYTES):
+                size += len(chunk)
+                if size > max_bytes:
+                    metrics.incr("media.too_large")
+                    raise MediaTooLarge(f"{url} exceeded {max_bytes} bytes")
+                if not spilled and size > spool_bytes:
+                    spool = _spill(spool)
+                    spilled = True
+                spool.write(chunk)
+        except BaseException:
+            spool.close()
+            raise
+
+    media = DownloadedMedia(spool, size, sniff_content_type(spool), response.headers.get("Content-Type"), spilled)
+    metrics.observe("media.download_kb", size / 1024)
+    if media.spilled:
+        metrics.incr("media.spilled")
+    if media.declared_type and media.declared_type.split(";")[0].strip() != media.content_type:
+        metrics.incr("media.type_mismatch")
+    return media
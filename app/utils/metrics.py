@@ -0,0 +1,93 @@
+"""Lightweight in-process metrics (counters, gauges, latency histograms)."""
+import threading
+from collections import deque
+from typing import Deque, Dict, Any, Optional
+
+
+class LatencyHistogram:
+    """Keeps a rolling window of samples and reports percentiles."""
+
+    def __init__(self, window: int = 2048):
+        self.samples: Deque[float] = deque(maxlen=window)
+        self.count = 0
+        self.total = 0.0
+
+    def observe(self, value: float) -> None:
+        self.samples.append(value)
+        self.count += 1
+        self.total += value
+
+    def percentile(self, pct: float) -> float:
+        """
+        Nearest-rank percentile over the rolling window.
+
+        Args:
+            pct: Percentile between 0 and 100
+
+        Returns:
+            Sample value, or 0.0 if no samples were observed
+        """
+        if not self.samples:
+            return 0.0
+        ordered = sorted(self.samples)
+        index = min(len(ordered) - 1, max(0, int(round(pct / 100 * len(ordered))) - 1))
+        return ordered[index]
+
+    def snapshot(self) -> Dict[str, float]:
+        return {
+            "count": self.count,
+            "avg": round(self.total / self.count, 3) if self.count else 0.0,
+            "p50": round(self.percentile(50), 3),
+            "p99": round(self.percentile(99), 3),
+            "max": round(max(self.samples), 3) if self.samples else 0.0,
+        }
+
+
+class MetricsRegistry:
+    """Thread-safe registry shared by the webhook, engine and services."""
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self.counters: Dict[str, float] = {}
+        self.gauges: Dict[str, float] = {}
+        self.histograms: Dict[str, LatencyHistogram] = {}
+
+    def incr(self, name: str, value: float = 1) -> None:
+        with self._lock:
+            self.counters[name] = self.counters.get(name, 0) + value
+
+    def set_gauge(self, name: str, value: float) -> None:
+        with self._lock:
+            self.gauges[name] = value
+
+    def observe(self, name: str, value: float) -> None:
+        with self._lock:
+            histogram = self.histograms.get(name)
+            if histogram is None:
+                histogram = self.histograms[name] = LatencyHistogram()
+            histogram.observe(value)
+
+    def counter(self, name: str) -> float:
+        return self.counters.get(name, 0)
+
+    def histogram(self, name: str) -> Optional[LatencyHistogram]:
+        return self.histograms.get(name)
+
+    def snapshot(self) -> Dict[str, Any]:
+        """Return a JSON-serialisable view of all metrics."""
+        with self._lock:
+            return {
+                "counters": dict(self.counters),
+                "gauges": dict(self.gauges),
+                "histograms": {k: h.snapshot() for k, h in self.histograms.items()},
+            }
+
+    def reset(self) -> None:
+        with self._lock:
+            self.counters.clear()
+            self.gauges.clear()
+            self.histograms.clear()
+
+
+# Global metrics registry
+metrics = MetricsRegistry()
@@ -0,0 +1,150 @@
+"""Micro-batching: collect concurrent requests for a few milliseconds and run them as one."""
+import asyncio
+import threading
+import time
+from concurrent.futures import Future
+from typing import Any, Awaitable, Callable, Generic, List, Optional, TypeVar
+
+from app.utils.metrics import metrics
+
+T = TypeVar("T")
+R = TypeVar("R")
+
+
+class _Batch:
+    __slots__ = ("items", "futures", "closed", "full", "started")
+
+    def __init__(self, full: Any):
+        self.items: List[Any] = []
+        self.futures: List[Any] = []
+        self.closed = False
+        self.full = full  # threading.Event / asyncio.Event
+        self.started = time.perf_counter()
+
+
+class MicroBatcher(Generic[T, R]):
+    """
+    Groups concurrent submissions into batches of up to max_batch_size.
+
+    A batch is flushed max_wait_ms after its first item arrived, or as soon
+    as it is full. Every caller gets its own result back. Threads (submit)
+    are flushed by the batch's first caller; on the event loop
+    (submit_async) a flush task does it, so a cancelled turn cannot strand
+    the others. Threads and the event loop are batched separately.
+    """
+
+    def __init__(
+        self,
+        name: str,
+        run_batch: Callable[[List[T]], List[R]],
+        run_batch_async: Optional[Callable[[List[T]], Awaitable[List[R]]]] = None,
+        max_batch_size: int = 16,
+        max_wait_ms: float = 10.0
+    ):
+        self.name = name
+        self.run_batch = run_batch
+        self.run_batch_async = run_batch_async
+        self.max_batch_size = max_batch_size
+        self.max_wait_ms = max_wait_ms
+        self._lock = threading.Lock()
+        self._batch: Optional[_Batch] = None
+        self._async_batch: Optional[_Batch] = None
+
+    def submit(self, item: T) -> R:
+        """
+        Add an item to the open batch and block until its result is ready.
+
+        Args:
+            item: One request
+
+        Returns:
+            The result for this item
+
+        Raises:
+            Exception: Whatever run_batch raised for the batch
+        """
+        future: Future = Future()
+        with self._lock:
+            batch = self._batch
+            leader = batch is None
+            if leader:
+                batch = self._batch = _Batch(threading.Event())
+            batch.items.append(item)
+            batch.futures.append(future)
+            if len(batch.items) >= self.max_batch_size:
+                self._close(batch)
+        if leader:
+            batch.full.wait(self.max_wait_ms / 1000)
+            with self._lock:
+                self._close(batch)
+            self._run(batch)
+        return future.result()
+
+    async def submit_async(self, item: T) -> R:
+        """Async variant of submit (runs batches with run_batch_async)."""
+        future = asyncio.get_running_loop().create_future()
+        batch = self._async_batch
+        if batch is None:
+            batch = self._async_batch = _Batch(asyncio.Event())
+            asyncio.ensure_future(self._flush_async(batch))
+        batch.items.append(item)
+        batch.futures.append(future)
+        if len(batch.items) >= self.max_batch_size:
+            self._close_async(batch)
+        return await future
+
+    async def _flush_async(self, batch: _Batch) -> None:
+        try:
+            await asyncio.wait_for(batch.full.wait(), self.max_wait_ms / 1000)
+        except asyncio.TimeoutError:
+            pass
+        self._close_async(batch)
+        await self._run_async(batch)
+
+    def _close(self, batch: _Batch) -> None:
+        if not batch.closed:
+            batch.closed = True
+            self._batch = None
+            batch.full.set()
+
+    def _close_async(self, batch: _Batch) -> None:
+        if not batch.closed:
+            batch.closed = True
+            self._async_batch = None
+            batch.full.set()
+
+    def _observe(self, batch: _Batch) -> None:
+        metrics.incr(f"batch.{self.name}.batches")
+        metrics.incr(f"batch.{self.name}.items", len(batch.items))
+        metrics.observe(f"batch.{self.name}.size", len(batch.items))
+        metrics.observe(f"batch.{self.name}.wait_ms", (time.perf_counter() - batch.started) * 1000)
+
+    @staticmethod
+    def _checked(batch: _Batch, results: List[Any]) -> List[Any]:
+        if len(results) != len(batch.items):
+            raise ValueError(f"Batch of {len(batch.items)} items returned {len(results)} results")
+        return results
+
+    def _run(self, batch: _Batch) -> None:
+        self._observe(batch)
+        try:
+            results = self._checked(batch, self.run_batch(batch.items))
+        except Exception as e:
+            for future in batch.futures:
+                future.set_exception(e)
+            return
+        for future, result in zip(batch.futures, results):
+            future.set_result(result)
+
+    async def _run_async(self, batch: _Batch) -> None:
+        self._observe(batch)
+        try:
+            results = self._checked(batch, await self.run_batch_async(batch.items))
+        except Exception as e:
+            for future in batch.futures:
+                if not future.done():
+                    future.set_exception(e)
+            return
+        for future, result in zip(batch.futures, results):
+            if not future.done():  # The waiting turn may have been cancelled
+                future.set_result(result)
@@ -0,0 +1,210 @@
+"""MinHash/LSH index for near-duplicate short texts (no network, pure Python)."""
+import re
+import threading
+import unicodedata
+import zlib
+from collections import OrderedDict
+from typing import Any, Dict, FrozenSet, Iterable, List, Optional, Tuple
+
+
+STOPWORDS = {
+    # German
+    "wie", "was", "wo", "wann", "warum", "wieso", "weshalb", "welche", "welcher", "welches", "wer", "ist", "sind",
+    "das", "der", "die", "den", "dem", "des", "ein", "eine", "einen", "einem", "man", "bei", "euch", "ihr", "ihnen",
+    "du", "ich", "es", "mir", "mich", "hoch", "viel", "denn", "so", "auch", "und", "oder", "in", "im", "am", "an",
+    "zu", "zum", "zur", "für", "mit", "von", "vom", "gibt", "habt", "hat", "haben", "kann", "können", "könnt",
+    "wird", "werden", "bitte", "mal", "eigentlich", "euer", "eure", "eurer", "eurem", "euren", "da", "dort",
+    "hier", "uns", "wir", "sie", "noch", "schon", "gerne", "gern", "genau", "aktuell", "dann", "mehr",
+    "etwas", "über", "ueber", "sagen", "sag", "erzählen", "wissen", "infos", "info", "frage", "hallo", "hi",
+    "möglich", "ab", "arbeiten", "läuft", "geht",
+    # English
+    "the", "is", "are", "what", "how", "much", "do", "does", "you", "a", "an", "of", "for", "at", "to", "your",
+    "can", "i", "we", "there", "please",
+}
+SUFFIXES = ("ungen", "ung", "en", "st", "er", "e", "n", "s", "t")
+
+# Words that flip or restrict the meaning of an otherwise identical question
+# ("Kann ich remote arbeiten?" / "Muss ich remote arbeiten?" / "... nicht remote ...").
+# They add few n-grams, so the texts of a match must contain the same ones.
+MUST_MATCH = {
+    "nicht": "nicht", "nichts": "nicht", "kein": "kein", "keine": "kein", "keinen": "kein", "keiner": "kein",
+    "keinem": "kein", "keines": "kein", "nie": "nie", "niemals": "nie", "ohne": "ohne", "nur": "nur",
+    "muss": "muss", "müssen": "muss", "musst": "muss", "müsst": "muss", "soll": "soll", "sollte": "soll",
+    "sollen": "soll", "darf": "darf", "dürfen": "darf", "darfst": "darf",
+    "not": "not", "no": "not", "never": "never", "without": "without", "only": "only", "must": "must",
+    "should": "should", "have to": "must",
+}
+
+
+def stem(token: str) -> str:
+    """Crude German/English suffix stripping ("verdient" and "verdienst" -> "verdien")."""
+    for suffix in SUFFIXES:
+        if token.endswith(suffix) and len(token) - len(suffix) >= 4:
+            return token[: -len(suffix)]
+    return token
+
+
+class MinHashIndex:
+    """
+    Near-duplicate lookup over short texts.
+
+    Texts are normalized (stopwords dropped, tokens stemmed, synonyms mapped
+    to concept tokens), split into character n-grams and MinHashed; LSH
+    banding yields candidates, which are verified with the exact Jaccard
+    similarity of their n-gram sets. A candidate only matches if it was
+    added under the same scope and contains the same MUST_MATCH words
+    (negations, modals). Oldest entries are evicted first.
+    """
+
+    def __init__(
+        self,
+        threshold: float = 0.6,
+        max_entries: int = 100000,
+        num_perm: int = 64,
+        bands: int = 16,
+        ngram: int = 3,
+        concepts: Optional[Dict[str, str]] = None
+    ):
+        if num_perm % bands:
+            raise ValueError("num_perm must be divisible by bands")
+        self.threshold = threshold
+        self.max_entries = max_entries
+        self.num_perm = num_perm
+        self.bands = bands
+        self.rows = num_perm // bands
+        self.ngram = ngram
+        self.concepts: Dict[str, str] = {}  # stemmed word or phrase -> concept token
+        self.phrases: List[Tuple[str, str]] = []
+        for term, concept in (concepts or {}).items():
+            self.add_concept(term, concept)
+
+        # Fixed (a, b) pairs for h(x) = (a * x + b) mod p, so signatures are stable across processes
+        prime = (1 << 61) - 1
+        self._prime = prime
+        self._perms = [((i * 0x9E3779B1 + 1) % prime | 1, (i * 0x85EBCA77 + 7) % prime) for i in range(num_perm)]
+
+        # entry id -> (shingles, signature, (scope, must-match words), value)
+        self._entries: "OrderedDict[int, Tuple[FrozenSet[int], Tuple[int, ...], Tuple[Any, FrozenSet[str]], Any]]" = OrderedDict()
+        self._buckets: Dict[Tuple[int, Tuple[int, ...]], List[int]] = {}
+        self._next_id = 0
+        self._lock = threading.Lock()
+
+    def add_concept(self, term: str, concept: str) -> None:
+        term = term.lower().strip()
+        if " " in term:
+            self.phrases.append((term, concept))
+        else:
+            self.concepts[stem(term)] = concept
+
+    def normalize(self, text: str) -> str:
+        text = unicodedata.normalize("NFC", text).lower()
+        for phrase, concept in self.phrases:
+            text = text.replace(phrase, f" {concept} ")
+        tokens = []
+        for token in re.findall(r"[#\w€]+", text):
+            if token in STOPWORDS:
+                continue
+            token = token if token.startswith("#") else stem(token)
+            tokens.append(self.concepts.get(token, token))
+        return " ".join(tokens)
+
+    def markers(self, text: str) -> FrozenSet[str]:
+        """Negation and modal words of a text, canonicalized ("keinen" -> "kein")."""
+        text = unicodedata.normalize("NFC", text).lower()
+        found = {MUST_MATCH[token] for token in re.findall(r"\w+", text) if token in MUST_MATCH}
+        found.update(marker for phrase, marker in MUST_MATCH.items() if " " in phrase and phrase in text)
+        return frozenset(found)
+
+    def shingles(self, text: str) -> FrozenSet[int]:
+        normalized = f" {self.normalize(text)} "
+        if not normalized.strip():
+            return frozenset()
+        n = self.ngram
+        if len(normalized) <= n:
+            return frozenset({zlib.crc32(normalized.encode("utf-8"))})
+        return frozenset(zlib.crc32(normalized[i:i + n].encode("utf-8")) for i in range(len(normalized) - n + 1))
+
+    def signature(self, shingles: Iterable[int]) -> Tuple[int, ...]:
+        prime = self._prime
+        shingles = tuple(shingles)
+        return tuple(min((a * x + b) % prime for x in shingles) for a, b in self._perms)
+
+    def _band_keys(self, signature: Tuple[int, ...]) -> List[Tuple[int, Tuple[int, ...]]]:
+        rows = self.rows
+        return [(band, signature[band * rows:(band + 1) * rows]) for band in range(self.bands)]
+
+    def add(self, text: str, value: Any, scope: Any = None) -> bool:
+        """
+        Index a text.
+
+        Args:
+            text: The text (e.g. a candidate question)
+            value: Payload returned by lookup
+            scope: Only lookups with the same scope match it
+
+        Returns:
+            False if the text has no content after normalization
+        """
+        shingles = self.shingles(text)
+        if not shingles:
+            return False
+        signature = self.signature(shingles)
+        key = (scope, self.markers(text))
+        with self._lock:
+            entry_id = self._next_id
+            self._next_id += 1
+            self._entries[entry_id] = (shingles, signature, key, value)
+            for key in self._band_keys(signature):
+                self._buckets.setdefault(key, []).append(entry_id)
+            while len(self._entries) > self.max_entries:
+                self._evict_oldest()
+        return True
+
+    def _evict_oldest(self) -> None:
+        entry_id, (_, signature, _, _) = self._entries.popitem(last=False)
+        for key in self._band_keys(signature):
+            bucket = self._buckets.get(key)
+            if bucket is None:
+                continue
+            bucket.remove(entry_id)
+            if not bucket:
+                del self._buckets[key]
+
+    def lookup(self, text: str, scope: Any = None) -> Optional[Tuple[Any, float]]:
+        """
+        Find the most similar indexed text.
+
+        Args:
+            text: Query text
+            scope: Scope the text was added under
+
+        Returns:
+            (value, Jaccard similarity) of the best match at or above the
+            threshold, or None
+        """
+        shingles = self.shingles(text)
+        if not shingles:
+            return None
+        signature = self.signature(shingles)
+        key = (scope, self.markers(text))
+        best: Optional[Tuple[Any, float]] = None
+        with self._lock:
+            candidates = set()
+            for band_key in self._band_keys(signature):
+                candidates.update(self._buckets.get(band_key, ()))
+            for entry_id in candidates:
+                other, _, other_key, value = self._entries[entry_id]
+                if other_key != key:
+                    continue
+                similarity = len(shingles & other) / len(shingles | other)
+                if similarity >= self.threshold and (best is None or similarity > best[1]):
+                    best = (value, similarity)
+        return best
+
+    def clear(self) -> None:
+        with self._lock:
+            self._entries.clear()
+            self._buckets.clear()
+
+    def __len__(self) -> int:
+        return len(self._entries)
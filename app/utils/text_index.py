@@ -0,0 +1,119 @@
+"""Keyword automaton (Aho-Corasick) and BM25 ranking for short German/English texts."""
+import math
+import re
+import unicodedata
+from collections import Counter, deque
+from typing import Dict, Hashable, Iterable, List, Tuple
+
+from app.utils.near_duplicate import STOPWORDS, stem
+
+
+def normalize(text: str) -> str:
+    return unicodedata.normalize("NFC", text).lower()
+
+
+def tokenize(text: str) -> List[str]:
+    """Lowercased, stemmed word tokens without stopwords."""
+    return [stem(token) for token in re.findall(r"\w+", normalize(text)) if token not in STOPWORDS]
+
+
+class KeywordAutomaton:
+    """
+    Finds all keywords in a text in one pass (Aho-Corasick).
+
+    Matches must start at a word boundary. Keywords of at least
+    min_prefix_len characters also match as a word prefix ("gehalt" in
+    "gehaltsvorstellung"); shorter ones must match a whole word ("hi" does
+    not match "hier").
+    """
+
+    def __init__(self, keywords: Iterable[Tuple[str, Hashable]], min_prefix_len: int = 5):
+        self.min_prefix_len = min_prefix_len
+        self._goto: List[Dict[str, int]] = [{}]
+        self._fail: List[int] = [0]
+        self._out: List[List[Tuple[int, Hashable]]] = [[]]  # (keyword length, value)
+        for keyword, value in keywords:
+            self._insert(normalize(keyword).strip(), value)
+        self._build()
+
+    def _insert(self, keyword: str, value: Hashable) -> None:
+        if not keyword:
+            return
+        node = 0
+        for ch in keyword:
+            nxt = self._goto[node].get(ch)
+            if nxt is None:
+                nxt = len(self._goto)
+                self._goto[node][ch] = nxt
+                self._goto.append({})
+                self._fail.append(0)
+                self._out.append([])
+            node = nxt
+        self._out[node].append((len(keyword), value))
+
+    def _build(self) -> None:
+        queue = deque(self._goto[0].values())
+        while queue:
+            node = queue.popleft()
+            for ch, nxt in self._goto[node].items():
+                queue.append(nxt)
+                fail = self._fail[node]
+                while fail and ch not in self._goto[fail]:
+                    fail = self._fail[fail]
+                self._fail[nxt] = self._goto[fail].get(ch, 0)
+                self._out[nxt] = self._out[nxt] + self._out[self._fail[nxt]]
+
+    def find(self, text: str) -> List[Tuple[int, int, Hashable]]:
+        """
+        Find keyword occurrences.
+
+        Args:
+            text: Text to scan
+
+        Returns:
+            (start, end, value) per match, in text order
+        """
+        text = normalize(text)
+        matches = []
+        node = 0
+        for i, ch in enumerate(text):
+            while node and ch not in self._goto[node]:
+                node = self._fail[node]
+            node = self._goto[node].get(ch, 0)
+            for length, value in self._out[node]:
+                start, end = i - length + 1, i + 1
+                if start > 0 and text[start - 1].isalnum():
+                    continue
+                if end < len(text) and text[end].isalnum() and length < self.min_prefix_len:
+                    continue
+                matches.append((start, end, value))
+        return matches
+
+
+class BM25Index:
+    """Okapi BM25 over a small, fixed document collection."""
+
+    def __init__(self, documents: Dict[Hashable, List[str]], k1: float = 1.5, b: float = 0.75):
+        self.k1 = k1
+        self.b = b
+        self._tf = {doc_id: Counter(tokens) for doc_id, tokens in documents.items()}
+        self._length = {doc_id: len(tokens) for doc_id, tokens in documents.items()}
+        self._avg_length = sum(self._length.values()) / len(documents) if documents else 0.0
+        df = Counter(token for tf in self._tf.values() for token in tf)
+        n = len(documents)
+        self._idf = {token: math.log((n - count + 0.5) / (count + 0.5) + 1) for token, count in df.items()}
+
+    def scores(self, tokens: Iterable[str]) -> Dict[Hashable, float]:
+        """BM25 score of every document that shares at least one token with the query."""
+        scores: Dict[Hashable, float] = {}
+        for token in set(tokens):
+            idf = self._idf.get(token)
+            if idf is None:
+                continue
+            for doc_id, tf in self._tf.items():
+                freq = tf.get(token)
+                if not freq:
+                    continue
+                norm = 1 - self.b + self.b * self._length[doc_id] / self._avg_length
+                scores[doc_id] = scores.get(doc_id, 0.0) + idf * freq * (self.k1 + 1) / (freq + self.k1 * norm)
+        return scores
@@ -1,8 +1,9 @@
 """Background tasks for document processing."""
 from sqlalchemy.orm import Session
+from starlette.concurrency import run_in_threadpool
 from app.db import crud
-from app.utils.document_processor import download_media, extract_document_text, save_document
-from app.services.cv_analyzer import cv_analyzer
+from app.utils.document_processor import document_extension, download_media, extract_document_text, save_document
+from app.services.cv_analyzer import COVER_LETTER_CHARS, CV_ANALYSIS_CHARS, cv_analyzer
 from app.services.twilio_service import twilio_service
 from app.core.scoring import calculate_lead_score, get_score_feedback
 from app.utils.logger import app_logger
@@ -22,11 +23,12 @@ async def process_document_upload(
     Args:
         message_sid: Twilio message ID
         media_url: URL to media file
-        media_content_type: Content type
+        media_content_type: Content type as declared by Twilio (the file's magic bytes decide)
         user_id: User's WhatsApp number
         body: Message body
         db: Database session
     """
+    media = None
     try:
         app_logger.info(f"Starting background processing for {message_sid}")
         
@@ -34,19 +36,12 @@ async def process_document_upload(
         lead = crud.get_or_create_lead(db, user_id)
         
         # Download document
-        file_content = download_media(media_url, settings.twilio_auth_token)
+        media = download_media(media_url, settings.twilio_auth_token)
         
-        if not file_content:
+        if media is None:
             twilio_service.send_message(user_id, "❌ Konnte das Dokument leider nicht herunterladen. Bitte versuche es nochmal.")
             return
 
-        # Extract text from document
-        doc_text = extract_document_text(file_content, media_content_type)
-        
-        if not doc_text:
-            twilio_service.send_message(user_id, "❌ Konnte den Text aus dem Dokument nicht lesen. Bitte sende ein PDF oder DOCX.")
-            return
-
         # Determine document type
         is_cv = any(word in body.lower() for word in ["cv", "lebenslauf", "resume"])
         is_cover = any(word in body.lower() for word in ["anschreiben", "cover", "motivationsschreiben"])
@@ -55,12 +50,20 @@ async def process_document_upload(
         if not is_cv and not is_cover:
             is_cv = True
         
+        # Extract only the text the analysis prompt uses (the file itself is saved in full)
+        budget = CV_ANALYSIS_CHARS if is_cv else COVER_LETTER_CHARS
+        doc_text = await run_in_threadpool(extract_document_text, media, budget)
+        
+        if not doc_text:
+            twilio_service.send_message(user_id, "❌ Konnte den Text aus dem Dokument nicht lesen. Bitte sende ein PDF oder DOCX.")
+            return
+
         if is_cv:
             # Analyze CV (Time intensive!)
             cv_data = cv_analyzer.analyze_cv(doc_text)
             
             # Save file
-            file_path = save_document(file_content, f"cv_{message_sid}.pdf", lead.id)
+            file_path = save_document(media, f"cv_{message_sid}.{document_extension(media)}", lead.id)
             
             # Update lead with CV data
             crud.update_lead(db, lead,
@@ -112,7 +115,7 @@ async def process_document_upload(
             cover_data = cv_analyzer.analyze_cover_letter(doc_text)
             
             # Save file
-            file_path = save_document(file_content, f"cover_{message_sid}.pdf", lead.id)
+            file_path = save_document(media, f"cover_{message_sid}.{document_extension(media)}", lead.id)
             
             # Update lead
             crud.update_lead(db, lead,
@@ -147,3 +150,6 @@ async def process_document_upload(
     except Exception as e:
         app_logger.error(f"Error in background document processing: {e}")
         twilio_service.send_message(user_id, "⚠️ Bei der Analyse gab es ein kleines Problem. Unser HR-Team schaut sich das Dokument manuell an!")
+    finally:
+        if media is not None:
+            media.close()
@@ -0,0 +1,116 @@
+"""
+Benchmark: micro-batched vs. per-request classify_flow_input under load.
+
+Replaces the OpenAI client with a local stub model whose latency is a
+fixed base plus a per-item cost, and which only serves a limited number of
+requests at once (rate limit / provider concurrency). Turns arrive as a
+Poisson stream from worker threads and go through openai_service, so the
+prompt build and the fan-out of the batched answer are measured too.
+
+Usage:
+    python scripts/bench_classify_batch.py --turns 400 --rate 150 --base-ms 300 --item-ms 15 --slots 8
+"""
+import argparse
+import json
+import os
+import random
+import sys
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from pathlib import Path
+from types import SimpleNamespace
+
+# Add project root to path
+project_root = Path(__file__).parent.parent
+sys.path.insert(0, str(project_root))
+os.chdir(project_root)
+for key in ("OPENAI_API_KEY", "TWILIO_ACCOUNT_SID", "TWILIO_AUTH_TOKEN", "TWILIO_WHATSAPP_NUMBER"):
+    os.environ.setdefault(key, "bench-dummy")
+
+from app.config import settings
+from app.services.openai_service import openai_service
+from app.utils.micro_batch import MicroBatcher
+
+MESSAGES = ["ja", "nein", "klar, gerne", "eher nicht", "Wie viel verdient man?", "Job 2", "passt", "hmm"]
+
+
+class StubModel:
+    """chat.completions.create with latency base + items * per-item, at most `slots` requests at once."""
+
+    def __init__(self, base_s, item_s, slots):
+        self.base_s = base_s
+        self.item_s = item_s
+        self.slots = threading.Semaphore(slots)
+        self.requests = 0
+
+    def create(self, **request):
+        content = request["messages"][-1]["content"]
+        batched = request["functions"][0]["name"] == "classify_inputs"
+        inputs = json.loads(content) if batched else [{"id": 0}]
+        with self.slots:
+            self.requests += 1
+            time.sleep(self.base_s + self.item_s * len(inputs))
+        results = [{"id": item["id"], "category": "VALID_ANSWER", "normalized_value": "YES"} for item in inputs]
+        args = json.dumps({"results": results} if batched else results[0])
+        return SimpleNamespace(choices=[SimpleNamespace(message=SimpleNamespace(function_call=SimpleNamespace(arguments=args)))])
+
+
+def percentile(samples, p):
+    ordered = sorted(samples)
+    return ordered[min(len(ordered) - 1, int(len(ordered) * p / 100))]
+
+
+def run(args, batcher):
+    stub = StubModel(args.base_ms / 1000, args.item_ms / 1000, args.slots)
+    openai_service.client.chat.completions.create = stub.create
+    openai_service.classify_batcher = batcher
+    rng = random.Random(1)
+    latencies = []
+
+    def turn(i):
+        started = time.perf_counter()
+        openai_service.classify_flow_input(f"{MESSAGES[i % len(MESSAGES)]} #{i}", "yes_no")
+        latencies.append((time.perf_counter() - started) * 1000)
+
+    started = time.perf_counter()
+    with ThreadPoolExecutor(max_workers=args.turns) as pool:
+        for i in range(args.turns):
+            pool.submit(turn, i)
+            time.sleep(rng.expovariate(args.rate))
+    elapsed = time.perf_counter() - started
+    return args.turns / elapsed, percentile(latencies, 50), percentile(latencies, 99), stub.requests
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--turns", type=int, default=400)
+    parser.add_argument("--rate", type=float, default=150.0, help="Arriving turns per second")
+    parser.add_argument("--base-ms", type=float, default=300.0, help="Stub latency per request")
+    parser.add_argument("--item-ms", type=float, default=15.0, help="Stub latency per classified item")
+    parser.add_argument("--slots", type=int, default=8, help="Requests the stub serves at once")
+    parser.add_argument("--max-batch", type=int, default=16)
+    parser.add_argument("--max-wait-ms", type=float, default=10.0)
+    args = parser.parse_args()
+
+    # Every turn is a new message, so the cache and streaming are out of the picture
+    openai_service.classify_cache = None
+    settings.classify_streaming = False
+
+    print(f"{args.turns} turns at {args.rate:.0f}/s, stub {args.base_ms:.0f} ms + {args.item_ms:.0f} ms/item, "
+          f"{args.slots} slots")
+    print(f"{'mode':<28}{'turns/s':>9}{'p50 ms':>9}{'p99 ms':>9}{'requests':>10}")
+    modes = [
+        ("per-request", None),
+        (f"batched (<= {args.max_batch}, {args.max_wait_ms:.0f} ms)", MicroBatcher(
+            "classify", openai_service._classify_batch, openai_service._classify_batch_async,
+            max_batch_size=args.max_batch, max_wait_ms=args.max_wait_ms
+        )),
+    ]
+    for label, batcher in modes:
+        throughput, p50, p99, requests = run(args, batcher)
+        print(f"{label:<28}{throughput:>9.1f}{p50:>9.0f}{p99:>9.0f}{requests:>10}")
+
+
+if __name__ == "__main__":
+    main()
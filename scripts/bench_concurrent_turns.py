@@ -0,0 +1,125 @@
+"""
+Benchmark: concurrent conversation turns per worker, threadpool vs. async path.
+
+OpenAI and Twilio are replaced by stubs with a fixed latency, so the numbers
+show how many turns one uvicorn worker keeps in flight, not model speed.
+
+Usage:
+    python scripts/bench_concurrent_turns.py --turns 400 --latency-ms 300 --openai-concurrency 64
+"""
+import argparse
+import asyncio
+import json
+import os
+import sys
+import tempfile
+import time
+from pathlib import Path
+from types import SimpleNamespace
+
+# Add project root to path
+project_root = Path(__file__).parent.parent
+sys.path.insert(0, str(project_root))
+os.chdir(project_root)
+
+_db_dir = tempfile.mkdtemp(prefix="bench_turns_")
+os.environ["DATABASE_URL"] = f"sqlite:///{_db_dir}/bench.db"
+for key in ("OPENAI_API_KEY", "TWILIO_ACCOUNT_SID", "TWILIO_AUTH_TOKEN", "TWILIO_WHATSAPP_NUMBER"):
+    os.environ.setdefault(key, "bench-dummy")
+os.environ["LOCAL_CLASSIFIER_ENABLED"] = "false"  # every turn pays for classify + generate
+os.environ["ENVIRONMENT"] = "benchmark"  # no SQL echo
+os.environ["CLASSIFY_CACHE_ENABLED"] = "false"  # identical inputs would be answered from the cache
+
+from app.config import settings
+from app.core import turn_processor as turn_module
+from app.core.flow_engine import FlowEngine
+from app.core.turn_processor import InboundMessage, TurnProcessor
+from app.db import crud
+from app.db.database import SessionLocal, init_db
+from app.services.openai_service import openai_service
+from app.services.twilio_service import twilio_service
+
+
+def _completion(**request):
+    if request.get("functions"):
+        args = json.dumps({"category": "VALID_ANSWER", "normalized_value": "YES"})
+        message = SimpleNamespace(function_call=SimpleNamespace(arguments=args), content=None)
+    else:
+        message = SimpleNamespace(function_call=None, content="Super! Bist du fit in Python? 🐍")
+    return SimpleNamespace(choices=[SimpleNamespace(message=message)], usage=SimpleNamespace(total_tokens=120))
+
+
+def install_stubs(latency_s: float) -> None:
+    def create(**request):
+        time.sleep(latency_s)
+        return _completion(**request)
+
+    async def create_async(**request):
+        await asyncio.sleep(latency_s)
+        return _completion(**request)
+
+    async def send_async(to_number, message):
+        await asyncio.sleep(latency_s / 3)
+        return True
+
+    def send(to_number, message):
+        time.sleep(latency_s / 3)
+        return True
+
+    openai_service.client = SimpleNamespace(chat=SimpleNamespace(completions=SimpleNamespace(create=create)))
+    openai_service.async_client = SimpleNamespace(chat=SimpleNamespace(completions=SimpleNamespace(create=create_async)))
+    twilio_service.send_message = send
+    twilio_service.send_message_async = send_async
+    turn_module.enqueue_scoring = lambda lead_id: None
+
+
+def seed(users) -> None:
+    db = SessionLocal()
+    try:
+        for user in users:
+            lead = crud.get_or_create_lead(db, user)
+            lead.conversation_stage = FlowEngine.STATE_REQ_1
+            lead.conversation_history = []
+        db.commit()
+    finally:
+        db.close()
+
+
+async def run(mode: str, turns: int) -> dict:
+    settings.async_turns = mode == "async"
+    processor = TurnProcessor()
+    users = [f"whatsapp:+49151{mode == 'async':d}{i:07d}" for i in range(turns)]
+    seed(users)
+
+    started = time.perf_counter()
+    for i, user in enumerate(users):
+        processor.submit(user, InboundMessage(f"SM{mode}{i}", "Ich habe schon einige Bots gebaut"))
+    while processor.in_flight:
+        await asyncio.sleep(0.01)
+    elapsed = time.perf_counter() - started
+    return {"mode": mode, "turns": turns, "seconds": round(elapsed, 2), "turns_per_s": round(turns / elapsed, 1)}
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--turns", type=int, default=400, help="Concurrent turns (one per sender)")
+    parser.add_argument("--latency-ms", type=int, default=300, help="Stubbed latency per OpenAI call")
+    parser.add_argument("--openai-concurrency", type=int, default=settings.openai_max_concurrency)
+    args = parser.parse_args()
+    settings.openai_max_concurrency = args.openai_concurrency
+    settings.classify_streaming = False  # Stubs return whole completions
+
+    init_db()
+    install_stubs(args.latency_ms / 1000)
+    # One turn = classify + generate + send
+    sequential_s = (2 + 1 / 3) * args.latency_ms / 1000
+    print(f"{args.turns} turns, {args.latency_ms} ms per OpenAI call (~{sequential_s:.2f} s per turn), "
+          f"openai_max_concurrency={settings.openai_max_concurrency}")
+    for mode in ("threadpool", "async"):
+        result = asyncio.run(run(mode, args.turns))
+        in_flight = result["turns_per_s"] * sequential_s
+        print(f"{mode:>10}: {result['seconds']:>6} s  {result['turns_per_s']:>7} turns/s  ~{in_flight:.0f} turns in flight")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,83 @@
+"""
+Benchmark: PDF extraction in the web process vs. the extraction worker pool.
+
+Extracts a corpus of generated CV PDFs (scripts/pdf_fixtures.py) from
+several threads, as the job workers do, and reports documents and pages
+per second. A heartbeat thread stands in for request handling in the web
+process: its p99 / max lag shows how much extraction stalls it.
+
+Usage:
+    python scripts/bench_extraction_pool.py --docs 60 --pages 3 --threads 4 --workers 1,2,4
+"""
+import argparse
+import os
+import sys
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from pathlib import Path
+
+# Add project root to path
+project_root = Path(__file__).parent.parent
+sys.path.insert(0, str(project_root))
+os.chdir(project_root)
+for key in ("OPENAI_API_KEY", "TWILIO_ACCOUNT_SID", "TWILIO_AUTH_TOKEN", "TWILIO_WHATSAPP_NUMBER"):
+    os.environ.setdefault(key, "bench-dummy")
+
+from app.services.extraction_pool import PDF, ExtractionPool
+from scripts.pdf_fixtures import cv_pdf
+
+
+class Heartbeat(threading.Thread):
+    """Sleeps 2 ms at a time and records how late it wakes up."""
+
+    def __init__(self):
+        super().__init__(daemon=True)
+        self.lags = []
+        self.running = True
+
+    def run(self):
+        while self.running:
+            started = time.perf_counter()
+            time.sleep(0.002)
+            self.lags.append((time.perf_counter() - started - 0.002) * 1000)
+
+
+def run(pool, corpus, threads):
+    pool.extract(PDF, corpus[0])  # Start the workers outside the measurement
+    heartbeat = Heartbeat()
+    heartbeat.start()
+    started = time.perf_counter()
+    with ThreadPoolExecutor(max_workers=threads) as executor:
+        list(executor.map(lambda content: pool.extract(PDF, content), corpus))
+    elapsed = time.perf_counter() - started
+    heartbeat.running = False
+    heartbeat.join()
+    lags = sorted(heartbeat.lags)
+    return elapsed, lags[int(len(lags) * 0.99)], lags[-1]
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--docs", type=int, default=60)
+    parser.add_argument("--pages", type=int, default=3)
+    parser.add_argument("--threads", type=int, default=4, help="Concurrent extractions (job workers)")
+    parser.add_argument("--workers", default="1,2,4", help="Pool sizes to compare")
+    args = parser.parse_args()
+
+    corpus = [cv_pdf(args.pages, seed=i) for i in range(args.docs)]
+    pages = args.docs * args.pages
+    print(f"{args.docs} PDFs x {args.pages} pages, {args.threads} threads, {os.cpu_count()} CPUs")
+    print(f"{'mode':<20}{'docs/s':>9}{'pages/s':>9}{'heartbeat p99 ms':>18}{'max ms':>8}")
+    modes = [("in-process", 0)] + [(f"pool, {n} workers", int(n)) for n in args.workers.split(",")]
+    for label, workers in modes:
+        pool = ExtractionPool(workers=workers, timeout_seconds=60, max_jobs_per_worker=50)
+        try:
+            elapsed, p99, worst = run(pool, corpus, args.threads)
+        finally:
+            pool.close()
+        print(f"{label:<20}{args.docs / elapsed:>9.1f}{pages / elapsed:>9.1f}{p99:>18.1f}{worst:>8.1f}")
+
+
+if __name__ == "__main__":
+    main()
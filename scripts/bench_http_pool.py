@@ -0,0 +1,117 @@
+"""
+Benchmark: fresh connection per call vs. the shared keep-alive pool.
+
+"fresh" mirrors the old code paths (bare requests.get, a new client per
+call); "pooled" goes through HttpTransport. The local server sleeps
+--handshake-ms once per new connection to stand in for the TCP + TLS
+round trips to a remote API (loopback handshakes are nearly free).
+
+Usage:
+    python scripts/bench_http_pool.py --requests 200 --concurrency 8 --handshake-ms 30
+"""
+import argparse
+import os
+import statistics
+import sys
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from pathlib import Path
+
+# Add project root to path
+project_root = Path(__file__).parent.parent
+sys.path.insert(0, str(project_root))
+os.chdir(project_root)
+for key in ("OPENAI_API_KEY", "TWILIO_ACCOUNT_SID", "TWILIO_AUTH_TOKEN", "TWILIO_WHATSAPP_NUMBER"):
+    os.environ.setdefault(key, "bench-dummy")
+
+import httpx
+import requests
+
+from app.utils.http_transport import HttpTransport
+
+
+class Handler(BaseHTTPRequestHandler):
+    protocol_version = "HTTP/1.1"
+    disable_nagle_algorithm = True  # Headers and body are separate writes
+    handshake_s = 0.0
+    connections = 0
+
+    def setup(self):
+        super().setup()
+        Handler.connections += 1
+        time.sleep(self.handshake_s)
+
+    def do_GET(self):
+        body = b'{"ok": true}'
+        self.send_response(200)
+        self.send_header("Content-Length", str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def log_message(self, *args):
+        pass
+
+
+def run(call, n: int, concurrency: int):
+    latencies = []
+
+    def timed(_):
+        started = time.perf_counter()
+        call()
+        latencies.append((time.perf_counter() - started) * 1000)
+
+    Handler.connections = 0
+    started = time.perf_counter()
+    with ThreadPoolExecutor(max_workers=concurrency) as pool:
+        list(pool.map(timed, range(n)))
+    elapsed = time.perf_counter() - started
+    latencies.sort()
+    return {
+        "rps": n / elapsed,
+        "p50": statistics.median(latencies),
+        "p99": latencies[int(len(latencies) * 0.99) - 1],
+        "connections": Handler.connections,
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--requests", type=int, default=200)
+    parser.add_argument("--concurrency", type=int, default=8)
+    parser.add_argument("--handshake-ms", type=float, default=30.0)
+    args = parser.parse_args()
+
+    Handler.handshake_s = args.handshake_ms / 1000
+    httpd = ThreadingHTTPServer(("127.0.0.1", 0), Handler)
+    threading.Thread(target=httpd.serve_forever, daemon=True).start()
+    url = f"http://127.0.0.1:{httpd.server_port}/"
+
+    transport = HttpTransport(max_connections_per_host=args.concurrency)
+    session = transport.session("bench")
+    client = transport.httpx_client("bench_httpx")
+
+    def fresh_httpx():
+        with httpx.Client() as c:
+            c.get(url)
+
+    cases = [
+        ("requests fresh", lambda: requests.get(url, timeout=10)),
+        ("requests pooled", lambda: session.get(url, timeout=10)),
+        ("httpx fresh", fresh_httpx),
+        ("httpx pooled", lambda: client.get(url)),
+    ]
+    print(f"{args.requests} requests, concurrency {args.concurrency}, simulated handshake {args.handshake_ms:.0f} ms")
+    print(f"{'mode':<18}{'req/s':>9}{'p50 ms':>9}{'p99 ms':>9}{'conns':>8}")
+    for label, call in cases:
+        r = run(call, args.requests, args.concurrency)
+        print(f"{label:<18}{r['rps']:>9.0f}{r['p50']:>9.1f}{r['p99']:>9.1f}{r['connections']:>8}")
+
+    print(transport.snapshot())
+    transport.close()
+    httpd.shutdown()
+
+
+if __name__ == "__main__":
+    main()
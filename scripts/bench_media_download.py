@@ -0,0 +1,122 @@
+"""
+Benchmark: peak memory of concurrent media downloads, buffered vs. streamed.
+
+Serves a large PDF-like payload from a local HTTP stand-in for Twilio's
+media host and downloads it from several threads at once, each holding
+its file until all are downloaded (as concurrent uploads being extracted
+do). "buffered" is the previous path (response.content -> BytesIO ->
+getvalue() for the extractor); "streamed" is download_to_spool plus the
+memoryview the extractor gets. Each mode runs in a fresh subprocess so
+peak RSS (ru_maxrss) is measured on its own.
+
+Usage:
+    python scripts/bench_media_download.py --mb 20 --concurrency 8
+"""
+import argparse
+import os
+import resource
+import subprocess
+import sys
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from io import BytesIO
+from pathlib import Path
+
+# Add project root to path
+project_root = Path(__file__).parent.parent
+sys.path.insert(0, str(project_root))
+os.chdir(project_root)
+for key in ("OPENAI_API_KEY", "TWILIO_ACCOUNT_SID", "TWILIO_AUTH_TOKEN", "TWILIO_WHATSAPP_NUMBER"):
+    os.environ.setdefault(key, "bench-dummy")
+
+
+def serve(payload):
+    class Handler(BaseHTTPRequestHandler):
+        protocol_version = "HTTP/1.1"
+        disable_nagle_algorithm = True
+
+        def do_GET(self):
+            self.send_response(200)
+            self.send_header("Content-Type", "application/pdf")
+            self.send_header("Content-Length", str(len(payload)))
+            self.end_headers()
+            view = memoryview(payload)
+            for start in range(0, len(payload), 1024 * 1024):
+                self.wfile.write(view[start:start + 1024 * 1024])
+
+        def log_message(self, *args):
+            pass
+
+    httpd = ThreadingHTTPServer(("127.0.0.1", 0), Handler)
+    threading.Thread(target=httpd.serve_forever, daemon=True).start()
+    return httpd
+
+
+def peak_mb():
+    return resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1024
+
+
+def child(mode, url, concurrency):
+    from app.utils.http_transport import http_transport
+    from app.utils.media_download import download_to_spool
+
+    session = http_transport.session("media")
+    with session.get(url, timeout=30, stream=True) as response:  # Warm up the connection pool
+        for _ in response.iter_content(chunk_size=64 * 1024):
+            pass
+    all_downloaded = threading.Barrier(concurrency)
+    baseline = peak_mb()
+
+    def buffered(_):
+        response = session.get(url, timeout=30)
+        response.raise_for_status()
+        content = BytesIO(response.content).getvalue()  # What the extractor was handed
+        all_downloaded.wait()
+        return len(content)
+
+    def streamed(_):
+        with download_to_spool(session, url, timeout=30) as media:
+            with media.view() as content:
+                all_downloaded.wait()
+                return len(content)
+
+    started = time.perf_counter()
+    with ThreadPoolExecutor(max_workers=concurrency) as executor:
+        sizes = list(executor.map(buffered if mode == "buffered" else streamed, range(concurrency)))
+    elapsed = time.perf_counter() - started
+    print(f"{peak_mb() - baseline:.1f} {elapsed:.3f} {sum(sizes)}")
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--mb", type=int, default=20, help="Payload size")
+    parser.add_argument("--concurrency", type=int, default=8)
+    parser.add_argument("--child", nargs=2, metavar=("MODE", "URL"), help=argparse.SUPPRESS)
+    args = parser.parse_args()
+    if args.child:
+        child(args.child[0], args.child[1], args.concurrency)
+        return
+
+    os.environ["MEDIA_MAX_MB"] = str(args.mb + 1)
+    payload = b"%PDF-1.4\n" + os.urandom(args.mb * 1024 * 1024 - 9)
+    httpd = serve(payload)
+    url = f"http://127.0.0.1:{httpd.server_port}/media.pdf"
+    print(f"{args.concurrency} concurrent downloads of {args.mb} MB")
+    print(f"{'mode':<12}{'peak RSS +MB':>14}{'MB per download':>17}{'seconds':>9}")
+    try:
+        for mode in ("buffered", "streamed"):
+            out = subprocess.run(
+                [sys.executable, __file__, "--concurrency", str(args.concurrency), "--child", mode, url],
+                capture_output=True, text=True, check=True
+            ).stdout.split()
+            rss, elapsed = float(out[0]), float(out[1])
+            print(f"{mode:<12}{rss:>14.1f}{rss / args.concurrency:>17.1f}{elapsed:>9.2f}")
+    finally:
+        httpd.shutdown()
+        httpd.server_close()
+
+
+if __name__ == "__main__":
+    main()
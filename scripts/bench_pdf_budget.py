@@ -0,0 +1,76 @@
+"""
+Benchmark: budget-aware vs. full PDF extraction on long CVs.
+
+Grading only sends the first GRADE_CV_CHARS characters to the model, so
+budgeted extraction stops at the page that fills them. Compares time,
+pages parsed and the prompt prefix against full-text extraction, and the
+old `text +=` accumulation against the list join.
+
+Usage:
+    python scripts/bench_pdf_budget.py --pages 30 --docs 20 --lines 30
+"""
+import argparse
+import os
+import sys
+import time
+from io import BytesIO
+from pathlib import Path
+
+# Add project root to path
+project_root = Path(__file__).parent.parent
+sys.path.insert(0, str(project_root))
+os.chdir(project_root)
+for key in ("OPENAI_API_KEY", "TWILIO_ACCOUNT_SID", "TWILIO_AUTH_TOKEN", "TWILIO_WHATSAPP_NUMBER"):
+    os.environ.setdefault(key, "bench-dummy")
+
+from PyPDF2 import PdfReader
+
+from app.services.cv_analyzer import CV_ANALYSIS_CHARS
+from app.services.extraction_pool import read_pdf
+from app.services.openai_service import GRADE_CV_CHARS
+from scripts.pdf_fixtures import cv_pdf
+
+
+def read_pdf_concat(content):
+    """The previous extraction loop: every page, `text +=`."""
+    reader = PdfReader(BytesIO(content))
+    text = ""
+    for page in reader.pages:
+        extracted = page.extract_text()
+        if extracted:
+            text += extracted + "\n"
+    return text.strip()
+
+
+def timed(fn, corpus):
+    started = time.perf_counter()
+    results = [fn(content) for content in corpus]
+    return (time.perf_counter() - started) / len(corpus) * 1000, results
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--pages", type=int, default=30)
+    parser.add_argument("--docs", type=int, default=20)
+    parser.add_argument("--lines", type=int, default=30, help="Lines per page (30 is about 3000 characters)")
+    args = parser.parse_args()
+
+    corpus = [cv_pdf(args.pages, lines_per_page=args.lines, seed=i) for i in range(args.docs)]
+    concat_ms, concat = timed(read_pdf_concat, corpus)
+    full_ms, _ = timed(read_pdf, corpus)
+
+    print(f"{args.docs} CVs x {args.pages} pages ({len(concat[0])} chars each)")
+    print(f"{'mode':<32}{'ms/doc':>8}{'pages':>7}{'speedup':>9}{'same prefix':>13}")
+    print(f"{'full, text += (previous)':<32}{concat_ms:>8.1f}{args.pages:>7}{'1.0x':>9}{'-':>13}")
+    print(f"{'full, list join':<32}{full_ms:>8.1f}{args.pages:>7}{concat_ms / full_ms:>8.1f}x{'-':>13}")
+    for label, budget in (("grade", GRADE_CV_CHARS), ("cv_analysis", CV_ANALYSIS_CHARS)):
+        ms, results = timed(lambda content: read_pdf(content, max_chars=budget), corpus)
+        same = all(text[:budget] == reference[:budget] for (text, _, _), reference in zip(results, concat))
+        pages = sum(pages for _, pages, _ in results) / len(results)
+        print(f"{f'budget {budget} chars ({label})':<32}{ms:>8.1f}{pages:>7.1f}{concat_ms / ms:>8.1f}x{str(same):>13}")
+    ms, results = timed(lambda content: read_pdf(content, max_pages=2), corpus)
+    print(f"{'budget 2 pages':<32}{ms:>8.1f}{2:>7}{concat_ms / ms:>8.1f}x{'-':>13}")
+
+
+if __name__ == "__main__":
+    main()
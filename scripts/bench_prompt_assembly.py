@@ -0,0 +1,79 @@
+"""
+Benchmark: prompt assembly cost, rebuilt per call vs. precompiled registry.
+
+"rebuilt" runs each prompt's builder and assembles the request dict on every
+call, as the services did before the registry; "registry" only appends the
+per-call messages to the precompiled prefix. Also checks that the prefix
+(system prompt + schema) is byte-identical across different user messages.
+
+Usage:
+    python scripts/bench_prompt_assembly.py --iterations 20000
+"""
+import argparse
+import json
+import os
+import sys
+import time
+from pathlib import Path
+
+# Add project root to path
+project_root = Path(__file__).parent.parent
+sys.path.insert(0, str(project_root))
+os.chdir(project_root)
+for key in ("OPENAI_API_KEY", "TWILIO_ACCOUNT_SID", "TWILIO_AUTH_TOKEN", "TWILIO_WHATSAPP_NUMBER"):
+    os.environ.setdefault(key, "bench-dummy")
+
+from app.services.openai_service import openai_service
+from app.services.prompts import TOKENIZER, prompt_registry
+
+MODEL = "gpt-4-turbo-preview"
+SUFFIX = {"role": "user", "content": "Wie hoch ist das Gehalt?"}
+
+
+def rebuilt(name: str) -> dict:
+    system, functions = prompt_registry.builder(name)()
+    request = {"model": MODEL, "messages": [{"role": "system", "content": system}, SUFFIX]}
+    if functions:
+        request["functions"] = functions
+        request["function_call"] = {"name": functions[0]["name"]}
+    return request
+
+
+def per_call_us(fn, iterations: int) -> float:
+    started = time.perf_counter()
+    for _ in range(iterations):
+        fn()
+    return (time.perf_counter() - started) / iterations * 1e6
+
+
+def stable_prefix(request_a: dict, request_b: dict) -> bool:
+    prefix = lambda r: json.dumps([r["messages"][0], r.get("functions")], ensure_ascii=False)
+    return prefix(request_a) == prefix(request_b)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--iterations", type=int, default=20000)
+    args = parser.parse_args()
+
+    print(f"tokens: {TOKENIZER}")
+    print(f"{'prompt':<16} {'version':<13} {'tokens':>6} {'rebuilt us':>10} {'registry us':>11}")
+    for name, info in prompt_registry.report().items():
+        prompt = prompt_registry[name]
+        rebuild_us = per_call_us(lambda: rebuilt(name), args.iterations)
+        registry_us = per_call_us(lambda: prompt.request(MODEL, SUFFIX), args.iterations)
+        print(f"{name:<16} {info['version']:<13} {info['tokens']:>6} {rebuild_us:>10.2f} {registry_us:>11.2f}")
+
+    checks = {
+        "classify": (openai_service._classify_flow_request("ja", "yes_no"),
+                     openai_service._classify_flow_request("Wie hoch ist das Gehalt?", "job_selection")),
+        "flow_reply": (openai_service._flow_reply_request("ja", "A", "Ask A", "Du"),
+                       openai_service._flow_reply_request("nein", "B", "Ask B", "Max")),
+        "grade": (openai_service._grade_request("CV 1", "Backend"), openai_service._grade_request("CV 2", "Trainee")),
+    }
+    for name, (a, b) in checks.items():
+        print(f"prefix stable across calls ({name}): {stable_prefix(a, b)}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,67 @@
+"""
+Benchmark: classify_flow_input prompt size with the full muuh_info.json dump vs. retrieved facts.
+
+Builds the real classify request for a set of typical messages in both
+modes (no API calls) and reports prompt tokens and build time. Tokens are
+counted as in app/services/prompts.py (tiktoken if installed, else chars / 4).
+
+Usage:
+    python scripts/bench_prompt_context.py
+"""
+import json
+import os
+import statistics
+import sys
+import time
+from pathlib import Path
+
+# Add project root to path
+project_root = Path(__file__).parent.parent
+sys.path.insert(0, str(project_root))
+os.chdir(project_root)
+for key in ("OPENAI_API_KEY", "TWILIO_ACCOUNT_SID", "TWILIO_AUTH_TOKEN", "TWILIO_WHATSAPP_NUMBER"):
+    os.environ.setdefault(key, "bench-dummy")
+
+from app.config import settings
+from app.services.openai_service import openai_service
+from app.services.prompts import TOKENIZER, count_tokens
+
+MESSAGES = [
+    ("ja", "yes_no"),
+    ("nein, leider nicht", "yes_no"),
+    ("ja klar, hab 2 Jahre mit GPT gebaut", "yes_no"),
+    ("Wie hoch ist das Gehalt?", "yes_no"),
+    ("Gibt es Teilzeit?", "yes_no"),
+    ("Wie groß ist das Team?", "yes_no"),
+    ("Was macht ihr mit Parloa?", "yes_no"),
+    ("Welche Anforderungen hat der UX Designer?", "job_selection"),
+    ("der zweite", "job_selection"),
+    ("Kann ich remote arbeiten?", "job_selection"),
+]
+
+def prompt_tokens(request: dict) -> int:
+    text = "".join(m["content"] for m in request["messages"]) + json.dumps(request["functions"])
+    return count_tokens(text)
+
+
+def main():
+    print(f"tokens: {TOKENIZER}")
+    print(f"{'message':<44} {'full dump':>9} {'facts':>6} {'k':>3}")
+    totals = {}
+    for enabled in (False, True):
+        settings.prompt_facts_enabled = enabled
+        started = time.perf_counter()
+        sizes = [prompt_tokens(openai_service._classify_flow_request(m, t)) for m, t in MESSAGES]
+        build_us = (time.perf_counter() - started) / len(MESSAGES) * 1e6
+        totals[enabled] = (sizes, build_us)
+
+    for i, (message, _) in enumerate(MESSAGES):
+        facts = len(openai_service.fact_index.search(message, k=settings.prompt_facts_top_k))
+        print(f"{message:<44} {totals[False][0][i]:>9} {totals[True][0][i]:>6} {facts:>3}")
+    for enabled, label in ((False, "full dump"), (True, "retrieval")):
+        sizes, build_us = totals[enabled]
+        print(f"{label:>10}: mean {statistics.mean(sizes):6.0f} tokens  build {build_us:6.0f} us/request")
+
+
+if __name__ == "__main__":
+    main()
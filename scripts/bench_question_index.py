@@ -0,0 +1,90 @@
+"""
+Benchmark: near-duplicate question lookup latency at a large index size.
+
+Fills a MinHashIndex (configured like the live question cache) with
+synthetic candidate questions and times lookups of paraphrases (hits) and
+unrelated questions (misses).
+
+Usage:
+    python scripts/bench_question_index.py --entries 100000 --lookups 2000
+"""
+import argparse
+import os
+import random
+import statistics
+import sys
+import time
+from pathlib import Path
+
+# Add project root to path
+project_root = Path(__file__).parent.parent
+sys.path.insert(0, str(project_root))
+os.chdir(project_root)
+for key in ("OPENAI_API_KEY", "TWILIO_ACCOUNT_SID", "TWILIO_AUTH_TOKEN", "TWILIO_WHATSAPP_NUMBER"):
+    os.environ.setdefault(key, "bench-dummy")
+
+from app.core.question_cache import intent_concepts
+from app.utils.near_duplicate import MinHashIndex
+
+TOPICS = [
+    "python", "docker", "kubernetes", "langchain", "openai", "rasa", "dialogflow", "fastapi", "postgres",
+    "react", "typescript", "aws", "azure", "gcp", "terraform", "llama", "whisper", "twilio", "voice", "crm",
+]
+OBJECTS = [
+    "projekt", "team", "kunde", "stack", "einarbeitung", "weiterbildung", "laptop", "standort", "vertrag",
+    "probezeit", "onboarding", "mentoring", "codereview", "deployment", "sprint", "roadmap", "budget",
+]
+TEMPLATES = [
+    "Nutzt ihr {topic} im {obj} {n}?",
+    "Welche Rolle spielt {topic} beim {obj} {n}?",
+    "Gibt es {obj} {n} mit {topic}?",
+    "Wie wichtig ist {topic} für {obj} {n}?",
+]
+PARAPHRASES = [
+    "nutzt ihr {topic} im {obj} {n} eigentlich?",
+    "Welche Rolle spielt denn {topic} beim {obj} {n}",
+]
+MISSES = [
+    "Wie lange dauert die Anfahrt zum Büro aus Potsdam {n}?",
+    "Darf ich meinen Hund {n} mitbringen?",
+]
+
+
+def percentile(samples, p):
+    ordered = sorted(samples)
+    return ordered[min(len(ordered) - 1, int(len(ordered) * p / 100))]
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--entries", type=int, default=100000)
+    parser.add_argument("--lookups", type=int, default=2000)
+    args = parser.parse_args()
+
+    rng = random.Random(42)
+    index = MinHashIndex(max_entries=args.entries, concepts=intent_concepts())
+    params = [(rng.choice(TOPICS), rng.choice(OBJECTS), i) for i in range(args.entries)]
+
+    started = time.perf_counter()
+    for i, (topic, obj, n) in enumerate(params):
+        index.add(TEMPLATES[i % len(TEMPLATES)].format(topic=topic, obj=obj, n=n), i)
+    build_s = time.perf_counter() - started
+    print(f"indexed {len(index)} questions in {build_s:.1f} s ({build_s / args.entries * 1e6:.0f} us/add)")
+
+    for label, queries in (
+        ("hit", [PARAPHRASES[i % 2].format(topic=p[0], obj=p[1], n=p[2])
+                 for i, p in ((i, params[i]) for i in rng.sample(range(0, args.entries, 4), args.lookups))]),
+        ("miss", [rng.choice(MISSES).format(n=rng.randrange(10**6, 10**7)) for _ in range(args.lookups)]),
+    ):
+        samples, found = [], 0
+        for query in queries:
+            started = time.perf_counter()
+            match = index.lookup(query)
+            samples.append((time.perf_counter() - started) * 1e6)
+            found += match is not None
+        print(f"{label:>5}: p50 {statistics.median(samples):7.0f} us  p99 {percentile(samples, 99):7.0f} us  "
+              f"matched {found}/{len(queries)}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,110 @@
+"""
+Benchmark: time-to-decision of streamed classify_flow_input vs. full completion.
+
+Replays function-call arguments as token deltas with a simulated time to
+first token and inter-token delay, and reports when the streamed reader
+has its answer compared with the end of the completion. Also reports the
+parser's CPU cost per delta.
+
+Usage:
+    python scripts/bench_streaming_classify.py --ttft-ms 400 --token-ms 25
+"""
+import argparse
+import json
+import os
+import re
+import sys
+import time
+from pathlib import Path
+from types import SimpleNamespace
+
+# Add project root to path
+project_root = Path(__file__).parent.parent
+sys.path.insert(0, str(project_root))
+os.chdir(project_root)
+for key in ("OPENAI_API_KEY", "TWILIO_ACCOUNT_SID", "TWILIO_AUTH_TOKEN", "TWILIO_WHATSAPP_NUMBER"):
+    os.environ.setdefault(key, "bench-dummy")
+
+from app.services.classify_stream import read_classification_stream
+from app.utils.json_stream import IncrementalObjectParser
+
+# Arguments as the model emits them; VALID_ANSWERs often come with an ai_reply anyway
+FIXTURES = {
+    "yes (empty ai_reply)": {"category": "VALID_ANSWER", "normalized_value": "YES", "ai_reply": ""},
+    "yes (chatty ai_reply)": {
+        "category": "VALID_ANSWER", "normalized_value": "YES",
+        "ai_reply": "Super, danke für deine Antwort! Dann machen wir direkt mit der nächsten Frage weiter.",
+    },
+    "job selection": {"category": "VALID_ANSWER", "normalized_value": "JOB_2", "ai_reply": ""},
+    "unclear": {"category": "UNCLEAR"},
+    "question": {
+        "category": "QUESTION",
+        "ai_reply": "Das Gehalt liegt je nach Erfahrung zwischen 40k€ und 80k€. Details besprechen wir gern im Gespräch!",
+    },
+}
+
+
+def token_deltas(text):
+    try:
+        import tiktoken
+        encoding = tiktoken.get_encoding("cl100k_base")
+        return [encoding.decode([token]) for token in encoding.encode(text)]
+    except ImportError:
+        return re.findall(r"\w+|\s+|[^\w\s]", text)
+
+
+class TimedStream:
+    """Yields deltas at the simulated token rate."""
+
+    def __init__(self, deltas, ttft_s, token_s):
+        self.deltas = deltas
+        self.ttft_s = ttft_s
+        self.token_s = token_s
+        self.read = 0
+
+    def __iter__(self):
+        time.sleep(self.ttft_s)
+        for i, delta in enumerate(self.deltas):
+            if i:
+                time.sleep(self.token_s)
+            self.read += 1
+            function_call = SimpleNamespace(arguments=delta)
+            yield SimpleNamespace(choices=[SimpleNamespace(delta=SimpleNamespace(function_call=function_call))])
+
+    def close(self):
+        pass
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--ttft-ms", type=float, default=400.0, help="Simulated time to first token")
+    parser.add_argument("--token-ms", type=float, default=25.0, help="Simulated delay between tokens")
+    args = parser.parse_args()
+    ttft_s, token_s = args.ttft_ms / 1000, args.token_ms / 1000
+
+    print(f"time to first token {args.ttft_ms:.0f} ms, {args.token_ms:.0f} ms/token")
+    print(f"{'fixture':<24}{'tokens':>7}{'read':>6}{'decision ms':>13}{'full ms':>9}{'saved':>7}")
+    for label, arguments in FIXTURES.items():
+        deltas = token_deltas(json.dumps(arguments, ensure_ascii=False))
+        full_ms = args.ttft_ms + (len(deltas) - 1) * args.token_ms
+
+        stream = TimedStream(deltas, ttft_s, token_s)
+        started = time.perf_counter()
+        read_classification_stream(stream)
+        decision_ms = (time.perf_counter() - started) * 1000
+        print(f"{label:<24}{len(deltas):>7}{stream.read:>6}{decision_ms:>13.0f}{full_ms:>9.0f}"
+              f"{(1 - decision_ms / full_ms) * 100:>6.0f}%")
+
+    deltas = token_deltas(json.dumps(FIXTURES["question"], ensure_ascii=False))
+    rounds = 2000
+    started = time.perf_counter()
+    for _ in range(rounds):
+        p = IncrementalObjectParser()
+        for delta in deltas:
+            p.feed(delta)
+    per_delta_us = (time.perf_counter() - started) / (rounds * len(deltas)) * 1_000_000
+    print(f"parser cost: {per_delta_us:.2f} us per delta")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,39 @@
+"""Pre-generate the reply pool for all poolable flow transitions."""
+import argparse
+import sys
+from pathlib import Path
+
+# Add project root to path
+project_root = Path(__file__).parent.parent
+sys.path.insert(0, str(project_root))
+
+from app.config import settings
+from app.core.flow_definition import load_flow
+from app.services.reply_pool import ReplyPool, pool_targets
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--size", type=int, default=settings.reply_pool_size, help="Variants per trigger event")
+    parser.add_argument("--output", default=settings.reply_pool_path)
+    parser.add_argument("--only-missing", action="store_true", help="Keep existing up-to-date pools")
+    args = parser.parse_args()
+
+    pool = ReplyPool(path=args.output, size=args.size)
+    pool.load()
+    targets = pool_targets(load_flow(settings.flow_definition_path))
+    failed = 0
+    for trigger_event, instruction in targets:
+        if args.only_missing and pool.has(trigger_event, instruction):
+            print(f"= {trigger_event}")
+            continue
+        ok = pool.refresh(trigger_event, instruction)
+        failed += not ok
+        print(f"{'+' if ok else '!'} {trigger_event}")
+
+    print(f"{len(targets) - failed}/{len(targets)} trigger events pooled in {args.output}")
+    sys.exit(1 if failed else 0)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,97 @@
+"""
+Generate PDF fixtures without a PDF library: CV-like documents of any
+length, a page whose content stream is very slow to extract, and a
+compression bomb.
+
+Used by tests/test_extraction_pool.py and the extraction benchmarks.
+
+Usage:
+    python scripts/pdf_fixtures.py out_dir --count 20 --pages 3
+"""
+import argparse
+import random
+import zlib
+from pathlib import Path
+from typing import List
+
+WORDS = (
+    "Python FastAPI Entwicklung Chatbot Kunden Projekt Team Erfahrung API Daten Analyse Cloud "
+    "Kommunikation Verantwortung Agentur Konzeption Umsetzung Dialog Prozess Automatisierung"
+).split()
+
+
+def _escape(text: str) -> str:
+    return text.replace("\\", "\\\\").replace("(", "\\(").replace(")", "\\)")
+
+
+def _page_stream(lines: List[str]) -> bytes:
+    ops = ["BT", "/F1 10 Tf", "12 TL", "50 800 Td"]
+    ops += [f"({_escape(line)}) Tj T*" for line in lines]
+    ops.append("ET")
+    return "\n".join(ops).encode("latin-1")
+
+
+def build_pdf(streams: List[bytes], compress: bool = False) -> bytes:
+    """Assemble a PDF with one page per content stream."""
+    objects = [b"<< /Type /Catalog /Pages 2 0 R >>", None, b"<< /Type /Font /Subtype /Type1 /BaseFont /Helvetica >>"]
+    kids = []
+    for stream in streams:
+        page_id = len(objects) + 1
+        kids.append(f"{page_id} 0 R")
+        objects.append(
+            f"<< /Type /Page /Parent 2 0 R /MediaBox [0 0 595 842] /Resources << /Font << /F1 3 0 R >> >> "
+            f"/Contents {page_id + 1} 0 R >>".encode()
+        )
+        data = zlib.compress(stream, 9) if compress else stream
+        header = f"<< /Length {len(data)}{' /Filter /FlateDecode' if compress else ''} >>\nstream\n".encode()
+        objects.append(header + data + b"\nendstream")
+    objects[1] = f"<< /Type /Pages /Kids [{' '.join(kids)}] /Count {len(kids)} >>".encode()
+
+    out = bytearray(b"%PDF-1.4\n")
+    offsets = []
+    for number, body in enumerate(objects, start=1):
+        offsets.append(len(out))
+        out += f"{number} 0 obj\n".encode() + body + b"\nendobj\n"
+    xref = len(out)
+    out += f"xref\n0 {len(objects) + 1}\n0000000000 65535 f \n".encode()
+    out += b"".join(f"{offset:010d} 00000 n \n".encode() for offset in offsets)
+    out += f"trailer\n<< /Size {len(objects) + 1} /Root 1 0 R >>\nstartxref\n{xref}\n%%EOF\n".encode()
+    return bytes(out)
+
+
+def cv_pdf(pages: int = 2, lines_per_page: int = 60, seed: int = 0) -> bytes:
+    """A CV-like document: pages of random German/English CV vocabulary."""
+    rng = random.Random(seed)
+    streams = []
+    for page in range(pages):
+        lines = [f"Lebenslauf - Seite {page + 1}"]
+        lines += [" ".join(rng.choice(WORDS) for _ in range(12)) for _ in range(lines_per_page - 1)]
+        streams.append(_page_stream(lines))
+    return build_pdf(streams)
+
+
+def slow_pdf(operators: int = 300_000) -> bytes:
+    """One page with a huge number of tiny text operators (seconds of PyPDF2 time)."""
+    return build_pdf([_page_stream(["x"] * operators)], compress=True)
+
+
+def bomb_pdf(megabytes: int = 1024) -> bytes:
+    """A page stream that inflates from about 1 MB to `megabytes` of whitespace."""
+    return build_pdf([b" " * (megabytes * 1024 * 1024)], compress=True)
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("out_dir")
+    parser.add_argument("--count", type=int, default=20)
+    parser.add_argument("--pages", type=int, default=3)
+    args = parser.parse_args()
+    out = Path(args.out_dir)
+    out.mkdir(parents=True, exist_ok=True)
+    for i in range(args.count):
+        (out / f"cv_{i:03d}.pdf").write_bytes(cv_pdf(args.pages, seed=i))
+    print(f"Wrote {args.count} PDFs with {args.pages} pages to {out}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,42 @@
+"""Shared test fixtures."""
+import pytest
+from sqlalchemy import create_engine
+from sqlalchemy.orm import sessionmaker
+from sqlalchemy.pool import StaticPool
+
+from app.db.database import Base, get_db
+from app.main import app
+
+
+@pytest.fixture
+def db_session():
+    """Isolated in-memory database session with all tables created."""
+    from app.models import lead, processed_message  # Register models
+    engine = create_engine(
+        "sqlite://",
+        connect_args={"check_same_thread": False},
+        poolclass=StaticPool
+    )
+    Base.metadata.create_all(bind=engine)
+    session = sessionmaker(autocommit=False, autoflush=False, bind=engine)()
+    try:
+        yield session
+    finally:
+        session.close()
+        engine.dispose()
+
+
+@pytest.fixture
+def override_db(db_session):
+    """Route the FastAPI get_db dependency to the test session."""
+    app.dependency_overrides[get_db] = lambda: db_session
+    yield db_session
+    app.dependency_overrides.pop(get_db, None)
+
+
+@pytest.fixture(autouse=True)
+def clear_question_cache():
+    """Answers remembered by one test must not leak into the next."""
+    from app.core.question_cache import question_cache
+    yield
+    question_cache.index.clear()
@@ -0,0 +1,108 @@
+"""Test the async turn path (AsyncOpenAI, no threadpool)."""
+import asyncio
+
+from sqlalchemy import event
+
+from app.core import flow_engine as flow_engine_module
+from app.core import turn_processor as turn_processor_module
+from app.core.flow_engine import FlowEngine
+from app.core.turn_processor import InboundMessage, run_turn_async
+from app.db import crud
+from app.models.lead import Lead
+
+
+class TestAsyncTurns:
+    """run_turn_async drives the flow without holding a connection across awaits."""
+
+    def test_turn_runs_on_the_event_loop(self, db_session, monkeypatch):
+        checked_out, held_connection = [0], []
+        engine = db_session.get_bind()
+        on_checkout = lambda *args: checked_out.__setitem__(0, checked_out[0] + 1)
+        on_checkin = lambda *args: checked_out.__setitem__(0, checked_out[0] - 1)
+        event.listen(engine, "checkout", on_checkout)
+        event.listen(engine, "checkin", on_checkin)
+
+        async def classify(message, expected_type):
+            held_connection.append(checked_out[0] > 0)
+            await asyncio.sleep(0.01)
+            return {"category": "VALID_ANSWER", "normalized_value": "YES"}
+
+        async def generate(message, trigger_event, next_step_instruction, user_name="Du"):
+            held_connection.append(checked_out[0] > 0)
+            return f"[{trigger_event}]"
+
+        async def send(to, body):
+            return True
+
+        monkeypatch.setattr(flow_engine_module.openai_service, "classify_flow_input_async", classify)
+        monkeypatch.setattr(flow_engine_module.openai_service, "generate_flow_reply_async", generate)
+        monkeypatch.setattr(turn_processor_module.twilio_service, "send_message_async", send)
+
+        user = "whatsapp:+4915100000040"
+        lead = crud.get_or_create_lead(db_session, user)
+        lead.conversation_stage = FlowEngine.STATE_REQ_1
+        db_session.commit()
+
+        try:
+            reply = asyncio.run(run_turn_async(db_session, user, [InboundMessage("SM-async-1", "Ich habe Bots gebaut")]))
+        finally:
+            event.remove(engine, "checkout", on_checkout)
+            event.remove(engine, "checkin", on_checkin)
+
+        assert reply == "[USER_HAS_AI_EXPERIENCE]"
+        assert held_connection == [False, False]
+        db_session.expire_all()
+        lead = db_session.query(Lead).filter(Lead.whatsapp_number == user).first()
+        assert lead.conversation_stage == FlowEngine.STATE_REQ_2
+        assert lead.has_conversational_ai_experience
+        assert [m["role"] for m in lead.conversation_history] == ["user", "bot"]
+
+    def test_concurrent_turns_overlap(self, db_session, monkeypatch):
+        async def classify(message, expected_type):
+            await asyncio.sleep(0.2)
+            return {"category": "UNCLEAR"}
+
+        async def send(to, body):
+            return True
+
+        monkeypatch.setattr(flow_engine_module.openai_service, "classify_flow_input_async", classify)
+        monkeypatch.setattr(turn_processor_module.twilio_service, "send_message_async", send)
+        users = [f"whatsapp:+49151000001{i:02d}" for i in range(10)]
+        for user in users:
+            crud.get_or_create_lead(db_session, user).conversation_stage = FlowEngine.STATE_REQ_2
+        db_session.commit()
+
+        async def scenario():
+            loop = asyncio.get_running_loop()
+            started = loop.time()
+            # One session per turn, as in TurnProcessor
+            sessions = [type(db_session)(bind=db_session.get_bind()) for _ in users]
+            replies = await asyncio.gather(*(
+                run_turn_async(s, user, [InboundMessage(f"SM-async-c{i}", "hmm schwierig")])
+                for i, (s, user) in enumerate(zip(sessions, users))
+            ))
+            for s in sessions:
+                s.close()
+            return replies, loop.time() - started
+
+        replies, elapsed = asyncio.run(scenario())
+
+        assert all(r == "Bitte antworte mit **Ja** oder **Nein**." for r in replies)
+        assert elapsed < 1.0  # 10 x 200 ms sequentially would take 2 s
+
+    def test_failed_turn_and_failed_error_reply_stay_inside_the_turn(self, db_session, monkeypatch):
+        async def classify(message, expected_type):
+            raise RuntimeError("openai down")
+
+        async def send(to, body):
+            raise ConnectionError("twilio down")
+
+        monkeypatch.setattr(flow_engine_module.openai_service, "classify_flow_input_async", classify)
+        monkeypatch.setattr(turn_processor_module.twilio_service, "send_message_async", send)
+        user = "whatsapp:+4915100000041"
+        crud.get_or_create_lead(db_session, user).conversation_stage = FlowEngine.STATE_REQ_1
+        db_session.commit()
+
+        assert asyncio.run(run_turn_async(db_session, user, [InboundMessage("SM-async-err", "Ich habe Bots gebaut")])) is None
+        db_session.expire_all()
+        assert db_session.query(Lead).filter(Lead.whatsapp_number == user).first().conversation_stage == FlowEngine.STATE_REQ_1
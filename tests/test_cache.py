@@ -0,0 +1,92 @@
+"""Test the LRU+TTL cache and the classify_flow_input cache."""
+import json
+import os
+import time
+from types import SimpleNamespace
+
+import pytest
+
+from app.config import settings
+from app.services import openai_service as openai_service_module
+from app.services.openai_service import OpenAIService
+from app.utils.cache import SQLiteCacheStore, TTLCache
+from app.utils.metrics import metrics
+
+
+class TestTTLCache:
+    """Bounded size, expiry, tags and the SQLite tier."""
+
+    def test_lru_eviction_and_ttl(self, monkeypatch):
+        cache = TTLCache("test_lru", max_entries=2, ttl_seconds=60)
+        cache.set("a", 1)
+        cache.set("b", 2)
+        assert cache.get("a") == 1  # "b" is now least recently used
+        cache.set("c", 3)
+        assert cache.get("b") is None
+        assert metrics.counter("cache.test_lru.evictions") >= 1
+
+        now = time.time()
+        monkeypatch.setattr("app.utils.cache.time.time", lambda: now + 61)
+        assert cache.get("a") is None
+
+    def test_sqlite_tier_survives_restart(self, tmp_path):
+        path = str(tmp_path / "cache.db")
+        TTLCache("test_l2", store=SQLiteCacheStore(path, "test_l2")).set("ja", {"category": "VALID_ANSWER"}, tag="x")
+
+        restarted = TTLCache("test_l2", store=SQLiteCacheStore(path, "test_l2"))
+        hits = metrics.counter("cache.test_l2.l2_hits")
+        assert restarted.get("ja") == {"category": "VALID_ANSWER"}
+        assert metrics.counter("cache.test_l2.l2_hits") == hits + 1
+
+        restarted.invalidate_tag("x")
+        assert TTLCache("test_l2", store=SQLiteCacheStore(path, "test_l2")).get("ja") is None
+
+
+@pytest.fixture
+def service(tmp_path, monkeypatch):
+    info_path = tmp_path / "muuh_info.json"
+    info_path.write_text(json.dumps({"company": "muuuh!", "salary": "fair"}), encoding="utf-8")
+    monkeypatch.setattr(openai_service_module, "COMPANY_INFO_PATH", str(info_path))
+    monkeypatch.setattr(settings, "classify_streaming", False)
+    service = OpenAIService()
+    calls = []
+
+    def create(**request):
+        message = request["messages"][-1]["content"]
+        calls.append(message)
+        if message.endswith("?"):
+            args = {"category": "QUESTION", "ai_reply": f"Antwort {len(calls)}"}
+        else:
+            args = {"category": "VALID_ANSWER", "normalized_value": "YES"}
+        choice = SimpleNamespace(message=SimpleNamespace(function_call=SimpleNamespace(arguments=json.dumps(args))))
+        return SimpleNamespace(choices=[choice])
+
+    service.client = SimpleNamespace(chat=SimpleNamespace(completions=SimpleNamespace(create=create)))
+    return service, calls, info_path
+
+
+class TestClassifyCache:
+    """Identical inputs are classified once; QUESTION answers follow muuh_info.json."""
+
+    def test_normalized_inputs_share_an_entry(self, service):
+        service, calls, _ = service
+        assert service.classify_flow_input("Ja!", "yes_no")["normalized_value"] == "YES"
+        assert service.classify_flow_input("  ja ", "yes_no")["normalized_value"] == "YES"
+        service.classify_flow_input("ja", "job_selection")
+        assert len(calls) == 2
+
+    def test_question_answers_invalidated_on_info_change(self, service):
+        service, calls, info_path = service
+        first = service.classify_flow_input("Wie viel verdient man?", "yes_no")
+        assert service.classify_flow_input("wie viel verdient man?", "yes_no") == first
+        service.classify_flow_input("ja", "yes_no")
+        assert len(calls) == 2
+
+        info_path.write_text(json.dumps({"company": "muuuh!", "salary": "sehr gut"}), encoding="utf-8")
+        future = time.time() + 10
+        os.utime(info_path, (future, future))
+        service._company_info_checked = float("-inf")
+
+        assert service.classify_flow_input("Wie viel verdient man?", "yes_no")["ai_reply"] == "Antwort 3"
+        service.classify_flow_input("ja", "yes_no")  # yes/no answers do not depend on the company info
+        assert len(calls) == 3
@@ -0,0 +1,137 @@
+"""Test the incremental arguments parser and streamed classification."""
+import asyncio
+import json
+import random
+from types import SimpleNamespace
+
+import pytest
+
+from app.config import settings
+from app.services.classify_stream import read_classification_stream, read_classification_stream_async
+from app.services.openai_service import openai_service
+from app.utils.json_stream import IncrementalObjectParser
+
+# Function-call arguments as OpenAI streams them (one delta per token)
+VALID_ANSWER_DELTAS = ['{\n', ' ', ' "', 'category', '":', ' "', 'VALID', '_ANSWER', '",\n', ' ', ' "',
+                       'normalized', '_value', '":', ' "', 'YES', '",\n', ' ', ' "', 'ai', '_reply', '":', ' ""\n', '}']
+QUESTION_DELTAS = ['{"', 'category', '":"', 'QUESTION', '","', 'ai', '_reply', '":"', 'Wir', ' zahlen', ' fair', ':',
+                   ' \\"', 'Junior', ' 40', '-', '50', 'k', '€', '\\"', '.\\n', 'Mehr', ' im', ' Gespräch', '!', '"}']
+UNCLEAR_DELTAS = ['{', '"category"', ': ', '"UNCLEAR"', '}']
+ODD_VALUES = '{"a": "x\\"y\\u00e4\\\\", "b": [1, {"c": "]}"}], "n": -1.5e3, "t": true, "z": null, "e": {}}'
+
+
+def feed_all(text, sizes):
+    parser = IncrementalObjectParser()
+    completed, i = [], 0
+    while i < len(text):
+        size = next(sizes)
+        completed.extend(parser.feed(text[i:i + size]))
+        i += size
+    return parser, completed
+
+
+class TestIncrementalObjectParser:
+    """Any chunking yields the same fields as json.loads, each as soon as it is complete."""
+
+    @pytest.mark.parametrize("deltas", [VALID_ANSWER_DELTAS, QUESTION_DELTAS, UNCLEAR_DELTAS, [ODD_VALUES]])
+    def test_random_chunkings_match_json_loads(self, deltas):
+        text = "".join(deltas)
+        rng = random.Random(7)
+        for _ in range(50):
+            parser, completed = feed_all(text, iter(lambda: rng.randint(1, 6), None))
+            assert parser.done
+            assert parser.fields == json.loads(text)
+            assert [key for key, _ in completed] == list(json.loads(text))
+
+    def test_field_reported_when_its_value_closes(self):
+        parser = IncrementalObjectParser()
+        reported = [parser.feed(delta) for delta in VALID_ANSWER_DELTAS]
+        assert reported[7] == []  # "VALID_ANSWER" not closed yet
+        assert reported[8] == [("category", "VALID_ANSWER")]
+        assert reported[16] == [("normalized_value", "YES")]
+        assert reported[-1] == [] and parser.done
+
+    def test_rejects_non_objects(self):
+        with pytest.raises(ValueError):
+            IncrementalObjectParser().feed('["category"]')
+
+
+class FakeStream:
+    """Iterable of chat completion chunks that records how much was consumed."""
+
+    def __init__(self, deltas):
+        self.deltas = deltas
+        self.consumed = 0
+        self.closed = False
+
+    def _chunk(self, delta):
+        self.consumed += 1
+        function_call = SimpleNamespace(arguments=delta)
+        return SimpleNamespace(choices=[SimpleNamespace(delta=SimpleNamespace(function_call=function_call))])
+
+    def __iter__(self):
+        for delta in self.deltas:
+            yield self._chunk(delta)
+
+    async def __aiter__(self):
+        for delta in self.deltas:
+            yield self._chunk(delta)
+
+    def close(self):
+        self.closed = True
+
+
+class TestReadClassificationStream:
+    """The stream is closed as soon as the flow has what it needs."""
+
+    def test_valid_answer_stops_after_value(self):
+        stream = FakeStream(VALID_ANSWER_DELTAS)
+        streamed = read_classification_stream(stream, prompt_tokens=300)
+        assert streamed.result == {"category": "VALID_ANSWER", "normalized_value": "YES"}
+        assert streamed.early
+        assert stream.consumed == 17 and stream.closed
+        assert streamed.usage.prompt_tokens == 300
+
+    def test_unclear_stops_after_category(self):
+        stream = FakeStream(UNCLEAR_DELTAS)
+        assert read_classification_stream(stream).result == {"category": "UNCLEAR"}
+        assert stream.closed
+
+    def test_question_reads_the_whole_reply(self):
+        stream = FakeStream(QUESTION_DELTAS)
+        streamed = read_classification_stream(stream)
+        assert not streamed.early
+        assert streamed.result["ai_reply"] == 'Wir zahlen fair: "Junior 40-50k€".\nMehr im Gespräch!'
+        assert stream.consumed == len(QUESTION_DELTAS)
+
+    def test_async(self):
+        stream = FakeStream(VALID_ANSWER_DELTAS)
+
+        async def close():
+            stream.closed = True
+
+        stream.close = close
+        streamed = asyncio.run(read_classification_stream_async(stream))
+        assert streamed.result["normalized_value"] == "YES"
+        assert stream.consumed == 17 and stream.closed
+
+    def test_missing_category_is_an_error(self):
+        with pytest.raises(ValueError):
+            read_classification_stream(FakeStream(['{"ai_reply": "Hallo"}']))
+
+
+def test_classify_flow_input_streams(monkeypatch):
+    requests = []
+
+    def create(**request):
+        requests.append(request)
+        return FakeStream(VALID_ANSWER_DELTAS)
+
+    monkeypatch.setattr(settings, "classify_streaming", True)
+    monkeypatch.setattr(openai_service, "classify_cache", None)
+    monkeypatch.setattr(openai_service.client.chat.completions, "create", create)
+
+    assert openai_service.classify_flow_input("passt schon", "yes_no") == {
+        "category": "VALID_ANSWER", "normalized_value": "YES"
+    }
+    assert requests[0]["stream"] is True
@@ -0,0 +1,65 @@
+"""Test rapid-fire message coalescing."""
+import asyncio
+
+from app.core import turn_processor as turn_processor_module
+from app.core.coalescer import MessageCoalescer
+from app.core.turn_processor import InboundMessage, run_turn
+from app.models.lead import Lead
+
+
+class TestMessageCoalescer:
+    """Debounce window behaviour."""
+
+    def test_window_disabled_passes_through(self):
+        coalescer = MessageCoalescer(window_ms=0)
+        assert asyncio.run(coalescer.collect("A", "ja")) == ["ja"]
+
+    def test_burst_is_merged_into_last_caller(self):
+        coalescer = MessageCoalescer(window_ms=30)
+
+        async def scenario():
+            first = asyncio.create_task(coalescer.collect("A", "ja"))
+            await asyncio.sleep(0.01)
+            second = asyncio.create_task(coalescer.collect("A", "hab 2 jahre mit GPT gebaut"))
+            other = asyncio.create_task(coalescer.collect("B", "nein"))
+            return await first, await second, await other
+
+        first, second, other = asyncio.run(scenario())
+        assert first is None
+        assert second == ["ja", "hab 2 jahre mit GPT gebaut"]
+        assert other == ["nein"]
+
+    def test_burst_is_flushed_after_max_wait(self):
+        coalescer = MessageCoalescer(window_ms=20, max_wait_ms=30)
+
+        async def scenario():
+            tasks = []
+            for i in range(5):
+                tasks.append(asyncio.create_task(coalescer.collect("A", i)))
+                await asyncio.sleep(0.012)
+            return [await t for t in tasks]
+
+        batches = [b for b in asyncio.run(scenario()) if b]
+        assert len(batches) >= 2
+        assert [i for b in batches for i in b] == [0, 1, 2, 3, 4]
+
+
+class TestMergedTurn:
+    """A merged turn classifies once but logs every raw message."""
+
+    def test_merged_turn_logs_each_message(self, db_session, monkeypatch):
+        seen = []
+        monkeypatch.setattr(
+            turn_processor_module.flow_engine, "process_message",
+            lambda user_id, message, db, lead=None: seen.append(message) or "Super!"
+        )
+        monkeypatch.setattr(turn_processor_module.twilio_service, "send_message", lambda to, body: True)
+
+        run_turn(db_session, "whatsapp:+4915100000003", [
+            InboundMessage("SM-c-1", "ja"),
+            InboundMessage("SM-c-2", "hab 2 jahre mit GPT gebaut"),
+        ])
+
+        assert seen == ["ja hab 2 jahre mit GPT gebaut"]
+        lead = db_session.query(Lead).filter(Lead.whatsapp_number == "whatsapp:+4915100000003").first()
+        assert [m["message"] for m in lead.conversation_history] == ["ja", "hab 2 jahre mit GPT gebaut", "Super!"]
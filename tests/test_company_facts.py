@@ -0,0 +1,71 @@
+"""Test fact retrieval for the classify prompt."""
+from types import SimpleNamespace
+
+from app.config import settings
+from app.core.company_facts import FactIndex, chunk_facts
+from app.services.openai_service import openai_service
+from app.utils.metrics import metrics
+
+
+INFO = {
+    "company": {"name": "MUUUH! Group", "locations": ["Osnabrück", "Berlin"]},
+    "positions": [{"title": "UX Designer", "type": ["Vollzeit", "Teilzeit"]}],
+    "faqs": {"salary": "Junior 40-50k€, Senior 60-80k€ Gehalt.", "team_size": "Über 100 Mitarbeiter."},
+}
+
+
+class TestFactIndex:
+    """Chunking and top-k retrieval."""
+
+    def test_chunk_facts(self):
+        assert chunk_facts(INFO) == [
+            "company / name: MUUUH! Group",
+            "company / locations: Osnabrück; Berlin",
+            "positions / UX Designer / type: Vollzeit; Teilzeit",
+            "faqs / salary: Junior 40-50k€, Senior 60-80k€ Gehalt.",
+            "faqs / team size: Über 100 Mitarbeiter.",
+        ]
+
+    def test_search(self):
+        index = FactIndex(INFO)
+        assert index.search("Wie hoch ist das Gehalt?") == ["faqs / salary: Junior 40-50k€, Senior 60-80k€ Gehalt."]
+        assert index.search("Gibt es Teilzeit?", k=1) == ["positions / UX Designer / type: Vollzeit; Teilzeit"]
+        assert index.search("ja klar") == []
+        assert index.search("nein") == []
+
+
+class TestClassifyPrompt:
+    """Only relevant facts go into the classify prompt."""
+
+    def _system_prompt(self, message):
+        # Static prefix, then the per-call context, then the message
+        return openai_service._classify_flow_request(message, "yes_no")["messages"][1]["content"]
+
+    def test_relevant_facts_only(self, monkeypatch):
+        monkeypatch.setattr(settings, "prompt_facts_enabled", True)
+        prompt = self._system_prompt("Wie hoch ist das Gehalt?")
+        assert "- faqs / salary:" in prompt
+        assert "Parloa" not in prompt
+        assert "(no relevant facts)" in self._system_prompt("ja")
+
+    def test_full_dump_when_disabled(self, monkeypatch):
+        monkeypatch.setattr(settings, "prompt_facts_enabled", False)
+        assert "(truncated)" in self._system_prompt("ja")
+
+    def test_prompt_tokens_are_recorded_per_mode(self, monkeypatch):
+        args = '{"category": "VALID_ANSWER", "normalized_value": "YES"}'
+        response = SimpleNamespace(
+            choices=[SimpleNamespace(message=SimpleNamespace(function_call=SimpleNamespace(arguments=args)))],
+            usage=SimpleNamespace(prompt_tokens=321, total_tokens=340)
+        )
+        monkeypatch.setattr(openai_service.client.chat.completions, "create", lambda **request: response)
+        monkeypatch.setattr(openai_service, "classify_cache", None)
+        monkeypatch.setattr(settings, "classify_streaming", False)
+        monkeypatch.setattr(settings, "prompt_facts_enabled", True)
+        before = metrics.histogram("classify.prompt_tokens.retrieval")
+        count = before.count if before else 0
+
+        openai_service.classify_flow_input("ja sicher", "yes_no")
+
+        histogram = metrics.histogram("classify.prompt_tokens.retrieval")
+        assert histogram.count == count + 1
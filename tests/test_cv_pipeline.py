@@ -0,0 +1,101 @@
+"""Test that CV scoring starts at the upload and how it overlaps the conversation."""
+from datetime import datetime
+
+from app.core import turn_processor as turn_processor_module
+from app.core import worker as worker_module
+from app.core.flow_engine import FlowEngine
+from app.core.turn_processor import InboundMessage, run_turn
+from app.core.worker import CvPipelineTimeline, run_scoring_pipeline
+from app.db import crud
+from app.utils.media_download import MediaTooLarge
+from app.utils.metrics import metrics
+
+
+def _lead_at(db, number, stage):
+    lead = crud.create_lead(db, number)
+    lead.conversation_stage = stage
+    db.commit()
+    return lead
+
+
+def test_scoring_is_queued_when_the_cv_arrives(db_session, monkeypatch):
+    monkeypatch.setattr(turn_processor_module.twilio_service, "send_message", lambda to, body: True)
+    lead = _lead_at(db_session, "whatsapp:+4915100000031", FlowEngine.STATE_CV)
+    scheduled = []
+
+    upload = InboundMessage("SM-cv-1", "", 1, "https://api.twilio.com/media/cv.pdf")
+    run_turn(db_session, lead.whatsapp_number, [upload], schedule_scoring=scheduled.append)
+    assert scheduled == [lead.id]
+    assert lead.conversation_stage == FlowEngine.STATE_COVER
+
+    run_turn(db_session, lead.whatsapp_number, [InboundMessage("SM-cv-2", "weiter")], schedule_scoring=scheduled.append)
+    assert scheduled == [lead.id]  # Not again for the following states
+
+
+def test_completed_lead_is_queued_only_while_its_cv_is_unhandled(db_session, monkeypatch):
+    monkeypatch.setattr(turn_processor_module.twilio_service, "send_message", lambda to, body: True)
+    scheduled = []
+    no_cv = _lead_at(db_session, "whatsapp:+4915100000032", FlowEngine.STATE_COMPLETED)
+    run_turn(db_session, no_cv.whatsapp_number, [InboundMessage("SM-cv-3", "Hallo")], schedule_scoring=scheduled.append)
+    assert scheduled == []
+
+    graded = _lead_at(db_session, "whatsapp:+4915100000033", FlowEngine.STATE_COMPLETED)
+    graded.cv_file_path = "url:https://api.twilio.com/media/cv.pdf"
+    db_session.commit()
+    run_turn(db_session, graded.whatsapp_number, [InboundMessage("SM-cv-4", "Hallo")], schedule_scoring=scheduled.append)
+    assert scheduled == [graded.id]
+
+    graded.scored_at = datetime.utcnow()  # Graded 0 is still graded
+    db_session.commit()
+    run_turn(db_session, graded.whatsapp_number, [InboundMessage("SM-cv-5", "Hallo")], schedule_scoring=scheduled.append)
+    assert scheduled == [graded.id]
+
+
+def test_too_large_cv_is_marked_handled(db_session, monkeypatch):
+    lead = _lead_at(db_session, "whatsapp:+4915100000034", FlowEngine.STATE_COMPLETED)
+    lead.cv_file_path = "url:https://api.twilio.com/media/huge.pdf"
+    db_session.commit()
+
+    def too_large(url):
+        raise MediaTooLarge(url)
+
+    monkeypatch.setattr(worker_module, "SessionLocal", lambda: db_session)
+    monkeypatch.setattr(worker_module.document_service, "download_file_from_url", too_large)
+    monkeypatch.setattr(db_session, "close", lambda: None)
+    run_scoring_pipeline(lead.id)
+    assert lead.scored_at is not None and lead.qualification_score == 0
+
+    monkeypatch.setattr(worker_module.openai_service, "grade_application", lambda *a, **k: 1 / 0)
+    run_scoring_pipeline(lead.id)  # Skipped, not graded again
+
+
+def test_overlap_of_a_pipeline_done_before_completion(monkeypatch):
+    now = [100.0]
+    monkeypatch.setattr("app.core.worker.time.time", lambda: now[0])
+    before = metrics.counter("cv_pipeline.ready_before_completion")
+    timeline = CvPipelineTimeline()
+
+    timeline.mark(1, "uploaded")
+    now[0] = 130.0
+    timeline.mark(1, "scored")
+    now[0] = 200.0
+    timeline.mark(1, "completed")
+
+    assert metrics.counter("cv_pipeline.ready_before_completion") == before + 1
+    assert metrics.histogram("cv_pipeline.overlap_pct").samples[-1] == 100.0
+
+
+def test_wait_left_after_completion(monkeypatch):
+    now = [100.0]
+    monkeypatch.setattr("app.core.worker.time.time", lambda: now[0])
+    timeline = CvPipelineTimeline()
+
+    timeline.mark(2, "uploaded")
+    now[0] = 130.0
+    timeline.mark(2, "completed")
+    timeline.mark(2, "completed")  # Later turns in the completed state don't move it
+    now[0] = 140.0
+    timeline.mark(2, "scored")
+
+    assert metrics.histogram("cv_pipeline.overlap_pct").samples[-1] == 75.0
+    assert metrics.histogram("cv_pipeline.wait_after_completion_ms").samples[-1] == 10000.0
@@ -0,0 +1,83 @@
+"""Test the local FAQ engine over data/intents.json."""
+import pytest
+
+from app.core import flow_engine as flow_engine_module
+from app.core.faq_engine import faq_engine
+from app.core.flow_engine import FlowEngine
+from app.db import crud
+from app.services.openai_service import openai_service
+from app.utils.text_index import BM25Index, KeywordAutomaton
+
+
+class TestTextIndex:
+    """Keyword automaton and BM25 building blocks."""
+
+    def test_automaton_word_boundaries(self):
+        automaton = KeywordAutomaton([("hi", "greeting"), ("gehalt", "salary"), ("home office", "remote")])
+        found = lambda text: [value for _, _, value in automaton.find(text)]
+        assert found("Hi! Wie ist die Gehaltsvorstellung im Home Office?") == ["greeting", "salary", "remote"]
+        assert found("Ich bin hier") == []
+        assert found("Vorgehalten") == []
+
+    def test_automaton_overlapping_keywords(self):
+        automaton = KeywordAutomaton([("tech", "a"), ("tech stack", "b"), ("stack", "c")])
+        assert [value for _, _, value in automaton.find("euer tech stack")] == ["a", "b", "c"]
+
+    def test_bm25_prefers_rare_terms(self):
+        index = BM25Index({"a": ["python", "team"], "b": ["team", "büro"], "c": ["team"]})
+        scores = index.scores(["python", "team"])
+        assert max(scores, key=scores.get) == "a"
+        assert index.scores(["unbekannt"]) == {}
+
+
+class TestFaqEngine:
+    """Local answers for FAQ questions, LLM for everything else."""
+
+    @pytest.mark.parametrize("message,intent", [
+        ("Kann ich remote arbeiten?", "remote_work"),
+        ("Gibt es Homeoffice?", "remote_work"),
+        ("Hi, wie hoch ist das Gehalt?", "salary"),
+        ("was verdient man bei euch?", "salary"),
+        ("Welche Benefits gibt es?", "benefits"),
+        ("Mit welchem Tech Stack arbeitet ihr?", "tech_stack"),
+        ("Wie läuft die Bewerbung ab?", "application_process"),
+    ])
+    def test_answers_faq_questions(self, message, intent):
+        result = faq_engine.answer(message)
+        assert result["category"] == "QUESTION"
+        assert result["intent"] == intent
+        assert not result["ai_reply"].rstrip().endswith("?")  # The flow appends its own follow-up
+
+    @pytest.mark.parametrize("message", [
+        "Wie viele Urlaubstage gibt es?",  # Not in the FAQ
+        "Hat die Stelle Homeoffice und wie ist die Bezahlung?",  # Two topics
+        "Welche Jobs habt ihr?",  # An answer to the flow, not an aside
+        "Remote",  # Not a question
+    ])
+    def test_leaves_other_messages_to_the_llm(self, message):
+        assert faq_engine.answer(message) is None
+
+    def test_extract_intent_without_llm(self, monkeypatch):
+        def fail(**kwargs):
+            raise AssertionError("LLM called")
+
+        monkeypatch.setattr(openai_service.client.chat.completions, "create", fail)
+        assert openai_service.extract_intent("Hallo")["intent"] == "greeting"
+        assert openai_service.extract_intent("Welche Jobs habt ihr?")["intent"] == "job_openings"
+        # Contact details still need the LLM's entity extraction
+        assert openai_service.extract_intent("Hi, ich bin Tom, tom@example.com")["intent"] == "other"
+
+    def test_flow_engine_answers_without_llm(self, db_session, monkeypatch):
+        def classify(message, expected_type):
+            raise AssertionError("LLM called")
+
+        monkeypatch.setattr(flow_engine_module.openai_service, "classify_flow_input", classify)
+        engine = FlowEngine()
+        user = "whatsapp:+4915100000050"
+        crud.get_or_create_lead(db_session, user).conversation_stage = FlowEngine.STATE_REQ_2
+        db_session.commit()
+
+        reply = engine.process_message(user, "Gibt es Homeoffice?", db_session)
+
+        assert reply.startswith("Ja! 🏠 Alle Positionen bieten wir remote")
+        assert reply.endswith("(Zurück zur Frage: Bist du fit in Python? Ja/Nein)")
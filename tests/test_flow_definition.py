@@ -0,0 +1,136 @@
+"""Test the declarative flow definition and the FlowEngine interpreter."""
+import copy
+import json
+
+import pytest
+
+from app.config import settings
+from app.core import flow_engine as flow_engine_module
+from app.core.flow_definition import FlowDefinitionError, compile_flow, load_flow
+from app.core.flow_engine import FlowEngine
+from app.db import crud
+
+
+with open("data/flow.json", "r", encoding="utf-8") as f:
+    FLOW = json.load(f)
+
+
+def _state(definition, name):
+    return next(s for s in definition["states"] if s["name"] == name)
+
+
+class TestFlowCompilation:
+    """Load-time validation."""
+
+    def test_shipped_flow_compiles(self):
+        flow = load_flow()
+        assert flow.start == FlowEngine.STATE_IDLE
+        assert flow.states[FlowEngine.STATE_CV].name == "CV"
+        assert [job.value for job in flow.jobs] == ["JOB_1", "JOB_2", "JOB_3"]
+        assert flow.states[FlowEngine.STATE_IDLE].rules[0].reply.is_static
+
+    def test_dangling_transition_is_rejected(self):
+        broken = copy.deepcopy(FLOW)
+        _state(broken, "PHONE")["rules"][0]["goto"] = "FAX"
+        with pytest.raises(FlowDefinitionError, match="dangling"):
+            compile_flow(broken)
+
+    def test_unreachable_state_is_rejected(self):
+        broken = copy.deepcopy(FLOW)
+        broken["states"].append({"id": 50, "name": "ORPHAN", "rules": [{"goto": "COMPLETED", "reply": "x"}]})
+        with pytest.raises(FlowDefinitionError, match="Unreachable states: ORPHAN"):
+            compile_flow(broken)
+
+    def test_unknown_lead_field_is_rejected(self):
+        broken = copy.deepcopy(FLOW)
+        _state(broken, "PHONE")["rules"][0]["write"] = {"fax": "{message}"}
+        with pytest.raises(FlowDefinitionError, match="fax"):
+            compile_flow(broken)
+
+    def test_unknown_placeholder_is_rejected(self):
+        broken = copy.deepcopy(FLOW)
+        _state(broken, "PHONE")["rules"][0]["reply"] = "Hallo {vorname}"
+        with pytest.raises(FlowDefinitionError, match="vorname"):
+            compile_flow(broken)
+
+    def test_conditional_last_rule_is_rejected(self):
+        broken = copy.deepcopy(FLOW)
+        _state(broken, "PHONE")["rules"][0]["when"] = {"shorter_than": 3}
+        with pytest.raises(FlowDefinitionError, match="unconditional"):
+            compile_flow(broken)
+
+
+class TestFlowEngine:
+    """Walk the full application flow with a stubbed LLM."""
+
+    def test_full_application(self, db_session, monkeypatch):
+        monkeypatch.setattr(
+            flow_engine_module.openai_service, "classify_flow_input",
+            lambda message, expected_type: {"category": "UNCLEAR"}
+        )
+        monkeypatch.setattr(
+            flow_engine_module.openai_service, "generate_flow_reply",
+            lambda message, trigger_event, next_step_instruction, user_name="Du": f"[{trigger_event}]"
+        )
+        engine = FlowEngine()
+        user = "whatsapp:+4915100000007"
+
+        def say(message):
+            return engine.process_message(user, message, db_session)
+
+        assert "Willkommen" in say("Hallo")
+        assert "offenen Stellen" in say("Job")
+        assert say("Backend bitte") == "[USER_SELECTED_JOB_Senior Backend Dev]"
+        assert say("ja") == "[USER_HAS_AI_EXPERIENCE]"
+        assert say("ja klar") == "[USER_KNOWS_PYTHON_AND_API]"
+        assert say("👍") == "[USER_HAS_INNOVATION_MINDSET]"
+        assert say("Al") == "Bitte gib deinen vollständigen Namen ein."
+        assert say("Max Mustermann").startswith("Danke Max Mustermann!")
+        assert "Lebenslauf" in say("0151 234567")
+        assert "Lebenslauf" in say("weiter")
+        assert "CV erhalten" in say("UPLOAD_DONE")
+        assert "verfügbar" in say("weiter")
+        assert "Gehaltsvorstellung" in say("ab sofort")
+        assert "aufmerksam" in say("60.000 €")
+        assert "Deutschkenntnisse" in say("LinkedIn")
+        final = say("C1")
+        assert "Vielen Dank, Max Mustermann!" in final
+        assert "💼 Job: Senior Backend Dev" in final
+        assert say("Hallo?") == "Bewerbung ist bereits durch! 👋"
+
+        lead = crud.get_lead_by_whatsapp(db_session, user)
+        assert lead.conversation_stage == FlowEngine.STATE_COMPLETED
+        assert lead.position_interest == "Senior Backend Dev"
+        assert lead.has_conversational_ai_experience and lead.has_api_knowledge
+        assert lead.salary_expectation == 60000
+        assert lead.german_level == "C1"
+
+    def test_question_and_knockout(self, db_session, monkeypatch):
+        monkeypatch.setattr(settings, "faq_engine_enabled", False)
+        monkeypatch.setattr(
+            flow_engine_module.openai_service, "classify_flow_input",
+            lambda message, expected_type: {"category": "QUESTION", "ai_reply": "Remote geht!"}
+        )
+        engine = FlowEngine()
+        user = "whatsapp:+4915100000008"
+        lead = crud.get_or_create_lead(db_session, user)
+        lead.conversation_stage = FlowEngine.STATE_REQ_1
+        db_session.commit()
+
+        reply = engine.process_message(user, "Kann man remote arbeiten?", db_session)
+        assert reply == "Remote geht!\n\n(Aber zur Frage: Hast du Erfahrung? Ja oder Nein?)"
+        assert "Schade!" in engine.process_message(user, "nein", db_session)
+        assert lead.conversation_stage == FlowEngine.STATE_COMPLETED
+
+    def test_reset_and_unknown_state(self, db_session):
+        engine = FlowEngine()
+        user = "whatsapp:+4915100000009"
+        lead = crud.get_or_create_lead(db_session, user)
+        lead.conversation_stage = 42
+        db_session.commit()
+
+        assert engine.process_message(user, "egal", db_session) == "Fehler. Neustart..."
+        assert lead.conversation_stage == FlowEngine.STATE_IDLE
+        lead.conversation_stage = FlowEngine.STATE_NAME
+        assert engine.process_message(user, "#reset", db_session).startswith("🔄 System zurückgesetzt.")
+        assert lead.conversation_stage == FlowEngine.STATE_IDLE
@@ -0,0 +1,148 @@
+"""Test the shared HTTP transport (keep-alive reuse, in-flight cap)."""
+import asyncio
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+import httpx
+import pytest
+
+from app.utils.http_transport import HttpTransport, body_deadline
+from app.utils.metrics import metrics
+
+
+class _Handler(BaseHTTPRequestHandler):
+    protocol_version = "HTTP/1.1"  # Keep-alive
+    disable_nagle_algorithm = True
+    delay = 0.0
+
+    def do_GET(self):
+        time.sleep(self.delay)
+        if self.path == "/trickle":  # Each read is quick, the whole body is not
+            self.send_response(200)
+            self.send_header("Content-Length", "10")
+            self.end_headers()
+            for _ in range(10):
+                self.wfile.write(b"x")
+                self.wfile.flush()
+                time.sleep(0.05)
+            return
+        body = b"ok"
+        self.send_response(200)
+        self.send_header("Content-Length", str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def log_message(self, *args):
+        pass
+
+
+@pytest.fixture
+def server():
+    httpd = ThreadingHTTPServer(("127.0.0.1", 0), _Handler)
+    thread = threading.Thread(target=httpd.serve_forever, daemon=True)
+    thread.start()
+    yield f"http://127.0.0.1:{httpd.server_port}/"
+    httpd.shutdown()
+    httpd.server_close()
+
+
+def _counter(name):
+    return metrics.snapshot()["counters"].get(name, 0)
+
+
+def test_requests_session_reuses_connection(server):
+    transport = HttpTransport()
+    before = _counter("http.t_requests.handshakes")
+    session = transport.session("t_requests")
+    for _ in range(5):
+        assert session.get(server, timeout=5).text == "ok"
+    assert _counter("http.t_requests.handshakes") - before == 1
+    assert transport.snapshot()["t_requests"]["requests"] >= 5
+    transport.close()
+
+
+def test_httpx_client_reuses_connection(server):
+    transport = HttpTransport()
+    before = _counter("http.t_httpx.handshakes")
+    client = transport.httpx_client("t_httpx")
+    assert transport.httpx_client("t_httpx") is client  # Shared per upstream
+    for _ in range(5):
+        assert client.get(server).text == "ok"
+    assert _counter("http.t_httpx.handshakes") - before == 1
+    transport.close()
+
+
+def test_httpx_async_client_reuses_connection(server):
+    transport = HttpTransport()
+    before = _counter("http.t_async.handshakes")
+
+    async def run():
+        client = transport.httpx_async_client("t_async")
+        for _ in range(5):
+            assert (await client.get(server)).text == "ok"
+        await transport.aclose()
+
+    asyncio.run(run())
+    assert _counter("http.t_async.handshakes") - before == 1
+
+
+def test_in_flight_cap(server, monkeypatch):
+    monkeypatch.setattr(_Handler, "delay", 0.1)
+    transport = HttpTransport(max_in_flight=1)
+    session = transport.session("t_capped")
+    started = time.perf_counter()
+    threads = [threading.Thread(target=session.get, args=(server,)) for _ in range(3)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    # One at a time: the waits add up
+    assert time.perf_counter() - started >= 0.3
+    assert metrics.histogram("http.t_capped.wait_ms").total >= 100
+    assert transport.snapshot()["in_flight"] == {"t_capped": 0}
+    transport.close()
+
+
+def test_streamed_body_holds_the_slot_until_consumed(server):
+    transport = HttpTransport()
+    session = transport.session("t_stream")
+    response = session.get(server, stream=True)
+    assert transport.snapshot()["in_flight"] == {"t_stream": 1}
+    assert response.text == "ok"  # Reading the body gives the slot back
+    assert transport.snapshot()["in_flight"] == {"t_stream": 0}
+
+    client = transport.httpx_client("t_stream_httpx")
+    with client.stream("GET", server) as streamed:
+        assert transport.snapshot()["in_flight"]["t_stream_httpx"] == 1
+        streamed.read()
+    assert transport.snapshot()["in_flight"]["t_stream_httpx"] == 0
+    transport.close()
+
+
+def test_aiohttp_session_is_shared_and_closed(server):
+    transport = HttpTransport()
+
+    async def run():
+        session = transport.aiohttp_session("t_aiohttp")
+        assert transport.aiohttp_session("t_aiohttp") is session
+        async with session.get(server) as response:
+            assert await response.text() == "ok"
+        await transport.aclose()
+        return session
+
+    assert asyncio.run(run()).closed
+
+
+def test_body_deadline_bounds_the_whole_response(server):
+    transport = HttpTransport()
+    client = transport.httpx_client("t_deadline")
+    with body_deadline(time.monotonic() + 0.2):
+        assert client.get(server).text == "ok"
+        started = time.perf_counter()
+        with pytest.raises(httpx.ReadTimeout):
+            client.get(server + "trickle", timeout=5)
+    assert time.perf_counter() - started < 0.4
+    assert transport.snapshot()["in_flight"]["t_deadline"] == 0
+    assert len(client.get(server + "trickle").content) == 10  # No deadline outside the block
+    transport.close()
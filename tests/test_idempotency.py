@@ -0,0 +1,70 @@
+"""Test the MessageSid dedupe store."""
+import asyncio
+import threading
+
+from sqlalchemy.orm import sessionmaker
+
+from app.core import idempotency as idempotency_module
+from app.core import turn_processor as turn_processor_module
+from app.core.idempotency import MessageDedupeStore
+
+
+class TestMessageDedupeStore:
+    """Test TTL, bounds and replay data of the dedupe store."""
+
+    def test_first_delivery_is_reserved(self):
+        store = MessageDedupeStore()
+        assert store.begin("SM1") is None
+
+        duplicate = store.begin("SM1")
+        assert duplicate is not None
+        assert duplicate.done is False
+
+    def test_completed_entry_keeps_reply(self):
+        store = MessageDedupeStore()
+        store.begin("SM1")
+        store.complete("SM1", "Hallo!", delivered=False)
+
+        duplicate = store.begin("SM1")
+        assert duplicate.done is True
+        assert duplicate.reply == "Hallo!"
+        assert duplicate.delivered is False
+
+    def test_expired_entries_are_forgotten(self):
+        store = MessageDedupeStore(ttl_seconds=0)
+        store.begin("SM1")
+        store.complete("SM1", "Hallo!", delivered=True)
+        assert store.begin("SM1") is None
+
+    def test_size_is_bounded(self):
+        store = MessageDedupeStore(max_entries=2)
+        for sid in ["SM1", "SM2", "SM3"]:
+            store.begin(sid)
+        assert store.begin("SM1") is None  # evicted as least recently used
+        assert store.begin("SM3") is not None
+
+    def test_async_callers_query_the_table_off_the_loop(self, monkeypatch):
+        store = MessageDedupeStore(persistent=True)
+        threads = []
+        monkeypatch.setattr(store, "_load_persistent", lambda sid: threads.append(threading.get_ident()))
+        monkeypatch.setattr(store, "_save_persistent", lambda entry: threads.append(threading.get_ident()))
+
+        async def turn():
+            assert await store.begin_async("SM1") is None
+            await store.complete_async("SM1", "Hallo!", delivered=True)
+            return threading.get_ident()
+
+        loop_thread = asyncio.run(turn())
+        assert len(threads) == 2 and loop_thread not in threads
+        assert store.begin("SM1").reply == "Hallo!"
+
+    def test_replayed_reply_is_persisted(self, db_session, monkeypatch):
+        monkeypatch.setattr(idempotency_module, "SessionLocal", sessionmaker(bind=db_session.get_bind()))
+        MessageDedupeStore(persistent=True).complete("SM1", "Hallo!", delivered=False)
+
+        restarted = MessageDedupeStore(persistent=True)
+        monkeypatch.setattr(turn_processor_module, "message_dedupe", restarted)
+        monkeypatch.setattr(turn_processor_module.twilio_service, "send_message", lambda to, body: True)
+        turn_processor_module.replay_duplicate("whatsapp:+4915100000040", restarted.begin("SM1"))
+
+        assert MessageDedupeStore(persistent=True).begin("SM1").delivered is True  # Not re-sent after another restart
@@ -0,0 +1,99 @@
+"""Test the persistent job queue: leasing, retries, restarts and the worker pool."""
+import threading
+import time
+
+import pytest
+
+from app.utils.job_queue import DONE, FAILED, QUEUED, JobQueue
+
+
+@pytest.fixture
+def clock():
+    now = [1000.0]
+    tick = lambda: now[0]
+    tick.advance = lambda seconds: now.__setitem__(0, now[0] + seconds)
+    return tick
+
+
+def queue(tmp_path, clock=time.time, **kwargs):
+    return JobQueue(str(tmp_path / "jobs.db"), clock=clock, **kwargs)
+
+
+def test_dedupe_only_while_active(tmp_path):
+    q = queue(tmp_path)
+    runs = []
+    q.register("score", lambda payload: runs.append(payload["lead_id"]))
+    assert q.enqueue("score", {"lead_id": 1}, dedupe_key="score:1")
+    assert not q.enqueue("score", {"lead_id": 1}, dedupe_key="score:1")
+    assert q.run_one() and not q.run_one()
+    assert q.enqueue("score", {"lead_id": 1}, dedupe_key="score:1")  # Finished jobs don't block
+    assert runs == [1]
+
+
+def test_retries_with_backoff_then_fails(tmp_path, clock):
+    q = queue(tmp_path, clock, max_attempts=3, retry_base_seconds=10)
+    q.register("score", lambda payload: 1 / 0)
+    q.enqueue("score", {})
+
+    assert q.run_one()
+    assert not q.run_one()  # Backing off
+    clock.advance(10)
+    assert q.run_one()
+    clock.advance(20)
+    assert q.run_one()
+    clock.advance(1000)
+    assert not q.run_one()
+    kinds = q.report()["kinds"]["score"]
+    assert (kinds[FAILED], kinds[QUEUED]) == (1, 0)
+
+
+def test_expired_lease_is_run_again(tmp_path, clock):
+    q = queue(tmp_path, clock, visibility_timeout=60)
+    q.enqueue("score", {"lead_id": 7})
+    crashed = q.lease()  # Worker dies without acknowledging
+    assert q.lease() is None
+
+    clock.advance(61)
+    job = q.lease()
+    assert job.payload == {"lead_id": 7} and job.attempts == 2
+    q.complete(crashed)  # A stale lease cannot finish the job
+    assert q.report()["kinds"]["score"][DONE] == 0
+    q.complete(job)
+    assert q.report()["kinds"]["score"][DONE] == 1
+
+
+def test_jobs_survive_a_restart(tmp_path):
+    queue(tmp_path).enqueue("score", {"lead_id": 3})
+    restarted = queue(tmp_path)
+    runs = []
+    restarted.register("score", lambda payload: runs.append(payload["lead_id"]))
+    assert restarted.run_one()
+    assert runs == [3]
+
+
+def test_worker_pool_runs_jobs_concurrently(tmp_path):
+    q = queue(tmp_path, poll_seconds=0.05)
+    running, peak, lock = [0], [0], threading.Lock()
+
+    def handler(payload):
+        with lock:
+            running[0] += 1
+            peak[0] = max(peak[0], running[0])
+        time.sleep(0.05)
+        with lock:
+            running[0] -= 1
+
+    q.register("score", handler)
+    q.start(4)
+    try:
+        for i in range(8):
+            q.enqueue("score", {"lead_id": i})
+        deadline = time.monotonic() + 5
+        while q.depth() and time.monotonic() < deadline:
+            time.sleep(0.02)
+    finally:
+        q.stop()
+    report = q.report()
+    assert report["kinds"]["score"][DONE] == 8
+    assert peak[0] > 1
+    assert report["workers"] == 0
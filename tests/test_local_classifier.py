@@ -0,0 +1,69 @@
+"""Test the local fast-path classifier."""
+import pytest
+
+from app.core.flow_definition import load_flow
+from app.core.local_classifier import LocalClassifier
+
+
+classifier = LocalClassifier()
+classifier.set_jobs(load_flow().jobs)
+
+
+@pytest.mark.parametrize("message,expected", [
+    ("ja", "YES"), ("Ja!", "YES"), ("Klar", "YES"), ("auf jeden Fall", "YES"), ("yes", "YES"),
+    ("👍", "YES"), ("✅✅", "YES"), ("ja, hab 2 jahre mit GPT gebaut", "YES"),
+    ("nein", "NO"), ("Nee", "NO"), ("leider nicht", "NO"), ("nope", "NO"), ("👎", "NO"),
+    ("Nein, noch nie gemacht", "NO"), ("leider hab ich keine Erfahrung", "NO"),
+])
+def test_yes_no(message, expected):
+    result = classifier.classify(message, "yes_no")
+    assert result["category"] == "VALID_ANSWER"
+    assert result["normalized_value"] == expected
+
+
+@pytest.mark.parametrize("message,expected", [
+    ("1", "JOB_1"), ("eins", "JOB_1"), ("der erste", "JOB_1"), ("1️⃣", "JOB_1"), ("Junior", "JOB_1"),
+    ("Backend", "JOB_2"), ("2", "JOB_2"), ("python", "JOB_2"),
+    ("Trainee", "JOB_3"), ("drei", "JOB_3"),
+])
+def test_job_selection(message, expected):
+    assert classifier.classify(message, "job_selection")["normalized_value"] == expected
+
+
+@pytest.mark.parametrize("message,expected", [
+    ("Job", "JOB"), ("jobs bitte", "JOB"), ("1", "JOB"), ("Infos", "INFO"), ("2", "INFO"),
+])
+def test_job_or_info(message, expected):
+    assert classifier.classify(message, "job_or_info")["normalized_value"] == expected
+
+
+@pytest.mark.parametrize("message,expected_type", [
+    ("Wie viel verdient man?", "yes_no"),
+    ("was verdient man bei euch", "yes_no"),
+    ("ja aber nicht mit python", "yes_no"),
+    ("hmm vielleicht", "yes_no"),
+    ("👍👎", "yes_no"),
+    ("backend oder trainee", "job_selection"),
+    ("leider ja", "yes_no"),
+    ("ich will keinen job", "job_or_info"),
+    ("kein bot", "job_selection"),
+    ("", "yes_no"),
+])
+def test_unclear_input_goes_to_llm(message, expected_type):
+    assert classifier.classify(message, expected_type) is None
+
+
+def test_flow_engine_skips_llm_on_fast_path_hit(monkeypatch):
+    from app.core import flow_engine as flow_engine_module
+    from app.utils.metrics import metrics
+
+    def no_llm(*args, **kwargs):
+        raise AssertionError("LLM must not be called")
+
+    monkeypatch.setattr(flow_engine_module.openai_service, "classify_flow_input", no_llm)
+    hits = metrics.counter("fast_path.hit.state_3")
+
+    result = flow_engine_module.FlowEngine()._classify("ja klar", "yes_no", 3)
+
+    assert result["normalized_value"] == "YES"
+    assert metrics.counter("fast_path.hit.state_3") == hits + 1
@@ -0,0 +1,114 @@
+"""Test streaming media downloads (size cap, spooling, type sniffing)."""
+import threading
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from io import BytesIO
+
+import pytest
+import requests
+from docx import Document
+
+from app.services.document_service import document_service
+from app.utils.media_download import DOCX_TYPE, PDF_TYPE, MediaTooLarge, download_to_spool, sniff_content_type
+from scripts.pdf_fixtures import cv_pdf
+
+FILES = {}
+
+
+class _Handler(BaseHTTPRequestHandler):
+    protocol_version = "HTTP/1.1"
+    disable_nagle_algorithm = True
+
+    def do_GET(self):
+        body, content_type, chunked = FILES[self.path]
+        self.send_response(200)
+        self.send_header("Content-Type", content_type)
+        if chunked:  # No Content-Length: only the streamed size can trip the cap
+            self.send_header("Transfer-Encoding", "chunked")
+            self.end_headers()
+            for start in range(0, len(body), 4096):
+                chunk = body[start:start + 4096]
+                self.wfile.write(b"%x\r\n%s\r\n" % (len(chunk), chunk))
+            self.wfile.write(b"0\r\n\r\n")
+        else:
+            self.send_header("Content-Length", str(len(body)))
+            self.end_headers()
+            self.wfile.write(body)
+
+    def log_message(self, *args):
+        pass
+
+
+@pytest.fixture
+def server():
+    httpd = ThreadingHTTPServer(("127.0.0.1", 0), _Handler)
+    thread = threading.Thread(target=httpd.serve_forever, daemon=True)
+    thread.start()
+    yield f"http://127.0.0.1:{httpd.server_port}"
+    httpd.shutdown()
+    httpd.server_close()
+
+
+@pytest.fixture
+def session():
+    with requests.Session() as session:
+        yield session
+
+
+def _docx():
+    doc = Document()
+    doc.add_paragraph("Lebenslauf: Erfahrung mit Python und Chatbots")
+    buffer = BytesIO()
+    doc.save(buffer)
+    return buffer.getvalue()
+
+
+def test_small_file_stays_in_memory(server, session):
+    content = cv_pdf(pages=1)
+    FILES["/cv"] = (content, PDF_TYPE, False)
+    with download_to_spool(session, f"{server}/cv", spool_bytes=1024 * 1024) as media:
+        assert (media.size, media.spilled, media.content_type) == (len(content), False, PDF_TYPE)
+        with media.view() as view:
+            assert view == content
+
+
+def test_large_file_is_spooled_to_disk(server, session):
+    content = b"%PDF-1.4\n" + bytes(300_000)
+    FILES["/big"] = (content, PDF_TYPE, True)
+    with download_to_spool(session, f"{server}/big", spool_bytes=64 * 1024) as media:
+        assert media.spilled and media.size == len(content)
+        with media.view() as view:
+            assert view == content
+
+
+def test_spills_only_past_the_threshold(server, session):
+    content = b"%PDF-1.4\n" + bytes(64 * 1024 - 9)
+    FILES["/edge"] = (content, PDF_TYPE, False)
+    with download_to_spool(session, f"{server}/edge", spool_bytes=len(content)) as media:
+        assert not media.spilled
+    with download_to_spool(session, f"{server}/edge", spool_bytes=len(content) - 1) as media:
+        assert media.spilled
+        with media.view() as view:
+            assert view == content
+
+
+@pytest.mark.parametrize("chunked", [False, True])
+def test_size_cap(server, session, chunked):
+    FILES["/huge"] = (bytes(200_000), "application/pdf", chunked)
+    with pytest.raises(MediaTooLarge):
+        download_to_spool(session, f"{server}/huge", max_bytes=100_000)
+
+
+def test_type_is_sniffed_not_trusted(server, session):
+    FILES["/doc"] = (_docx(), "application/octet-stream", False)
+    with download_to_spool(session, f"{server}/doc") as media:
+        assert media.content_type == DOCX_TYPE
+        assert media.declared_type == "application/octet-stream"
+    assert sniff_content_type(BytesIO(b"PK\x03\x04 not a zip")) == "application/zip"
+    assert sniff_content_type(BytesIO(b"<html>")) == "application/octet-stream"
+
+
+def test_document_service_extracts_from_the_spool(server, monkeypatch):
+    monkeypatch.setattr("app.services.extraction_pool.extraction_pool.workers", 0)
+    FILES["/cv.bin"] = (cv_pdf(pages=2), "text/plain", False)
+    with document_service.download_file_from_url(f"url:{server}/cv.bin") as media:
+        assert "Lebenslauf - Seite 2" in document_service.extract_text(media)
@@ -0,0 +1,100 @@
+"""Test the micro-batcher and batched classify_flow_input."""
+import asyncio
+import json
+import threading
+from concurrent.futures import ThreadPoolExecutor
+from types import SimpleNamespace
+
+import pytest
+
+from app.config import settings
+from app.services.openai_service import openai_service
+from app.utils.micro_batch import MicroBatcher
+
+
+def recording_batcher(**kwargs):
+    batches = []
+    lock = threading.Lock()
+
+    def run(items):
+        with lock:
+            batches.append(list(items))
+        return [item * 10 for item in items]
+
+    async def run_async(items):
+        batches.append(list(items))
+        return [item * 10 for item in items]
+
+    return MicroBatcher("test", run, run_async, **kwargs), batches
+
+
+def test_concurrent_threads_share_a_batch():
+    batcher, batches = recording_batcher(max_batch_size=8, max_wait_ms=200)
+    with ThreadPoolExecutor(max_workers=8) as pool:
+        results = list(pool.map(batcher.submit, range(8)))
+    assert results == [i * 10 for i in range(8)]
+    assert len(batches) == 1  # A full batch is flushed without waiting out max_wait_ms
+
+
+def test_batches_are_capped():
+    batcher, batches = recording_batcher(max_batch_size=3, max_wait_ms=50)
+
+    async def main():
+        return await asyncio.gather(*(batcher.submit_async(i) for i in range(7)))
+
+    assert asyncio.run(main()) == [i * 10 for i in range(7)]
+    assert [len(batch) for batch in batches] == [3, 3, 1]
+
+
+def test_errors_reach_every_caller():
+    def run(items):
+        raise RuntimeError("model down")
+
+    batcher = MicroBatcher("test", run, max_batch_size=4, max_wait_ms=50)
+    with ThreadPoolExecutor(max_workers=4) as pool:
+        futures = [pool.submit(batcher.submit, i) for i in range(4)]
+    for future in futures:
+        with pytest.raises(RuntimeError):
+            future.result()
+
+
+def test_result_count_is_checked():
+    batcher = MicroBatcher("test", lambda items: [], max_wait_ms=1)
+    with pytest.raises(ValueError):
+        batcher.submit(1)
+
+
+def test_classify_fans_results_out(monkeypatch):
+    requests = []
+
+    def create(**request):
+        requests.append(request)
+        inputs = json.loads(request["messages"][-1]["content"])
+        results = [
+            {"id": item["id"], "category": "VALID_ANSWER", "normalized_value": item["message"].upper()}
+            for item in inputs if item["message"] != "hä?"
+        ]
+        args = json.dumps({"results": results})
+        return SimpleNamespace(choices=[SimpleNamespace(message=SimpleNamespace(function_call=SimpleNamespace(arguments=args)))])
+
+    async def create_async(**request):
+        return create(**request)
+
+    monkeypatch.setattr(openai_service.async_client.chat.completions, "create", create_async)
+    monkeypatch.setattr(openai_service, "classify_cache", None)
+    monkeypatch.setattr(settings, "classify_streaming", False)
+    monkeypatch.setattr(openai_service, "classify_batcher", MicroBatcher(
+        "classify", openai_service._classify_batch, openai_service._classify_batch_async, max_wait_ms=200
+    ))
+
+    async def main():
+        messages = ["ja", "nein", "hä?"]
+        return await asyncio.gather(*(openai_service.classify_flow_input_async(m, "yes_no") for m in messages))
+
+    assert asyncio.run(main()) == [
+        {"category": "VALID_ANSWER", "normalized_value": "JA"},
+        {"category": "VALID_ANSWER", "normalized_value": "NEIN"},
+        {"category": "UNCLEAR"},  # Skipped by the model
+    ]
+    assert len(requests) == 1
+    assert requests[0]["functions"][0]["name"] == "classify_inputs"
@@ -0,0 +1,127 @@
+"""Test model tier routing, latency-budget fallback and cost reporting."""
+import json
+from types import SimpleNamespace
+
+import pytest
+
+from app.config import settings
+from app.services.model_router import FAST, STRONG, ModelRouter, parse_prices, parse_routes
+from app.services.openai_service import openai_service
+
+
+def router(clock=lambda: 0.0, routes=None, **kwargs):
+    return ModelRouter(
+        fast_model="gpt-4o-mini",
+        strong_model="gpt-4-turbo-preview",
+        routes=routes or {"classify": FAST},
+        clock=clock,
+        **kwargs
+    )
+
+
+def usage(prompt_tokens, completion_tokens):
+    return SimpleNamespace(usage=SimpleNamespace(prompt_tokens=prompt_tokens, completion_tokens=completion_tokens))
+
+
+def test_parse_routes():
+    assert parse_routes("classify=fast, grade = strong,") == {"classify": FAST, "grade": STRONG}
+    with pytest.raises(ValueError):
+        parse_routes("classify=tiny")
+
+
+def test_sites_use_their_tier():
+    r = router()
+    request = {"model": "default"}
+    assert r.route("classify", request) == FAST
+    assert request["model"] == "gpt-4o-mini"
+    assert r.route("grade", request) == STRONG  # Unlisted sites use the strong tier
+    assert request["model"] == "gpt-4-turbo-preview"
+
+
+def test_slow_tier_falls_back_until_cooldown_ends():
+    now = [0.0]
+    r = router(clock=lambda: now[0], fallbacks={"classify": STRONG}, fast_budget_ms=1000, min_samples=5, fallback_seconds=60)
+    for _ in range(5):
+        r.observe("classify", FAST, 3000)
+
+    request = {}
+    assert r.route("classify", request) == STRONG  # Not yet observed on the strong tier
+    assert request["model"] == "gpt-4-turbo-preview"
+    assert r.report()["tiers"][FAST]["degraded"]
+    assert r.report()["tiers"][FAST]["fallbacks"] == 1
+
+    now[0] = 61
+    assert r.route("classify", request) == FAST
+    assert r.report()["tiers"][FAST]["p95_ms"] == 0.0  # Fresh latency window
+
+
+def test_fallback_compares_the_same_call_site_across_tiers():
+    r = router(
+        routes={"classify": FAST, "flow_reply": FAST},
+        fallbacks={"classify": STRONG, "flow_reply": STRONG},
+        fast_budget_ms=1000,
+        min_samples=5
+    )
+    for _ in range(5):
+        r.observe("grade", STRONG, 20000)  # Long completions: must not count against classify
+        r.observe("classify", STRONG, 1500)
+        r.observe("flow_reply", STRONG, 8000)
+    for _ in range(5):
+        r.observe("classify", FAST, 3000)
+        r.observe("flow_reply", FAST, 4000)
+
+    assert r.report()["tiers"][FAST]["degraded"]
+    assert r.route("classify", {}) == STRONG  # 1500 ms there vs. 3000 ms on fast
+    assert r.route("flow_reply", {}) == FAST  # Slower on strong: stays
+    assert r.report()["sites"]["flow_reply"] == {"strong_p95_ms": 8000.0, "fast_p95_ms": 4000.0}
+
+
+def test_sites_without_a_fallback_stay_on_their_tier():
+    r = router(routes={"classify": FAST}, fallbacks={"classify": STRONG}, strong_budget_ms=1000, min_samples=5)
+    for _ in range(5):
+        r.observe("grade", STRONG, 30000)
+        r.observe("cv_analysis", STRONG, 30000)
+    assert r.report()["tiers"][STRONG]["degraded"]
+    request = {}
+    assert r.route("grade", request) == STRONG  # Scoring is never moved to the small model implicitly
+    assert request["model"] == "gpt-4-turbo-preview"
+    assert r.route("cv_analysis", {}) == STRONG
+
+    opted_in = router(fallbacks={"grade": FAST}, strong_budget_ms=1000, min_samples=5)
+    for _ in range(5):
+        opted_in.observe("grade", STRONG, 30000)
+    assert opted_in.route("grade", {}) == FAST
+
+
+def test_parse_prices():
+    assert parse_prices("gpt-4o-mini=0.00015/0.0006, x = 1/2") == {"gpt-4o-mini": (0.00015, 0.0006), "x": (1.0, 2.0)}
+    with pytest.raises(ValueError):
+        parse_prices("gpt-4o=cheap")
+
+
+def test_cost_per_tier():
+    r = router(prices=parse_prices(settings.openai_model_prices))
+    r.observe("classify", FAST, 400, usage(1000, 100))
+    r.observe("grade", STRONG, 2000, usage(1000, 100))
+    tiers = r.report()["tiers"]
+    assert tiers[FAST]["cost_usd"] == pytest.approx(0.00021)
+    assert tiers[STRONG]["cost_usd"] == pytest.approx(0.013)
+    assert (tiers[FAST]["prompt_tokens"], tiers[FAST]["completion_tokens"]) == (1000, 100)
+
+
+def test_classify_is_sent_to_the_fast_model(monkeypatch):
+    models = []
+
+    def create(**request):
+        models.append(request["model"])
+        args = json.dumps({"category": "VALID_ANSWER", "normalized_value": "YES"})
+        return SimpleNamespace(choices=[SimpleNamespace(message=SimpleNamespace(function_call=SimpleNamespace(arguments=args)))])
+
+    monkeypatch.setattr(openai_service.client.chat.completions, "create", create)
+    monkeypatch.setattr(openai_service, "classify_cache", None)
+    monkeypatch.setattr(settings, "classify_streaming", False)
+    monkeypatch.setattr(openai_service, "router", router())
+
+    openai_service.classify_flow_input("passt schon", "yes_no")
+    openai_service.grade_application("CV", "UX Designer")
+    assert models == ["gpt-4o-mini", "gpt-4-turbo-preview"]
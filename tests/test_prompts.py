@@ -0,0 +1,33 @@
+"""Test the prompt registry."""
+from app.services.openai_service import openai_service
+from app.services.prompts import PromptRegistry, prompt_registry
+
+
+class TestPromptRegistry:
+    """Static prefixes are built once and stay byte-identical across calls."""
+
+    def test_version_tracks_static_content(self):
+        registry = PromptRegistry()
+        a = registry.register("a", lambda: ("System A", None))
+        b = registry.register("b", lambda: ("System A", [{"name": "fn", "parameters": {}}]))
+        assert a.version != b.version
+        assert registry.register("a", lambda: ("System A", None)).version == a.version
+        assert registry.report()["a"]["tokens"] > 0
+
+    def test_request_appends_suffix_after_prefix(self):
+        request = prompt_registry["classify"].request("m", {"role": "user", "content": "ja"}, temperature=0.3)
+        assert request["messages"][0]["content"] == prompt_registry["classify"].system
+        assert request["messages"][-1] == {"role": "user", "content": "ja"}
+        assert request["function_call"] == {"name": "classify_input"}
+        assert request["temperature"] == 0.3
+
+    def test_dynamic_content_only_in_suffix(self):
+        first = openai_service._classify_flow_request("ja", "yes_no")
+        second = openai_service._classify_flow_request("Wie hoch ist das Gehalt?", "job_selection")
+        assert first["messages"][0] == second["messages"][0]
+        assert first["functions"] is second["functions"]
+        assert "job_selection" in second["messages"][1]["content"]
+
+        grade = openai_service._grade_request("Python, Parloa", "Senior Backend Dev")
+        assert "Senior Backend Dev" not in grade["messages"][0]["content"]
+        assert "Senior Backend Dev" in grade["messages"][-1]["content"]
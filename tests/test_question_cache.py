@@ -0,0 +1,83 @@
+"""Test the near-duplicate question cache."""
+import pytest
+
+from app.config import settings
+from app.core import flow_engine as flow_engine_module
+from app.core.flow_engine import FlowEngine
+from app.core.question_cache import QuestionCache
+from app.utils.near_duplicate import MinHashIndex
+
+
+class TestMinHashIndex:
+    """Lookup, threshold and eviction of the LSH index."""
+
+    def test_bounded_size(self):
+        index = MinHashIndex(max_entries=2)
+        for i, text in enumerate(["Büro in Berlin?", "Büro in Hamburg?", "Büro in München?"]):
+            index.add(text, i)
+        assert len(index) == 2
+        assert index.lookup("Büro in Berlin?") is None
+        assert index.lookup("Büro in München?")[0] == 2
+
+
+@pytest.mark.parametrize("answered,paraphrase", [
+    ("Wie hoch ist das Gehalt?", "was verdient man bei euch"),
+    ("Kann man remote arbeiten?", "ist remote möglich?"),
+    ("Wie läuft die Bewerbung ab?", "wie ist der ablauf der bewerbung?"),
+])
+def test_paraphrase_hits(answered, paraphrase):
+    cache = QuestionCache()
+    cache.remember(answered, {"category": "QUESTION", "ai_reply": "Antwort"}, "v1")
+    assert cache.lookup(paraphrase, "v1")["ai_reply"] == "Antwort"
+    assert cache.lookup(paraphrase, "v2") is None  # muuh_info.json changed
+
+
+@pytest.mark.parametrize("answered,other", [
+    ("Wie hoch ist das Gehalt?", "Wie viele Urlaubstage gibt es?"),
+    ("Arbeitet ihr mit Python?", "Arbeitet ihr mit Java?"),
+    ("Wo ist das Büro?", "Wann ist das Büro offen?"),
+])
+def test_different_questions_miss(answered, other):
+    cache = QuestionCache()
+    cache.remember(answered, {"category": "QUESTION", "ai_reply": "Antwort"}, "v1")
+    assert cache.lookup(other, "v1") is None
+
+
+@pytest.mark.parametrize("answered,other", [
+    ("Kann man remote arbeiten?", "Kann ich nicht remote arbeiten?"),
+    ("Kann man remote arbeiten?", "Muss ich remote arbeiten?"),
+    ("Gibt es Gehalt für Trainees?", "Gibt es Gehalt für Trainees nicht?"),
+    ("Gibt es Gehalt für Trainees?", "Gibt es nur Gehalt für Trainees?"),
+])
+def test_negations_and_modals_must_match(answered, other):
+    cache = QuestionCache()
+    cache.remember(answered, {"category": "QUESTION", "ai_reply": "Ja!"}, "v1")
+    assert cache.lookup(answered, "v1")["ai_reply"] == "Ja!"
+    assert cache.lookup(other, "v1") is None
+
+
+def test_answers_are_scoped_to_the_expected_type():
+    cache = QuestionCache()
+    cache.remember("Wie hoch ist das Gehalt?", {"category": "QUESTION", "ai_reply": "Antwort"}, "v1", "yes_no")
+    assert cache.lookup("was verdient man bei euch", "v1", "yes_no")["ai_reply"] == "Antwort"
+    assert cache.lookup("was verdient man bei euch", "v1", "job_selection") is None
+
+
+def test_flow_engine_answers_paraphrase_without_llm(db_session, monkeypatch):
+    monkeypatch.setattr(settings, "faq_engine_enabled", False)
+    monkeypatch.setattr(settings, "question_cache_enabled", True)
+    calls = []
+
+    def classify(message, expected_type):
+        calls.append(message)
+        return {"category": "QUESTION", "ai_reply": "Junior 40-50k€, Senior 60-80k€."}
+
+    monkeypatch.setattr(flow_engine_module.openai_service, "classify_flow_input", classify)
+    engine = FlowEngine()
+
+    first = engine._classify("Wie hoch ist das Gehalt?", "yes_no", FlowEngine.STATE_REQ_1)
+    second = engine._classify("was verdient man bei euch", "yes_no", FlowEngine.STATE_REQ_1)
+
+    assert second["ai_reply"] == first["ai_reply"]
+    assert second["source"] == "near_duplicate"
+    assert len(calls) == 1
@@ -0,0 +1,91 @@
+"""Test the pre-generated reply pool."""
+import json
+import time
+
+import pytest
+
+from app.config import settings
+from app.core import flow_engine as flow_engine_module
+from app.core.flow_definition import load_flow
+from app.core.flow_engine import FlowEngine
+from app.db import crud
+from app.services import reply_pool as reply_pool_module
+from app.services.reply_pool import ReplyPool, pool_targets
+
+
+INSTRUCTION = "React positively to their AI experience. Then ask Question 2: Are they fit in Python and APIs? (Ask for Yes/No)"
+
+
+@pytest.fixture
+def pool(tmp_path):
+    path = tmp_path / "reply_pool.json"
+    path.write_text(json.dumps({"pools": {
+        "USER_HAS_AI_EXPERIENCE": {
+            "instruction": INSTRUCTION,
+            "replies": ["Stark, {user_name}! 🚀 Bist du fit in Python und APIs?"],
+            "generated_at": int(time.time()),
+        }
+    }}), encoding="utf-8")
+    return ReplyPool(path=str(path))
+
+
+class TestReplyPool:
+    """Pool lookup, slots and the FlowEngine integration."""
+
+    def test_targets_cover_static_and_job_transitions(self):
+        triggers = [trigger for trigger, _ in pool_targets(load_flow())]
+        assert "USER_HAS_AI_EXPERIENCE" in triggers
+        assert "USER_SELECTED_JOB_Senior Backend Dev" in triggers
+        assert len(triggers) == 6
+
+    def test_pick_fills_user_name(self, pool, monkeypatch):
+        monkeypatch.setattr(pool, "refresh_in_background", lambda *args: None)
+        assert pool.pick("USER_HAS_AI_EXPERIENCE", INSTRUCTION, "Max") == "Stark, Max! 🚀 Bist du fit in Python und APIs?"
+        assert pool.pick("USER_HAS_AI_EXPERIENCE", "changed instruction") is None
+
+    def test_miss_refreshes_in_background(self, pool, monkeypatch):
+        monkeypatch.setattr(
+            reply_pool_module.openai_service, "generate_reply_variants",
+            lambda trigger_event, next_step_instruction, count: ["Super! Und Innovation? 💡"]
+        )
+        assert pool.pick("USER_KNOWS_PYTHON_AND_API", "Ask about innovation") is None
+        deadline = time.monotonic() + 2
+        while (pool._refreshing or not pool.has("USER_KNOWS_PYTHON_AND_API", "Ask about innovation")) and time.monotonic() < deadline:
+            time.sleep(0.01)
+        assert pool.pick("USER_KNOWS_PYTHON_AND_API", "Ask about innovation") == "Super! Und Innovation? 💡"
+        assert "USER_KNOWS_PYTHON_AND_API" in json.loads(open(pool.path, encoding="utf-8").read())["pools"]
+
+    def test_failed_refresh_is_not_retried_on_every_miss(self, pool, monkeypatch):
+        calls = []
+        monkeypatch.setattr(
+            reply_pool_module.openai_service, "generate_reply_variants",
+            lambda *args: calls.append(args) or []
+        )
+        for _ in range(3):
+            assert pool.pick("USER_KNOWS_PYTHON_AND_API", "Ask about innovation") is None
+            deadline = time.monotonic() + 2
+            while pool._refreshing and time.monotonic() < deadline:
+                time.sleep(0.01)
+        assert len(calls) == 1
+
+    def test_flow_engine_uses_pool_only_for_short_answers(self, pool, db_session, monkeypatch):
+        monkeypatch.setattr(settings, "reply_pool_enabled", True)
+        monkeypatch.setattr(flow_engine_module, "reply_pool", pool)
+        monkeypatch.setattr(
+            flow_engine_module.openai_service, "classify_flow_input",
+            lambda message, expected_type: {"category": "VALID_ANSWER", "normalized_value": "YES"}
+        )
+        monkeypatch.setattr(
+            flow_engine_module.openai_service, "generate_flow_reply",
+            lambda message, trigger_event, next_step_instruction, user_name="Du": "[live]"
+        )
+        engine = FlowEngine()
+
+        for user, message, expected in [
+            ("whatsapp:+4915100000030", "ja", "Stark, Du! 🚀 Bist du fit in Python und APIs?"),
+            ("whatsapp:+4915100000031", "ja, hab 2 Jahre Chatbots mit GPT gebaut", "[live]"),
+        ]:
+            lead = crud.get_or_create_lead(db_session, user)
+            lead.conversation_stage = FlowEngine.STATE_REQ_1
+            db_session.commit()
+            assert engine.process_message(user, message, db_session) == expected
@@ -0,0 +1,191 @@
+"""Test deadlines, retries, hedging and the circuit breaker around OpenAI calls."""
+import asyncio
+import time
+
+import httpx
+import pytest
+
+from app.config import settings
+from app.core import flow_engine as flow_engine_module
+from app.core.flow_engine import FlowEngine
+from app.db import crud
+from app.services.resilience import CircuitBreaker, CircuitOpenError, DeadlineExceeded, DeadlineStream, ResilientCaller
+from app.utils.metrics import metrics
+
+
+def flaky(failures, result="ok", error=httpx.ConnectError):
+    """Fails the first `failures` attempts, then returns result."""
+    attempts = []
+
+    def fn(timeout):
+        attempts.append(timeout)
+        if len(attempts) <= failures:
+            raise error("boom")
+        return result
+    return fn, attempts
+
+
+class TestRetries:
+    """Retryable errors are retried within the deadline; others are raised at once."""
+
+    def test_retryable_error_is_retried(self):
+        caller = ResilientCaller(name="t_retry", max_retries=2, retry_base_ms=1)
+        fn, attempts = flaky(2)
+        assert caller.call("site", fn) == "ok"
+        assert len(attempts) == 3
+        assert attempts[0] <= caller.default_deadline  # Remaining budget is passed as the timeout
+        assert caller.report()["site"]["retries"] == 2
+
+    def test_non_retryable_error_is_raised(self):
+        caller = ResilientCaller(name="t_fatal", retry_base_ms=1)
+        fn, attempts = flaky(1, error=ValueError)
+        with pytest.raises(ValueError):
+            caller.call("site", fn)
+        assert len(attempts) == 1
+        assert caller.breaker.state == CircuitBreaker.CLOSED
+
+    def test_async_deadline(self):
+        caller = ResilientCaller(name="t_deadline", deadlines={"slow": 0.05})
+
+        async def slow(timeout):
+            await asyncio.sleep(1)
+
+        started = time.perf_counter()
+        with pytest.raises(DeadlineExceeded):
+            asyncio.run(caller.call_async("slow", slow))
+        assert time.perf_counter() - started < 0.5
+        assert caller.report()["slow"]["timeouts"] == 1
+
+
+class TestCircuitBreaker:
+    """Consecutive failures open the breaker; a probe closes it again."""
+
+    def test_open_and_probe(self):
+        now = [0.0]
+        breaker = CircuitBreaker("t_breaker", failure_threshold=2, reset_seconds=10, clock=lambda: now[0])
+        caller = ResilientCaller(name="t_breaker", max_retries=0, breaker=breaker)
+        for _ in range(2):
+            with pytest.raises(httpx.ConnectError):
+                caller.call("site", flaky(1)[0])
+        assert caller.degraded
+
+        fn, attempts = flaky(0)
+        with pytest.raises(CircuitOpenError):
+            caller.call("site", fn)
+        assert attempts == []  # Failed fast, nothing sent
+
+        now[0] = 11
+        assert breaker.state == CircuitBreaker.HALF_OPEN
+        assert not caller.degraded
+        assert caller.call("site", fn) == "ok"
+        assert breaker.state == CircuitBreaker.CLOSED
+
+
+class TestHedging:
+    """A duplicate is sent once the primary is slower than the site's p95."""
+
+    def test_hedge_wins_over_slow_primary(self):
+        caller = ResilientCaller(name="t_hedge", hedge_sites=["classify"], hedge_min_samples=5)
+        for _ in range(5):
+            metrics.observe("t_hedge.classify.ms", 20)
+        calls = []
+
+        async def request(timeout):
+            calls.append(timeout)
+            await asyncio.sleep(1 if len(calls) == 1 else 0.01)
+            return len(calls)
+
+        started = time.perf_counter()
+        assert asyncio.run(caller.call_async("classify", request)) == 2
+        assert time.perf_counter() - started < 0.5
+        report = caller.report()["classify"]
+        assert (report["hedges"], report["hedge_wins"]) == (1, 1)
+
+    def test_sync_hedge(self):
+        caller = ResilientCaller(name="t_hedge_sync", hedge_sites=["classify"], hedge_min_samples=5)
+        for _ in range(5):
+            metrics.observe("t_hedge_sync.classify.ms", 20)
+        calls = []
+
+        def request(timeout):
+            calls.append(timeout)
+            time.sleep(0.5 if len(calls) == 1 else 0.01)
+            return len(calls)
+
+        assert caller.call("classify", request) == 2
+
+
+    def test_hedged_calls_are_capped(self):
+        caller = ResilientCaller(name="t_hedge_cap", hedge_sites=["classify"], hedge_min_samples=5, max_hedged_calls=1)
+        for _ in range(5):
+            metrics.observe("t_hedge_cap.classify.ms", 20)
+        assert caller._hedge_slots.acquire(blocking=False)  # Another hedged call is still running
+        calls = []
+
+        def request(timeout):
+            calls.append(timeout)
+            time.sleep(0.1)
+            return len(calls)
+
+        assert caller.call("classify", request) == 1  # Not hedged
+        assert caller.report()["classify"]["hedge_skipped"] == 1
+        caller._hedge_slots.release()
+
+    def test_hedge_delay_is_cached(self):
+        caller = ResilientCaller(name="t_hedge_cache", hedge_sites=["classify"], hedge_min_samples=5)
+        for _ in range(5):
+            metrics.observe("t_hedge_cache.classify.ms", 20)
+        assert caller.hedge_delay("classify") == pytest.approx(0.02)
+        metrics.observe("t_hedge_cache.classify.ms", 5000)
+        assert caller.hedge_delay("classify") == pytest.approx(0.02)  # Until hedge_refresh_seconds passed
+
+
+class SlowStream:
+    def __init__(self, chunks, pause):
+        self.chunks, self.pause, self.closed = chunks, pause, False
+
+    def __iter__(self):
+        for chunk in self.chunks:
+            time.sleep(self.pause)
+            yield chunk
+
+    def close(self):
+        self.closed = True
+
+
+def test_stream_is_cut_off_at_the_deadline():
+    stream = SlowStream(range(100), 0.01)
+    with pytest.raises(DeadlineExceeded):
+        list(DeadlineStream(stream, time.monotonic() + 0.1, "classify"))
+    assert stream.closed
+    assert list(DeadlineStream(SlowStream(range(3), 0), time.monotonic() + 1, "classify")) == [0, 1, 2]
+
+
+def test_flow_engine_falls_back_while_degraded(db_session, monkeypatch):
+    monkeypatch.setattr(settings, "faq_engine_enabled", False)
+    monkeypatch.setattr(settings, "reply_pool_enabled", False)
+    now = [0.0]
+    breaker = CircuitBreaker("t_flow", failure_threshold=1, reset_seconds=30, clock=lambda: now[0])
+    breaker.record_failure()
+    monkeypatch.setattr(flow_engine_module.openai_service, "resilience", ResilientCaller(name="t_flow", breaker=breaker))
+
+    def unreachable(*args, **kwargs):
+        raise AssertionError("OpenAI must not be called while the circuit is open")
+
+    monkeypatch.setattr(flow_engine_module.openai_service, "classify_flow_input", unreachable)
+    monkeypatch.setattr(flow_engine_module.openai_service, "generate_flow_reply", unreachable)
+    engine = FlowEngine()
+    user = "whatsapp:+4915100000030"
+    lead = crud.get_or_create_lead(db_session, user)
+    lead.conversation_stage = FlowEngine.STATE_REQ_1
+    db_session.commit()
+
+    # Not decidable locally: re-ask with the state's template reply
+    reply = engine.process_message(user, "Ich habe zwei Jahre Chatbots gebaut", db_session)
+    assert reply.startswith("Bitte antworte mit **Ja**")
+    assert lead.conversation_stage == FlowEngine.STATE_REQ_1
+
+    # Decided locally, generated transition: the instruction text is sent as is
+    reply = engine.process_message(user, "ja", db_session)
+    assert reply.startswith("React positively to their AI experience.")
+    assert lead.conversation_stage == FlowEngine.STATE_REQ_2
@@ -0,0 +1,50 @@
+"""Test per-sender ordered execution lanes."""
+import asyncio
+
+from app.core.sender_lanes import SenderLanes
+
+
+async def _turn(lanes, sender, label, log, delay):
+    async with lanes.lane(sender):
+        log.append(f"start:{label}")
+        await asyncio.sleep(delay)
+        log.append(f"end:{label}")
+
+
+class TestSenderLanes:
+    """Ordering and parallelism guarantees."""
+
+    def test_same_sender_runs_in_order(self):
+        lanes = SenderLanes()
+        log = []
+
+        async def scenario():
+            await asyncio.gather(
+                _turn(lanes, "A", "1", log, 0.03),
+                _turn(lanes, "A", "2", log, 0.0),
+                _turn(lanes, "A", "3", log, 0.01),
+            )
+
+        asyncio.run(scenario())
+        assert log == ["start:1", "end:1", "start:2", "end:2", "start:3", "end:3"]
+        assert lanes.snapshot()["A"]["turns"] == 3
+        assert lanes.snapshot()["A"]["max_wait_ms"] > 0
+
+    def test_different_senders_run_in_parallel(self):
+        lanes = SenderLanes()
+        log = []
+
+        async def scenario():
+            await asyncio.gather(
+                _turn(lanes, "A", "a", log, 0.03),
+                _turn(lanes, "B", "b", log, 0.0),
+            )
+
+        asyncio.run(scenario())
+        assert log.index("end:b") < log.index("end:a")
+
+    def test_idle_lanes_are_evicted(self):
+        lanes = SenderLanes(idle_seconds=0)
+        asyncio.run(_turn(lanes, "A", "1", [], 0.0))
+        asyncio.run(_turn(lanes, "B", "1", [], 0.0))
+        assert "A" not in lanes.snapshot()
@@ -0,0 +1,86 @@
+"""Test speculative reply generation during classification."""
+import time
+
+import pytest
+
+from app.config import settings
+from app.core import flow_engine as flow_engine_module
+from app.core.flow_engine import FlowEngine
+from app.db import crud
+from app.utils.metrics import metrics
+
+
+MESSAGE = "Ich habe zwei Jahre Chatbots gebaut"  # not decidable by the local classifier
+
+
+@pytest.fixture
+def engine(monkeypatch):
+    monkeypatch.setattr(settings, "speculative_replies", True)
+
+    def generate(message, trigger_event, next_step_instruction, user_name="Du"):
+        time.sleep(0.05)
+        return f"[speculative {trigger_event}]", 42
+
+    monkeypatch.setattr(flow_engine_module.openai_service, "generate_flow_reply_with_usage", generate)
+    monkeypatch.setattr(
+        flow_engine_module.openai_service, "generate_flow_reply",
+        lambda message, trigger_event, next_step_instruction, user_name="Du": f"[live {trigger_event}]"
+    )
+    return FlowEngine()
+
+
+def classify_as(monkeypatch, analysis):
+    def classify(message, expected_type):
+        time.sleep(0.05)
+        return analysis
+    monkeypatch.setattr(flow_engine_module.openai_service, "classify_flow_input", classify)
+
+
+def lead_in(db_session, user, state):
+    lead = crud.get_or_create_lead(db_session, user)
+    lead.conversation_stage = state
+    db_session.commit()
+    return lead
+
+
+class TestSpeculation:
+    """Speculative replies are used on a confirmed branch and discarded otherwise."""
+
+    def test_confirmed_branch_uses_speculation(self, engine, db_session, monkeypatch):
+        classify_as(monkeypatch, {"category": "VALID_ANSWER", "normalized_value": "YES"})
+        user = "whatsapp:+4915100000020"
+        lead = lead_in(db_session, user, FlowEngine.STATE_REQ_1)
+        hits = metrics.counter("speculation.hit.state_3")
+
+        reply = engine.process_message(user, MESSAGE, db_session)
+
+        assert reply == "[speculative USER_HAS_AI_EXPERIENCE]"
+        assert lead.conversation_stage == FlowEngine.STATE_REQ_2
+        assert metrics.counter("speculation.hit.state_3") == hits + 1
+        assert metrics.counter("speculation.saved_ms.state_3") > 0
+
+    def test_other_branch_discards_speculation(self, engine, db_session, monkeypatch):
+        classify_as(monkeypatch, {"category": "VALID_ANSWER", "normalized_value": "NO"})
+        user = "whatsapp:+4915100000021"
+        lead_in(db_session, user, FlowEngine.STATE_REQ_2)
+        wasted = metrics.counter("speculation.wasted_tokens.state_4")
+
+        reply = engine.process_message(user, MESSAGE, db_session)
+
+        assert reply.startswith("Danke für deine Ehrlichkeit!")
+        assert metrics.counter("speculation.miss.state_4") >= 1
+        deadline = time.monotonic() + 2
+        while metrics.counter("speculation.wasted_tokens.state_4") == wasted and time.monotonic() < deadline:
+            time.sleep(0.01)
+        assert metrics.counter("speculation.wasted_tokens.state_4") == wasted + 42
+
+    def test_no_speculation_without_known_job(self, engine, db_session, monkeypatch):
+        classify_as(monkeypatch, {"category": "VALID_ANSWER", "normalized_value": "JOB_3"})
+        user = "whatsapp:+4915100000022"
+        lead_in(db_session, user, FlowEngine.STATE_JOB_SELECTED)
+        started = metrics.counter("speculation.started.state_2")
+
+        reply = engine.process_message(user, "das mit den menschen", db_session)
+
+        assert reply == "[live USER_SELECTED_JOB_Trainee Recruiting]"
+        assert metrics.counter("speculation.started.state_2") == started
@@ -0,0 +1,78 @@
+"""Test the turn-scoped unit of work (SQL statements per turn)."""
+from sqlalchemy import event
+
+from app.core import turn_processor as turn_processor_module
+from app.core.flow_engine import FlowEngine
+from app.core.turn_processor import InboundMessage, run_turn
+from app.db import crud
+from app.models.lead import Lead
+
+
+class _StatementCounter:
+    """Counts SQL statements sent to the database."""
+
+    def __init__(self, engine):
+        self.engine = engine
+        self.statements = []
+
+    def __enter__(self):
+        event.listen(self.engine, "before_cursor_execute", self._record)
+        return self
+
+    def __exit__(self, *exc):
+        event.remove(self.engine, "before_cursor_execute", self._record)
+
+    def _record(self, conn, cursor, statement, parameters, context, executemany):
+        self.statements.append(statement)
+
+
+def _existing_lead(db, number, stage):
+    lead = crud.create_lead(db, number)
+    lead.conversation_stage = stage
+    lead.conversation_history = [{"role": "bot", "message": "Ab wann bist du verfügbar?"}]
+    db.commit()
+    db.expire_all()
+    return lead
+
+
+class TestUnitOfWork:
+    """One load and one flush per webhook turn."""
+
+    def test_turn_issues_one_select_and_one_update(self, db_session, monkeypatch):
+        monkeypatch.setattr(turn_processor_module.twilio_service, "send_message", lambda to, body: True)
+        _existing_lead(db_session, "whatsapp:+4915100000004", FlowEngine.STATE_ADDITIONAL_AVAILABILITY)
+
+        with _StatementCounter(db_session.get_bind()) as counter:
+            reply = run_turn(db_session, "whatsapp:+4915100000004", [InboundMessage("SM-uow-1", "ab sofort")])
+
+        assert "Gehaltsvorstellung" in reply
+        assert len(counter.statements) == 2, counter.statements
+        assert counter.statements[0].startswith("SELECT")
+        assert counter.statements[1].startswith("UPDATE")
+
+        lead = db_session.query(Lead).filter(Lead.whatsapp_number == "whatsapp:+4915100000004").first()
+        assert lead.availability == "ab sofort"
+        assert lead.conversation_stage == FlowEngine.STATE_ADDITIONAL_SALARY
+        assert [m["role"] for m in lead.conversation_history] == ["bot", "user", "bot"]
+
+    def test_without_unit_of_work_each_helper_commits(self, db_session):
+        lead = _existing_lead(db_session, "whatsapp:+4915100000005", FlowEngine.STATE_ADDITIONAL_AVAILABILITY)
+
+        with _StatementCounter(db_session.get_bind()) as counter:
+            crud.add_conversation_message(db_session, lead, "user", "ab sofort")
+            FlowEngine().process_message("whatsapp:+4915100000005", "ab sofort", db_session, lead=lead)
+
+        assert len(counter.statements) > 2
+
+    def test_error_rolls_back_the_whole_turn(self, db_session, monkeypatch):
+        def explode(*args, **kwargs):
+            raise RuntimeError("boom")
+
+        monkeypatch.setattr(turn_processor_module.flow_engine, "process_message", explode)
+        monkeypatch.setattr(turn_processor_module.twilio_service, "send_message", lambda to, body: True)
+        _existing_lead(db_session, "whatsapp:+4915100000006", FlowEngine.STATE_ADDITIONAL_AVAILABILITY)
+
+        assert run_turn(db_session, "whatsapp:+4915100000006", [InboundMessage("SM-uow-2", "ab sofort")]) is None
+
+        lead = db_session.query(Lead).filter(Lead.whatsapp_number == "whatsapp:+4915100000006").first()
+        assert len(lead.conversation_history) == 1
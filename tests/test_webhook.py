@@ -2,6 +2,13 @@
 import pytest
 from fastapi.testclient import TestClient
 from app.main import app
+from app.api import webhook as webhook_module
+from app.config import settings
+from app.core import turn_processor as turn_processor_module
+from app.core.idempotency import message_dedupe
+from app.core.turn_processor import InboundMessage
+from app.models.lead import Lead
+from app.utils.metrics import metrics
 
 
 client = TestClient(app)
@@ -33,6 +40,79 @@ class TestWebhook:
         response = client.post("/webhook", data={})
         assert response.status_code == 422  # Validation error
 
+    def test_fast_ack_defers_turn(self, override_db, monkeypatch):
+        """Fast-ack mode stores the message and hands the turn off."""
+        submitted = []
+        monkeypatch.setattr(settings, "webhook_fast_ack", True)
+        monkeypatch.setattr(
+            turn_processor_module.turn_processor, "submit",
+            lambda *args: submitted.append(args)
+        )
+
+        response = client.post("/webhook", data={
+            "From": "whatsapp:+4915100000001",
+            "Body": "Hallo",
+            "MessageSid": "SM-fast-ack-1"
+        })
+
+        assert response.status_code == 200
+        assert submitted == [("whatsapp:+4915100000001", InboundMessage("SM-fast-ack-1", "Hallo", 0, None))]
+        lead = override_db.query(Lead).filter(Lead.whatsapp_number == "whatsapp:+4915100000001").first()
+        assert lead.conversation_history[-1]["message"] == "Hallo"
+        assert lead.conversation_stage == 0
+        assert metrics.histogram("webhook.ack_ms").count >= 1
+
+    def test_fast_ack_failure_lets_twilio_retry(self, override_db, monkeypatch):
+        """A message that could not be stored is not marked as processed."""
+        monkeypatch.setattr(settings, "webhook_fast_ack", True)
+
+        def fail(*args, **kwargs):
+            raise RuntimeError("database unavailable")
+
+        monkeypatch.setattr(webhook_module.crud, "add_conversation_message", fail)
+        payload = {"From": "whatsapp:+4915100000003", "Body": "Hallo", "MessageSid": "SM-fast-ack-fail"}
+
+        assert client.post("/webhook", data=payload).status_code == 503
+        assert message_dedupe.begin("SM-fast-ack-fail") is None  # The redelivery owns the turn
+
+    def test_stored_message_is_acknowledged_when_queueing_fails(self, override_db, monkeypatch):
+        """A redelivery of a stored message would log it twice: acknowledge it and count the lost turn."""
+        monkeypatch.setattr(settings, "webhook_fast_ack", True)
+
+        def fail(*args):
+            raise RuntimeError("queue full")
+
+        monkeypatch.setattr(turn_processor_module.turn_processor, "submit", fail)
+        lost_before = metrics.counter("webhook.turns_lost")
+        payload = {"From": "whatsapp:+4915100000004", "Body": "Hallo", "MessageSid": "SM-fast-ack-lost"}
+
+        assert client.post("/webhook", data=payload).status_code == 200
+        assert metrics.counter("webhook.turns_lost") == lost_before + 1
+        assert message_dedupe.begin("SM-fast-ack-lost").done  # A redelivery is not processed again
+        lead = override_db.query(Lead).filter(Lead.whatsapp_number == "whatsapp:+4915100000004").first()
+        assert [entry["message"] for entry in lead.conversation_history] == ["Hallo"]
+
+    def test_duplicate_message_sid_runs_turn_once(self, override_db, monkeypatch):
+        """A Twilio redelivery must not re-run the FlowEngine."""
+        turns, sent = [], []
+        monkeypatch.setattr(
+            turn_processor_module.flow_engine, "process_message",
+            lambda user_id, message, db, lead=None: turns.append(message) or "Antwort"
+        )
+        monkeypatch.setattr(
+            turn_processor_module.twilio_service, "send_message",
+            lambda to, body: sent.append(body) or True
+        )
+        hits_before = metrics.counter("dedupe.hits")
+        payload = {"From": "whatsapp:+4915100000002", "Body": "Hallo", "MessageSid": "SM-dup-1"}
+
+        assert client.post("/webhook", data=payload).status_code == 200
+        assert client.post("/webhook", data=payload).status_code == 200
+
+        assert turns == ["Hallo"]
+        assert sent == ["Antwort"]
+        assert metrics.counter("dedupe.hits") == hits_before + 1
+
 
 # Note: Full webhook integration tests require Twilio credentials
 # To run: pytest tests/test_webhook.py -v